@@ -0,0 +1,234 @@
+import argparse
+import collections
+import csv
+import datetime
+import math
+
+from columnar_store import canonical_column_name, TIMESTAMP_FORMAT
+
+# --- Akış Halinde Hava Kalitesi İndeksi (AQI) ---
+# Her kirletici için standardın öngördüğü ortalama süresi (1, 8 veya 24 saat) boyunca
+# kayan ortalama tutulur. Pencereler İKA başına ve ızgara hücresi başına ayrı tutulur;
+# her biri (dakika, değer) kuyruğu ve bir toplamdan oluşur, yeni örnek eklenip süresi
+# dolanlar çıkarılır (örnek başına sabit amortize maliyet). Böylece alt indeksler ve genel
+# AQI veri üretilirken ya da dosya tek geçişte okunurken hesaplanır. Pencere dolmadan
+# önce mevcut örneklerin ortalaması kullanılır.
+
+# Kirletici -> (veri sütunu, ortalama süresi (dakika)); EPA ve Türkiye indeksinde süreler aynıdır
+POLLUTANTS = {
+    "PM2.5": ("PM2.5_ug_m3", 24 * 60),
+    "PM10": ("PM10_ug_m3", 24 * 60),
+    "O3": ("O3_ppb", 8 * 60),
+    "CO": ("CO_ppm", 8 * 60),
+    "NO2": ("NO2_ppb", 60),
+    "SO2": ("SO2_ppb", 60),
+}
+
+# ppb/ppm -> µg/m³ (25 °C, 1 atm: mol kütlesi / 24.45)
+UG_M3_PER_PPB = {"O3": 48.00 / 24.45, "NO2": 46.01 / 24.45, "SO2": 64.07 / 24.45}
+UG_M3_PER_PPM_CO = 28.01 / 24.45 * 1000
+
+AQI_CELL_DEG = 0.01  # Hücre bazlı AQI ızgara boyu (derece, ~1 km)
+INDEX_BANDS = [(0, 50), (51, 100), (101, 150), (151, 200), (201, 300), (301, 500)]
+
+# ABD EPA (2024 PM2.5 güncellemesiyle); derişimler veri birimlerinde (µg/m³, ppb, ppm),
+# ikinci değer standardın kesme hassasiyetidir
+EPA_BREAKPOINTS = {
+    "PM2.5": ([0.0, 9.1, 35.5, 55.5, 125.5, 225.5, 325.5], 0.1),
+    "PM10": ([0, 55, 155, 255, 355, 425, 605], 1),
+    "O3": ([0, 55, 71, 86, 106, 201], 1),  # 8 saatlik O3 tanımı 200 ppb'de biter
+    "CO": ([0.0, 4.5, 9.5, 12.5, 15.5, 30.5, 50.5], 0.1),
+    "NO2": ([0, 54, 101, 361, 650, 1250, 2050], 1),
+    "SO2": ([0, 36, 76, 186, 305, 605, 1005], 1),
+}
+
+# Türkiye Ulusal Hava Kalitesi İndeksi (µg/m³); PM2.5 ulusal indekste yer almaz
+TR_BREAKPOINTS = {
+    "PM10": ([0, 51, 101, 261, 401, 521, 621], 1),
+    "O3": ([0, 121, 161, 181, 241, 701, 1701], 1),
+    "CO": ([0, 5501, 10001, 16001, 24001, 32001, 40001], 1),
+    "NO2": ([0, 101, 201, 501, 1001, 2001, 3001], 1),
+    "SO2": ([0, 101, 251, 501, 851, 1101, 1501], 1),
+}
+
+
+def _tr_units(pollutant, value):
+    if pollutant == "CO":
+        return value * UG_M3_PER_PPM_CO
+    return value * UG_M3_PER_PPB.get(pollutant, 1.0)
+
+
+STANDARDS = {
+    "EPA": (EPA_BREAKPOINTS, lambda pollutant, value: value),
+    "TR": (TR_BREAKPOINTS, _tr_units),
+}
+
+
+def sub_index(breakpoints, concentration):
+    """Derişimi kırılma noktaları arasında doğrusal enterpolasyonla alt indekse çevirir"""
+    edges, precision = breakpoints
+    if not math.isfinite(concentration):
+        return None
+    c = math.floor(max(concentration, 0.0) / precision + 1e-9) * precision  # Standardın kesme kuralı
+    for band, (i_lo, i_hi) in enumerate(INDEX_BANDS[:len(edges) - 1]):
+        c_lo, c_next = edges[band], edges[band + 1]
+        if c < c_next:
+            c_hi = c_next - precision
+            return round(i_lo + (i_hi - i_lo) * (c - c_lo) / (c_hi - c_lo)) if c_hi > c_lo else i_lo
+    return INDEX_BANDS[len(edges) - 2][1]  # En üst bandın üstü tavan değerde kalır
+
+
+class RollingMean:
+    """Dakika damgalı örnekler üzerinde sabit süreli kayan ortalama"""
+
+    __slots__ = ("window", "samples", "total")
+
+    def __init__(self, window_minutes):
+        self.window = window_minutes
+        self.samples = collections.deque()
+        self.total = 0.0
+
+    def add(self, minute_index, value):
+        """Örneği ekler, süresi dolanları çıkarır ve güncel ortalamayı döndürür"""
+        if math.isfinite(value):
+            self.samples.append((minute_index, value))
+            self.total += value
+        while self.samples and self.samples[0][0] <= minute_index - self.window:
+            self.total -= self.samples.popleft()[1]
+        if not self.samples:
+            self.total = 0.0  # Kayan hata birikmesin
+            return float("nan")
+        return self.total / len(self.samples)
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class AqiStream:
+    """Satırları sırayla alıp İKA ve hücre bazında AQI sütunları üreten akış hesaplayıcı"""
+
+    def __init__(self, header, standards=("EPA", "TR"), cell_deg=AQI_CELL_DEG, sidecar_path=None):
+        names = [canonical_column_name(h) for h in header]
+        self.time_col = names.index("Timestamp")
+        self.unit_col = names.index("Ika_ID")
+        self.lat_col = names.index("Latitude")
+        self.lon_col = names.index("Longitude")
+        self.pollutants = [(p, names.index(col), window) for p, (col, window) in POLLUTANTS.items() if col in names]
+        self.standards = [s.upper() for s in standards]
+        self.cell_deg = cell_deg
+        self.unit_windows = {}
+        self.cell_windows = {}
+        self.columns = []
+        for standard in self.standards:
+            table = STANDARDS[standard][0]
+            self.columns += [f"AQI_{standard}_{p}" for p, _, _ in self.pollutants if p in table]
+            self.columns += [f"AQI_{standard}", f"AQI_{standard}_Dominant", f"AQI_{standard}_Cell"]
+        self.rows = 0
+        self.sidecar_path = sidecar_path
+        self.sidecar = None
+        if sidecar_path:
+            self.sidecar = open(sidecar_path, "w", newline="", encoding="utf-8")
+            self.sidecar_writer = csv.writer(self.sidecar)
+            self.sidecar_writer.writerow(["Timestamp", "Ika_ID"] + self.columns)
+
+    def __getstate__(self):
+        # Kontrol noktası için: dosya boşaltılır, açık dosya durumun dışında bırakılır
+        state = self.__dict__.copy()
+        if self.sidecar:
+            self.sidecar.flush()
+        state.pop("sidecar_writer", None)
+        state["sidecar"] = None
+        return state
+
+    def reopen(self):
+        """Kontrol noktasından dönüldüğünde yan dosyayı ekleme kipinde yeniden açar"""
+        if self.sidecar_path:
+            self.sidecar = open(self.sidecar_path, "a", newline="", encoding="utf-8")
+            self.sidecar_writer = csv.writer(self.sidecar)
+
+    def _windows(self, store, key):
+        windows = store.get(key)
+        if windows is None:
+            windows = store[key] = [RollingMean(window) for _, _, window in self.pollutants]
+        return windows
+
+    def _indices(self, standard, means):
+        table, convert = STANDARDS[standard]
+        subs = {}
+        for (pollutant, _, _), mean in zip(self.pollutants, means):
+            if pollutant in table:
+                subs[pollutant] = sub_index(table[pollutant], convert(pollutant, mean))
+        valid = {p: v for p, v in subs.items() if v is not None}
+        dominant = max(valid, key=valid.get) if valid else ""
+        return subs, (valid[dominant] if valid else None), dominant
+
+    def update(self, minute_index, row):
+        """Bir satırı işler; self.columns sırasıyla AQI değerlerini döndürür (yan dosya varsa oraya da yazar)"""
+        values = [_parse_float(row[i]) for _, i, _ in self.pollutants]
+        lat, lon = _parse_float(row[self.lat_col]), _parse_float(row[self.lon_col])
+        unit_means = [w.add(minute_index, v) for w, v in zip(self._windows(self.unit_windows, row[self.unit_col]), values)]
+        cell_means = None
+        if math.isfinite(lat) and math.isfinite(lon):
+            cell = (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+            cell_means = [w.add(minute_index, v) for w, v in zip(self._windows(self.cell_windows, cell), values)]
+        result = []
+        for standard in self.standards:
+            subs, overall, dominant = self._indices(standard, unit_means)
+            cell_overall = self._indices(standard, cell_means)[1] if cell_means else None
+            result += ["" if v is None else v for v in subs.values()]
+            result += ["" if overall is None else overall, dominant, "" if cell_overall is None else cell_overall]
+        if self.sidecar:
+            self.sidecar_writer.writerow([row[self.time_col], row[self.unit_col]] + result)
+        self.rows += 1
+        return result
+
+    def close(self):
+        """Yan dosyayı kapatır; işlenen satır sayısını döndürür"""
+        if self.sidecar:
+            self.sidecar.close()
+            self.sidecar = None
+        return self.rows
+
+
+def annotate_csv(csv_path, out_path, mode="sidecar", standards=("EPA", "TR"), cell_deg=AQI_CELL_DEG):
+    """Veri setini tek geçişte okuyup AQI sütunlarını ekler ("columns") ya da yan dosyaya yazar ("sidecar")"""
+    with open(csv_path, newline="", encoding="utf-8") as src:
+        reader = csv.reader(src)
+        header = next(reader)
+        stream = AqiStream(header, standards, cell_deg, sidecar_path=out_path if mode == "sidecar" else None)
+        dst = open(out_path, "w", newline="", encoding="utf-8") if mode == "columns" else None
+        try:
+            writer = csv.writer(dst) if dst else None
+            if writer:
+                writer.writerow(header + stream.columns)
+            start_time = None
+            for row in reader:
+                if not row:
+                    continue
+                timestamp = datetime.datetime.strptime(row[stream.time_col], TIMESTAMP_FORMAT)
+                start_time = start_time or timestamp
+                extra = stream.update(int((timestamp - start_time).total_seconds() // 60), row)
+                if writer:
+                    writer.writerow(row + extra)
+        finally:
+            if dst:
+                dst.close()
+    return stream.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Veri setine tek geçişte kayan ortalamalı AQI (EPA / Türkiye) ekler.")
+    parser.add_argument("csv_path")
+    parser.add_argument("out_path")
+    parser.add_argument("--mode", choices=["sidecar", "columns"], default="sidecar",
+                        help="sidecar: yalnızca Timestamp, Ika_ID ve AQI sütunları; columns: tüm satır + AQI sütunları")
+    parser.add_argument("--standard", action="append", choices=sorted(STANDARDS), help="İndeks standardı (varsayılan: ikisi de)")
+    parser.add_argument("--cell-deg", type=float, default=AQI_CELL_DEG, help="Hücre bazlı AQI için ızgara boyu (derece)")
+    args = parser.parse_args()
+
+    rows = annotate_csv(args.csv_path, args.out_path, args.mode, tuple(args.standard or STANDARDS), args.cell_deg)
+    print(f"{rows} satır için AQI hesaplandı -> '{args.out_path}'")
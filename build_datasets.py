@@ -0,0 +1,185 @@
+import argparse
+import ast
+import concurrent.futures
+import contextlib
+import datetime
+import json
+import os
+import sys
+import time
+
+from output_cache import publish
+from validate_dataset import validate_csv
+
+# --- Çok Şehirli Veri Seti Derleyici ---
+# Şehir üreticileri ayrı süreçlerde (ayrı çekirdeklerde) eşzamanlı çalıştırılır; her süreç
+# konsol çıktısını kendi günlük dosyasına yazar ve ürettiği veri setini tek geçişte özetler.
+# Tüm dosyalar gösterge panelinin sunduğu klasöre (public/data) kopyalanır ve yollar,
+# satır/İKA sayıları, sütunlar, sınırlar ve sensör istatistikleri manifest.json'a yazılır.
+# Gösterge paneli veri seti yollarını ve şehir sınırlarını bu dosyadan okur.
+
+ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+DATA_DIR = os.path.join(ROOT_DIR, "public", "data")
+DATA_URL_PREFIX = "/data/"  # public/ altındaki dosyaların sunulduğu yol
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+LOG_SUFFIX = "_uretim.log"
+
+# Şehir anahtarı -> (görünen ad, üretici betik)
+CITIES = {
+    "istanbul": ("İstanbul", "generate_istanbul_data.py"),
+    "ankara": ("Ankara", "generate_ankara_data.py"),
+    "aydin": ("Aydın", "generate_aydin_data.py"),
+}
+
+# Manifestteki yan dosya rolü -> üreticideki dosya ayarı
+SIDECAR_SETTINGS = {
+    "aqi": "AQI_FILE",
+    "exceptions": "EXCEPTION_STREAM_FILE",
+    "camera_events": "CAMERA_EVENTS_FILE",
+    "close_approaches": "CLOSE_APPROACH_FILE",
+    "trajectory": "TRAJECTORY_SIDECAR_FILE",
+    "tracks": "TRACK_POLYLINES_FILE",
+}
+
+
+def module_settings(script):
+    """Üreticinin modül düzeyinde atanan BÜYÜK_HARF ayar adlarını döndürür"""
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), script)
+    return {node.targets[0].id for node in tree.body if isinstance(node, ast.Assign) and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name) and node.targets[0].id.isupper()}
+
+
+def run_generator(script, overrides=None, log_path=None):
+    """Üreticiyi bu süreçte __main__ olarak çalıştırır; modül ad alanını döndürür.
+
+    overrides verilirse modül düzeyindeki ayar atamalarının değerleri kaynak ağacında
+    (AST) değiştirilir, böylece ayardan türetilen değerler de yeni değeri görür.
+    """
+    if ROOT_DIR not in sys.path:
+        sys.path.insert(0, ROOT_DIR)
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), script)
+    overrides = dict(overrides or {})
+    unknown = set(overrides) - module_settings(script)
+    if unknown:
+        raise ValueError(f"{os.path.basename(script)} içinde bu ayarlar yok: {', '.join(sorted(unknown))}")
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and len(node.targets) == 1 and getattr(node.targets[0], "id", None) in overrides:
+            node.value = ast.copy_location(ast.parse(repr(overrides[node.targets[0].id]), mode="eval").body, node.value)
+    code = compile(ast.fix_missing_locations(tree), script, "exec")
+    namespace = {"__name__": "__main__", "__file__": script}
+    with open(log_path or os.devnull, "w", encoding="utf-8") as log, contextlib.redirect_stdout(log):
+        try:
+            exec(code, namespace)
+        except SystemExit as exc:  # Önbellekten alınan çıktılarda üretici erken çıkar
+            if exc.code not in (None, 0):
+                raise RuntimeError(f"{os.path.basename(script)} {exc.code} koduyla çıktı (bkz. {log_path})") from None
+    return namespace
+
+
+def build_city(city, work_dir, log_dir):
+    """Şehrin üreticisini bu süreçte çalıştırır ve çıktılarını özetler"""
+    script = os.path.join(ROOT_DIR, CITIES[city][1])
+    os.chdir(work_dir)
+    log_path = os.path.join(log_dir, city + LOG_SUFFIX)
+    started = time.perf_counter()
+    namespace = run_generator(script, log_path=log_path)
+    elapsed = time.perf_counter() - started
+
+    output_files = [os.path.abspath(p) for p in namespace["output_files"]]
+    dataset = os.path.abspath(namespace["OUTPUT_CSV_FILE"])
+    sidecars = {role: os.path.abspath(namespace[name]) for role, name in SIDECAR_SETTINGS.items()
+                if name in namespace and os.path.abspath(namespace[name]) in output_files}
+    report = validate_csv(dataset, city=city, terrain=bool(namespace.get("DEM_PATH"))) if dataset in output_files else None
+    return {
+        "city": city,
+        "dataset": dataset if report else None,
+        "sidecars": sidecars,
+        "output_files": output_files,
+        "report": report,
+        "seed": namespace.get("RANDOM_SEED"),
+        "seconds": round(elapsed, 1),
+        "log": log_path,
+    }
+
+
+def manifest_entry(result):
+    """Şehir sonucunu gösterge panelinin okuyacağı manifest girdisine çevirir"""
+    name = CITIES[result["city"]][0]
+    entry = {
+        "name": name,
+        "datasetPath": DATA_URL_PREFIX + os.path.basename(result["dataset"]) if result["dataset"] else None,
+        "sidecars": {role: DATA_URL_PREFIX + os.path.basename(path) for role, path in result["sidecars"].items()},
+        "seed": result["seed"],
+        "generationSeconds": result["seconds"],
+    }
+    report = result["report"]
+    if report:
+        entry.update({
+            "rows": report["rows"],
+            "units": report["units"],
+            "columns": report["columns"],
+            "startTime": report["start_time"],
+            "endTime": report["end_time"],
+            "valid": report["valid"],
+            "stats": report["stats"],
+        })
+        if report["bounds"]:
+            min_lat, min_lng, max_lat, max_lng = report["bounds"]
+            entry.update({
+                "bounds": [[min_lat, min_lng], [max_lat, max_lng]],
+                "center": [round((min_lat + max_lat) / 2, 6), round((min_lng + max_lng) / 2, 6)],
+                "minLat": min_lat, "maxLat": max_lat, "minLng": min_lng, "maxLng": max_lng,
+            })
+    return entry
+
+
+def build_all(cities, data_dir=DATA_DIR, work_dir=ROOT_DIR, jobs=None):
+    """Şehirleri eşzamanlı üretir, çıktıları data_dir'e kopyalar ve manifesti yazar; manifesti döndürür"""
+    os.makedirs(data_dir, exist_ok=True)
+    log_dir = os.path.join(os.path.abspath(work_dir), ".build_logs")
+    os.makedirs(log_dir, exist_ok=True)
+    manifest_path = os.path.join(data_dir, MANIFEST_FILE)
+    manifest = {"version": MANIFEST_VERSION, "cities": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest["cities"] = json.load(f).get("cities", {})  # Yeniden üretilmeyen şehirler korunur
+
+    failed = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs or len(cities)) as pool:
+        futures = {pool.submit(build_city, city, os.path.abspath(work_dir), log_dir): city for city in cities}
+        for future in concurrent.futures.as_completed(futures):
+            city = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                print(f"{CITIES[city][0]}: üretim başarısız - {exc}")
+                failed.append(city)
+                continue
+            publish(result["output_files"], data_dir)
+            manifest["cities"][city] = manifest_entry(result)
+            rows = result["report"]["rows"] if result["report"] else 0
+            print(f"{CITIES[city][0]}: {rows} satır, {len(result['output_files'])} dosya, {result['seconds']} sn")
+
+    manifest["generated"] = datetime.datetime.now().isoformat(timespec="seconds")
+    manifest["cities"] = {c: manifest["cities"][c] for c in CITIES if c in manifest["cities"]}
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, manifest_path)
+    return manifest, failed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Şehir veri setlerini eşzamanlı üretir, gösterge paneli klasörüne kopyalar ve manifest yazar.")
+    parser.add_argument("--cities", nargs="+", choices=list(CITIES), default=list(CITIES), help="Üretilecek şehirler (varsayılan: hepsi)")
+    parser.add_argument("--data-dir", default=DATA_DIR, help="Gösterge panelinin sunduğu veri klasörü")
+    parser.add_argument("--work-dir", default=ROOT_DIR, help="Üreticilerin çalıştırıldığı klasör (önbellekler burada tutulur)")
+    parser.add_argument("--jobs", type=int, help="Eşzamanlı süreç sayısı (varsayılan: şehir sayısı)")
+    args = parser.parse_args()
+
+    manifest, failed = build_all(args.cities, args.data_dir, args.work_dir, args.jobs)
+    print(f"Manifest '{os.path.join(args.data_dir, MANIFEST_FILE)}' dosyasına yazıldı ({len(manifest['cities'])} şehir).")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,82 @@
+import csv
+import datetime
+import numpy as np
+
+from columnar_store import TIMESTAMP_FORMAT
+
+# --- Seyrek Kamera Analizi Olayları ---
+# Kamera analizi yalnızca tespit olan dakikalarda kayıt üretir; ana CSV'de sütun tutulmaz.
+# Her dakika tüm İKA'lar için tek seferde (vektörel) tespit olasılığı, araç/yaya sayıları
+# ve olay etiketi çekilir; tespit olmayan satırlar hiç saklanmaz. Kayıtlar ana veri setine
+# (Timestamp, Ika_ID) ile bağlanır.
+
+CAMERA_HEADER = ["Timestamp", "Ika_ID", "Vehicles", "Pedestrians", "Incident"]
+DETECTION_CHANCE = 0.08  # Gündüz, ortalama trafikte bir İKA'nın bir dakikada tespit yapma olasılığı
+MEAN_VEHICLES = 6.0  # Tespit başına ortalama araç sayısı (etkinlik ve trafikle ölçeklenir)
+MEAN_PEDESTRIANS = 4.0  # Tespit başına ortalama yaya sayısı
+INCIDENT_CHANCE = 0.03  # Bir tespitin olay etiketi taşıma olasılığı
+INCIDENT_TAGS = ["trafik_kazasi", "park_ihlali", "yol_calismasi", "kalabalik", "arizali_arac"]
+INCIDENT_WEIGHTS = [0.15, 0.4, 0.15, 0.2, 0.1]
+
+# Saat başına etkinlik çarpanı (gece düşük, 7-9 ve 17-19 yoğun saatler)
+HOURLY_ACTIVITY = np.array([0.2, 0.15, 0.1, 0.1, 0.15, 0.3, 0.6, 1.5, 1.6, 1.3, 1.0, 1.0,
+                            1.1, 1.0, 1.0, 1.1, 1.3, 1.6, 1.6, 1.3, 1.0, 0.8, 0.5, 0.3])
+
+
+class CameraEventSimulator:
+    """Dakika başına tüm İKA'lar için kamera tespitlerini toplu üreten simülatör"""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+        self.minutes, self.unit_ids, self.vehicles, self.pedestrians, self.incidents = [], [], [], [], []
+        self.count = 0
+
+    def step(self, minute_index, hour_of_day, ika_ids, traffic_levels=None):
+        """Bir dakikanın tespitlerini üretir; bu dakikadaki tespit sayısını döndürür.
+
+        traffic_levels (0-1, örn. kirletici alanından) verilirse tespit olasılığı ve araç
+        sayısı yerel trafikle ölçeklenir.
+        """
+        n = len(ika_ids)
+        activity = HOURLY_ACTIVITY[hour_of_day % 24]
+        traffic = np.full(n, 0.5) if traffic_levels is None else np.asarray(traffic_levels, dtype=np.float64)
+        detected = np.flatnonzero(self.rng.random(n) < np.minimum(DETECTION_CHANCE * activity * (0.5 + traffic), 1.0))
+        if len(detected) == 0:
+            return 0
+        vehicles = self.rng.poisson(MEAN_VEHICLES * activity * (0.5 + traffic[detected]))
+        pedestrians = self.rng.poisson(MEAN_PEDESTRIANS * activity, len(detected))
+        tagged = self.rng.random(len(detected)) < INCIDENT_CHANCE
+        tags = np.full(len(detected), "", dtype=object)
+        tags[tagged] = self.rng.choice(INCIDENT_TAGS, int(tagged.sum()), p=INCIDENT_WEIGHTS)
+        self.minutes.append(np.full(len(detected), minute_index, dtype=np.int64))
+        self.unit_ids.append(np.asarray(ika_ids, dtype=object)[detected])
+        self.vehicles.append(vehicles)
+        self.pedestrians.append(pedestrians)
+        self.incidents.append(tags)
+        self.count += len(detected)
+        return len(detected)
+
+    def events(self):
+        """(dakika, İKA, araç, yaya, olay) kayıtlarını üretir"""
+        for batch in zip(self.minutes, self.unit_ids, self.vehicles, self.pedestrians, self.incidents):
+            yield from zip(*(column.tolist() for column in batch))
+
+
+def write_camera_events(simulator, path, start_time):
+    """Kamera tespitlerini (Timestamp, Ika_ID) anahtarlı CSV dosyasına yazar"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(CAMERA_HEADER)
+        for minute_index, ika_id, vehicles, pedestrians, incident in simulator.events():
+            timestamp = start_time + datetime.timedelta(minutes=minute_index)
+            writer.writerow([timestamp.strftime(TIMESTAMP_FORMAT), ika_id, vehicles, pedestrians, incident])
+    return simulator.count
+
+
+def read_camera_events(path):
+    """Kamera olay dosyasını {(Timestamp, Ika_ID): (araç, yaya, olay)} sözlüğü olarak okur"""
+    with open(path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        if next(reader, None) != CAMERA_HEADER:
+            raise ValueError(f"'{path}' bir kamera olay dosyası değil")
+        return {(row[0], row[1]): (int(row[2]), int(row[3]), row[4]) for row in reader if row}
@@ -0,0 +1,193 @@
+import hashlib
+import json
+import math
+import os
+import numpy as np
+
+# --- Derlenmiş Şehir Profilleri ---
+# Dairesel şehir tanımı (merkez, yarıçap, kilit konumlar, çevre/radyal yol parametreleri)
+# bir kez derlenir: sınır dışındaki konumlar kenara taşınır, yol ağı noktaları üretilir,
+# yol noktaları için ızgara tabanlı bir uzamsal indeks kurulur ve sık kullanılan
+# trigonometrik sabitler hesaplanır. Sonuç, parametrelerin özetiyle adlandırılmış bir
+# .npz dosyasına yazılır; aynı parametrelerle yapılan sonraki çalıştırmalar yalnızca
+# bu dosyayı yükler.
+
+PROFILE_FORMAT_VERSION = 1
+PROFILE_CACHE_DIR = ".city_profiles"
+EDGE_FACTOR = 0.95  # Sınır dışındaki konumların taşındığı yarıçap oranı
+INDEX_CELL_DEG = 0.01  # Uzamsal indeks hücre boyu (derece, ~1 km)
+
+
+def profile_key(params):
+    """Profil parametrelerinden kararlı bir önbellek anahtarı üretir"""
+    payload = json.dumps({"version": PROFILE_FORMAT_VERSION, **params}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class CityProfile:
+    """Derlenmiş şehir profili: konumlar, yol ağı, uzamsal indeks ve trigonometrik sabitler"""
+
+    def __init__(self, arrays, key):
+        self.key = key
+        self.center_lat = float(arrays["center"][0])
+        self.center_lon = float(arrays["center"][1])
+        self.radius = float(arrays["center"][2])
+        self.cos_lat = float(arrays["trig"][0])  # cos(merkez enlemi)
+        self.inv_cos_lat = float(arrays["trig"][1])
+        self.key_names = [str(n) for n in arrays["key_names"]]
+        self.key_lat = arrays["key_lat"]
+        self.key_lon = arrays["key_lon"]
+        self.relocated = arrays["relocated"]
+        self.road_names = [str(n) for n in arrays["road_names"]]
+        self.road_offsets = arrays["road_offsets"]
+        self.road_lat = arrays["road_lat"]
+        self.road_lon = arrays["road_lon"]
+        self.index_origin = arrays["index_origin"]
+        self.index_shape = tuple(int(v) for v in arrays["index_shape"])
+        self.cell_starts = arrays["cell_starts"]
+        self.cell_points = arrays["cell_points"]
+
+    @property
+    def key_locations(self):
+        return {name: (float(lat), float(lon)) for name, lat, lon in zip(self.key_names, self.key_lat, self.key_lon)}
+
+    @property
+    def main_roads(self):
+        roads = {}
+        for i, name in enumerate(self.road_names):
+            lo, hi = int(self.road_offsets[i]), int(self.road_offsets[i + 1])
+            roads[name] = [(float(lat), float(lon)) for lat, lon in zip(self.road_lat[lo:hi], self.road_lon[lo:hi])]
+        return roads
+
+    def nearest_road_point(self, lat, lon):
+        """Tüm yol noktaları içinde (derece cinsinden) en yakın olanı döndürür; yol yoksa None"""
+        if len(self.road_lat) == 0:
+            return None
+        rows, cols = self.index_shape
+        r0 = int((lat - self.index_origin[0]) // INDEX_CELL_DEG)
+        c0 = int((lon - self.index_origin[1]) // INDEX_CELL_DEG)
+        best, best_dist = -1, float("inf")
+        # Hücre halkaları dışa doğru taranır; halkanın en yakın kenarı bulunan en iyi
+        # mesafeden uzaksa daha dıştaki hücrelerde daha yakın nokta olamaz
+        for ring in range(max(rows, cols) + abs(r0) + abs(c0) + 1):
+            if best >= 0 and (ring - 1) * INDEX_CELL_DEG > best_dist:
+                break
+            for r in range(r0 - ring, r0 + ring + 1):
+                if not 0 <= r < rows:
+                    continue
+                step = 1 if abs(r - r0) == ring else 2 * ring
+                for c in range(c0 - ring, c0 + ring + 1, max(step, 1)):
+                    if not 0 <= c < cols:
+                        continue
+                    cell = r * cols + c
+                    for p in self.cell_points[self.cell_starts[cell]:self.cell_starts[cell + 1]]:
+                        dist = math.sqrt((lat - self.road_lat[p]) ** 2 + (lon - self.road_lon[p]) ** 2)
+                        if dist < best_dist or (dist == best_dist and p < best):
+                            best, best_dist = int(p), dist
+        return float(self.road_lat[best]), float(self.road_lon[best])
+
+
+def _build_road_index(road_lat, road_lon):
+    """Yol noktalarını düzenli ızgara hücrelerine (CSR biçiminde) yerleştirir"""
+    if len(road_lat) == 0:
+        return np.zeros(2), np.array([1, 1]), np.zeros(2, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    origin = np.array([road_lat.min(), road_lon.min()])
+    rows = int((road_lat.max() - origin[0]) // INDEX_CELL_DEG) + 1
+    cols = int((road_lon.max() - origin[1]) // INDEX_CELL_DEG) + 1
+    cells = ((road_lat - origin[0]) // INDEX_CELL_DEG).astype(np.int64) * cols + \
+            ((road_lon - origin[1]) // INDEX_CELL_DEG).astype(np.int64)
+    order = np.argsort(cells, kind="stable")
+    starts = np.searchsorted(cells[order], np.arange(rows * cols + 1))
+    return origin, np.array([rows, cols]), starts.astype(np.int64), order.astype(np.int64)
+
+
+def compile_city_profile(center_lat, center_lon, radius, key_locations, ring_roads,
+                         ring_points, radial_count, radial_factors, min_road_radius=0.0):
+    """Dairesel şehir tanımını derler; dizi sözlüğü döndürür (üreticilerdeki hesapla birebir aynı)"""
+    cos_lat = math.cos(math.radians(center_lat))
+
+    names, lats, lons, relocated = [], [], [], []
+    for name, (lat, lon) in key_locations.items():
+        dlat = lat - center_lat
+        dlon_adjusted = (lon - center_lon) * cos_lat
+        if math.sqrt(dlat ** 2 + dlon_adjusted ** 2) > radius:
+            angle = math.atan2(dlat, dlon_adjusted)
+            lat = center_lat + (radius * EDGE_FACTOR) * math.sin(angle)
+            lon = center_lon + ((radius * EDGE_FACTOR) * math.cos(angle)) / cos_lat
+            relocated.append(True)
+        else:
+            relocated.append(False)
+        names.append(name)
+        lats.append(lat)
+        lons.append(lon)
+
+    road_names, offsets, road_lat, road_lon = [], [0], [], []
+    for radius_factor, name in ring_roads:
+        ring_radius = radius * radius_factor
+        if ring_radius < min_road_radius:
+            continue
+        for i in range(ring_points):
+            angle = 2 * math.pi * i / ring_points
+            road_lat.append(center_lat + ring_radius * math.sin(angle))
+            road_lon.append(center_lon + (ring_radius * math.cos(angle)) / cos_lat)
+        road_names.append(name)
+        offsets.append(len(road_lat))
+    for i in range(radial_count):
+        angle = 2 * math.pi * i / radial_count
+        start = len(road_lat)
+        for radius_factor in radial_factors:
+            pos_radius = radius * radius_factor
+            if pos_radius < min_road_radius:
+                continue
+            road_lat.append(center_lat + pos_radius * math.sin(angle))
+            road_lon.append(center_lon + (pos_radius * math.cos(angle)) / cos_lat)
+        if len(road_lat) > start:
+            road_names.append(f"Radyal_Yol_{i+1}")
+            offsets.append(len(road_lat))
+
+    road_lat = np.array(road_lat, dtype=np.float64)
+    road_lon = np.array(road_lon, dtype=np.float64)
+    origin, shape, starts, points = _build_road_index(road_lat, road_lon)
+    return {
+        "center": np.array([center_lat, center_lon, radius]),
+        "trig": np.array([cos_lat, 1.0 / cos_lat]),
+        "key_names": np.array(names, dtype=str),
+        "key_lat": np.array(lats, dtype=np.float64),
+        "key_lon": np.array(lons, dtype=np.float64),
+        "relocated": np.array(relocated, dtype=bool),
+        "road_names": np.array(road_names, dtype=str),
+        "road_offsets": np.array(offsets, dtype=np.int64),
+        "road_lat": road_lat,
+        "road_lon": road_lon,
+        "index_origin": origin,
+        "index_shape": shape,
+        "cell_starts": starts,
+        "cell_points": points,
+    }
+
+
+def load_city_profile(city, center_lat, center_lon, radius, key_locations, ring_roads,
+                      ring_points, radial_count, radial_factors, min_road_radius=0.0,
+                      cache_dir=PROFILE_CACHE_DIR, use_cache=True):
+    """Profili önbellekten yükler, yoksa derleyip yazar; (profil, önbellekten_mi) döndürür"""
+    params = {
+        "city": city, "center": [center_lat, center_lon], "radius": radius,
+        "key_locations": {name: list(pos) for name, pos in key_locations.items()},
+        "ring_roads": [list(r) for r in ring_roads], "ring_points": ring_points,
+        "radial_count": radial_count, "radial_factors": [float(f) for f in radial_factors],
+        "min_road_radius": min_road_radius, "edge_factor": EDGE_FACTOR, "index_cell_deg": INDEX_CELL_DEG,
+    }
+    key = profile_key(params)
+    path = os.path.join(cache_dir, f"{city}_{key}.npz")
+    if use_cache and os.path.exists(path):
+        with np.load(path, allow_pickle=False) as arrays:
+            return CityProfile(dict(arrays), key), True
+
+    arrays = compile_city_profile(center_lat, center_lon, radius, key_locations, ring_roads,
+                                  ring_points, radial_count, radial_factors, min_road_radius)
+    if use_cache:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = path + ".tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)  # Paralel taramalarda yarım dosya okunmasın
+    return CityProfile(arrays, key), False
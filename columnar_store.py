@@ -0,0 +1,225 @@
+import csv
+import datetime
+import json
+import os
+import argparse
+import numpy as np
+
+# --- Sütunlu Veri Deposu ---
+# Üreticilerin yazdığı CSV dosyalarını sabit genişlikli ikili sütunlara dönüştürür.
+# Her sütun ayrı bir .bin dosyasıdır ve np.memmap ile açılır; böylece sorgular
+# dosyanın tamamını ayrıştırmadan yalnızca gereken dilimi okur.
+# Satırlar (saat, İKA, dakika) sırasıyla yazılır ve hour_unit_index.bin her
+# (saat, İKA) diliminin başlangıç satırını tutar (bkz. dataset_reader.py).
+
+STORE_FORMAT_VERSION = 2
+META_FILE = "meta.json"
+INDEX_FILE = "hour_unit_index.bin"
+CHUNK_ROWS = 100000  # Dönüştürme sırasında bellekte tutulan en fazla satır
+
+# Üreticiler farklı başlıklar kullanıyor (İstanbul İngilizce, Ankara/Aydın Türkçe).
+# Depoda her zaman İstanbul üreticisinin kullandığı standart adlar tutulur.
+COLUMN_ALIASES = {
+    "ZamanDamgasi": "Timestamp",
+    "Enlem": "Latitude",
+    "Boylam": "Longitude",
+    "Yukseklik_m": "Altitude_m",
+    "Hedef_Konum": "Target_Location",
+    "Sicaklik_C": "Temperature_C",
+    "Bagil_Nem_Yuzde": "Relative_Humidity_Percent",
+    "Ses_Seviyesi_dB": "Sound_Level_dB",
+    "Isik_Seviyesi_lux": "Light_Level_lux",
+    "Titresim_g": "Vibration_g",
+    "ManyetikAlan_X_uT": "Magnetic_Field_X_uT",
+    "ManyetikAlan_Y_uT": "Magnetic_Field_Y_uT",
+    "ManyetikAlan_Z_uT": "Magnetic_Field_Z_uT",
+    "Radyasyon_uSv_h": "Radiation_uSv_h",
+}
+
+SENSOR_COLUMNS = [
+    "PM2.5_ug_m3", "PM10_ug_m3", "CO_ppm", "NO2_ppb", "SO2_ppb", "O3_ppb", "VOC_ppb",
+    "Temperature_C", "Relative_Humidity_Percent", "Sound_Level_dB", "Light_Level_lux",
+    "Vibration_g", "Magnetic_Field_X_uT", "Magnetic_Field_Y_uT", "Magnetic_Field_Z_uT",
+    "Radiation_uSv_h",
+]
+
+# Sabit genişlikli sütun tipleri. "minute" başlangıç zamanından itibaren geçen dakika,
+# "unit" ve "target" ise meta.json içindeki sözlüklere indekstir.
+COLUMN_DTYPES = {
+    "minute": "int32",
+    "unit": "uint16",
+    "target": "uint16",
+    "Latitude": "float64",
+    "Longitude": "float64",
+    "Altitude_m": "float32",
+}
+for _sensor in SENSOR_COLUMNS:
+    COLUMN_DTYPES[_sensor] = "float32"
+
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+
+
+def canonical_column_name(name):
+    """Üretici başlığını depodaki standart sütun adına çevirir"""
+    name = name.strip()
+    return COLUMN_ALIASES.get(name, name)
+
+
+def column_file_name(column):
+    """Sütun adından .bin dosya adını üretir"""
+    return column.replace("/", "_") + ".bin"
+
+
+def _parse_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+def csv_to_columnar(csv_path, out_dir, city=None):
+    """Üretilmiş bir CSV dosyasını sütunlu depoya dönüştürür ve meta bilgisini döndürür"""
+    os.makedirs(out_dir, exist_ok=True)
+    if city is None:
+        city = os.path.basename(csv_path).split("_")[0].lower()
+
+    files = {column: open(os.path.join(out_dir, column_file_name(column)), "wb") for column in COLUMN_DTYPES}
+    unit_codes, target_codes = {}, {}
+    start_time = None
+    row_count = 0
+    lat_min = lon_min = float("inf")
+    lat_max = lon_max = float("-inf")
+    hour_unit_counts = []  # saat -> İKA kodu başına satır sayısı
+    current_hour = None
+
+    def to_arrays(buffers):
+        arrays = {column: np.asarray(values, dtype=COLUMN_DTYPES[column]) for column, values in buffers.items()}
+        for values in buffers.values():
+            values.clear()
+        return arrays
+
+    def flush_hour(hour_chunks):
+        # Saat içindeki satırlar İKA koduna göre kararlı sıralanır; böylece her (saat, İKA)
+        # dilimi dosyada bitişik olur ve dakika sırası korunur.
+        if not hour_chunks:
+            return
+        arrays = {column: np.concatenate([chunk[column] for chunk in hour_chunks]) for column in COLUMN_DTYPES}
+        hour_chunks.clear()
+        order = np.argsort(arrays["unit"], kind="stable")
+        for column, values in arrays.items():
+            values[order].tofile(files[column])
+        while len(hour_unit_counts) <= current_hour:
+            hour_unit_counts.append(np.zeros(0, dtype=np.int64))
+        hour_unit_counts[current_hour] = np.bincount(arrays["unit"], minlength=len(unit_codes))
+
+    try:
+        with open(csv_path, newline="", encoding="utf-8") as csvfile:
+            reader = csv.reader(csvfile)
+            header = [canonical_column_name(h) for h in next(reader)]
+            positions = {name: i for i, name in enumerate(header)}
+            missing = [c for c in ["Timestamp", "Ika_ID", "Latitude", "Longitude"] if c not in positions]
+            if missing:
+                raise ValueError(f"'{csv_path}' içinde zorunlu sütunlar eksik: {missing}")
+
+            buffers = {column: [] for column in COLUMN_DTYPES}
+            hour_chunks = []
+            value_columns = [c for c in COLUMN_DTYPES if c in positions]
+            absent_columns = [c for c in COLUMN_DTYPES if c not in positions and c not in ("minute", "unit", "target")]
+
+            for row in reader:
+                if not row:
+                    continue
+                timestamp = datetime.datetime.strptime(row[positions["Timestamp"]], TIMESTAMP_FORMAT)
+                if start_time is None:
+                    start_time = timestamp
+                minute = int((timestamp - start_time).total_seconds() // 60)
+                hour = minute // 60
+                if current_hour is None:
+                    current_hour = hour
+                elif hour != current_hour:
+                    if hour < current_hour:
+                        raise ValueError(f"'{csv_path}' zamana göre sıralı değil (satır {row_count + 2})")
+                    if buffers["minute"]:
+                        hour_chunks.append(to_arrays(buffers))
+                    flush_hour(hour_chunks)
+                    current_hour = hour
+
+                unit_id = row[positions["Ika_ID"]]
+                target = row[positions["Target_Location"]] if "Target_Location" in positions else ""
+                buffers["minute"].append(minute)
+                buffers["unit"].append(unit_codes.setdefault(unit_id, len(unit_codes)))
+                buffers["target"].append(target_codes.setdefault(target, len(target_codes)))
+                for column in value_columns:
+                    idx = positions[column]
+                    buffers[column].append(_parse_float(row[idx]) if idx < len(row) else float("nan"))
+                for column in absent_columns:
+                    buffers[column].append(float("nan"))
+
+                lat = buffers["Latitude"][-1]
+                lon = buffers["Longitude"][-1]
+                lat_min, lat_max = min(lat_min, lat), max(lat_max, lat)
+                lon_min, lon_max = min(lon_min, lon), max(lon_max, lon)
+                row_count += 1
+                if len(buffers["minute"]) >= CHUNK_ROWS:
+                    hour_chunks.append(to_arrays(buffers))
+            if buffers["minute"]:
+                hour_chunks.append(to_arrays(buffers))
+            flush_hour(hour_chunks)
+    finally:
+        for f in files.values():
+            f.close()
+
+    # (saat, İKA) ofset indeksi: index[h, u] saat h içindeki u. İKA diliminin başlangıç satırı,
+    # index[h, U] ise saat h'nin bitişidir.
+    unit_count = len(unit_codes)
+    counts = np.zeros((len(hour_unit_counts), unit_count), dtype=np.int64)
+    for hour, hour_counts in enumerate(hour_unit_counts):
+        counts[hour, :len(hour_counts)] = hour_counts
+    index = np.zeros((len(hour_unit_counts), unit_count + 1), dtype=np.int64)
+    index[:, 1:] = np.cumsum(counts, axis=1)
+    hour_starts = np.concatenate([[0], np.cumsum(counts.sum(axis=1))[:-1]]) if len(counts) else np.zeros(0, dtype=np.int64)
+    index += hour_starts[:, None]
+    index.tofile(os.path.join(out_dir, INDEX_FILE))
+
+    meta = {
+        "format_version": STORE_FORMAT_VERSION,
+        "city": city,
+        "source": os.path.basename(csv_path),
+        "row_count": row_count,
+        "start_time": start_time.strftime(TIMESTAMP_FORMAT) if start_time else None,
+        "layout": "hour_unit",
+        "hours": len(hour_unit_counts),
+        "index_file": INDEX_FILE,
+        "units": list(unit_codes),
+        "targets": list(target_codes),
+        "bounds": [lat_min, lon_min, lat_max, lon_max] if row_count else None,
+        "columns": {column: {"dtype": dtype, "file": column_file_name(column)} for column, dtype in COLUMN_DTYPES.items()},
+    }
+    with open(os.path.join(out_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return meta
+
+
+def open_columnar(store_dir):
+    """Sütunlu depoyu açar; (meta, {sütun: np.memmap}) döndürür"""
+    with open(os.path.join(store_dir, META_FILE), encoding="utf-8") as f:
+        meta = json.load(f)
+    columns = {}
+    for column, info in meta["columns"].items():
+        path = os.path.join(store_dir, info["file"])
+        if meta["row_count"] == 0:
+            columns[column] = np.zeros(0, dtype=info["dtype"])
+        else:
+            columns[column] = np.memmap(path, dtype=info["dtype"], mode="r", shape=(meta["row_count"],))
+    return meta, columns
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üretilmiş CSV veri setini bellek eşlemeli sütunlu depoya dönüştürür.")
+    parser.add_argument("csv_path", help="Üretici tarafından yazılmış CSV dosyası")
+    parser.add_argument("out_dir", help="Sütun dosyalarının yazılacağı klasör")
+    parser.add_argument("--city", help="Şehir adı (varsayılan: dosya adının ilk parçası)")
+    args = parser.parse_args()
+
+    meta = csv_to_columnar(args.csv_path, args.out_dir, city=args.city)
+    print(f"'{args.csv_path}' -> '{args.out_dir}': {meta['row_count']} satır, {len(meta['units'])} İKA, şehir: {meta['city']}")
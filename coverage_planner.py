@@ -0,0 +1,126 @@
+import math
+import random
+import numpy as np
+
+# --- Kapsama Odaklı Hedef Atama ---
+# Şehir düzgün hücrelere bölünür ve her hücre için en son ne zaman bir İKA'nın geçtiği
+# tutulur. Bir dakikada yeni hedefe ihtiyaç duyan tüm İKA'lar birlikte ele alınır:
+# en bayat hücreler aday seçilir, "bayatlık - yol süresi" fayda matrisi vektörel olarak
+# kurulur ve atama problemi açık artırma (auction) algoritmasıyla çözülür. Atanan hücre
+# hemen "rezerve" sayılır; böylece sonraki dakikalarda başka İKA aynı hücreye yönelmez.
+
+NOMINAL_SPEED_M_PER_MIN = 300.0  # Yol süresi tahmini için ortalama hız (~18 km/saat)
+METERS_PER_DEGREE = 111_320.0
+UNVISITED_STALENESS = 24 * 60  # Hiç ziyaret edilmemiş hücrenin bayatlığı (dakika)
+TRAVEL_WEIGHT = 1.0  # Yol süresinin bayatlığa göre ağırlığı
+AUCTION_EPSILON = 0.5  # Teklif artışı (dakika); toplam sapma en fazla İKA sayısı x epsilon
+CANDIDATE_FACTOR = 2  # Atanacak İKA başına değerlendirilen aday hücre sayısı
+MIN_CANDIDATES = 32
+
+
+def auction_assign(benefit, eps=AUCTION_EPSILON):
+    """Her satırı (İKA) farklı bir sütuna (hücre) atayıp toplam faydayı ~en büyükler.
+
+    Jacobi tipi ileri açık artırma: atanmamış tüm satırlar aynı turda teklif verir,
+    her sütunu en yüksek teklif kazanır. Satır sayısı sütun sayısından fazla olamaz.
+    """
+    n, m = benefit.shape
+    if n > m:
+        raise ValueError(f"Satır sayısı ({n}) sütun sayısından ({m}) fazla olamaz")
+    prices = np.zeros(m)
+    owner = np.full(m, -1, dtype=np.int64)
+    assigned = np.full(n, -1, dtype=np.int64)
+    while True:
+        free = np.flatnonzero(assigned < 0)
+        if len(free) == 0:
+            return assigned
+        values = benefit[free] - prices
+        rows = np.arange(len(free))
+        best = np.argmax(values, axis=1)
+        best_value = values[rows, best]
+        if m > 1:
+            values[rows, best] = -np.inf
+            second_value = values.max(axis=1)
+        else:
+            second_value = best_value
+        bids = prices[best] + best_value - second_value + eps
+        # Her sütun için en yüksek teklif: (sütun, teklif) sırasına göre grubun sonuncusu
+        order = np.lexsort((bids, best))
+        last = np.r_[best[order][1:] != best[order][:-1], True]
+        winners = order[last]
+        objects = best[winners]
+        previous = owner[objects]
+        assigned[previous[previous >= 0]] = -1
+        owner[objects] = free[winners]
+        assigned[free[winners]] = objects
+        prices[objects] = bids[winners]
+
+
+class CoveragePlanner:
+    """Hücre bayatlığına göre İKA'lara toplu hedef atayan planlayıcı"""
+
+    def __init__(self, lat_min, lat_max, lon_min, lon_max, cell_deg, inside=None):
+        self.lat_min, self.lon_min = lat_min, lon_min
+        self.cell_deg = cell_deg
+        self.rows = max(1, int(math.ceil((lat_max - lat_min) / cell_deg)))
+        self.cols = max(1, int(math.ceil((lon_max - lon_min) / cell_deg)))
+        centers_lat = lat_min + (np.arange(self.rows) + 0.5) * cell_deg
+        centers_lon = lon_min + (np.arange(self.cols) + 0.5) * cell_deg
+        grid_lat, grid_lon = np.meshgrid(centers_lat, centers_lon, indexing="ij")
+        grid_lat, grid_lon = grid_lat.ravel(), grid_lon.ravel()
+        mask = np.array([inside(la, lo) for la, lo in zip(grid_lat, grid_lon)]) if inside else np.ones(len(grid_lat), dtype=bool)
+        # Izgara hücresi -> aday indeksi (sınır dışı hücreler -1)
+        self.cell_index = np.full(len(grid_lat), -1, dtype=np.int64)
+        self.cell_index[mask] = np.arange(int(mask.sum()))
+        self.cell_lat, self.cell_lon = grid_lat[mask], grid_lon[mask]
+        self.cos_lat = math.cos(math.radians((lat_min + lat_max) / 2))
+        self.last_visit = np.full(len(self.cell_lat), -np.inf)
+        self.reserved_at = np.full(len(self.cell_lat), -np.inf)
+
+    def __len__(self):
+        return len(self.cell_lat)
+
+    def _cells(self, lat, lon):
+        r = np.floor((np.asarray(lat) - self.lat_min) / self.cell_deg).astype(np.int64)
+        c = np.floor((np.asarray(lon) - self.lon_min) / self.cell_deg).astype(np.int64)
+        valid = (r >= 0) & (r < self.rows) & (c >= 0) & (c < self.cols)
+        cells = np.full(len(r), -1, dtype=np.int64)
+        cells[valid] = self.cell_index[r[valid] * self.cols + c[valid]]
+        return cells
+
+    def observe(self, minute_index, lat, lon):
+        """İKA konumlarının bulunduğu hücreleri bu dakikada ziyaret edilmiş işaretler"""
+        cells = self._cells(lat, lon)
+        self.last_visit[cells[cells >= 0]] = minute_index
+
+    def staleness(self, minute_index):
+        """Hücre başına son ziyaret veya rezervasyondan bu yana geçen dakika"""
+        touched = np.maximum(self.last_visit, self.reserved_at)
+        return np.where(np.isfinite(touched), np.minimum(minute_index - touched, UNVISITED_STALENESS), UNVISITED_STALENESS)
+
+    def coverage(self):
+        """En az bir kez ziyaret edilmiş hücrelerin oranı"""
+        return float(np.isfinite(self.last_visit).mean()) if len(self) else 0.0
+
+    def assign(self, minute_index, lat, lon):
+        """Verilen İKA konumları için (hedef_enlem, hedef_boylam) listesi döndürür"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        n = len(lat)
+        if n == 0 or len(self) == 0:
+            return []
+        staleness = self.staleness(minute_index)
+        k = min(len(self), max(CANDIDATE_FACTOR * n, MIN_CANDIDATES))
+        candidates = np.argpartition(-staleness, k - 1)[:k] if k < len(self) else np.arange(len(self))
+        dy = (lat[:, None] - self.cell_lat[candidates][None, :]) * METERS_PER_DEGREE
+        dx = (lon[:, None] - self.cell_lon[candidates][None, :]) * METERS_PER_DEGREE * self.cos_lat
+        travel_minutes = np.hypot(dx, dy) / NOMINAL_SPEED_M_PER_MIN
+        benefit = staleness[candidates][None, :] - TRAVEL_WEIGHT * travel_minutes
+        if n > k:  # İKA sayısı hücre sayısını aşıyorsa (çok kaba ızgara) hücreler paylaşılır
+            chosen = candidates[np.argmax(benefit, axis=1)]
+        else:
+            chosen = candidates[auction_assign(benefit)]
+        self.reserved_at[chosen] = minute_index
+        # Hedef, hücre merkezinin etrafında hafifçe dağıtılır
+        half = self.cell_deg * 0.4
+        return [(self.cell_lat[j] + random.uniform(-half, half), self.cell_lon[j] + random.uniform(-half, half)) for j in chosen]
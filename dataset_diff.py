@@ -0,0 +1,276 @@
+import argparse
+import csv
+import hashlib
+import io
+import json
+import math
+import sys
+import numpy as np
+
+from columnar_store import canonical_column_name
+
+# --- Veri Seti Karşılaştırma (Üretici Regresyon Testi) ---
+# İki CSV veri seti önce saatlik parçalar halinde karşılaştırılır: dosya büyük bloklar
+# halinde okunur, satır başlarındaki zaman damgasının saat kısmı (YYYY-MM-DDTHH) NumPy ile
+# bulunur ve her saatin ham baytları özetlenir (blake2b). Tüm saatler aynıysa veri setleri
+# birebir aynıdır. Farklı (ya da yalnızca bir dosyada olan) saatlerden satır örneklenir ve
+# yalnızca bu örnekler ayrıştırılarak sütun bazında dağılımlar karşılaştırılır: sayısal
+# sütunlarda iki örneklem Kolmogorov-Smirnov istatistiği ve ortalama farkı, metin
+# sütunlarında değer sıklıkları arasındaki toplam değişim mesafesi. Satırlar birbirinden
+# bağımsız olmadığı için (aynı filo, aynı hava durumu) RNG gürültüsü tek başına da belirgin
+# farklar üretir; A ile aynı kodun farklı tohumlarla ürettiği taban çizgileri verilirse sapma
+# eşikleri her sütun için A ile taban çizgileri arasındaki en büyük farka göre belirlenir.
+
+BLOCK_BYTES = 16 * 1024 * 1024
+HOUR_PREFIX = 13  # "2025-05-01T08"
+SAMPLE_ROWS_PER_HOUR = 2000  # Farklı saat başına ayrıştırılan en fazla satır
+MAX_SAMPLE_ROWS = 200_000  # Tüm farklı saatlerden toplam en fazla satır
+KS_ALPHA_COEFF = 1.95  # α = 0.001 için iki örneklem KS kritik katsayısı
+KS_DRIFT = 0.10  # Bu değerin altındaki KS farkları anlamlı olsa da sapma sayılmaz
+MEAN_DRIFT_STD = 0.25  # Ortalama farkı (birleşik std cinsinden) bu değeri aşarsa sapma
+CATEGORY_DRIFT = 0.10  # Metin sütunlarında toplam değişim mesafesi eşiği
+NULL_RATE_DRIFT = 0.02  # Boş/NaN oranı farkı eşiği
+NOISE_MARGIN = 2.0  # Taban çizgisi verildiğinde: fark, RNG gürültüsünün bu katını aşarsa sapma
+NOISE_FLOOR = 0.05  # Gürültü eşiğine eklenen mutlak pay
+
+
+# --- Saatlik Parça Özetleri ---
+def hour_chunks(path, block_bytes=BLOCK_BYTES):
+    """Dosyayı tek geçişte okur; (başlık, {saat: [özet, satır sayısı, [(ofset, uzunluk), ...]]}) döndürür.
+
+    Zaman damgası ilk sütun olmalıdır; aynı saatin satırları bitişik değilse parçalar sırayla eklenir.
+    """
+    chunks = {}
+    with open(path, "rb") as f:
+        header = f.readline()
+        offset = len(header)
+        carry = b""
+        while True:
+            data = f.read(block_bytes)
+            block = carry + data
+            end = block.rfind(b"\n") + 1 if data else len(block)
+            if end == 0 and data:
+                carry = block
+                continue
+            lines, carry = block[:end], block[end:]
+            if lines:
+                _hash_block(lines, offset, chunks)
+            offset += len(lines)
+            if not data:
+                break
+    return header.decode("utf-8").rstrip("\r\n"), chunks
+
+
+def _hash_block(block, offset, chunks):
+    arr = np.frombuffer(block, dtype=np.uint8)
+    newlines = np.flatnonzero(arr == 10)
+    ends = newlines + 1 if len(newlines) and newlines[-1] == len(arr) - 1 else np.r_[newlines + 1, len(arr)]
+    starts = np.r_[0, ends[:-1]]
+    columns = np.minimum(starts[:, None] + np.arange(HOUR_PREFIX), len(arr) - 1)
+    prefixes = arr[columns]
+    prefixes[(ends - starts) <= HOUR_PREFIX] = 0  # Boş/kısa satırlar ayrı (geçersiz) anahtar alır
+    change = np.r_[True, np.any(prefixes[1:] != prefixes[:-1], axis=1)]
+    run_starts = np.flatnonzero(change)
+    run_ends = np.r_[run_starts[1:], len(starts)]
+    for first, last in zip(run_starts, run_ends):
+        key = prefixes[first].tobytes()
+        if key[4:5] != b"-":  # Zaman damgası değil (boş satır vb.)
+            continue
+        lo, hi = int(starts[first]), int(ends[last - 1])
+        entry = chunks.get(key)
+        if entry is None:
+            entry = chunks[key] = [hashlib.blake2b(digest_size=16), 0, []]
+        entry[0].update(block[lo:hi])
+        entry[1] += int(last - first)
+        entry[2].append((offset + lo, hi - lo))
+
+
+# --- Dağılım Karşılaştırması ---
+def sample_rows(path, segments, limit):
+    """Saatin bayt aralıklarından en fazla limit satırı eşit aralıklarla okur"""
+    lines = []
+    with open(path, "rb") as f:
+        for start, length in segments:
+            f.seek(start)
+            lines.extend(f.read(length).splitlines())
+    lines = [line for line in lines if line]
+    if len(lines) > limit:
+        lines = [lines[i] for i in np.linspace(0, len(lines) - 1, limit).astype(int)]
+    return list(csv.reader(io.StringIO(b"\n".join(lines).decode("utf-8"))))
+
+
+def _as_float(values):
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        out = np.full(len(values), np.nan)
+        for i, value in enumerate(values):
+            try:
+                out[i] = float(value)
+            except ValueError:
+                if value != "":
+                    return None  # Metin sütunu
+        return out
+
+
+def ks_statistic(a, b):
+    """İki örneklem Kolmogorov-Smirnov D istatistiği"""
+    a, b = np.sort(a), np.sort(b)
+    grid = np.concatenate([a, b])
+    return float(np.max(np.abs(np.searchsorted(a, grid, side="right") / len(a) - np.searchsorted(b, grid, side="right") / len(b))))
+
+
+def column_metrics(a_values, b_values):
+    """Bir sütunun iki örneklemi arasındaki fark ölçüleri (sayısal: KS, ortalama kayması; metin: TVD)"""
+    a_num, b_num = _as_float(a_values), _as_float(b_values)
+    if a_num is not None and b_num is not None:
+        a_null, b_null = float(np.mean(~np.isfinite(a_num))), float(np.mean(~np.isfinite(b_num)))
+        a_ok, b_ok = a_num[np.isfinite(a_num)], b_num[np.isfinite(b_num)]
+        metrics = {"kind": "numeric", "null_rate": [round(a_null, 4), round(b_null, 4)], "null_diff": abs(a_null - b_null)}
+        if len(a_ok) and len(b_ok):
+            pooled = math.sqrt((a_ok.var() + b_ok.var()) / 2)
+            shift = abs(a_ok.mean() - b_ok.mean()) / pooled if pooled > 0 else float(a_ok.mean() != b_ok.mean())
+            metrics.update({
+                "mean": [round(float(a_ok.mean()), 4), round(float(b_ok.mean()), 4)],
+                "std": [round(float(a_ok.std()), 4), round(float(b_ok.std()), 4)],
+                "p50": [round(float(np.median(a_ok)), 4), round(float(np.median(b_ok)), 4)],
+                "p99": [round(float(np.percentile(a_ok, 99)), 4), round(float(np.percentile(b_ok, 99)), 4)],
+                "ks": round(ks_statistic(a_ok, b_ok), 4),
+                "ks_critical": round(KS_ALPHA_COEFF * math.sqrt((len(a_ok) + len(b_ok)) / (len(a_ok) * len(b_ok))), 4),
+                "mean_shift_std": round(shift, 4),
+            })
+        else:
+            metrics["empty"] = bool(len(a_ok)) != bool(len(b_ok))
+        return metrics
+    a_keys, a_counts = np.unique(np.asarray(a_values, dtype=object).astype(str), return_counts=True)
+    b_keys, b_counts = np.unique(np.asarray(b_values, dtype=object).astype(str), return_counts=True)
+    a_freq = dict(zip(a_keys.tolist(), (a_counts / max(len(a_values), 1)).tolist()))
+    b_freq = dict(zip(b_keys.tolist(), (b_counts / max(len(b_values), 1)).tolist()))
+    tvd = 0.5 * sum(abs(a_freq.get(k, 0.0) - b_freq.get(k, 0.0)) for k in set(a_freq) | set(b_freq))
+    return {"kind": "text", "distinct": [len(a_freq), len(b_freq)], "tvd": round(tvd, 4)}
+
+
+def is_drift(metrics, noise=None):
+    """Fark ölçülerini eşiklerle (taban çizgisi verildiyse RNG gürültüsünün NOISE_MARGIN katıyla) karşılaştırır"""
+    if metrics.get("empty") or metrics.get("null_diff", 0.0) > NULL_RATE_DRIFT:
+        return True
+    if metrics["kind"] == "text":
+        limit = NOISE_MARGIN * noise["tvd"] + NOISE_FLOOR if noise and "tvd" in noise else CATEGORY_DRIFT
+        return metrics["tvd"] > limit
+    if "ks" not in metrics:
+        return False
+    if noise and "ks" in noise:
+        return metrics["ks"] > NOISE_MARGIN * noise["ks"] + NOISE_FLOOR  # KS ortalama kaymalarını da kapsar
+    return (metrics["ks"] > metrics["ks_critical"] and metrics["ks"] > KS_DRIFT) or metrics["mean_shift_std"] > MEAN_DRIFT_STD
+
+
+def diff_datasets(path_a, path_b, baselines=(), sample_per_hour=SAMPLE_ROWS_PER_HOUR, max_sample=MAX_SAMPLE_ROWS):
+    """İki veri setini karşılaştırır; rapor sözlüğü döndürür (status: identical / no_drift / drift).
+
+    baselines: A ile aynı kod ve ayarlarla, farklı tohumlarla üretilmiş veri setleri. Verilirse her
+    sütun için A ile taban çizgileri arasındaki en büyük fark RNG gürültüsü düzeyi olarak kullanılır.
+    """
+    header_a, chunks_a = hour_chunks(path_a)
+    header_b, chunks_b = hour_chunks(path_b)
+    columns_a = [canonical_column_name(h) for h in header_a.split(",")]
+    columns_b = [canonical_column_name(h) for h in header_b.split(",")]
+    hours = sorted(set(chunks_a) | set(chunks_b))
+    same = [h for h in hours if h in chunks_a and h in chunks_b and chunks_a[h][0].digest() == chunks_b[h][0].digest()]
+    changed = [h for h in hours if h in chunks_a and h in chunks_b and h not in same]
+    only_a = [h for h in hours if h not in chunks_b]
+    only_b = [h for h in hours if h not in chunks_a]
+    report = {
+        "a": path_a, "b": path_b, "baselines": list(baselines),
+        "rows": [sum(c[1] for c in chunks_a.values()), sum(c[1] for c in chunks_b.values())],
+        "hours": len(hours), "identical_hours": len(same), "changed_hours": [h.decode() for h in changed],
+        "only_in_a": [h.decode() for h in only_a], "only_in_b": [h.decode() for h in only_b],
+        "header_changed": header_a != header_b,
+        "missing_columns": [c for c in columns_a if c not in columns_b],
+        "added_columns": [c for c in columns_b if c not in columns_a],
+        "columns": [],
+    }
+    if len(same) == len(hours) and not report["header_changed"]:
+        report["status"] = "identical"
+        return report
+
+    # Yalnızca farklı saatlerden örneklem; toplam örneklem sınırı saatlere eşit bölünür
+    differing = changed + only_a + only_b
+    per_hour = max(1, min(sample_per_hour, max_sample // max(len(differing), 1)))
+
+    def sample(path, chunks):
+        rows = []
+        for h in differing:
+            if h in chunks:
+                rows += sample_rows(path, chunks[h][2], per_hour)
+        return rows
+
+    rows_a, rows_b = sample(path_a, chunks_a), sample(path_b, chunks_b)
+    bases = []
+    for path in baselines:
+        header_base, chunks_base = hour_chunks(path)
+        bases.append((sample(path, chunks_base), [canonical_column_name(h) for h in header_base.split(",")]))
+
+    def values(rows, columns, name):
+        i = columns.index(name)
+        return [r[i] if i < len(r) else "" for r in rows]
+
+    for name in [c for c in columns_a if c in columns_b and c != "Timestamp"]:
+        a_values, b_values = values(rows_a, columns_a, name), values(rows_b, columns_b, name)
+        if not (a_values and b_values):
+            continue
+        metrics = column_metrics(a_values, b_values)
+        noise = None
+        for rows_base, columns_base in bases:
+            if rows_base and name in columns_base:
+                base = column_metrics(a_values, values(rows_base, columns_base, name))
+                noise = {k: max(base[k], (noise or {}).get(k, 0.0)) for k in ("ks", "mean_shift_std", "tvd") if k in base}
+        if noise:
+            metrics["noise"] = noise
+        drift = bool(is_drift(metrics, noise))
+        metrics.pop("null_diff", None)
+        report["columns"].append({"column": name, **metrics, "drift": drift})
+    report["sampled_rows"] = [len(rows_a), len(rows_b)]
+    drifted = any(c["drift"] for c in report["columns"]) or report["missing_columns"] or report["added_columns"]
+    report["status"] = "drift" if drifted or only_a or only_b else "no_drift"
+    return report
+
+
+def print_report(report):
+    rows_a, rows_b = report["rows"]
+    print(f"A: {report['a']} ({rows_a} satır)\nB: {report['b']} ({rows_b} satır)")
+    print(f"{report['hours']} saatin {report['identical_hours']} tanesi birebir aynı, "
+          f"{len(report['changed_hours'])} tanesi farklı; yalnızca A'da {len(report['only_in_a'])}, yalnızca B'de {len(report['only_in_b'])}.")
+    if report["missing_columns"] or report["added_columns"]:
+        print(f"Eksik sütunlar: {report['missing_columns']}  Yeni sütunlar: {report['added_columns']}")
+    for c in report["columns"]:
+        flag = "SAPMA" if c["drift"] else "ok"
+        if c["kind"] == "numeric" and "ks" in c:
+            noise = f", gürültü KS {c['noise']['ks']}" if "ks" in c.get("noise", {}) else f" (kritik {c['ks_critical']})"
+            print(f"  [{flag:5}] {c['column']}: ort {c['mean'][0]} -> {c['mean'][1]}, p99 {c['p99'][0]} -> {c['p99'][1]}, "
+                  f"KS {c['ks']}{noise}, kayma {c['mean_shift_std']} std")
+        elif c["kind"] == "text":
+            noise = f" (gürültü {c['noise']['tvd']})" if "tvd" in c.get("noise", {}) else ""
+            print(f"  [{flag:5}] {c['column']}: {c['distinct'][0]} -> {c['distinct'][1]} farklı değer, TVD {c['tvd']}{noise}")
+        else:
+            print(f"  [{flag:5}] {c['column']}: boş oranı {c['null_rate'][0]} -> {c['null_rate'][1]}")
+    print({"identical": "Sonuç: veri setleri birebir aynı.",
+           "no_drift": "Sonuç: farklar var ancak dağılımlar aynı (RNG gürültüsü düzeyinde).",
+           "drift": "Sonuç: dağılım sapması var."}[report["status"]])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="İki üretici çıktısını saatlik özetler ve sütun dağılımlarıyla karşılaştırır.")
+    parser.add_argument("a", help="Referans veri seti (CSV)")
+    parser.add_argument("b", help="Karşılaştırılan veri seti (CSV)")
+    parser.add_argument("--baseline", action="append", default=[],
+                        help="A ile aynı kod ve ayarlarla farklı tohumla üretilmiş veri seti (RNG gürültüsü düzeyi için; tekrarlanabilir)")
+    parser.add_argument("--json", help="Raporu bu JSON dosyasına da yaz")
+    parser.add_argument("--sample-per-hour", type=int, default=SAMPLE_ROWS_PER_HOUR, help="Farklı saat başına örneklenen satır")
+    args = parser.parse_args()
+
+    report = diff_datasets(args.a, args.b, args.baseline, args.sample_per_hour)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    sys.exit(1 if report["status"] == "drift" else 0)  # CI'da sapma başarısızlık sayılır
@@ -0,0 +1,104 @@
+import argparse
+import datetime
+import os
+import numpy as np
+
+from columnar_store import open_columnar, TIMESTAMP_FORMAT, STORE_FORMAT_VERSION
+
+# --- Bellek Eşlemeli Veri Seti Okuyucu ---
+# columnar_store.py ile oluşturulan depoyu açar. Satırlar (saat, İKA, dakika) sırasıyla
+# tutulduğu için her (saat, İKA) dilimi tek bir bitişik aralıktır; aralık sınırları
+# hour_unit_index.bin'den O(1) okunur ve sütunlar kopyalanmadan NumPy görünümü olarak döner.
+
+
+class DatasetReader:
+    """Sütunlu depo üzerinde saat ve İKA indeksli okuyucu"""
+
+    def __init__(self, store_dir):
+        self.store_dir = store_dir
+        self.meta, self.columns = open_columnar(store_dir)
+        if self.meta.get("format_version") != STORE_FORMAT_VERSION or self.meta.get("layout") != "hour_unit":
+            raise ValueError(f"'{store_dir}' eski biçimde; columnar_store.py ile yeniden dönüştürün.")
+        self.units = self.meta["units"]
+        self.unit_codes = {unit_id: code for code, unit_id in enumerate(self.units)}
+        self.hours = self.meta["hours"]
+        self.start_time = datetime.datetime.strptime(self.meta["start_time"], TIMESTAMP_FORMAT) if self.meta["start_time"] else None
+        shape = (self.hours, len(self.units) + 1)
+        index_path = os.path.join(store_dir, self.meta["index_file"])
+        if self.hours and self.units:
+            self.index = np.memmap(index_path, dtype=np.int64, mode="r", shape=shape)
+        else:
+            self.index = np.zeros(shape, dtype=np.int64)
+
+    def __len__(self):
+        return self.meta["row_count"]
+
+    def unit_code(self, ika_id):
+        """İKA kimliğini depo içindeki koda çevirir"""
+        try:
+            return self.unit_codes[ika_id]
+        except KeyError:
+            raise KeyError(f"Bilinmeyen İKA: {ika_id}") from None
+
+    # --- Satır aralıkları ---
+    def hour_range(self, hour_start, hour_end=None):
+        """[hour_start, hour_end) saatlerini kapsayan (başlangıç, bitiş) satır aralığı"""
+        if hour_end is None:
+            hour_end = hour_start + 1
+        hour_start = max(0, hour_start)
+        hour_end = min(self.hours, hour_end)
+        if hour_end <= hour_start:
+            return 0, 0
+        return int(self.index[hour_start, 0]), int(self.index[hour_end - 1, -1])
+
+    def unit_range(self, hour, ika_id):
+        """Tek bir (saat, İKA) diliminin satır aralığı"""
+        if not 0 <= hour < self.hours:
+            return 0, 0
+        code = self.unit_code(ika_id)
+        return int(self.index[hour, code]), int(self.index[hour, code + 1])
+
+    # --- Görünümler ---
+    def column(self, name, hour=None, ika_id=None):
+        """Sütunun tamamı, bir saati veya bir (saat, İKA) dilimi için kopyasız görünüm"""
+        values = self.columns[name]
+        if hour is None:
+            return values
+        lo, hi = self.unit_range(hour, ika_id) if ika_id is not None else self.hour_range(hour)
+        return values[lo:hi]
+
+    def slice(self, hour, ika_id, columns=None):
+        """(saat, İKA) dilimi için {sütun: görünüm} sözlüğü"""
+        lo, hi = self.unit_range(hour, ika_id)
+        names = columns or list(self.columns)
+        return {name: self.columns[name][lo:hi] for name in names}
+
+    def unit_track(self, ika_id, columns=None):
+        """Bir İKA'nın tüm saatlerdeki satırları (saat başına bir görünüm birleştirilir)"""
+        code = self.unit_code(ika_id)
+        names = columns or list(self.columns)
+        ranges = [(int(self.index[h, code]), int(self.index[h, code + 1])) for h in range(self.hours)]
+        return {name: np.concatenate([self.columns[name][lo:hi] for lo, hi in ranges]) if ranges
+                else self.columns[name][:0] for name in names}
+
+    def timestamps(self, minutes):
+        """Dakika ofsetlerini ISO zaman damgası dizgilerine çevirir"""
+        return [(self.start_time + datetime.timedelta(minutes=int(m))).strftime(TIMESTAMP_FORMAT) for m in minutes]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sütunlu depodan tek bir (saat, İKA) dilimini okur.")
+    parser.add_argument("store_dir")
+    parser.add_argument("--hour", type=int, default=0, help="Başlangıçtan itibaren saat indeksi")
+    parser.add_argument("--ika", help="İKA kimliği (örn. IKA_001); verilmezse saat özeti yazdırılır")
+    args = parser.parse_args()
+
+    reader = DatasetReader(args.store_dir)
+    print(f"{reader.meta['city']}: {len(reader)} satır, {reader.hours} saat, {len(reader.units)} İKA")
+    if args.ika:
+        part = reader.slice(args.hour, args.ika)
+        for ts, lat, lon, pm25 in zip(reader.timestamps(part["minute"]), part["Latitude"], part["Longitude"], part["PM2.5_ug_m3"]):
+            print(f"{ts}  {lat:.6f}, {lon:.6f}  PM2.5={pm25:.2f}")
+    else:
+        lo, hi = reader.hour_range(args.hour)
+        print(f"Saat {args.hour}: satır {lo}-{hi} ({hi - lo} kayıt)")
@@ -0,0 +1,261 @@
+import argparse
+import csv
+import json
+import math
+import os
+import numpy as np
+
+from columnar_store import META_FILE, canonical_column_name, column_file_name
+from dataset_reader import DatasetReader
+
+# --- İlçe Atama (Nokta-Çokgen İndeksi) ---
+# İlçe sınırları (GeoJSON Polygon/MultiPolygon, delikler dahil) düzenli bir ızgaraya
+# hazırlanır. Hiçbir sınır kenarının geçmediği hücreler tamamen tek bir ilçenin içinde
+# (ya da dışında) olduğundan bu hücrelerdeki noktalar tek bir tablo okumasıyla etiketlenir.
+# Sınır hücrelerinde hücre merkezinin hangi ilçelerde olduğu önceden (tarama çizgisiyle)
+# hesaplanır; nokta, merkezle arasındaki doğru parçasının yalnızca o hücredeki kenarları
+# kaç kez kestiğine bakılarak (tek/çift) etiketlenir. Tüm sorgular NumPy ile toplu yapılır.
+
+DISTRICT_CELL_DEG = 0.005  # Izgara hücre boyu (derece, ~500 m)
+MAX_GRID_CELLS = 4_000_000  # Izgara bundan büyük olacaksa hücre boyu büyütülür
+LOOKUP_CHUNK = 1 << 20  # Tek seferde etiketlenen nokta sayısı
+DISTRICT_COLUMN = "district"
+DISTRICT_DTYPE = "int16"  # -1: hiçbir ilçede değil
+NAME_PROPERTIES = ("name", "NAME", "ilce_adi", "ILCE_ADI", "ilce", "ILCE", "district", "NAME_2", "display_name")
+
+
+def load_geojson(path, name_property=None):
+    """GeoJSON'daki (Multi)Polygon özelliklerini okur; [(ad, [halka dizileri (N, 2) boylam/enlem])] döndürür"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    features = data["features"] if data.get("type") == "FeatureCollection" else [data]
+    districts = []
+    for number, feature in enumerate(features):
+        geometry = feature.get("geometry") or {}
+        if geometry.get("type") == "Polygon":
+            polygons = [geometry["coordinates"]]
+        elif geometry.get("type") == "MultiPolygon":
+            polygons = geometry["coordinates"]
+        else:
+            continue
+        properties = feature.get("properties") or {}
+        keys = [name_property] if name_property else NAME_PROPERTIES
+        name = next((str(properties[k]) for k in keys if properties.get(k) not in (None, "")), f"ilce_{number}")
+        rings = [np.asarray(ring, dtype=np.float64)[:, :2] for polygon in polygons for ring in polygon if len(ring) >= 3]
+        districts.append((name, rings))
+    return districts
+
+
+class DistrictIndex:
+    """İlçe çokgenleri için ızgara kovalı nokta-çokgen indeksi; çakışmalarda ilk ilçe kazanır"""
+
+    def __init__(self, districts, cell_deg=DISTRICT_CELL_DEG):
+        self.names = [name for name, _ in districts]
+        ax, ay, bx, by, owner = [], [], [], [], []
+        for code, (_, rings) in enumerate(districts):
+            for ring in rings:
+                a, b = ring, np.roll(ring, -1, axis=0)  # Halka kapalı olsun olmasın son kenar eklenir
+                ax.append(a[:, 0]), ay.append(a[:, 1]), bx.append(b[:, 0]), by.append(b[:, 1])
+                owner.append(np.full(len(ring), code, dtype=np.int64))
+        if not owner:
+            raise ValueError("GeoJSON içinde çokgen bulunamadı")
+        self.ax, self.ay, self.bx, self.by = (np.concatenate(v) for v in (ax, ay, bx, by))
+        self.edge_owner = np.concatenate(owner)
+        self.x0, self.y0 = float(min(self.ax.min(), self.bx.min())), float(min(self.ay.min(), self.by.min()))
+        width = float(max(self.ax.max(), self.bx.max())) - self.x0
+        height = float(max(self.ay.max(), self.by.max())) - self.y0
+        cell_deg = max(cell_deg, math.sqrt(max(width * height, 1e-12) / MAX_GRID_CELLS))
+        self.cell_deg = cell_deg
+        self.cols = int(width // cell_deg) + 1
+        self.rows = int(height // cell_deg) + 1
+        self._build()
+
+    def _build(self):
+        n_cells, n_codes = self.rows * self.cols, len(self.names)
+        cs = self.cell_deg
+        # Kenar -> kapsadığı hücreler (kenarın sınır kutusu; fazlası sonuç değiştirmez)
+        c0 = np.floor((np.minimum(self.ax, self.bx) - self.x0) / cs).astype(np.int64)
+        c1 = np.floor((np.maximum(self.ax, self.bx) - self.x0) / cs).astype(np.int64)
+        r0 = np.floor((np.minimum(self.ay, self.by) - self.y0) / cs).astype(np.int64)
+        r1 = np.floor((np.maximum(self.ay, self.by) - self.y0) / cs).astype(np.int64)
+        c1, r1 = np.minimum(c1, self.cols - 1), np.minimum(r1, self.rows - 1)
+        widths, heights = c1 - c0 + 1, r1 - r0 + 1
+        counts = widths * heights
+        edge = np.repeat(np.arange(len(self.ax)), counts)
+        k = np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cell = (r0[edge] + k // widths[edge]) * self.cols + c0[edge] + k % widths[edge]
+        order = np.lexsort((edge, cell))
+        self.cell_edges = edge[order]
+        self.edge_starts = np.searchsorted(cell[order], np.arange(n_cells + 1))
+        boundary_cell, boundary_code = _unique_pairs(cell, self.edge_owner[edge])
+        self.boundary = np.zeros(n_cells, dtype=bool)
+        self.boundary[boundary_cell] = True
+        self.candidate_starts = np.searchsorted(boundary_cell, np.arange(n_cells + 1))
+        self.candidate_codes = boundary_code
+
+        # Hücre merkezlerinin her ilçe için içeride olup olmadığı: merkez satırlarında tarama çizgisi
+        ymin, ymax = np.minimum(self.ay, self.by), np.maximum(self.ay, self.by)
+        row_lo = np.clip(np.ceil((ymin - self.y0) / cs - 0.5), 0, self.rows).astype(np.int64)
+        row_hi = np.clip(np.ceil((ymax - self.y0) / cs - 0.5), 0, self.rows).astype(np.int64)
+        spans = np.maximum(row_hi - row_lo, 0)
+        edge = np.repeat(np.arange(len(self.ax)), spans)
+        row = row_lo[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(spans) - spans, spans)
+        y = self.y0 + (row + 0.5) * cs
+        x = self.ax[edge] + (y - self.ay[edge]) * (self.bx[edge] - self.ax[edge]) / (self.by[edge] - self.ay[edge])
+        first_col = np.clip(np.ceil((x - self.x0) / cs - 0.5), 0, self.cols).astype(np.int64)  # Merkezi x'ten büyük ilk sütun
+        self.center_code = np.full(n_cells, -1, dtype=np.int64)
+        self.background = np.full(n_cells, -1, dtype=np.int64)
+        self.candidate_inside = np.zeros(len(boundary_code), dtype=bool)
+        edge_code = self.edge_owner[edge]
+        for code in range(n_codes):
+            mine = edge_code == code
+            toggles = np.zeros((self.rows, self.cols + 1), dtype=np.int32)
+            np.add.at(toggles, (row[mine], first_col[mine]), 1)
+            inside = (np.cumsum(toggles[:, :-1], axis=1) % 2 == 1).reshape(-1)
+            self.center_code[inside & (self.center_code < 0)] = code
+            candidate = boundary_cell[boundary_code == code]
+            self.candidate_inside[boundary_code == code] = inside[candidate]
+            plain = inside.copy()
+            plain[candidate] = False  # Bu hücrelerde ilçe sınırı var; nokta bazında sınanır
+            self.background[plain & (self.background < 0)] = code
+
+    def lookup(self, lat, lon):
+        """Noktaların ilçe kodlarını döndürür (-1: hiçbir ilçede değil)"""
+        lat = np.asarray(lat, dtype=np.float64)
+        lon = np.asarray(lon, dtype=np.float64)
+        codes = np.empty(len(lat), dtype=np.int64)
+        for lo in range(0, len(lat), LOOKUP_CHUNK):
+            hi = min(lo + LOOKUP_CHUNK, len(lat))
+            codes[lo:hi] = self._lookup_chunk(lat[lo:hi], lon[lo:hi])
+        return codes
+
+    def _lookup_chunk(self, lat, lon):
+        cs = self.cell_deg
+        col = np.floor((lon - self.x0) / cs)
+        row = np.floor((lat - self.y0) / cs)
+        on_grid = (col >= 0) & (col < self.cols) & (row >= 0) & (row < self.rows)  # NaN'lar da dışarıda kalır
+        cell = np.where(on_grid, row * self.cols + col, 0).astype(np.int64)
+        codes = np.where(on_grid, self.center_code[cell], -1)
+        points = np.flatnonzero(on_grid & self.boundary[cell])
+        if len(points) == 0:
+            return codes
+        pcell = cell[points]
+        codes[points] = self.background[pcell]
+        px, py = lon[points], lat[points]
+        cx = self.x0 + (pcell % self.cols + 0.5) * cs
+        cy = self.y0 + (pcell // self.cols + 0.5) * cs
+
+        # Nokta -> hücre merkezi parçasının hücredeki kenarlarla kesişimleri
+        counts = self.edge_starts[pcell + 1] - self.edge_starts[pcell]
+        which = np.repeat(np.arange(len(points)), counts)
+        edge = self.cell_edges[np.repeat(self.edge_starts[pcell], counts) + np.arange(len(which)) -
+                               np.repeat(np.cumsum(counts) - counts, counts)]
+        ax, ay, bx, by = self.ax[edge], self.ay[edge], self.bx[edge], self.by[edge]
+        qx, qy, rx, ry = px[which], py[which], cx[which], cy[which]
+        side_a = (rx - qx) * (ay - qy) - (ry - qy) * (ax - qx) > 0
+        side_b = (rx - qx) * (by - qy) - (ry - qy) * (bx - qx) > 0
+        side_p = (bx - ax) * (qy - ay) - (by - ay) * (qx - ax) > 0
+        side_c = (bx - ax) * (ry - ay) - (by - ay) * (rx - ax) > 0
+        crossing = (side_a != side_b) & (side_p != side_c)
+        n_codes = len(self.names)
+        flips = np.bincount(which[crossing] * n_codes + self.edge_owner[edge[crossing]], minlength=len(points) * n_codes) % 2
+
+        # Aday ilçeler: merkez içerideyse ve tek sayıda kesişim yoksa (ya da tersi) nokta içeridedir
+        counts = self.candidate_starts[pcell + 1] - self.candidate_starts[pcell]
+        which = np.repeat(np.arange(len(points)), counts)
+        candidate = np.repeat(self.candidate_starts[pcell], counts) + np.arange(len(which)) - np.repeat(np.cumsum(counts) - counts, counts)
+        cand_code = self.candidate_codes[candidate]
+        inside = self.candidate_inside[candidate] != (flips[which * n_codes + cand_code] == 1)
+        best = np.full(len(points), n_codes, dtype=np.int64)
+        np.minimum.at(best, which[inside], cand_code[inside])
+        current = codes[points]
+        codes[points] = np.where((best < n_codes) & ((current < 0) | (best < current)), best, current)
+        return codes
+
+
+def _unique_pairs(first, second):
+    """(first, second) çiftlerinin benzersiz, first'e göre sıralı listesi"""
+    if len(first) == 0:
+        return first, second
+    order = np.lexsort((second, first))
+    first, second = first[order], second[order]
+    keep = np.r_[True, (first[1:] != first[:-1]) | (second[1:] != second[:-1])]
+    return first[keep], second[keep]
+
+
+# --- Veri Setlerini Etiketleme ---
+def label_store(store_dir, index):
+    """Sütunlu depoya ilçe kodu sütunu ekler; ilçe adları meta.json'daki "districts" listesindedir"""
+    reader = DatasetReader(store_dir)
+    meta = dict(reader.meta)
+    path = os.path.join(store_dir, column_file_name(DISTRICT_COLUMN))
+    counts = np.zeros(len(index.names) + 1, dtype=np.int64)
+    with open(path + ".tmp", "wb") as f:
+        for lo in range(0, len(reader), LOOKUP_CHUNK):
+            hi = min(lo + LOOKUP_CHUNK, len(reader))
+            codes = index.lookup(reader.columns["Latitude"][lo:hi], reader.columns["Longitude"][lo:hi])
+            codes.astype(DISTRICT_DTYPE).tofile(f)
+            counts += np.bincount(codes + 1, minlength=len(counts))
+    os.replace(path + ".tmp", path)
+    meta["districts"] = index.names
+    meta["columns"][DISTRICT_COLUMN] = {"dtype": DISTRICT_DTYPE, "file": column_file_name(DISTRICT_COLUMN)}
+    with open(os.path.join(store_dir, META_FILE), "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    return counts
+
+
+def label_csv(csv_path, out_path, index, chunk_rows=LOOKUP_CHUNK):
+    """CSV'yi parça parça okuyup her satıra District sütununu (ilçe adı, dışarıdaysa boş) ekler"""
+    names = np.asarray(index.names + [""], dtype=object)  # -1 kodu boş ada düşer
+    counts = np.zeros(len(index.names) + 1, dtype=np.int64)
+    with open(csv_path, newline="", encoding="utf-8") as src, open(out_path, "w", newline="", encoding="utf-8") as dst:
+        reader = csv.reader(src)
+        writer = csv.writer(dst)
+        header = next(reader)
+        columns = [canonical_column_name(h) for h in header]
+        lat_col, lon_col = columns.index("Latitude"), columns.index("Longitude")
+        writer.writerow(header + ["District"])
+        rows = []
+        for row in reader:
+            if row:
+                rows.append(row)
+            if len(rows) >= chunk_rows:
+                counts += _write_labelled(writer, rows, lat_col, lon_col, index, names)
+                rows = []
+        if rows:
+            counts += _write_labelled(writer, rows, lat_col, lon_col, index, names)
+    return counts
+
+
+def _write_labelled(writer, rows, lat_col, lon_col, index, names):
+    lat = np.array([r[lat_col] or "nan" for r in rows], dtype=np.float64)
+    lon = np.array([r[lon_col] or "nan" for r in rows], dtype=np.float64)
+    codes = index.lookup(lat, lon)
+    writer.writerows(row + [name] for row, name in zip(rows, names[codes]))
+    return np.bincount(codes + 1, minlength=len(names))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ölçümlere GeoJSON ilçe sınırlarından ilçe kodu/adı ekler.")
+    parser.add_argument("geojson", help="İlçe sınırları (Polygon/MultiPolygon FeatureCollection)")
+    parser.add_argument("target", help="Sütunlu depo klasörü ya da CSV veri seti")
+    parser.add_argument("out_csv", nargs="?", help="CSV girdide çıktı dosyası (District sütunu eklenmiş)")
+    parser.add_argument("--name-property", help="İlçe adının okunacağı özellik (varsayılan: name, ilce_adi, ...)")
+    parser.add_argument("--cell-deg", type=float, default=DISTRICT_CELL_DEG, help="İndeks ızgara hücre boyu (derece)")
+    args = parser.parse_args()
+
+    index = DistrictIndex(load_geojson(args.geojson, args.name_property), args.cell_deg)
+    print(f"{len(index.names)} ilçe, {len(index.ax)} kenar; ızgara {index.rows}x{index.cols}, "
+          f"{int(index.boundary.sum())} sınır hücresi")
+    if os.path.isdir(args.target):
+        counts = label_store(args.target, index)
+        print(f"'{args.target}' deposuna '{DISTRICT_COLUMN}' sütunu eklendi.")
+    else:
+        if not args.out_csv:
+            raise SystemExit("CSV girdisi için çıktı dosyası verin.")
+        counts = label_csv(args.target, args.out_csv, index)
+        print(f"District sütunu eklendi -> '{args.out_csv}'")
+    for code in np.argsort(-counts[1:])[:10]:
+        if counts[code + 1]:
+            print(f"  {index.names[code]}: {counts[code + 1]} satır")
+    print(f"  (ilçe dışı: {counts[0]} satır)")
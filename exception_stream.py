@@ -0,0 +1,340 @@
+import argparse
+import csv
+import datetime
+import itertools
+import os
+import tempfile
+
+from columnar_store import canonical_column_name, TIMESTAMP_FORMAT
+from hotspot_clusters import HEALTH_THRESHOLDS, NIGHT_THRESHOLDS
+
+# --- İstisna ile Raporlama (Report-by-Exception) Çıktısı ---
+# Her İKA'nın her kanalı (sensörler, konum, hedef) yalnızca son yazılan değerden kanal
+# eşiğinden (deadband) fazla saptığında ya da kalp atışı süresi dolduğunda yazılır.
+# Eşikler verinin kullanımından türetilir, akış boyutundan değil: uyarı/tehlike eşiği olan
+# sensörlerde uyarı-tehlike aralığının ALERT_BAND_FRACTION kadarı (gece eşikleri daha sıkıysa
+# onlar), diğerlerinde sensör çözünürlüğü. Geri kurulan değer gerçek değerden en fazla eşik
+# kadar saptığından geri kurulan veriden hesaplanan uyarı düzeyleri de en fazla bu kadar kayar.
+# Üreticiler bazı kanalları (manyetik alan, gündüz ışığı) her dakika bağımsız rastgele
+# ürettiği için bu kanallar neredeyse her dakika yazılır; akış oranı buna göre raporlanır.
+# Çıktı seyrek geniş tablodur: başlık yoğun CSV'nin sütunlarıdır, her (dakika, İKA) için en
+# az bir kanal değiştiyse tek satır yazılır, değişmeyen hücreler boş bırakılır ve sondaki boş
+# hücreler atılır. İlk istekteki uzun biçim (zaman, İKA, sensör, değer) her değer için zaman
+# damgasını ve İKA kimliğini tekrarladığından yoğun CSV'den büyük çıkıyordu; geniş tablo aynı
+# bilgiyi (yazılan her hücre bir istisnadır) satır başına bir kez tekrarla taşır.
+# Konum kanalları ölü hesapla (dead reckoning) izlenir: son iki yazılan konumdan doğrusal
+# öngörüden eşik kadar sapınca yazılır; güzergahlar parça parça doğrusal olduğundan hareket
+# eden İKA'lar yalnızca dönüşlerde satır üretir. Timestamp bir önceki satırla aynıysa boş bırakılır. Bir İKA'nın ilk dakikasında ve akışın
+# son dakikasında tüm kanallar yazılır; okuyucu boş hücreleri son yazılan değerle (konumda
+# aynı doğrusal öngörüyle) doldurarak dakikalık tam tabloyu yeniden kurar.
+
+HEARTBEAT_MINUTES = 30  # Değişmese bile her kanalın en geç yazılma aralığı
+EMPTY_VALUE = "NA"  # Yoğun satırdaki gerçekten boş değer (boş hücre "değişmedi" anlamına gelir)
+ALERT_BAND_FRACTION = 0.25  # Eşik = uyarı-tehlike aralığının bu kesri
+POSITION_TOLERANCE = 1e-6  # check: öngörülen konumların yazım yuvarlaması (6 ondalık)
+
+
+def alert_deadband(sensor):
+    """Sensörün en dar uyarı-tehlike aralığının ALERT_BAND_FRACTION kadarı (gündüz ve gece eşikleri)"""
+    warning, danger = HEALTH_THRESHOLDS[sensor]
+    if isinstance(warning, tuple):  # Alt/üst sınırlı: iki yandaki aralığın darı
+        gap = min(warning[0] - danger[0], danger[1] - warning[1])
+    else:
+        gap = danger - warning
+    if sensor in NIGHT_THRESHOLDS:
+        _, _, night_warning, night_danger = NIGHT_THRESHOLDS[sensor]
+        gap = min(gap, night_danger - night_warning)
+    return ALERT_BAND_FRACTION * gap
+
+
+# Kanal başına mutlak eşik: son yazılan değerden (konumda öngörüden) sapma eşiği aşarsa yazılır.
+# Tabloda olmayan kanallar (örn. Target_Location, AQI sütunları) her değişimde yazılır.
+DEADBANDS = {
+    "Latitude": 0.0005, "Longitude": 0.0005, "Altitude_m": 5.0,  # Öngörüden ~50 m sapma
+    # Uyarı eşiği olmayan manyetik alan: 3 eksenli manyetometrelerin tipik çözünürlüğü (~1 µT)
+    "Magnetic_Field_X_uT": 1.0, "Magnetic_Field_Y_uT": 1.0, "Magnetic_Field_Z_uT": 1.0,
+}
+DEADBANDS.update({sensor: alert_deadband(sensor) for sensor in HEALTH_THRESHOLDS})
+
+EXTRAPOLATED = ("Latitude", "Longitude")  # Doğrusal öngörüyle izlenen kanallar
+EXTRAPOLATED_DIGITS = 6
+
+
+def _extrapolate(older, last, minute):
+    """Son iki yazılan (değer, dakika) çiftinden dakikadaki doğrusal öngörü"""
+    value, at = float(last[0]), last[1]
+    if older is None or at == older[1]:
+        return value
+    return value + (value - float(older[0])) / (at - older[1]) * (minute - at)
+
+
+def _changed(channel, last, value, deadbands):
+    rule = deadbands.get(channel)
+    if rule is None:
+        return value != last
+    try:
+        return abs(float(value) - float(last)) > rule
+    except ValueError:
+        return value != last
+
+
+def _encode(value):
+    return EMPTY_VALUE if value == "" or value is None else value
+
+
+class ExceptionStreamWriter:
+    """Yoğun satırları alıp yalnızca istisnaları seyrek geniş CSV'ye yazan yazıcı"""
+
+    def __init__(self, path, header, deadbands=DEADBANDS, heartbeat_minutes=HEARTBEAT_MINUTES):
+        self.header = [canonical_column_name(h) for h in header]
+        self.time_col = self.header.index("Timestamp")
+        self.unit_col = self.header.index("Ika_ID")
+        self.channels = [(i, name) for i, name in enumerate(self.header) if i not in (self.time_col, self.unit_col)]
+        self.deadbands = deadbands
+        self.heartbeat_minutes = heartbeat_minutes
+        self.last = {}  # İKA -> {kanal: (son yazılan değer, dakika)}
+        self.anchors = {}  # İKA -> {öngörülen kanal: bir önceki yazılan (değer, dakika)}
+        self.latest = {}  # İKA -> (dakika, satır); kapanışta son durum yazılır
+        self.dense_values = 0
+        self.emitted = 0
+        self.dense_bytes = 0  # Aynı satırların yoğun CSV'de kaplayacağı yaklaşık boyut
+        self.previous_timestamp = None
+        self.path = path
+        self.file = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(["Timestamp", "Ika_ID"] + [name for _, name in self.channels])
+
+    def __getstate__(self):
+        # Kontrol noktası için: dosya boşaltılır, açık dosya durumun dışında bırakılır
+        self.file.flush()
+        state = self.__dict__.copy()
+        state.pop("file")
+        state.pop("writer")
+        return state
+
+    def reopen(self):
+        """Kontrol noktasından dönüldüğünde dosyayı ekleme kipinde yeniden açar"""
+        self.file = open(self.path, "a", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.file)
+
+    def _emit(self, timestamp, unit_id, cells):
+        while cells and not cells[-1]:  # Sondaki boş hücreler yazılmaz (konum sütunları öndedir)
+            cells = cells[:-1]
+        self.writer.writerow(["" if timestamp == self.previous_timestamp else timestamp, unit_id] + cells)
+        self.previous_timestamp = timestamp
+
+    def write(self, minute_index, row):
+        """Tek bir yoğun satırı işler; yazılan kanal sayısını döndürür"""
+        unit_id = row[self.unit_col]
+        state = self.last.setdefault(unit_id, {})
+        anchors = self.anchors.setdefault(unit_id, {})
+        cells = []
+        written = 0
+        for i, channel in self.channels:
+            if i >= len(row):
+                cells.append("")
+                continue
+            value = row[i]
+            self.dense_values += 1
+            previous = state.get(channel)
+            reference = previous and previous[0]
+            if previous and channel in EXTRAPOLATED:
+                reference = _extrapolate(anchors.get(channel), previous, minute_index)
+            if previous is None or minute_index - previous[1] >= self.heartbeat_minutes \
+                    or _changed(channel, reference, value, self.deadbands):
+                cells.append(_encode(value))
+                if previous and channel in EXTRAPOLATED:
+                    anchors[channel] = previous
+                state[channel] = (value, minute_index)
+                written += 1
+            else:
+                cells.append("")
+        if written:
+            self._emit(row[self.time_col], unit_id, cells)
+        self.dense_bytes += sum(len(str(v)) for v in row) + len(row) + 1
+        self.latest[unit_id] = (minute_index, row)
+        self.emitted += written
+        return written
+
+    def close(self):
+        """Son dakikadaki tüm kanalları yazar ve dosyayı kapatır; (yoğun değer, yazılan değer) döndürür"""
+        if self.latest:
+            final_minute = max(minute for minute, _ in self.latest.values())
+            for unit_id, (minute, row) in self.latest.items():
+                if minute != final_minute:
+                    continue
+                state = self.last[unit_id]
+                cells = [_encode(row[i]) if i < len(row) and state[channel][1] != minute else "" for i, channel in self.channels]
+                if any(cells):
+                    self._emit(row[self.time_col], unit_id, cells)
+                    self.emitted += sum(1 for cell in cells if cell)
+        self.file.close()
+        return self.dense_values, self.emitted
+
+    def size_ratio(self):
+        """Akış dosyasının yoğun CSV boyutuna oranı (kapatıldıktan sonra)"""
+        return os.path.getsize(self.path) / max(self.dense_bytes, 1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_exception_stream(path):
+    """Seyrek akıştan yoğun tabloyu yeniden kurar; (başlık, satır üreteci) döndürür.
+
+    Satırlar dakika sırasıyla ve her dakikada İKA'ların ilk görülme sırasıyla üretilir;
+    boş hücreler son yazılan değerle doldurulur.
+    """
+    handle = open(path, newline="", encoding="utf-8")
+    reader = csv.reader(handle)
+    header = next(reader, [])
+    if header[:2] != ["Timestamp", "Ika_ID"] or header[2:] == ["Sensor", "Value"]:
+        handle.close()
+        raise ValueError(f"'{path}' bir istisna akışı değil (eski uzun biçimli akışlar yeniden üretilmeli)")
+    channels = header[2:]
+    extrapolated = [k for k, channel in enumerate(channels) if channel in EXTRAPOLATED]
+
+    def rows():
+        try:
+            state = {}  # İKA -> [değerler]; ekleme sırası İKA sırasıdır
+            anchors = {}  # İKA -> {kanal sırası: [bir önceki, son] yazılan (değer, dakika)}
+            current = None
+            start = None
+
+            def emit_until(timestamp):
+                # current dakikasından timestamp'e kadar (hariç) tüm dakikaları doldur
+                moment = datetime.datetime.strptime(current, TIMESTAMP_FORMAT)
+                end = datetime.datetime.strptime(timestamp, TIMESTAMP_FORMAT) if timestamp else moment + datetime.timedelta(minutes=1)
+                while moment < end:
+                    stamp = moment.strftime(TIMESTAMP_FORMAT)
+                    minute = int((moment - start).total_seconds() // 60)
+                    for unit_id, values in state.items():
+                        for k, (older, last) in anchors[unit_id].items():
+                            if last[1] != minute:
+                                values = values[:]
+                                values[k] = str(round(_extrapolate(older, last, minute), EXTRAPOLATED_DIGITS))
+                        yield [stamp, unit_id] + values
+                    moment += datetime.timedelta(minutes=1)
+
+            timestamp = None
+            for entry in reader:
+                if not entry:
+                    continue
+                timestamp = entry[0] or timestamp
+                if timestamp != current:
+                    if current is not None:
+                        yield from emit_until(timestamp)
+                    current = timestamp
+                    moment = datetime.datetime.strptime(current, TIMESTAMP_FORMAT)
+                    start = start or moment
+                    minute = int((moment - start).total_seconds() // 60)
+                values = state.setdefault(entry[1], [""] * len(channels))
+                unit_anchors = anchors.setdefault(entry[1], {})
+                for k, cell in enumerate(entry[2:2 + len(channels)]):
+                    if cell:
+                        values[k] = "" if cell == EMPTY_VALUE else cell
+                        if k in extrapolated:
+                            last = unit_anchors.get(k, (None, None))[1]
+                            unit_anchors[k] = (last, (values[k], minute))
+            if current is not None:
+                yield from emit_until(None)
+        finally:
+            handle.close()
+
+    return header, rows()
+
+
+def convert_csv(csv_path, out_path, deadbands=DEADBANDS, heartbeat_minutes=HEARTBEAT_MINUTES):
+    """Mevcut yoğun CSV'yi istisna akışına çevirir; (yoğun değer, yazılan değer) döndürür"""
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        header = next(reader)
+        start_time = None
+        with ExceptionStreamWriter(out_path, header, deadbands, heartbeat_minutes) as stream:
+            for row in reader:
+                if not row:
+                    continue
+                timestamp = datetime.datetime.strptime(row[stream.time_col], TIMESTAMP_FORMAT)
+                start_time = start_time or timestamp
+                stream.write(int((timestamp - start_time).total_seconds() // 60), row)
+    return stream.dense_values, stream.emitted
+
+
+def check_stream(csv_path, max_ratio=None):
+    """Yoğun CSV'yi geçici akışa çevirip geri kurar; her değerin kanal eşiği içinde geri geldiğini denetler.
+
+    Eşiği olan kanallarda en büyük sapma eşiği aşmamalı, diğer kanallar birebir aynı olmalıdır;
+    max_ratio verilirse akış boyut oranı da sınırlanır. (boyut oranı, yoğun satır sayısı,
+    geri kurulan satır sayısı, {kanal: (en büyük sapma, eşik)}, geçti mi) döndürür.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        stream_path = os.path.join(tmp, "istisna.csv")
+        convert_csv(csv_path, stream_path)
+        ratio = os.path.getsize(stream_path) / max(os.path.getsize(csv_path), 1)
+        header, rebuilt = read_exception_stream(stream_path)
+        channels = header[2:]
+        errors = {channel: 0.0 for channel in channels if channel in DEADBANDS}
+        mismatches = dense_rows = rebuilt_rows = 0
+        with open(csv_path, newline="", encoding="utf-8") as f:
+            reader = csv.reader(f)
+            dense_header = [canonical_column_name(h) for h in next(reader)]
+            order = [dense_header.index(name) for name in header]
+            for row, rebuilt_row in itertools.zip_longest((r for r in reader if r), rebuilt):
+                dense_rows += row is not None
+                rebuilt_rows += rebuilt_row is not None
+                if row is None or rebuilt_row is None:
+                    continue
+                row = [row[i] if i < len(row) else "" for i in order]
+                if row[:2] != rebuilt_row[:2]:
+                    mismatches += 1
+                    continue
+                for channel, value, restored in zip(channels, row[2:], rebuilt_row[2:]):
+                    if channel in errors and value and restored:
+                        errors[channel] = max(errors[channel], abs(float(value) - float(restored)))
+                    elif value != restored:
+                        mismatches += 1
+    within = all(error <= DEADBANDS[channel] + POSITION_TOLERANCE for channel, error in errors.items())
+    ok = within and not mismatches and rebuilt_rows == dense_rows and (max_ratio is None or ratio <= max_ratio)
+    return ratio, dense_rows, rebuilt_rows, {c: (e, DEADBANDS[c]) for c, e in errors.items()}, ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Yoğun veri setini istisna akışına çevirir veya akıştan yoğun tabloyu geri kurar.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enc = sub.add_parser("encode", help="Yoğun CSV -> istisna akışı")
+    enc.add_argument("csv_path")
+    enc.add_argument("out_path")
+    enc.add_argument("--heartbeat", type=int, default=HEARTBEAT_MINUTES, help="Kalp atışı aralığı (dakika)")
+    chk = sub.add_parser("check", help="Akıştan geri kurulan tablonun her değeri kanal eşiği içinde taşıdığını denetler, boyut oranını raporlar")
+    chk.add_argument("csv_path")
+    chk.add_argument("--max-ratio", type=float, help="İsteğe bağlı: izin verilen en büyük akış/yoğun boyut oranı")
+    dec = sub.add_parser("decode", help="İstisna akışı -> yoğun CSV (standart sütun adlarıyla)")
+    dec.add_argument("stream_path")
+    dec.add_argument("out_csv")
+    args = parser.parse_args()
+
+    if args.command == "encode":
+        dense, emitted = convert_csv(args.csv_path, args.out_path, heartbeat_minutes=args.heartbeat)
+        ratio = os.path.getsize(args.out_path) / max(os.path.getsize(args.csv_path), 1)
+        print(f"{dense} değerden {emitted} tanesi yazıldı (%{100 * emitted / max(dense, 1):.1f}, boyut %{100 * ratio:.1f}) -> '{args.out_path}'")
+    elif args.command == "check":
+        ratio, dense_rows, rebuilt_rows, errors, ok = check_stream(args.csv_path, args.max_ratio)
+        for channel, (error, deadband) in errors.items():
+            print(f"  {channel}: en büyük sapma {error:g} (eşik {deadband:g})")
+        print(f"Akış boyutu yoğun CSV'nin %{100 * ratio:.1f}'i" + (f" (sınır %{100 * args.max_ratio:.0f})" if args.max_ratio else "")
+              + f"; {dense_rows} yoğun satırdan {rebuilt_rows} satır geri kuruldu.")
+        if not ok:
+            raise SystemExit(1)
+    else:
+        header, dense_rows = read_exception_stream(args.stream_path)
+        count = 0
+        with open(args.out_csv, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(header)
+            for dense_row in dense_rows:
+                writer.writerow(dense_row)
+                count += 1
+        print(f"{count} satırlık yoğun tablo '{args.out_csv}' dosyasına yazıldı.")
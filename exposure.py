@@ -0,0 +1,242 @@
+import argparse
+import ast
+import csv
+import math
+import os
+import numpy as np
+
+from columnar_store import SENSOR_COLUMNS
+from dataset_reader import DatasetReader
+from hotspot_clusters import alert_levels, HEALTH_THRESHOLDS
+
+# --- Kilit Konumlarda Maruziyet Tahmini ---
+# Hastane, kampüs, meydan gibi alıcı noktaların (receptor) çevresindeki ölçümlerden
+# zaman ağırlıklı maruziyet hesaplanır. Alıcılar en büyük yarıçap boyunda ızgara
+# hücrelerine (CSR biçiminde) yerleştirilir; her ölçüm yalnızca kendi hücresi ve 8
+# komşusundaki alıcılarla eşleştirilir, böylece binlerce alıcıda da nokta başına tam tarama
+# yapılmaz. Depo saat blokları halinde tek geçişte okunur. Her (alıcı, yarıçap, dakika)
+# için yarıçap içindeki ölçümlerin ortalaması alınır; her kapsanan dakika 1 dakikalık
+# maruziyet sayılır. Ses düzeyi enerji ortalamasıyla (Leq) birleştirilir.
+
+METERS_PER_DEGREE = 111_320.0
+EXPOSURE_RADII_M = (250.0, 500.0, 1000.0)
+BLOCK_HOURS = 6  # Tek seferde bellekte işlenen saat sayısı
+MIN_COVERED_MINUTES = 10  # Sıralamaya girmek için gereken en az kapsanan dakika
+TOP_N = 5
+LOG_SCALE_SENSORS = ("Sound_Level_dB",)  # Desibel değerleri enerji uzayında ortalanır
+NEIGHBOR_OFFSETS = [(dx, dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)]
+
+# Şehir -> (üretici betik, kilit konum sözlüğünün adı); koordinatlar yarıçapa taşınmadan önceki gerçek konumlardır
+KEY_LOCATION_SOURCES = {
+    "istanbul": ("generate_istanbul_data.py", "istanbul_key_locations"),
+    "ankara": ("generate_ankara_data.py", "original_key_locations"),
+    "aydin": ("generate_aydin_data.py", "aydin_key_locations"),
+}
+
+
+def city_key_locations(city, root_dir=None):
+    """Üretici betikteki kilit konum sözlüğünü çalıştırmadan (AST ile) okur; {ad: (enlem, boylam)}"""
+    script, name = KEY_LOCATION_SOURCES[city]
+    path = os.path.join(root_dir or os.path.dirname(os.path.abspath(__file__)), script)
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], "id", None) == name:
+            return {key: tuple(pos) for key, pos in ast.literal_eval(node.value).items()}
+    raise ValueError(f"{script} içinde {name} bulunamadı")
+
+
+def load_receptors(path):
+    """Name,Latitude,Longitude sütunlu CSV'den alıcı noktalarını okur"""
+    receptors = {}
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            receptors[row["Name"]] = (float(row["Latitude"]), float(row["Longitude"]))
+    return receptors
+
+
+class ReceptorIndex:
+    """Alıcı noktaları için düzenli ızgara indeksi; ölçüm-alıcı çiftleri vektörel üretilir"""
+
+    def __init__(self, lat, lon, cell_m):
+        self.lat = np.asarray(lat, dtype=np.float64)
+        self.lon = np.asarray(lon, dtype=np.float64)
+        self.cell_m = cell_m
+        self.cos_lat = math.cos(math.radians(float(self.lat.mean()))) if len(self.lat) else 1.0
+        cx, cy = self._cells(self.lat, self.lon)
+        keys = self._key(cx, cy)
+        order = np.argsort(keys, kind="stable")
+        self.cell_keys, self.cell_starts = np.unique(keys[order], return_index=True)
+        self.cell_ends = np.r_[self.cell_starts[1:], len(order)]
+        self.points = order
+
+    def _xy(self, lat, lon):
+        return lon * METERS_PER_DEGREE * self.cos_lat, lat * METERS_PER_DEGREE
+
+    def _cells(self, lat, lon):
+        x, y = self._xy(lat, lon)
+        return np.floor(x / self.cell_m).astype(np.int64), np.floor(y / self.cell_m).astype(np.int64)
+
+    @staticmethod
+    def _key(cx, cy):
+        return cx * (1 << 32) + cy
+
+    def pairs(self, lat, lon, max_distance_m):
+        """max_distance_m içindeki (ölçüm indeksi, alıcı indeksi, mesafe²) dizilerini döndürür"""
+        cx, cy = self._cells(lat, lon)
+        x, y = self._xy(lat, lon)
+        readings, receptors = [], []
+        for dx, dy in NEIGHBOR_OFFSETS:
+            keys = self._key(cx + dx, cy + dy)
+            pos = np.minimum(np.searchsorted(self.cell_keys, keys), len(self.cell_keys) - 1)
+            found = self.cell_keys[pos] == keys
+            hit = np.flatnonzero(found)
+            counts = (self.cell_ends - self.cell_starts)[pos[hit]]
+            reading = np.repeat(hit, counts)
+            within = np.arange(len(reading)) - np.repeat(np.cumsum(counts) - counts, counts)
+            readings.append(reading)
+            receptors.append(self.points[np.repeat(self.cell_starts[pos[hit]], counts) + within])
+        reading = np.concatenate(readings)
+        receptor = np.concatenate(receptors)
+        rx, ry = self._xy(self.lat[receptor], self.lon[receptor])
+        d2 = (x[reading] - rx) ** 2 + (y[reading] - ry) ** 2
+        keep = d2 <= max_distance_m ** 2
+        return reading[keep], receptor[keep], d2[keep]
+
+
+def estimate_exposure(store_dir, receptors, radii=EXPOSURE_RADII_M, sensors=None, block_hours=BLOCK_HOURS):
+    """Depodaki ölçümlerden her alıcı, yarıçap ve sensör için maruziyet birikimlerini hesaplar.
+
+    {sensör: {"samples", "minutes", "sum", "exceed", "peak"}} döndürür; her dizi (alıcı, yarıçap) boyutludur.
+    "sum" dakika ortalamalarının toplamıdır (ses için enerji uzayında).
+    """
+    reader = DatasetReader(store_dir)
+    sensors = [s for s in (sensors or SENSOR_COLUMNS) if s in reader.columns]
+    names = list(receptors)
+    index = ReceptorIndex([receptors[n][0] for n in names], [receptors[n][1] for n in names], max(radii))
+    n_rec, n_rad = len(names), len(radii)
+    shape = (n_rec, n_rad)
+    totals = {s: {"samples": np.zeros(shape), "minutes": np.zeros(shape), "sum": np.zeros(shape),
+                  "exceed": np.zeros(shape), "peak": np.full(shape, -np.inf)} for s in sensors}
+    start = reader.start_time
+    start_offset = start.hour * 60 + start.minute if start else 0
+    radii2 = np.asarray(radii, dtype=np.float64) ** 2
+
+    for block_start in range(0, reader.hours, block_hours):
+        lo, hi = reader.hour_range(block_start, block_start + block_hours)
+        if hi <= lo or n_rec == 0:
+            continue
+        lat = np.asarray(reader.columns["Latitude"][lo:hi], dtype=np.float64)
+        lon = np.asarray(reader.columns["Longitude"][lo:hi], dtype=np.float64)
+        minute = np.asarray(reader.columns["minute"][lo:hi], dtype=np.int64)
+        located = np.isfinite(lat) & np.isfinite(lon)
+        reading, receptor, d2 = index.pairs(np.where(located, lat, 0.0), np.where(located, lon, 0.0), max(radii))
+        keep = located[reading]
+        reading, receptor, d2 = reading[keep], receptor[keep], d2[keep]
+        # Çift her yarıçapa (içindeyse) bir kez katılır
+        pair_reading, pair_cell = [], []
+        for r, limit in enumerate(radii2):
+            inside = d2 <= limit
+            pair_reading.append(reading[inside])
+            pair_cell.append(receptor[inside] * n_rad + r)
+        pair_reading = np.concatenate(pair_reading)
+        pair_cell = np.concatenate(pair_cell)
+        pair_minute = minute[pair_reading]
+        if len(pair_reading) == 0:
+            continue
+        for sensor in sensors:
+            values = np.asarray(reader.columns[sensor][lo:hi], dtype=np.float64)[pair_reading]
+            valid = np.isfinite(values)
+            if not valid.any():
+                continue
+            cells, minutes, values = pair_cell[valid], pair_minute[valid], values[valid]
+            if sensor in LOG_SCALE_SENSORS:
+                values = 10.0 ** (values / 10.0)
+            # (alıcı·yarıçap, dakika) başına ortalama
+            groups, inverse = np.unique(cells * (1 << 32) + minutes, return_inverse=True)
+            counts = np.bincount(inverse)
+            means = np.bincount(inverse, weights=values) / counts
+            group_cell = groups >> 32
+            group_minute = groups & ((1 << 32) - 1)
+            levels = means if sensor not in LOG_SCALE_SENSORS else 10.0 * np.log10(means)
+            hour_of_day = ((group_minute + start_offset) // 60) % 24
+            acc = totals[sensor]
+            size = n_rec * n_rad
+            acc["samples"] += np.bincount(group_cell, weights=counts, minlength=size).reshape(shape)
+            acc["minutes"] += np.bincount(group_cell, minlength=size).reshape(shape)
+            acc["sum"] += np.bincount(group_cell, weights=means, minlength=size).reshape(shape)
+            if sensor in HEALTH_THRESHOLDS:
+                exceeded = alert_levels(sensor, levels, hour_of_day) >= 1
+                acc["exceed"] += np.bincount(group_cell, weights=exceeded, minlength=size).reshape(shape)
+            np.maximum.at(acc["peak"].reshape(-1), group_cell, levels)
+    return names, totals
+
+
+def exposure_rows(names, receptors, radii, totals, min_minutes=MIN_COVERED_MINUTES):
+    """Birikimleri rapor satırlarına çevirir; her (sensör, yarıçap) için zaman ağırlıklı ortalamaya göre sıralar"""
+    rows = []
+    for sensor, acc in totals.items():
+        minutes = acc["minutes"]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            twa = acc["sum"] / minutes
+        if sensor in LOG_SCALE_SENSORS:
+            with np.errstate(divide="ignore"):
+                twa = 10.0 * np.log10(twa)  # Leq
+            exposure = np.full(twa.shape, np.nan)  # Desibel için birikimli doz tanımlı değil
+        else:
+            exposure = acc["sum"] / 60.0  # birim·saat
+        for r, radius in enumerate(radii):
+            ranked = [i for i in np.argsort(-np.nan_to_num(twa[:, r], nan=-np.inf), kind="stable") if minutes[i, r] >= min_minutes]
+            ranks = {int(i): rank + 1 for rank, i in enumerate(ranked)}
+            for i, name in enumerate(names):
+                if minutes[i, r] == 0:
+                    continue
+                rows.append({
+                    "Sensor": sensor, "Radius_m": radius, "Rank": ranks.get(i, ""), "Location": name,
+                    "Latitude": receptors[name][0], "Longitude": receptors[name][1],
+                    "Samples": int(acc["samples"][i, r]), "Covered_Minutes": int(minutes[i, r]),
+                    "TWA": round(float(twa[i, r]), 4),
+                    "Exposure_Unit_Hours": "" if np.isnan(exposure[i, r]) else round(float(exposure[i, r]), 4),
+                    "Exceed_Minutes": int(acc["exceed"][i, r]),
+                    "Peak": round(float(acc["peak"][i, r]), 4),
+                })
+    rows.sort(key=lambda row: (row["Sensor"], row["Radius_m"], row["Rank"] == "", row["Rank"] or 0))
+    return rows
+
+
+def write_rows(rows, path):
+    fields = ["Sensor", "Radius_m", "Rank", "Location", "Latitude", "Longitude", "Samples",
+              "Covered_Minutes", "TWA", "Exposure_Unit_Hours", "Exceed_Minutes", "Peak"]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Kilit konumlar çevresinde zaman ağırlıklı kirletici ve gürültü maruziyetini hesaplar.")
+    parser.add_argument("store_dir", help="columnar_store.py ile oluşturulan depo")
+    parser.add_argument("out_csv")
+    parser.add_argument("--city", choices=sorted(KEY_LOCATION_SOURCES), help="Kilit konumları alınacak şehir (varsayılan: depo meta bilgisi)")
+    parser.add_argument("--receptors", help="Name,Latitude,Longitude sütunlu alıcı CSV'si (kilit konumlar yerine)")
+    parser.add_argument("--radius", type=float, nargs="+", default=list(EXPOSURE_RADII_M), help="Yarıçaplar (metre)")
+    parser.add_argument("--sensor", action="append", choices=SENSOR_COLUMNS, help="Sensör (tekrarlanabilir; varsayılan: tümü)")
+    parser.add_argument("--top", type=int, default=TOP_N, help="Konsolda gösterilecek sıralama uzunluğu")
+    args = parser.parse_args()
+
+    if args.receptors:
+        receptors = load_receptors(args.receptors)
+    else:
+        city = args.city or DatasetReader(args.store_dir).meta.get("city")
+        if city not in KEY_LOCATION_SOURCES:
+            raise SystemExit(f"Kilit konumları bilinmeyen şehir: {city} (--city veya --receptors verin)")
+        receptors = city_key_locations(city)
+    radii = sorted(args.radius)
+    names, totals = estimate_exposure(args.store_dir, receptors, radii, args.sensor)
+    rows = exposure_rows(names, receptors, radii, totals)
+    write_rows(rows, args.out_csv)
+    print(f"{len(receptors)} konum, {len(radii)} yarıçap: {len(rows)} satır -> '{args.out_csv}'")
+    for sensor in totals:
+        top = [row for row in rows if row["Sensor"] == sensor and row["Radius_m"] == radii[0] and row["Rank"] != ""][:args.top]
+        if top:
+            print(f"{sensor} ({radii[0]:g} m): " + ", ".join(f"{row['Location']} {row['TWA']}" for row in top))
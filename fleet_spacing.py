@@ -0,0 +1,147 @@
+import csv
+import datetime
+import math
+import numpy as np
+
+from columnar_store import TIMESTAMP_FORMAT
+
+# --- Uzamsal Karma Izgarası ile Filo Aralığı ---
+# Her dakika tüm İKA konumları düzgün hücreli bir ızgaraya yerleştirilir: hücre anahtarları
+# sıralanıp CSR biçiminde gruplanır (O(n log n) sıralama, Python döngüsü yok). Komşu
+# sorgusu yalnızca aynı ve bitişik hücrelere bakar; her çift bir kez üretilsin diye
+# 9 komşu hücre yerine "yarım komşuluk" (kendi hücresi + 4 hücre) taranır. Bulunan
+# çiftlerle en küçük aralık zorlanır ve yeni başlayan yakınlaşmalar olay olarak raporlanır.
+
+METERS_PER_DEGREE = 111_320.0
+MIN_SEPARATION_M = 20.0  # İki İKA arasında izin verilen en küçük mesafe
+CLOSE_APPROACH_M = 100.0  # Bu mesafenin altına inen çiftler yakınlaşma olayı sayılır
+SEPARATION_ITERATIONS = 8  # Dakika başına itme turu (zincirleme çakışmaları çözmek için)
+KEY_STRIDE = 1 << 32  # Hücre (x, y) -> tek int64 anahtar
+HALF_NEIGHBORHOOD = ((1, -1), (1, 0), (1, 1), (0, 1))
+
+
+class SpatialHashGrid:
+    """Noktaları düzgün hücrelere yerleştirip sabit yarıçaplı komşu çiftlerini bulan ızgara"""
+
+    def __init__(self, cell_m, ref_lat):
+        self.cell_m = cell_m
+        self.cos_lat = math.cos(math.radians(ref_lat))
+        self.x = self.y = np.zeros(0)
+        self.order = self.keys = self.cell_keys = self.cell_starts = np.zeros(0, dtype=np.int64)
+
+    def rebuild(self, lat, lon):
+        """Izgarayı verilen konumlarla baştan kurar"""
+        self.y = np.asarray(lat, dtype=np.float64) * METERS_PER_DEGREE
+        self.x = np.asarray(lon, dtype=np.float64) * METERS_PER_DEGREE * self.cos_lat
+        keys = np.floor(self.x / self.cell_m).astype(np.int64) * KEY_STRIDE + np.floor(self.y / self.cell_m).astype(np.int64)
+        self.order = np.argsort(keys, kind="stable")
+        self.keys = keys[self.order]
+        self.cell_keys, self.cell_starts = np.unique(self.keys, return_index=True)
+        self.cell_starts = np.append(self.cell_starts, len(self.keys))
+
+    def _cell_ranges(self, keys):
+        idx = np.searchsorted(self.cell_keys, keys)
+        idx = np.minimum(idx, len(self.cell_keys) - 1)
+        found = self.cell_keys[idx] == keys
+        return np.where(found, self.cell_starts[idx], 0), np.where(found, self.cell_starts[idx + 1], 0)
+
+    def pairs_within(self, radius_m):
+        """radius_m içindeki tüm (i, j, mesafe) çiftlerini döndürür (i < j, radius_m <= cell_m)"""
+        if radius_m > self.cell_m:
+            raise ValueError(f"Yarıçap ({radius_m} m) hücre boyundan ({self.cell_m} m) büyük olamaz")
+        n = len(self.keys)
+        if n < 2:
+            empty = np.zeros(0, dtype=np.int64)
+            return empty, empty, np.zeros(0)
+        positions = np.arange(n)
+        # Aynı hücre: sıralı dizide kendisinden sonraki elemanlar
+        _, own_end = self._cell_ranges(self.keys)
+        sources, starts, ends = [positions], [positions + 1], [own_end]
+        for dx, dy in HALF_NEIGHBORHOOD:
+            lo, hi = self._cell_ranges(self.keys + dx * KEY_STRIDE + dy)
+            sources.append(positions)
+            starts.append(lo)
+            ends.append(hi)
+        src, lo, hi = np.concatenate(sources), np.concatenate(starts), np.concatenate(ends)
+        counts = hi - lo
+        src = np.repeat(src, counts)
+        # Her kaynak için [lo, hi) aralığını tek bir vektörde aç
+        dst = np.repeat(lo - np.cumsum(counts) + counts, counts) + np.arange(int(counts.sum()))
+        a, b = self.order[src], self.order[dst]
+        dist = np.hypot(self.x[a] - self.x[b], self.y[a] - self.y[b])
+        near = dist <= radius_m
+        a, b, dist = a[near], b[near], dist[near]
+        return np.minimum(a, b), np.maximum(a, b), dist
+
+
+class FleetSpacing:
+    """Dakika başına en küçük aralığı zorlar ve yeni yakınlaşma olaylarını izler"""
+
+    def __init__(self, ref_lat, min_separation_m=MIN_SEPARATION_M, close_approach_m=CLOSE_APPROACH_M):
+        self.min_separation_m = min_separation_m
+        self.close_approach_m = close_approach_m
+        self.grid = SpatialHashGrid(max(min_separation_m, close_approach_m), ref_lat)
+        self.active_pairs = set()
+        self.separated = 0  # Toplam itme sayısı (çift x tur)
+
+    def separate(self, lat, lon):
+        """Çok yakın çiftleri bağlantı doğrultusunda eşit paylarla iterek ayırır"""
+        lat = np.array(lat, dtype=np.float64)
+        lon = np.array(lon, dtype=np.float64)
+        for _ in range(SEPARATION_ITERATIONS):
+            self.grid.rebuild(lat, lon)
+            a, b, dist = self.grid.pairs_within(self.min_separation_m)
+            if len(a) == 0:
+                break
+            self.separated += len(a)
+            dx = self.grid.x[b] - self.grid.x[a]
+            dy = self.grid.y[b] - self.grid.y[a]
+            # Tam çakışan çiftler rastgele bir yönde ayrılır
+            angle = np.random.uniform(0, 2 * math.pi, len(a))
+            overlap = dist == 0
+            dx[overlap], dy[overlap] = np.cos(angle[overlap]), np.sin(angle[overlap])
+            norm = np.hypot(dx, dy)
+            push = (self.min_separation_m - dist) / 2 / norm
+            shift_x = np.zeros(len(lat))
+            shift_y = np.zeros(len(lat))
+            np.add.at(shift_x, a, -dx * push)
+            np.add.at(shift_y, a, -dy * push)
+            np.add.at(shift_x, b, dx * push)
+            np.add.at(shift_y, b, dy * push)
+            lat += shift_y / METERS_PER_DEGREE
+            lon += shift_x / (METERS_PER_DEGREE * self.grid.cos_lat)
+        return lat, lon
+
+    def close_approaches(self, minute_index, ids, lat, lon):
+        """Bu dakikada yakınlaşma mesafesine yeni giren çiftleri olay olarak döndürür"""
+        self.grid.rebuild(lat, lon)
+        a, b, dist = self.grid.pairs_within(self.close_approach_m)
+        current = {}
+        for i, j, d in zip(a.tolist(), b.tolist(), dist.tolist()):
+            current[(ids[i], ids[j])] = d
+        events = [(minute_index, pair[0], pair[1], round(d, 1))
+                  for pair, d in current.items() if pair not in self.active_pairs]
+        self.active_pairs = set(current)
+        return events
+
+    def update(self, minute_index, ika_states, boundary=None):
+        """İKA durumlarının konumlarını yerinde düzeltir; yeni yakınlaşma olaylarını döndürür"""
+        lat = [ika["lat"] for ika in ika_states]
+        lon = [ika["lon"] for ika in ika_states]
+        if self.min_separation_m > 0:
+            lat, lon = self.separate(lat, lon)
+            for ika, new_lat, new_lon in zip(ika_states, lat.tolist(), lon.tolist()):
+                ika["lat"], ika["lon"] = boundary(new_lat, new_lon) if boundary else (new_lat, new_lon)
+            lat = [ika["lat"] for ika in ika_states]
+            lon = [ika["lon"] for ika in ika_states]
+        return self.close_approaches(minute_index, [ika["id"] for ika in ika_states], lat, lon)
+
+
+def write_close_approaches(events, path, start_time):
+    """Yakınlaşma olaylarını CSV dosyasına yazar"""
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Timestamp", "Ika_A", "Ika_B", "Distance_m"])
+        for minute_index, ika_a, ika_b, distance in events:
+            timestamp = start_time + datetime.timedelta(minutes=minute_index)
+            writer.writerow([timestamp.strftime(TIMESTAMP_FORMAT), ika_a, ika_b, distance])
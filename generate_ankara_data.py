@@ -2,13 +2,88 @@ import csv
 import datetime
 import random
 import math
+import os
+import sys
 import numpy as np
 
+from aqi_stream import AqiStream
+from exception_stream import ExceptionStreamWriter
+from fleet_spacing import FleetSpacing, write_close_approaches
+from city_profile import load_city_profile
+from coverage_planner import CoveragePlanner
+from output_cache import OutputCache, publish
+from pollution_field import build_city_field
+from sensor_sweep import FrameRecorder, FrameReplay
+from shm_ring import ShmRingWriter
+from solar import SolarCache
+from terrain import ElevationModel, dem_fingerprint
+from trajectory_codec import TrajectoryRecorder, write_sidecar
+from track_polylines import write_track_polylines
+
 # --- Yapılandırma Ayarları ---
 NUM_IKAS = 50  # Mobil sensör birimi sayısı
 DURATION_HOURS = 24  # Veri üretilecek süre (saat)
 RECORDS_PER_HOUR = 60  # Saat başına kayıt sayısı (dakikada bir kayıt)
 OUTPUT_CSV_FILE = "ankara_sensor_data_circular_v4_radius_0_05.csv" # Çıktı CSV dosyasının adı
+CITY_PROFILE_CACHE = True  # Derlenmiş şehir profili (konumlar, yol ağı, indeks) .city_profiles/ altında önbelleklenir
+
+# --- Sıkıştırılmış Güzergah Yan Dosyası (bkz. trajectory_codec.py) ---
+WRITE_TRAJECTORY_SIDECAR = False  # True ise konumlar ayrıca sıkıştırılmış .trj dosyasına yazılır
+TRAJECTORY_MODE = "dp"  # "delta": kayıpsız, "dp": Douglas-Peucker ile basitleştirilmiş
+TRAJECTORY_TOLERANCE_M = 5.0  # "dp" kipinde izin verilen en büyük sapma (metre)
+TRAJECTORY_SIDECAR_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + ".trj"
+
+# --- Kirletici Dağılım Alanı (bkz. pollution_field.py) ---
+USE_POLLUTION_FIELD = True  # PM2.5/PM10/CO/NO2 değerleri ızgara üzerindeki dağılım alanından örneklenir
+POLLUTION_CELL_DEG = 0.0025  # Izgara hücre boyu (derece, ~250 m)
+
+# --- Filo Aralığı ve Yakınlaşma Olayları (bkz. fleet_spacing.py) ---
+ENFORCE_FLEET_SPACING = True  # İKA'lar arasında en küçük aralık zorlanır, yakınlaşmalar kaydedilir
+MIN_SEPARATION_M = 20.0  # İki İKA arasındaki en küçük mesafe (metre)
+CLOSE_APPROACH_M = 100.0  # Bu mesafenin altına inen çiftler yakınlaşma olayı sayılır
+CLOSE_APPROACH_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_yakinlasmalar.csv"
+
+# --- Kapsama Odaklı Hedef Atama (bkz. coverage_planner.py) ---
+COVERAGE_TARGETING = True  # Yeni hedefler en uzun süredir ziyaret edilmeyen hücrelere toplu atanır
+COVERAGE_CELL_DEG = 0.01  # Kapsama hücre boyu (derece, ~1 km)
+
+# --- Hava Kalitesi İndeksi (bkz. aqi_stream.py) ---
+AQI_OUTPUT = "sidecar"  # "off", "sidecar": ayrı <veri seti>_aqi.csv, "columns": AQI sütunları ana CSV'ye eklenir
+AQI_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_aqi.csv"
+
+# --- İstisna ile Raporlama Çıktısı (bkz. exception_stream.py) ---
+EXCEPTION_STREAM_MODE = "off"  # "off": yalnızca tam CSV, "also": tam CSV + seyrek akış, "only": yalnızca seyrek akış
+EXCEPTION_STREAM_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_istisna.csv"
+
+# --- Gösterge Paneli İz Çizgileri (bkz. track_polylines.py) ---
+WRITE_TRACK_POLYLINES = True  # İKA başına kodlanmış güzergah çizgisi (şehir başına tek JSON)
+TRACK_POLYLINES_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_izler.json"
+TRACK_POLYLINE_TOLERANCE_M = 0.0  # 0 ise yalnızca durağan dakikalar atılır
+
+# --- Tekrarlanabilirlik ve Çıktı Önbelleği (bkz. output_cache.py) ---
+RANDOM_SEED = None  # Sayı verilirse aynı ayarlar aynı veriyi üretir; önbellek yalnızca tohumlu çalıştırmalarda kullanılır
+USE_OUTPUT_CACHE = True  # Aynı ayar, tohum ve kodla çıktılar .output_cache/ altından alınır
+PUBLISH_DIR = None  # Örn. "public/data": çıktılar üretimden sonra gösterge panelinin klasörüne de kopyalanır
+
+if RANDOM_SEED is not None:
+    random.seed(RANDOM_SEED)
+    np.random.seed(RANDOM_SEED)
+
+# --- Parametre Süpürmesi (bkz. sensor_sweep.py) ---
+SWEEP_RECORD_FILE = None  # Verilirse her dakikanın filo durumu (konum, yükseklik, hedef, alan düzeyleri) bu .npz dosyasına kaydedilir
+SWEEP_REPLAY_FILE = None  # Verilirse hareket benzetimi atlanır; filo durumu bu dosyadan okunur, yalnızca sensörler örneklenir
+
+# --- Arazi Yüksekliği (bkz. terrain.py) ---
+DEM_PATH = None  # SRTM .hgt karoları veya .flt/.hdr ızgarası (dosya ya da klasör); verilirse Altitude_m zemin yüksekliğinden hesaplanır
+HEIGHT_ABOVE_GROUND_M = 1.5  # Sensörün zeminden yüksekliği (m)
+DEM_FINGERPRINT = dem_fingerprint(DEM_PATH) if DEM_PATH else None  # DEM dosyaları değişince önbellek anahtarı da değişir
+
+# --- Güneş Konumu (bkz. solar.py) ---
+USE_SOLAR_MODEL = True  # Işık ve sıcaklığın günlük döngüsü tarihe ve konuma göre güneş yüksekliğinden hesaplanır (False: saate bağlı sabit eğriler)
+
+# --- Paylaşımlı Bellek Yayını (bkz. shm_ring.py) ---
+SHM_RING_NAME = None  # Örn. "ankara_ring": her dakikanın satırları yerel okuyucu süreçlere paylaşımlı bellek halkasıyla yayımlanır
+SHM_RING_SLOTS = 256  # Halkada tutulan dakika sayısı; daha fazla geride kalan okuyucu dakika kaçırır
 
 # --- Dairesel Ankara Sınırları ---
 # Ankara merkez noktası (Kızılay)
@@ -22,13 +97,15 @@ ANKARA_RADIUS = 0.10
 # --- Anomali Oluşturma Ayarları ---
 ANOMALY_CHANCE = 0.0005 # Her bir ölçüm için anomali oluşma olasılığı (%0.05)
 ANOMALY_MULTIPLIER_RANGE = (2.0, 5.0)  # Anomalilerin ne kadar aşırı olabileceği
+RUSH_HOUR_SCALE = 1.0  # Alan kullanılmadığında yoğun saat çarpanlarının etkisi (0: yok, 1: varsayılan aralıklar)
+TEMPERATURE_RANGE_C = (8, 20)  # Günün en düşük / en yüksek sıcaklığı (günlük sapma eklenir)
 
 # --- Ankara'daki Önemli Konumları Tanımlama ---
 def is_in_circular_ankara(lat, lon):
     """Bir noktanın dairesel Ankara alanı içinde olup olmadığını kontrol eder"""
     dlat = lat - ANKARA_CENTER_LAT
     dlon = lon - ANKARA_CENTER_LON
-    dlon_adjusted = dlon * math.cos(math.radians(ANKARA_CENTER_LAT))
+    dlon_adjusted = dlon * COS_CENTER_LAT
     distance = math.sqrt(dlat**2 + dlon_adjusted**2)
     return distance <= ANKARA_RADIUS
 
@@ -70,27 +147,21 @@ original_key_locations = {
     "Airport": (40.1231, 32.9975) # Kesinlikle dışarıda kalır
 }
 
-ankara_key_locations = {}
+# --- Derlenmiş Şehir Profili (bkz. city_profile.py) ---
+# Sınır dışındaki konumların kenara taşınması, yol ağı ve yol noktası indeksi parametre
+# özetine göre önbellekten yüklenir; parametreler değişirse profil yeniden derlenir.
 print(f"--- Dairesel Alan Yarıçapı: {ANKARA_RADIUS} derece (yaklaşık {ANKARA_RADIUS * 111:.1f} km) ---")
-locations_within_radius = 0
-for name, (lat, lon) in original_key_locations.items():
-    if is_in_circular_ankara(lat, lon):
-        ankara_key_locations[name] = (lat, lon)
-        locations_within_radius += 1
-    else:
-        dlat = lat - ANKARA_CENTER_LAT
-        dlon = lon - ANKARA_CENTER_LON
-        dlon_adjusted = dlon * math.cos(math.radians(ANKARA_CENTER_LAT))
-        
-        # distance = math.sqrt(dlat**2 + dlon_adjusted**2) # Bu satır artık kullanılmıyor, açı hesaplaması için gerekli değil
-        angle = math.atan2(dlat, dlon_adjusted)
-        
-        new_distance_factor = 0.95 
-        new_lat = ANKARA_CENTER_LAT + (ANKARA_RADIUS * new_distance_factor) * math.sin(angle)
-        new_lon = ANKARA_CENTER_LON + ((ANKARA_RADIUS * new_distance_factor) * math.cos(angle)) / math.cos(math.radians(ANKARA_CENTER_LAT))
-        
-        # print(f"UYARI: '{name}' konumu ({lat:.4f}, {lon:.4f}) dairesel alanın dışındaydı. Yeni koordinatlara ayarlandı: ({new_lat:.4f}, {new_lon:.4f}).")
-        ankara_key_locations[name] = (new_lat, new_lon)
+city_profile, profile_cached = load_city_profile(
+    "ankara", ANKARA_CENTER_LAT, ANKARA_CENTER_LON, ANKARA_RADIUS, original_key_locations,
+    ring_roads=[(0.4, "Ic_Cevre_Yolu"), (0.7, "Orta_Cevre_Yolu"), (0.95, "Dis_Cevre_Yolu")],
+    ring_points=24, # Daha küçük alanda daha az nokta yeterli olabilir
+    radial_count=6, radial_factors=np.linspace(0.1, 0.95, 10), # Merkezden biraz uzakta başlayan radyal yollar
+    min_road_radius=0.001, # Bundan küçük yarıçaplı halka/nokta atlanır
+    use_cache=CITY_PROFILE_CACHE)
+COS_CENTER_LAT = city_profile.cos_lat
+ankara_key_locations = city_profile.key_locations
+locations_within_radius = int((~city_profile.relocated).sum())
+print(f"Şehir profili {'önbellekten yüklendi' if profile_cached else 'derlendi'} (anahtar: {city_profile.key}).")
 print(f"Orijinal {len(original_key_locations)} konumdan {locations_within_radius} tanesi doğrudan {ANKARA_RADIUS} derecelik yarıçap içinde kaldı.")
 print(f"Diğer konumlar dairenin kenarına ayarlandı.")
 
@@ -109,7 +180,7 @@ def random_circular_point():
     effective_radius = ANKARA_RADIUS * radius_factor
     
     lat = ANKARA_CENTER_LAT + effective_radius * math.sin(angle)
-    lon = ANKARA_CENTER_LON + (effective_radius * math.cos(angle)) / math.cos(math.radians(ANKARA_CENTER_LAT))
+    lon = ANKARA_CENTER_LON + (effective_radius * math.cos(angle)) / COS_CENTER_LAT
     
     return lat, lon
 
@@ -120,54 +191,44 @@ def enforce_circular_boundary(lat, lon):
     
     dlat = lat - ANKARA_CENTER_LAT
     dlon = lon - ANKARA_CENTER_LON
-    dlon_adjusted = dlon * math.cos(math.radians(ANKARA_CENTER_LAT))
+    dlon_adjusted = dlon * COS_CENTER_LAT
     angle = math.atan2(dlat, dlon_adjusted) 
     
     new_distance_on_edge = ANKARA_RADIUS * 0.95 
     
     new_lat = ANKARA_CENTER_LAT + new_distance_on_edge * math.sin(angle)
-    new_lon = ANKARA_CENTER_LON + (new_distance_on_edge * math.cos(angle)) / math.cos(math.radians(ANKARA_CENTER_LAT))
+    new_lon = ANKARA_CENTER_LON + (new_distance_on_edge * math.cos(angle)) / COS_CENTER_LAT
     return new_lat, new_lon
 
 # --- Yol Ağı Simülasyonu (Dairesel Şehir için) ---
-main_roads = {}
-ring_road_points_count = 24 # Daha küçük alanda daha az nokta yeterli olabilir
-# Yarıçap faktörleri ANKARA_RADIUS'a göre ölçeklenir.
-# Örn: ANKARA_RADIUS = 0.05 ise, Ic_Cevre_Yolu 0.05 * 0.3 = 0.015 derece yarıçapında olur (çok küçük).
-print("Yol ağı oluşturuluyor...")
-for radius_factor, name in [(0.4, "Ic_Cevre_Yolu"), (0.7, "Orta_Cevre_Yolu"), (0.95, "Dis_Cevre_Yolu")]: # Faktörler ayarlandı
-    road_points = []
-    current_ring_radius = ANKARA_RADIUS * radius_factor
-    if current_ring_radius < 0.001: # Çok küçükse atla
-        print(f"'{name}' için yarıçap ({current_ring_radius:.4f}) çok küçük, atlanıyor.")
-        continue
-    for i in range(ring_road_points_count):
-        angle = 2 * math.pi * i / ring_road_points_count
-        lat = ANKARA_CENTER_LAT + current_ring_radius * math.sin(angle)
-        lon = ANKARA_CENTER_LON + (current_ring_radius * math.cos(angle)) / math.cos(math.radians(ANKARA_CENTER_LAT))
-        road_points.append((lat, lon))
-    main_roads[name] = road_points
-    print(f"'{name}' {len(road_points)} nokta ile oluşturuldu (yarıçap: {current_ring_radius:.4f} derece).")
-
-
-num_radial_roads = 6 # Daha küçük alanda daha az radyal yol
-for i in range(num_radial_roads):
-    angle = 2 * math.pi * i / num_radial_roads
-    road_points = []
-    for radius_factor_radial in np.linspace(0.1, 0.95, 10): # Daha az nokta, merkezden biraz daha uzakta başla
-        current_radial_pos_radius = ANKARA_RADIUS * radius_factor_radial
-        if current_radial_pos_radius < 0.001: continue # Çok kısa ise atla
-        lat = ANKARA_CENTER_LAT + current_radial_pos_radius * math.sin(angle)
-        lon = ANKARA_CENTER_LON + (current_radial_pos_radius * math.cos(angle)) / math.cos(math.radians(ANKARA_CENTER_LAT))
-        road_points.append((lat, lon))
-    if road_points:
-      main_roads[f"Radyal_Yol_{i+1}"] = road_points
-      print(f"'Radyal_Yol_{i+1}' {len(road_points)} nokta ile oluşturuldu.")
+main_roads = city_profile.main_roads
+for name, road_points in main_roads.items():
+    print(f"'{name}' {len(road_points)} nokta ile oluşturuldu.")
 
 if not main_roads:
     print("UYARI: Hiçbir ana yol oluşturulamadı. Yarıçap çok küçük olabilir. Rotalar daha direkt olacaktır.")
 
+pollution_field = None
+if USE_POLLUTION_FIELD:
+    lon_radius = ANKARA_RADIUS / COS_CENTER_LAT
+    pollution_field = build_city_field(ANKARA_CENTER_LAT - ANKARA_RADIUS, ANKARA_CENTER_LAT + ANKARA_RADIUS,
+                                       ANKARA_CENTER_LON - lon_radius, ANKARA_CENTER_LON + lon_radius,
+                                       POLLUTION_CELL_DEG, ankara_key_locations, main_roads)
+    print(f"Kirletici dağılım alanı hazır: {pollution_field.rows}x{pollution_field.cols} hücre.")
+
+coverage_planner = None
+if COVERAGE_TARGETING:
+    lon_radius = ANKARA_RADIUS / COS_CENTER_LAT
+    coverage_planner = CoveragePlanner(ANKARA_CENTER_LAT - ANKARA_RADIUS, ANKARA_CENTER_LAT + ANKARA_RADIUS,
+                                       ANKARA_CENTER_LON - lon_radius, ANKARA_CENTER_LON + lon_radius,
+                                       COVERAGE_CELL_DEG, is_in_circular_ankara)
+    print(f"Kapsama planlayıcısı hazır: {len(coverage_planner)} hücre.")
+
 # --- Sensör Veri Üretme Fonksiyonları (Değişiklik yok) ---
+def rush_hour_factor(low, high):
+    """Yoğun saat çarpanı; RUSH_HOUR_SCALE ile ölçeklenir"""
+    return 1 + (random.uniform(low, high) - 1) * RUSH_HOUR_SCALE
+
 def maybe_add_anomaly(value, sensor_type):
     if random.random() < ANOMALY_CHANCE: 
         if random.random() < 0.7:
@@ -178,36 +239,44 @@ def maybe_add_anomaly(value, sensor_type):
             return value / multiplier
     return value
 
-def get_pm25(hour, location_name_hint):
+def get_pm25(hour, location_name_hint, field_level=None):
+    if field_level is not None: # Merkez ve yoğun saat etkisi dağılım alanında zaten var
+        return maybe_add_anomaly(round(min((5 + 20 * field_level) * random.uniform(0.9, 1.1), 120), 2), "PM2.5")
     is_center = "Merkez" in location_name_hint or "Kizilay" in location_name_hint # Ulus artık çok dışarıda kalabilir
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(5, 25) # Daha küçük alanda genel kirlilik biraz daha düşük olabilir
     if is_center: base *= random.uniform(1.1, 1.3)
-    if is_rush_hour: base *= random.uniform(1.3, 2.0)
+    if is_rush_hour: base *= rush_hour_factor(1.3, 2.0)
     return maybe_add_anomaly(round(min(base, 120), 2), "PM2.5") # Max değer düşürüldü
 
-def get_pm10(hour, location_name_hint):
+def get_pm10(hour, location_name_hint, field_level=None):
+    if field_level is not None:
+        return maybe_add_anomaly(round(min((10 + 25 * field_level) * random.uniform(0.9, 1.1), 150), 2), "PM10")
     is_center = "Merkez" in location_name_hint or "Kizilay" in location_name_hint
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(10, 35) # Daha küçük alanda genel kirlilik biraz daha düşük olabilir
     if is_center: base *= random.uniform(1.1, 1.3)
-    if is_rush_hour: base *= random.uniform(1.3, 2.0)
+    if is_rush_hour: base *= rush_hour_factor(1.3, 2.0)
     return maybe_add_anomaly(round(min(base, 150), 2), "PM10") # Max değer düşürüldü
 
-def get_co(hour, location_name_hint):
+def get_co(hour, location_name_hint, field_level=None):
+    if field_level is not None:
+        return maybe_add_anomaly(round(min((0.1 + 1.4 * field_level) * random.uniform(0.9, 1.1), 7), 2), "CO")
     is_road = "Yolu" in location_name_hint # "Cevre_Yolu" ve "Radyal" çok kısa olabilir
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(0.1, 1.5)
     if is_road and main_roads : base *= random.uniform(1.2, 1.6) # Ana yollar varsa
-    if is_rush_hour: base *= random.uniform(1.5, 2.5)
+    if is_rush_hour: base *= rush_hour_factor(1.5, 2.5)
     return maybe_add_anomaly(round(min(base, 7), 2), "CO") # Max değer düşürüldü
 
-def get_no2(hour, location_name_hint):
+def get_no2(hour, location_name_hint, field_level=None):
+    if field_level is not None:
+        return maybe_add_anomaly(round(min((5 + 15 * field_level) * random.uniform(0.9, 1.1), 70), 1), "NO2")
     is_road = "Yolu" in location_name_hint
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(5, 20)
     if is_road and main_roads: base *= random.uniform(1.2, 1.5)
-    if is_rush_hour: base *= random.uniform(1.4, 2.2)
+    if is_rush_hour: base *= rush_hour_factor(1.4, 2.2)
     return maybe_add_anomaly(round(min(base, 70), 1), "NO2") # Max değer düşürüldü
 
 def get_so2(location_name_hint):
@@ -227,11 +296,14 @@ def get_voc(location_name_hint):
     if is_traffic: base *= random.uniform(1.1, 1.4)
     return maybe_add_anomaly(round(min(base, 600), 0), "VOC")
 
-def get_temperature(hour, day_variation):
-    min_temp, max_temp = 8 + day_variation, 20 + day_variation 
+def get_temperature(hour, day_variation, diurnal=None):
+    min_temp, max_temp = TEMPERATURE_RANGE_C[0] + day_variation, TEMPERATURE_RANGE_C[1] + day_variation
     amplitude = (max_temp - min_temp) / 2
     avg_temp = min_temp + amplitude
-    temp = avg_temp + amplitude * math.sin((hour - 9) * (2 * math.pi / 24)) 
+    if diurnal is not None: # Güneş konumundan türetilen günlük döngü (bkz. solar.py)
+        temp = min_temp + (max_temp - min_temp) * diurnal
+    else:
+        temp = avg_temp + amplitude * math.sin((hour - 9) * (2 * math.pi / 24)) 
     return maybe_add_anomaly(round(temp + random.uniform(-1, 1), 1), "Sıcaklık")
 
 def get_humidity(temperature):
@@ -248,8 +320,9 @@ def get_sound_level(hour, location_name_hint):
     if is_center: base += random.uniform(3, 10)
     return maybe_add_anomaly(round(min(base, 90), 1), "Ses")
 
-def get_light_level(hour):
-    if 7 <= hour <= 18: base = round(random.uniform(5000, 85000) * (math.sin((hour-6) * math.pi / 13)**2) + random.uniform(0, 1000))
+def get_light_level(hour, daylight_lux=None):
+    if daylight_lux is not None: base = round(daylight_lux * random.uniform(0.1, 1.0) + random.uniform(1, 80) + random.choice([0,0,0,0, 150, 300])) # Açık gök aydınlığı x bulut/gölge + yapay ışık
+    elif 7 <= hour <= 18: base = round(random.uniform(5000, 85000) * (math.sin((hour-6) * math.pi / 13)**2) + random.uniform(0, 1000))
     else: base = round(random.uniform(1, 80) + random.choice([0,0,0,0, 150, 300])) 
     return maybe_add_anomaly(base, "Işık")
 
@@ -273,44 +346,17 @@ def get_radiation():
 
 # --- Dairesel Şehir İçin Rota Oluşturma ---
 def find_nearest_road_point(lat, lon):
-    min_dist = float('inf')
-    nearest_point = None
-    
     if not main_roads: # Eğer hiç yol tanımlanmamışsa
         return (enforce_circular_boundary(lat,lon)) # En yakın sınır noktası veya merkez
 
-    # Önce en yakın radyal yolu dene, sonra çevre yollarını
-    # Bu, çok küçük yarıçapta daha mantıklı olabilir.
-    candidate_roads = [name for name in main_roads if "Radyal" in name] + \
-                      [name for name in main_roads if "Cevre" in name]
-    
-    if not candidate_roads: # Eğer hiç yol yoksa (main_roads boşsa)
-         return (enforce_circular_boundary(lat,lon))
-
-    for road_name in candidate_roads:
-        if road_name not in main_roads: continue # Yol listede yoksa atla (örn. çok küçük yarıçapta oluşmadıysa)
-        road_points_list = main_roads[road_name]
-        for point in road_points_list:
-            dist = math.sqrt((lat - point[0])**2 + (lon - point[1])**2)
-            if dist < min_dist:
-                min_dist = dist
-                nearest_point = point
-    
-    if nearest_point is None: 
-        # Fallback: Eğer hiçbir yol noktası bulunamazsa (çok olası değil ama önlem)
-        # Rastgele bir yolun rastgele bir noktasını al
-        if main_roads:
-            fallback_road_name = random.choice(list(main_roads.keys()))
-            if main_roads[fallback_road_name]:
-                 nearest_point = random.choice(main_roads[fallback_road_name])
-            else: # Seçilen yol da boşsa
-                 nearest_point = (ANKARA_CENTER_LAT, ANKARA_CENTER_LON) # Merkeze fallback
-        else: # Hiç yol yoksa
-            nearest_point = (ANKARA_CENTER_LAT, ANKARA_CENTER_LON) # Merkeze fallback
-        
-    return nearest_point
+    # Tüm radyal ve çevre yolu noktaları arasında en yakını, profildeki ızgara indeksiyle bulunur
+    return city_profile.nearest_road_point(lat, lon)
 
 
+def nearest_location_name(lat, lon):
+    """Koordinata en yakın kilit konumun adını döndürür"""
+    return min(ankara_key_locations, key=lambda name: (ankara_key_locations[name][0] - lat)**2 + (ankara_key_locations[name][1] - lon)**2)
+
 def get_circular_path(start_lat, start_lon, end_lat, end_lon):
     path = []
     
@@ -515,11 +561,51 @@ print(f"Dairesel sınırlar (Yarıçap: {ANKARA_RADIUS}) zorlanarak veri üretim
 start_time = datetime.datetime(2023, 10, 28, 0, 0, 0) 
 daily_temp_variation = random.uniform(-3, 3)
 
-with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
+# --- Çıktı önbelleği: tam eşleşmede üretim atlanır, daha kısa bir çalıştırma varsa kaldığı saatten devam edilir ---
+dense_output_file = os.devnull if EXCEPTION_STREAM_MODE == "only" else OUTPUT_CSV_FILE
+stream_files = [f for f, enabled in [(OUTPUT_CSV_FILE, EXCEPTION_STREAM_MODE != "only"), (AQI_FILE, AQI_OUTPUT == "sidecar"),
+                                     (EXCEPTION_STREAM_FILE, EXCEPTION_STREAM_MODE != "off")] if enabled]
+output_files = stream_files + [f for f, enabled in [(CLOSE_APPROACH_FILE, ENFORCE_FLEET_SPACING), (TRAJECTORY_SIDECAR_FILE, WRITE_TRAJECTORY_SIDECAR),
+                                                    (TRACK_POLYLINES_FILE, WRITE_TRACK_POLYLINES)] if enabled]
+checkpoint_names = ["ika_states", "daily_temp_variation", "pollution_field", "coverage_planner", "trajectory_recorder",
+                    "fleet_spacing", "close_approach_events", "aqi_stream", "exception_stream"]  # Kontrol noktasına alınan simülasyon durumu
+output_cache = OutputCache("ankara", globals(), __file__) if USE_OUTPUT_CACHE and RANDOM_SEED is not None and not (SWEEP_RECORD_FILE or SWEEP_REPLAY_FILE or SHM_RING_NAME) else None
+if output_cache and output_cache.restore(output_files):
+    print(f"Çıktılar önbellekten alındı (anahtar {output_cache.key}); üretim atlandı.")
+    if PUBLISH_DIR:
+        publish(output_files, PUBLISH_DIR)
+    sys.exit(0)
+resumed = output_cache.resume_point(DURATION_HOURS, stream_files) if output_cache else None
+resume_hour = 0
+if resumed:
+    resume_hour, checkpoint_state = resumed
+    globals().update(checkpoint_state)
+    for stream in (aqi_stream, exception_stream):
+        if stream:
+            stream.reopen()
+    print(f"İlk {resume_hour} saat önbellekten alındı; üretim {resume_hour + 1}. saatten devam ediyor.")
+else:
+    trajectory_recorder = TrajectoryRecorder(start_time) if (WRITE_TRAJECTORY_SIDECAR or WRITE_TRACK_POLYLINES) else None
+    fleet_spacing = FleetSpacing(ANKARA_CENTER_LAT, MIN_SEPARATION_M, CLOSE_APPROACH_M) if ENFORCE_FLEET_SPACING else None
+    close_approach_events = []
+    aqi_stream = AqiStream(headers, sidecar_path=AQI_FILE if AQI_OUTPUT == "sidecar" else None) if AQI_OUTPUT != "off" else None
+    if AQI_OUTPUT == "columns":
+        headers = headers + aqi_stream.columns
+    exception_stream = ExceptionStreamWriter(EXCEPTION_STREAM_FILE, headers) if EXCEPTION_STREAM_MODE != "off" else None
+
+unit_ids = [ika["id"] for ika in ika_states]
+frame_recorder = FrameRecorder(unit_ids, DURATION_HOURS * 60) if SWEEP_RECORD_FILE else None
+frame_replay = FrameReplay(SWEEP_REPLAY_FILE, unit_ids, DURATION_HOURS * 60) if SWEEP_REPLAY_FILE else None
+elevation_model = ElevationModel(DEM_PATH) if DEM_PATH else None
+solar_cache = SolarCache(start_time, DURATION_HOURS * 60, ANKARA_CENTER_LAT - ANKARA_RADIUS, ANKARA_CENTER_LAT + ANKARA_RADIUS, ANKARA_CENTER_LON - ANKARA_RADIUS, ANKARA_CENTER_LON + ANKARA_RADIUS) if USE_SOLAR_MODEL else None
+shm_ring = ShmRingWriter(SHM_RING_NAME, headers, unit_ids, location_names, SHM_RING_SLOTS, "ankara", start_time) if SHM_RING_NAME else None
+
+with open(dense_output_file, 'a' if resume_hour else 'w', newline='', encoding='utf-8') as csvfile:
     writer = csv.writer(csvfile)
-    writer.writerow(headers)
+    if not resume_hour:
+        writer.writerow(headers)
     
-    for hour_delta in range(DURATION_HOURS):
+    for hour_delta in range(resume_hour, DURATION_HOURS):
         current_hour_of_day = (start_time.hour + hour_delta) % 24
         
         if current_hour_of_day == 0: 
@@ -529,66 +615,114 @@ with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
             current_timestamp = start_time + datetime.timedelta(hours=hour_delta, minutes=minute_delta)
             timestamp_str = current_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
             
-            for ika in ika_states:
-                if not ika["path_complete"] and ika["path"] and ika["total_path_points"] > 0 :
-                    if ika["path_index"] < ika["total_path_points"]:
-                        current_path_point = ika["path"][ika["path_index"]]
-                        ika["lat"] = current_path_point[0]
-                        ika["lon"] = current_path_point[1]
-                        ika["path_index"] += 1
-                    else: 
-                        ika["path_complete"] = True
+            minute_index = hour_delta * 60 + minute_delta
+            if frame_replay:
+                # Süpürme: filo durumu kayıtlı karelerden alınır, hareket ve rota hesabı atlanır
+                field_levels = frame_replay.apply(minute_index, ika_states)
+                lats, lons = [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states]
+            else:
+                if pollution_field:
+                    pollution_field.step(current_hour_of_day)
+
+                needs_target = []
+                for ika in ika_states:
+                    if not ika["path_complete"] and ika["path"] and ika["total_path_points"] > 0 :
+                        if ika["path_index"] < ika["total_path_points"]:
+                            current_path_point = ika["path"][ika["path_index"]]
+                            ika["lat"] = current_path_point[0]
+                            ika["lon"] = current_path_point[1]
+                            ika["path_index"] += 1
+                        else: 
+                            ika["path_complete"] = True
                 
-                if ika["path_complete"]:
-                    new_target_lat, new_target_lon = random_circular_point()
-                    new_target_name_choice = "Rastgele_Hedef_Yeni"
-
-                    if location_names and random.random() < 0.8:
-                        old_target = ika["current_target_name"]
-                        possible_new_targets = [name for name in location_names if name != old_target]
-                        if possible_new_targets:
-                             new_target_name_choice = random.choice(possible_new_targets)
-                        elif location_names: 
-                             new_target_name_choice = random.choice(location_names)
+                    if ika["path_complete"] and coverage_planner:
+                        needs_target.append(ika) # Yeni hedef dakika sonunda kapsama planlayıcısıyla toplu atanır
+                    elif ika["path_complete"]:
+                        new_target_lat, new_target_lon = random_circular_point()
+                        new_target_name_choice = "Rastgele_Hedef_Yeni"
+
+                        if location_names and random.random() < 0.8:
+                            old_target = ika["current_target_name"]
+                            possible_new_targets = [name for name in location_names if name != old_target]
+                            if possible_new_targets:
+                                 new_target_name_choice = random.choice(possible_new_targets)
+                            elif location_names: 
+                                 new_target_name_choice = random.choice(location_names)
                         
-                        if new_target_name_choice in ankara_key_locations:
-                             new_target_lat, new_target_lon = ankara_key_locations[new_target_name_choice]
-                    else: 
-                        min_dist_new_random_target = float('inf')
-                        if location_names:
-                            for name, (loc_lat, loc_lon) in ankara_key_locations.items():
-                                dist = math.sqrt((new_target_lat - loc_lat)**2 + (new_target_lon - loc_lon)**2)
-                                if dist < min_dist_new_random_target:
-                                    min_dist_new_random_target = dist
-                                    new_target_name_choice = name
+                            if new_target_name_choice in ankara_key_locations:
+                                 new_target_lat, new_target_lon = ankara_key_locations[new_target_name_choice]
+                        else: 
+                            min_dist_new_random_target = float('inf')
+                            if location_names:
+                                for name, (loc_lat, loc_lon) in ankara_key_locations.items():
+                                    dist = math.sqrt((new_target_lat - loc_lat)**2 + (new_target_lon - loc_lon)**2)
+                                    if dist < min_dist_new_random_target:
+                                        min_dist_new_random_target = dist
+                                        new_target_name_choice = name
                     
-                    ika["current_target_name"] = new_target_name_choice
-                    ika["target_lat"] = new_target_lat
-                    ika["target_lon"] = new_target_lon
+                        ika["current_target_name"] = new_target_name_choice
+                        ika["target_lat"] = new_target_lat
+                        ika["target_lon"] = new_target_lon
                     
-                    ika["lat"], ika["lon"] = enforce_circular_boundary(ika["lat"], ika["lon"])
+                        ika["lat"], ika["lon"] = enforce_circular_boundary(ika["lat"], ika["lon"])
 
-                    ika["path"] = get_circular_path(ika["lat"], ika["lon"], new_target_lat, new_target_lon)
-                    ika["path_index"] = 0
-                    ika["total_path_points"] = len(ika["path"]) if ika["path"] else 0
-                    ika["path_complete"] = False if ika["path"] and len(ika["path"]) > 1 else True
+                        ika["path"] = get_circular_path(ika["lat"], ika["lon"], new_target_lat, new_target_lon)
+                        ika["path_index"] = 0
+                        ika["total_path_points"] = len(ika["path"]) if ika["path"] else 0
+                        ika["path_complete"] = False if ika["path"] and len(ika["path"]) > 1 else True
                 
-                ika["lat"], ika["lon"] = enforce_circular_boundary(ika["lat"], ika["lon"])
+                    ika["lat"], ika["lon"] = enforce_circular_boundary(ika["lat"], ika["lon"])
                 
-                ika['alt'] += random.uniform(-0.5, 0.5)
-                ika['alt'] = max(950, min(ika['alt'], 1100))
+                    if not elevation_model:
+                        ika['alt'] += random.uniform(-0.5, 0.5)
+                        ika['alt'] = max(950, min(ika['alt'], 1100))
+
+                if coverage_planner:
+                    coverage_planner.observe(minute_index, [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states])
+                    new_targets = coverage_planner.assign(minute_index, [ika["lat"] for ika in needs_target], [ika["lon"] for ika in needs_target])
+                    for ika, (new_target_lat, new_target_lon) in zip(needs_target, new_targets):
+                        ika["current_target_name"] = nearest_location_name(new_target_lat, new_target_lon)
+                        ika["target_lat"] = new_target_lat
+                        ika["target_lon"] = new_target_lon
+                        ika["path"] = get_circular_path(ika["lat"], ika["lon"], new_target_lat, new_target_lon)
+                        ika["path_index"] = 0
+                        ika["total_path_points"] = len(ika["path"]) if ika["path"] else 0
+                        ika["path_complete"] = False if ika["path"] and len(ika["path"]) > 1 else True
+
+                if fleet_spacing:
+                    # Tüm İKA'lar hareket ettikten sonra birbirine çok yaklaşanlar ayrılır
+                    close_approach_events.extend(fleet_spacing.update(hour_delta * 60 + minute_delta, ika_states, enforce_circular_boundary))
+
+                if elevation_model:
+                    elevation_model.apply(ika_states, HEIGHT_ABOVE_GROUND_M)
+
+                lats, lons = [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states]
+                if pollution_field:
+                    # Tüm filo tek vektörel okumayla örneklenir
+                    field_pm, field_traffic = pollution_field.sample_many(lats, lons)
+                    field_levels = list(zip(field_pm.tolist(), field_traffic.tolist()))
+                else:
+                    field_levels = [(None, None)] * len(ika_states)
+                if frame_recorder:
+                    frame_recorder.record(minute_index, ika_states, field_levels)
+
+            solar_levels = solar_cache.levels(minute_index, lats, lons) if solar_cache else [(None, None)] * len(ika_states)
+            for ika, (pm_level, traffic_level), (daylight_lux, diurnal) in zip(ika_states, field_levels, solar_levels):
+                if trajectory_recorder:
+                    trajectory_recorder.record(hour_delta * 60 + minute_delta, ika['id'], ika['lat'], ika['lon'])
                 
-                temp_val = get_temperature(current_hour_of_day, daily_temp_variation)
+
+                temp_val = get_temperature(current_hour_of_day, daily_temp_variation, diurnal)
                 humidity_val = get_humidity(temp_val)
-                pm25_val = get_pm25(current_hour_of_day, ika["current_target_name"])
-                pm10_val = get_pm10(current_hour_of_day, ika["current_target_name"])
-                co_val = get_co(current_hour_of_day, ika["current_target_name"])
-                no2_val = get_no2(current_hour_of_day, ika["current_target_name"])
+                pm25_val = get_pm25(current_hour_of_day, ika["current_target_name"], pm_level)
+                pm10_val = get_pm10(current_hour_of_day, ika["current_target_name"], pm_level)
+                co_val = get_co(current_hour_of_day, ika["current_target_name"], traffic_level)
+                no2_val = get_no2(current_hour_of_day, ika["current_target_name"], traffic_level)
                 so2_val = get_so2(ika["current_target_name"])
                 o3_val = get_o3(current_hour_of_day)
                 voc_val = get_voc(ika["current_target_name"])
                 sound_val = get_sound_level(current_hour_of_day, ika["current_target_name"])
-                light_val = get_light_level(current_hour_of_day)
+                light_val = get_light_level(current_hour_of_day, daylight_lux)
                 vibration_val = get_vibration(ika["current_target_name"])
                 mag_x_val = get_magnetic_field()
                 mag_y_val = get_magnetic_field()
@@ -600,11 +734,62 @@ with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
                     ika["current_target_name"], pm25_val, pm10_val, co_val, no2_val, so2_val, o3_val, voc_val,
                     temp_val, humidity_val, sound_val, light_val, vibration_val, mag_x_val, mag_y_val, mag_z_val, radiation_val
                 ]
+                if aqi_stream:
+                    aqi_values = aqi_stream.update(hour_delta * 60 + minute_delta, row)
+                    if AQI_OUTPUT == "columns":
+                        row += aqi_values
                 writer.writerow(row)
+                if exception_stream:
+                    exception_stream.write(hour_delta * 60 + minute_delta, row)
+                if shm_ring:
+                    shm_ring.write(hour_delta * 60 + minute_delta, row)
             
+            if shm_ring:
+                shm_ring.publish(hour_delta * 60 + minute_delta)
+
             if (minute_delta + 1) % 60 == 0: # Her saat başı çıktı ver
                 print(f"İşlenen zaman: {current_timestamp}, Saat {hour_delta+1}/{DURATION_HOURS}, Dakika {minute_delta+1}/{RECORDS_PER_HOUR}")
 
+    if output_cache:
+        # Akış dosyaları kapanış yazımlarından önce kontrol noktasına alınır
+        csvfile.flush()
+        output_cache.checkpoint(DURATION_HOURS, {name: globals()[name] for name in checkpoint_names}, stream_files)
+
+if shm_ring:
+    published_minutes = shm_ring.close()
+    print(f"Paylaşımlı bellek halkası '{SHM_RING_NAME}' kapatıldı ({published_minutes} dakika yayımlandı).")
+if frame_recorder:
+    frames_size = frame_recorder.save(SWEEP_RECORD_FILE)
+    print(f"Hareket kareleri '{SWEEP_RECORD_FILE}' dosyasına yazıldı ({frames_size / 1024:.0f} KB).")
+if coverage_planner:
+    print(f"Kapsama: hücrelerin %{coverage_planner.coverage() * 100:.1f}'i en az bir kez ziyaret edildi.")
+if aqi_stream:
+    aqi_rows = aqi_stream.close()
+    print(f"{aqi_rows} satır için AQI hesaplandı" + (f" ve '{AQI_FILE}' dosyasına yazıldı." if AQI_OUTPUT == "sidecar" else " (ana CSV'de)."))
+if exception_stream:
+    dense_values, emitted_values = exception_stream.close()
+    stream_ratio = exception_stream.size_ratio()
+    print(f"İstisna akışı '{EXCEPTION_STREAM_FILE}' yazıldı ({dense_values} değerden {emitted_values} tanesi, %{100 * emitted_values / max(dense_values, 1):.1f}; "
+          f"boyut yoğun CSV'nin %{100 * stream_ratio:.1f}'i).")
+    if EXCEPTION_STREAM_MODE == "only":
+        print(f"Not: \"only\" kipinde tam CSV ('{OUTPUT_CSV_FILE}') yazılmadı.")
+if fleet_spacing:
+    write_close_approaches(close_approach_events, CLOSE_APPROACH_FILE, start_time)
+    print(f"{len(close_approach_events)} yakınlaşma olayı '{CLOSE_APPROACH_FILE}' dosyasına yazıldı ({fleet_spacing.separated} aralık düzeltmesi).")
+if WRITE_TRAJECTORY_SIDECAR:
+    total_points, kept_points = write_sidecar(trajectory_recorder, TRAJECTORY_SIDECAR_FILE, mode=TRAJECTORY_MODE, tolerance_m=TRAJECTORY_TOLERANCE_M)
+    print(f"Güzergah yan dosyası '{TRAJECTORY_SIDECAR_FILE}' yazıldı ({total_points} noktadan {kept_points} tanesi saklandı).")
+if WRITE_TRACK_POLYLINES:
+    track_points = write_track_polylines(trajectory_recorder, TRACK_POLYLINES_FILE, "ankara", tolerance_m=TRACK_POLYLINE_TOLERANCE_M)
+    print(f"İz çizgileri '{TRACK_POLYLINES_FILE}' dosyasına yazıldı ({track_points} nokta).")
+
+if output_cache:
+    evicted = output_cache.store(output_files)
+    print(f"Çıktılar önbelleğe yazıldı (anahtar {output_cache.key}" + (f", {evicted} eski girdi silindi)." if evicted else ")."))
+if PUBLISH_DIR:
+    publish(output_files, PUBLISH_DIR)
+    print(f"Çıktılar '{PUBLISH_DIR}' klasörüne kopyalandı.")
+
 print(f"Veri seti başarıyla oluşturuldu ve '{OUTPUT_CSV_FILE}' dosyasına kaydedildi.")
 print(f"Toplam satır sayısı (başlık hariç): {NUM_IKAS * DURATION_HOURS * RECORDS_PER_HOUR}")
 num_potential_anomaly_sources = 15 
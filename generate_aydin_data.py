@@ -2,8 +2,24 @@ import csv
 import datetime
 import random
 import math
+import os
+import sys
 import numpy as np
 
+from aqi_stream import AqiStream
+from exception_stream import ExceptionStreamWriter
+from fleet_spacing import FleetSpacing, write_close_approaches
+from city_profile import load_city_profile
+from coverage_planner import CoveragePlanner
+from output_cache import OutputCache, publish
+from pollution_field import build_city_field
+from sensor_sweep import FrameRecorder, FrameReplay
+from shm_ring import ShmRingWriter
+from solar import SolarCache
+from terrain import ElevationModel, dem_fingerprint
+from trajectory_codec import TrajectoryRecorder, write_sidecar
+from track_polylines import write_track_polylines
+
 # --- Ayarlar ---
 NUM_IKAS = 50  # İKA sayısı - 50 sensör birimi 
 DURATION_HOURS = 24  # 24 saatlik veri
@@ -38,34 +54,90 @@ def is_in_circular_aydin(lat, lon):
     """Bir noktanın dairesel Aydın alanı içinde olup olmadığını kontrol eder"""
     dlat = lat - AYDIN_CENTER_LAT
     dlon = lon - AYDIN_CENTER_LON
-    dlon_adjusted = dlon * math.cos(math.radians(AYDIN_CENTER_LAT))
+    dlon_adjusted = dlon * COS_CENTER_LAT
     distance = math.sqrt(dlat**2 + dlon_adjusted**2)
     return distance <= AYDIN_RADIUS
 
-# Tüm noktaları dairesel alan içinde kalmaya zorla
+# --- Derlenmiş Şehir Profili (bkz. city_profile.py) ---
+# Dışarıdaki noktaların dairenin içine zorlanması, yol ağı ve yol noktası indeksi parametre
+# özetine göre önbellekten yüklenir; parametreler değişirse profil yeniden derlenir.
+CITY_PROFILE_CACHE = True  # Derlenmiş profil .city_profiles/ altında önbelleklenir
 print(f"--- Dairesel Alan Yarıçapı: {AYDIN_RADIUS} derece (yaklaşık {AYDIN_RADIUS * 111:.1f} km) ---")
-for name, (lat, lon) in list(aydin_key_locations.items()):
-    if not is_in_circular_aydin(lat, lon):
-        print(f"'{name}' konumu ({lat:.4f}, {lon:.4f}) dairesel alanın dışında.")
-        # Açıyı hesapla ve sınırda bir nokta oluştur
-        dlat = lat - AYDIN_CENTER_LAT
-        dlon = lon - AYDIN_CENTER_LON
-        dlon_adjusted = dlon * math.cos(math.radians(AYDIN_CENTER_LAT))
-        angle = math.atan2(dlat, dlon_adjusted)
-        
-        # Yeni nokta, sınırın biraz içinde olsun
-        new_distance_factor = 0.95
-        new_lat = AYDIN_CENTER_LAT + (AYDIN_RADIUS * new_distance_factor) * math.sin(angle)
-        new_lon = AYDIN_CENTER_LON + ((AYDIN_RADIUS * new_distance_factor) * math.cos(angle)) / math.cos(math.radians(AYDIN_CENTER_LAT))
-        
-        print(f"  Yeni koordinatlar: ({new_lat:.4f}, {new_lon:.4f})")
-        aydin_key_locations[name] = (new_lat, new_lon)
+city_profile, profile_cached = load_city_profile(
+    "aydin", AYDIN_CENTER_LAT, AYDIN_CENTER_LON, AYDIN_RADIUS, aydin_key_locations,
+    ring_roads=[(0.4, "Ic_Cevre_Yolu"), (0.7, "Orta_Cevre_Yolu"), (0.95, "Dis_Cevre_Yolu")],
+    ring_points=24, radial_count=6, radial_factors=[0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9],
+    use_cache=CITY_PROFILE_CACHE)
+COS_CENTER_LAT = city_profile.cos_lat
+for name, moved in zip(city_profile.key_names, city_profile.relocated):
+    if moved:
+        print(f"'{name}' konumu dairesel alanın dışındaydı, sınırın içine taşındı: {city_profile.key_locations[name]}")
+aydin_key_locations = city_profile.key_locations
+print(f"Şehir profili {'önbellekten yüklendi' if profile_cached else 'derlendi'} (anahtar: {city_profile.key}).")
 
 location_names = list(aydin_key_locations.keys())
 print(f"Aydın için tanımlanan toplam kilit konum sayısı: {len(location_names)}")
 
 OUTPUT_CSV_FILE = "aydin_sensor_data_circular.csv"
 
+# --- Sıkıştırılmış Güzergah Yan Dosyası (bkz. trajectory_codec.py) ---
+WRITE_TRAJECTORY_SIDECAR = False  # True ise konumlar ayrıca sıkıştırılmış .trj dosyasına yazılır
+TRAJECTORY_MODE = "dp"  # "delta": kayıpsız, "dp": Douglas-Peucker ile basitleştirilmiş
+TRAJECTORY_TOLERANCE_M = 5.0  # "dp" kipinde izin verilen en büyük sapma (metre)
+TRAJECTORY_SIDECAR_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + ".trj"
+
+# --- Kirletici Dağılım Alanı (bkz. pollution_field.py) ---
+USE_POLLUTION_FIELD = True  # PM2.5/PM10/CO/NO2 değerleri ızgara üzerindeki dağılım alanından örneklenir
+POLLUTION_CELL_DEG = 0.0025  # Izgara hücre boyu (derece, ~250 m)
+
+# --- Filo Aralığı ve Yakınlaşma Olayları (bkz. fleet_spacing.py) ---
+ENFORCE_FLEET_SPACING = True  # İKA'lar arasında en küçük aralık zorlanır, yakınlaşmalar kaydedilir
+MIN_SEPARATION_M = 20.0  # İki İKA arasındaki en küçük mesafe (metre)
+CLOSE_APPROACH_M = 100.0  # Bu mesafenin altına inen çiftler yakınlaşma olayı sayılır
+CLOSE_APPROACH_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_yakinlasmalar.csv"
+
+# --- Kapsama Odaklı Hedef Atama (bkz. coverage_planner.py) ---
+COVERAGE_TARGETING = True  # Yeni hedefler en uzun süredir ziyaret edilmeyen hücrelere toplu atanır
+COVERAGE_CELL_DEG = 0.01  # Kapsama hücre boyu (derece, ~1 km)
+
+# --- Hava Kalitesi İndeksi (bkz. aqi_stream.py) ---
+AQI_OUTPUT = "sidecar"  # "off", "sidecar": ayrı <veri seti>_aqi.csv, "columns": AQI sütunları ana CSV'ye eklenir
+AQI_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_aqi.csv"
+
+# --- İstisna ile Raporlama Çıktısı (bkz. exception_stream.py) ---
+EXCEPTION_STREAM_MODE = "off"  # "off": yalnızca tam CSV, "also": tam CSV + seyrek akış, "only": yalnızca seyrek akış
+EXCEPTION_STREAM_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_istisna.csv"
+
+# --- Gösterge Paneli İz Çizgileri (bkz. track_polylines.py) ---
+WRITE_TRACK_POLYLINES = True  # İKA başına kodlanmış güzergah çizgisi (şehir başına tek JSON)
+TRACK_POLYLINES_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_izler.json"
+TRACK_POLYLINE_TOLERANCE_M = 0.0  # 0 ise yalnızca durağan dakikalar atılır
+
+# --- Tekrarlanabilirlik ve Çıktı Önbelleği (bkz. output_cache.py) ---
+RANDOM_SEED = None  # Sayı verilirse aynı ayarlar aynı veriyi üretir; önbellek yalnızca tohumlu çalıştırmalarda kullanılır
+USE_OUTPUT_CACHE = True  # Aynı ayar, tohum ve kodla çıktılar .output_cache/ altından alınır
+PUBLISH_DIR = None  # Örn. "public/data": çıktılar üretimden sonra gösterge panelinin klasörüne de kopyalanır
+
+if RANDOM_SEED is not None:
+    random.seed(RANDOM_SEED)
+    np.random.seed(RANDOM_SEED)
+
+# --- Parametre Süpürmesi (bkz. sensor_sweep.py) ---
+SWEEP_RECORD_FILE = None  # Verilirse her dakikanın filo durumu (konum, yükseklik, hedef, alan düzeyleri) bu .npz dosyasına kaydedilir
+SWEEP_REPLAY_FILE = None  # Verilirse hareket benzetimi atlanır; filo durumu bu dosyadan okunur, yalnızca sensörler örneklenir
+
+# --- Arazi Yüksekliği (bkz. terrain.py) ---
+DEM_PATH = None  # SRTM .hgt karoları veya .flt/.hdr ızgarası (dosya ya da klasör); verilirse Altitude_m zemin yüksekliğinden hesaplanır
+HEIGHT_ABOVE_GROUND_M = 1.5  # Sensörün zeminden yüksekliği (m)
+DEM_FINGERPRINT = dem_fingerprint(DEM_PATH) if DEM_PATH else None  # DEM dosyaları değişince önbellek anahtarı da değişir
+
+# --- Güneş Konumu (bkz. solar.py) ---
+USE_SOLAR_MODEL = True  # Işık ve sıcaklığın günlük döngüsü tarihe ve konuma göre güneş yüksekliğinden hesaplanır (False: saate bağlı sabit eğriler)
+
+# --- Paylaşımlı Bellek Yayını (bkz. shm_ring.py) ---
+SHM_RING_NAME = None  # Örn. "aydin_ring": her dakikanın satırları yerel okuyucu süreçlere paylaşımlı bellek halkasıyla yayımlanır
+SHM_RING_SLOTS = 256  # Halkada tutulan dakika sayısı; daha fazla geride kalan okuyucu dakika kaçırır
+
 # --- Dairesel alan içinde rastgele nokta üretme ---
 def random_circular_point_aydin():
     """Aydın'ın dairesel alanı içinde rastgele bir nokta üretir"""
@@ -74,7 +146,7 @@ def random_circular_point_aydin():
     effective_radius = AYDIN_RADIUS * radius_factor
     
     lat = AYDIN_CENTER_LAT + effective_radius * math.sin(angle)
-    lon = AYDIN_CENTER_LON + (effective_radius * math.cos(angle)) / math.cos(math.radians(AYDIN_CENTER_LAT))
+    lon = AYDIN_CENTER_LON + (effective_radius * math.cos(angle)) / COS_CENTER_LAT
     
     return lat, lon
 
@@ -86,47 +158,42 @@ def enforce_circular_boundary_aydin(lat, lon):
     
     dlat = lat - AYDIN_CENTER_LAT
     dlon = lon - AYDIN_CENTER_LON
-    dlon_adjusted = dlon * math.cos(math.radians(AYDIN_CENTER_LAT))
+    dlon_adjusted = dlon * COS_CENTER_LAT
     angle = math.atan2(dlat, dlon_adjusted)
     
     new_distance_on_edge = AYDIN_RADIUS * 0.95
     
     new_lat = AYDIN_CENTER_LAT + new_distance_on_edge * math.sin(angle)
-    new_lon = AYDIN_CENTER_LON + (new_distance_on_edge * math.cos(angle)) / math.cos(math.radians(AYDIN_CENTER_LAT))
+    new_lon = AYDIN_CENTER_LON + (new_distance_on_edge * math.cos(angle)) / COS_CENTER_LAT
     return new_lat, new_lon
 
 # --- Yol Ağı Simülasyonu ---
-main_roads = {}
-ring_road_points_count = 24
-
-print("Aydın için yol ağı oluşturuluyor...")
-for radius_factor, name in [(0.4, "Ic_Cevre_Yolu"), (0.7, "Orta_Cevre_Yolu"), (0.95, "Dis_Cevre_Yolu")]:
-    road_points = []
-    current_ring_radius = AYDIN_RADIUS * radius_factor
-    for i in range(ring_road_points_count):
-        angle = 2 * math.pi * i / ring_road_points_count
-        lat = AYDIN_CENTER_LAT + current_ring_radius * math.sin(angle)
-        lon = AYDIN_CENTER_LON + (current_ring_radius * math.cos(angle)) / math.cos(math.radians(AYDIN_CENTER_LAT))
-        road_points.append((lat, lon))
-    main_roads[name] = road_points
+main_roads = city_profile.main_roads
+for name, road_points in main_roads.items():
     print(f"'{name}' {len(road_points)} nokta ile oluşturuldu.")
 
-num_radial_roads = 6
-for i in range(num_radial_roads):
-    angle = 2 * math.pi * i / num_radial_roads
-    road_points = []
-    for radius_factor_radial in [0.1, 0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9]:
-        current_radial_pos_radius = AYDIN_RADIUS * radius_factor_radial
-        lat = AYDIN_CENTER_LAT + current_radial_pos_radius * math.sin(angle)
-        lon = AYDIN_CENTER_LON + (current_radial_pos_radius * math.cos(angle)) / math.cos(math.radians(AYDIN_CENTER_LAT))
-        road_points.append((lat, lon))
-    main_roads[f"Radyal_Yol_{i+1}"] = road_points
-    print(f"'Radyal_Yol_{i+1}' {len(road_points)} nokta ile oluşturuldu.")
+pollution_field = None
+if USE_POLLUTION_FIELD:
+    lon_radius = AYDIN_RADIUS / COS_CENTER_LAT
+    pollution_field = build_city_field(AYDIN_CENTER_LAT - AYDIN_RADIUS, AYDIN_CENTER_LAT + AYDIN_RADIUS,
+                                       AYDIN_CENTER_LON - lon_radius, AYDIN_CENTER_LON + lon_radius,
+                                       POLLUTION_CELL_DEG, aydin_key_locations, main_roads)
+    print(f"Kirletici dağılım alanı hazır: {pollution_field.rows}x{pollution_field.cols} hücre.")
+
+coverage_planner = None
+if COVERAGE_TARGETING:
+    lon_radius = AYDIN_RADIUS / COS_CENTER_LAT
+    coverage_planner = CoveragePlanner(AYDIN_CENTER_LAT - AYDIN_RADIUS, AYDIN_CENTER_LAT + AYDIN_RADIUS,
+                                       AYDIN_CENTER_LON - lon_radius, AYDIN_CENTER_LON + lon_radius,
+                                       COVERAGE_CELL_DEG, is_in_circular_aydin)
+    print(f"Kapsama planlayıcısı hazır: {len(coverage_planner)} hücre.")
 
 # --- Sensör Veri Üretme Fonksiyonları ---
 # Anomali oluşturma olasılığı
 ANOMALY_CHANCE = 0.0005  # %0.05 olasılık
 ANOMALY_MULTIPLIER_RANGE = (2.0, 5.0)
+RUSH_HOUR_SCALE = 1.0  # Alan kullanılmadığında yoğun saat çarpanlarının etkisi (0: yok, 1: varsayılan aralıklar)
+TEMPERATURE_RANGE_C = (14, 28)  # Günün en düşük / en yüksek sıcaklığı (günlük sapma eklenir)
 
 def maybe_add_anomaly(value, sensor_type):
     if random.random() < ANOMALY_CHANCE:
@@ -138,37 +205,49 @@ def maybe_add_anomaly(value, sensor_type):
             return value / multiplier
     return value
 
+def rush_hour_factor(low, high):
+    """Yoğun saat çarpanı; RUSH_HOUR_SCALE ile ölçeklenir"""
+    return 1 + (random.uniform(low, high) - 1) * RUSH_HOUR_SCALE
+
 # Aydın için sensör değerleri (Akdeniz iklimi, kıyı bölgesi özellikleri)
-def get_pm25_aydin(hour, location_name_hint):
+def get_pm25_aydin(hour, location_name_hint, field_level=None):
+    if field_level is not None:  # Merkez ve yoğun saat etkisi dağılım alanında zaten var
+        return maybe_add_anomaly(round(min((5 + 15 * field_level) * random.uniform(0.9, 1.1), 100), 2), "PM2.5")
     is_center = "Merkez" in location_name_hint
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(5, 20)  # Aydın'da hava kirliliği genel olarak daha düşük
     if is_center: base *= random.uniform(1.1, 1.3)
-    if is_rush_hour: base *= random.uniform(1.2, 1.8)
+    if is_rush_hour: base *= rush_hour_factor(1.2, 1.8)
     return maybe_add_anomaly(round(min(base, 100), 2), "PM2.5")
 
-def get_pm10_aydin(hour, location_name_hint):
+def get_pm10_aydin(hour, location_name_hint, field_level=None):
+    if field_level is not None:
+        return maybe_add_anomaly(round(min((10 + 20 * field_level) * random.uniform(0.9, 1.1), 120), 2), "PM10")
     is_center = "Merkez" in location_name_hint
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(10, 30)
     if is_center: base *= random.uniform(1.1, 1.3)
-    if is_rush_hour: base *= random.uniform(1.2, 1.8)
+    if is_rush_hour: base *= rush_hour_factor(1.2, 1.8)
     return maybe_add_anomaly(round(min(base, 120), 2), "PM10")
 
-def get_co_aydin(hour, location_name_hint):
+def get_co_aydin(hour, location_name_hint, field_level=None):
+    if field_level is not None:
+        return maybe_add_anomaly(round(min((0.1 + 1.1 * field_level) * random.uniform(0.9, 1.1), 5), 2), "CO")
     is_road = "Yolu" in location_name_hint
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(0.1, 1.2)
     if is_road: base *= random.uniform(1.2, 1.5)
-    if is_rush_hour: base *= random.uniform(1.4, 2.0)
+    if is_rush_hour: base *= rush_hour_factor(1.4, 2.0)
     return maybe_add_anomaly(round(min(base, 5), 2), "CO")
 
-def get_no2_aydin(hour, location_name_hint):
+def get_no2_aydin(hour, location_name_hint, field_level=None):
+    if field_level is not None:
+        return maybe_add_anomaly(round(min((5 + 10 * field_level) * random.uniform(0.9, 1.1), 60), 1), "NO2")
     is_road = "Yolu" in location_name_hint
     is_rush_hour = (7 <= hour <= 9) or (17 <= hour <= 19)
     base = random.uniform(5, 15)
     if is_road: base *= random.uniform(1.2, 1.5)
-    if is_rush_hour: base *= random.uniform(1.3, 2.0)
+    if is_rush_hour: base *= rush_hour_factor(1.3, 2.0)
     return maybe_add_anomaly(round(min(base, 60), 1), "NO2")
 
 def get_so2_aydin(location_name_hint):
@@ -189,12 +268,15 @@ def get_voc_aydin(location_name_hint):
     if is_traffic: base *= random.uniform(1.1, 1.3)
     return maybe_add_anomaly(round(min(base, 500), 0), "VOC")
 
-def get_temperature_aydin(hour, day_variation):
+def get_temperature_aydin(hour, day_variation, diurnal=None):
     # Aydın Akdeniz iklimi: Daha sıcak yazlar, ılıman kışlar
-    min_temp, max_temp = 14 + day_variation, 28 + day_variation
+    min_temp, max_temp = TEMPERATURE_RANGE_C[0] + day_variation, TEMPERATURE_RANGE_C[1] + day_variation
     amplitude = (max_temp - min_temp) / 2
     avg_temp = min_temp + amplitude
-    temp = avg_temp + amplitude * math.sin((hour - 9) * (2 * math.pi / 24))
+    if diurnal is not None:  # Güneş konumundan türetilen günlük döngü (bkz. solar.py)
+        temp = min_temp + (max_temp - min_temp) * diurnal
+    else:
+        temp = avg_temp + amplitude * math.sin((hour - 9) * (2 * math.pi / 24))
     return maybe_add_anomaly(round(temp + random.uniform(-1, 1), 1), "Sıcaklık")
 
 def get_humidity_aydin(temperature):
@@ -219,9 +301,12 @@ def get_sound_level_aydin(hour, location_name_hint):
     
     return maybe_add_anomaly(round(min(base, 85), 1), "Ses")
 
-def get_light_level_aydin(hour):
+def get_light_level_aydin(hour, daylight_lux=None):
     # Aydın'ın daha güneşli olması nedeniyle ışık seviyeleri yüksek olabilir
-    if 7 <= hour <= 18:
+    if daylight_lux is not None:
+        # Açık gök aydınlığı x bulut/gölge payı + yapay ışık
+        return maybe_add_anomaly(round(daylight_lux * random.uniform(0.2, 1.0) + random.uniform(1, 70) + random.choice([0,0,0,0,120,250])), "Işık")
+    elif 7 <= hour <= 18:
         return maybe_add_anomaly(round(random.uniform(5500, 90000) * (math.sin((hour-6) * math.pi / 13)**2) + random.uniform(500, 1500)), "Işık")
     else:
         return maybe_add_anomaly(round(random.uniform(1, 70) + random.choice([0,0,0,0,120,250])), "Işık")
@@ -250,21 +335,18 @@ def get_radiation_aydin():
 
 # --- Rota Fonksiyonları ---
 def find_nearest_road_point_aydin(lat, lon):
-    min_dist = float('inf')
-    nearest_point = None
-    
-    for road_name, road_points_list in main_roads.items():
-        for point in road_points_list:
-            dist = math.sqrt((lat - point[0])**2 + (lon - point[1])**2)
-            if dist < min_dist:
-                min_dist = dist
-                nearest_point = point
+    # Profildeki ızgara indeksiyle tüm yol noktaları arasında en yakını bulunur
+    nearest_point = city_profile.nearest_road_point(lat, lon)
     
     if nearest_point is None:
         return (enforce_circular_boundary_aydin(lat, lon))
     
     return nearest_point
 
+def nearest_location_name(lat, lon):
+    """Koordinata en yakın kilit konumun adını döndürür"""
+    return min(aydin_key_locations, key=lambda name: (aydin_key_locations[name][0] - lat)**2 + (aydin_key_locations[name][1] - lon)**2) + "_Yakini"
+
 def get_circular_path_aydin(start_lat, start_lon, end_lat, end_lon):
     path = []
     
@@ -409,11 +491,51 @@ print(f"Dairesel sınırlar (Yarıçap: {AYDIN_RADIUS}) zorlanarak veri üretimi
 start_time = datetime.datetime(2023, 10, 28, 0, 0, 0)
 daily_temp_variation = random.uniform(-2, 5)  # Aydın'da sıcaklık değişimleri
 
-with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
+# --- Çıktı önbelleği: tam eşleşmede üretim atlanır, daha kısa bir çalıştırma varsa kaldığı saatten devam edilir ---
+dense_output_file = os.devnull if EXCEPTION_STREAM_MODE == "only" else OUTPUT_CSV_FILE
+stream_files = [f for f, enabled in [(OUTPUT_CSV_FILE, EXCEPTION_STREAM_MODE != "only"), (AQI_FILE, AQI_OUTPUT == "sidecar"),
+                                     (EXCEPTION_STREAM_FILE, EXCEPTION_STREAM_MODE != "off")] if enabled]
+output_files = stream_files + [f for f, enabled in [(CLOSE_APPROACH_FILE, ENFORCE_FLEET_SPACING), (TRAJECTORY_SIDECAR_FILE, WRITE_TRAJECTORY_SIDECAR),
+                                                    (TRACK_POLYLINES_FILE, WRITE_TRACK_POLYLINES)] if enabled]
+checkpoint_names = ["ika_states", "daily_temp_variation", "pollution_field", "coverage_planner", "trajectory_recorder",
+                    "fleet_spacing", "close_approach_events", "aqi_stream", "exception_stream"]  # Kontrol noktasına alınan simülasyon durumu
+output_cache = OutputCache("aydin", globals(), __file__) if USE_OUTPUT_CACHE and RANDOM_SEED is not None and not (SWEEP_RECORD_FILE or SWEEP_REPLAY_FILE or SHM_RING_NAME) else None
+if output_cache and output_cache.restore(output_files):
+    print(f"Çıktılar önbellekten alındı (anahtar {output_cache.key}); üretim atlandı.")
+    if PUBLISH_DIR:
+        publish(output_files, PUBLISH_DIR)
+    sys.exit(0)
+resumed = output_cache.resume_point(DURATION_HOURS, stream_files) if output_cache else None
+resume_hour = 0
+if resumed:
+    resume_hour, checkpoint_state = resumed
+    globals().update(checkpoint_state)
+    for stream in (aqi_stream, exception_stream):
+        if stream:
+            stream.reopen()
+    print(f"İlk {resume_hour} saat önbellekten alındı; üretim {resume_hour + 1}. saatten devam ediyor.")
+else:
+    trajectory_recorder = TrajectoryRecorder(start_time) if (WRITE_TRAJECTORY_SIDECAR or WRITE_TRACK_POLYLINES) else None
+    fleet_spacing = FleetSpacing(AYDIN_CENTER_LAT, MIN_SEPARATION_M, CLOSE_APPROACH_M) if ENFORCE_FLEET_SPACING else None
+    close_approach_events = []
+    aqi_stream = AqiStream(headers, sidecar_path=AQI_FILE if AQI_OUTPUT == "sidecar" else None) if AQI_OUTPUT != "off" else None
+    if AQI_OUTPUT == "columns":
+        headers = headers + aqi_stream.columns
+    exception_stream = ExceptionStreamWriter(EXCEPTION_STREAM_FILE, headers) if EXCEPTION_STREAM_MODE != "off" else None
+
+unit_ids = [ika["id"] for ika in ika_states]
+frame_recorder = FrameRecorder(unit_ids, DURATION_HOURS * 60) if SWEEP_RECORD_FILE else None
+frame_replay = FrameReplay(SWEEP_REPLAY_FILE, unit_ids, DURATION_HOURS * 60) if SWEEP_REPLAY_FILE else None
+elevation_model = ElevationModel(DEM_PATH) if DEM_PATH else None
+solar_cache = SolarCache(start_time, DURATION_HOURS * 60, AYDIN_CENTER_LAT - AYDIN_RADIUS, AYDIN_CENTER_LAT + AYDIN_RADIUS, AYDIN_CENTER_LON - AYDIN_RADIUS, AYDIN_CENTER_LON + AYDIN_RADIUS) if USE_SOLAR_MODEL else None
+shm_ring = ShmRingWriter(SHM_RING_NAME, headers, unit_ids, location_names, SHM_RING_SLOTS, "aydin", start_time) if SHM_RING_NAME else None
+
+with open(dense_output_file, 'a' if resume_hour else 'w', newline='', encoding='utf-8') as csvfile:
     writer = csv.writer(csvfile)
-    writer.writerow(headers)
+    if not resume_hour:
+        writer.writerow(headers)
     
-    for hour_delta in range(DURATION_HOURS):
+    for hour_delta in range(resume_hour, DURATION_HOURS):
         current_hour_of_day = (start_time.hour + hour_delta) % 24
         
         if current_hour_of_day == 0:
@@ -423,66 +545,113 @@ with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
             current_timestamp = start_time + datetime.timedelta(hours=hour_delta, minutes=minute_delta)
             timestamp_str = current_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
             
-            for ika in ika_states:
-                # Güzergah takibi
-                if not ika["path_complete"] and ika["path"] and ika["total_path_points"] > 0:
-                    if ika["path_index"] < ika["total_path_points"]:
-                        current_path_point = ika["path"][ika["path_index"]]
-                        ika["lat"] = current_path_point[0]
-                        ika["lon"] = current_path_point[1]
-                        ika["path_index"] += 1
-                    else:
-                        ika["path_complete"] = True
+            minute_index = hour_delta * 60 + minute_delta
+            if frame_replay:
+                # Süpürme: filo durumu kayıtlı karelerden alınır, hareket ve rota hesabı atlanır
+                field_levels = frame_replay.apply(minute_index, ika_states)
+                lats, lons = [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states]
+            else:
+                if pollution_field:
+                    pollution_field.step(current_hour_of_day)
+
+                needs_target = []
+                for ika in ika_states:
+                    # Güzergah takibi
+                    if not ika["path_complete"] and ika["path"] and ika["total_path_points"] > 0:
+                        if ika["path_index"] < ika["total_path_points"]:
+                            current_path_point = ika["path"][ika["path_index"]]
+                            ika["lat"] = current_path_point[0]
+                            ika["lon"] = current_path_point[1]
+                            ika["path_index"] += 1
+                        else:
+                            ika["path_complete"] = True
                 
-                # Hedefe ulaşıldıysa yeni hedef belirle
-                if ika["path_complete"]:
-                    if random.random() < 0.8:
-                        old_target = ika["current_target_name"]
-                        possible_new_targets = [name for name in location_names if name != old_target]
-                        if possible_new_targets:
-                            new_target_name = random.choice(possible_new_targets)
+                    # Hedefe ulaşıldıysa yeni hedef belirle
+                    if ika["path_complete"] and coverage_planner:
+                        needs_target.append(ika) # Yeni hedef dakika sonunda kapsama planlayıcısıyla toplu atanır
+                    elif ika["path_complete"]:
+                        if random.random() < 0.8:
+                            old_target = ika["current_target_name"]
+                            possible_new_targets = [name for name in location_names if name != old_target]
+                            if possible_new_targets:
+                                new_target_name = random.choice(possible_new_targets)
+                            else:
+                                new_target_name = random.choice(location_names)
+                            new_target_lat, new_target_lon = aydin_key_locations[new_target_name]
                         else:
-                            new_target_name = random.choice(location_names)
-                        new_target_lat, new_target_lon = aydin_key_locations[new_target_name]
-                    else:
-                        new_target_lat, new_target_lon = random_circular_point_aydin()
-                        # En yakın önemli konumu bul
-                        min_dist = float('inf')
-                        new_target_name = "Rastgele_Nokta"
-                        for name, (loc_lat, loc_lon) in aydin_key_locations.items():
-                            dist = math.sqrt((new_target_lat - loc_lat)**2 + (new_target_lon - loc_lon)**2)
-                            if dist < min_dist:
-                                min_dist = dist
-                                new_target_name = name + "_Yakini"
+                            new_target_lat, new_target_lon = random_circular_point_aydin()
+                            # En yakın önemli konumu bul
+                            min_dist = float('inf')
+                            new_target_name = "Rastgele_Nokta"
+                            for name, (loc_lat, loc_lon) in aydin_key_locations.items():
+                                dist = math.sqrt((new_target_lat - loc_lat)**2 + (new_target_lon - loc_lon)**2)
+                                if dist < min_dist:
+                                    min_dist = dist
+                                    new_target_name = name + "_Yakini"
                     
-                    ika["current_target_name"] = new_target_name
-                    ika["target_lat"] = new_target_lat
-                    ika["target_lon"] = new_target_lon
+                        ika["current_target_name"] = new_target_name
+                        ika["target_lat"] = new_target_lat
+                        ika["target_lon"] = new_target_lon
                     
-                    ika["path"] = get_circular_path_aydin(ika["lat"], ika["lon"], new_target_lat, new_target_lon)
-                    ika["path_index"] = 0
-                    ika["total_path_points"] = len(ika["path"]) if ika["path"] else 0
-                    ika["path_complete"] = False if ika["path"] and len(ika["path"]) > 1 else True
+                        ika["path"] = get_circular_path_aydin(ika["lat"], ika["lon"], new_target_lat, new_target_lon)
+                        ika["path_index"] = 0
+                        ika["total_path_points"] = len(ika["path"]) if ika["path"] else 0
+                        ika["path_complete"] = False if ika["path"] and len(ika["path"]) > 1 else True
                 
-                # Sınırları zorla
-                ika["lat"], ika["lon"] = enforce_circular_boundary_aydin(ika["lat"], ika["lon"])
+                    # Sınırları zorla
+                    ika["lat"], ika["lon"] = enforce_circular_boundary_aydin(ika["lat"], ika["lon"])
                 
-                # Yükseklik değişimi
-                ika['alt'] += random.uniform(-0.5, 0.5)
-                ika['alt'] = max(40, min(ika['alt'], 120))
+                    # Yükseklik değişimi
+                    if not elevation_model:
+                        ika['alt'] += random.uniform(-0.5, 0.5)
+                        ika['alt'] = max(40, min(ika['alt'], 120))
+
+                if coverage_planner:
+                    coverage_planner.observe(minute_index, [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states])
+                    new_targets = coverage_planner.assign(minute_index, [ika["lat"] for ika in needs_target], [ika["lon"] for ika in needs_target])
+                    for ika, (new_target_lat, new_target_lon) in zip(needs_target, new_targets):
+                        ika["current_target_name"] = nearest_location_name(new_target_lat, new_target_lon)
+                        ika["target_lat"] = new_target_lat
+                        ika["target_lon"] = new_target_lon
+                        ika["path"] = get_circular_path_aydin(ika["lat"], ika["lon"], new_target_lat, new_target_lon)
+                        ika["path_index"] = 0
+                        ika["total_path_points"] = len(ika["path"]) if ika["path"] else 0
+                        ika["path_complete"] = False if ika["path"] and len(ika["path"]) > 1 else True
+
+                if fleet_spacing:
+                    # Tüm İKA'lar hareket ettikten sonra birbirine çok yaklaşanlar ayrılır
+                    close_approach_events.extend(fleet_spacing.update(hour_delta * 60 + minute_delta, ika_states, enforce_circular_boundary_aydin))
+
+                if elevation_model:
+                    elevation_model.apply(ika_states, HEIGHT_ABOVE_GROUND_M)
+
+                lats, lons = [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states]
+                if pollution_field:
+                    # Tüm filo tek vektörel okumayla örneklenir
+                    field_pm, field_traffic = pollution_field.sample_many(lats, lons)
+                    field_levels = list(zip(field_pm.tolist(), field_traffic.tolist()))
+                else:
+                    field_levels = [(None, None)] * len(ika_states)
+                if frame_recorder:
+                    frame_recorder.record(minute_index, ika_states, field_levels)
+
+            solar_levels = solar_cache.levels(minute_index, lats, lons) if solar_cache else [(None, None)] * len(ika_states)
+            for ika, (pm_level, traffic_level), (daylight_lux, diurnal) in zip(ika_states, field_levels, solar_levels):
+                if trajectory_recorder:
+                    trajectory_recorder.record(hour_delta * 60 + minute_delta, ika['id'], ika['lat'], ika['lon'])
                 
                 # Sensör değerlerini oluştur
-                temp_val = get_temperature_aydin(current_hour_of_day, daily_temp_variation)
+                temp_val = get_temperature_aydin(current_hour_of_day, daily_temp_variation, diurnal)
                 humidity_val = get_humidity_aydin(temp_val)
-                pm25_val = get_pm25_aydin(current_hour_of_day, ika["current_target_name"])
-                pm10_val = get_pm10_aydin(current_hour_of_day, ika["current_target_name"])
-                co_val = get_co_aydin(current_hour_of_day, ika["current_target_name"])
-                no2_val = get_no2_aydin(current_hour_of_day, ika["current_target_name"])
+                pm25_val = get_pm25_aydin(current_hour_of_day, ika["current_target_name"], pm_level)
+                pm10_val = get_pm10_aydin(current_hour_of_day, ika["current_target_name"], pm_level)
+                co_val = get_co_aydin(current_hour_of_day, ika["current_target_name"], traffic_level)
+                no2_val = get_no2_aydin(current_hour_of_day, ika["current_target_name"], traffic_level)
                 so2_val = get_so2_aydin(ika["current_target_name"])
                 o3_val = get_o3_aydin(current_hour_of_day)
                 voc_val = get_voc_aydin(ika["current_target_name"])
                 sound_val = get_sound_level_aydin(current_hour_of_day, ika["current_target_name"])
-                light_val = get_light_level_aydin(current_hour_of_day)
+                light_val = get_light_level_aydin(current_hour_of_day, daylight_lux)
                 vibration_val = get_vibration_aydin(ika["current_target_name"])
                 mag_x_val = get_magnetic_field_aydin()
                 mag_y_val = get_magnetic_field_aydin()
@@ -495,11 +664,62 @@ with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
                     ika["current_target_name"], pm25_val, pm10_val, co_val, no2_val, so2_val, o3_val, voc_val,
                     temp_val, humidity_val, sound_val, light_val, vibration_val, mag_x_val, mag_y_val, mag_z_val, radiation_val
                 ]
+                if aqi_stream:
+                    aqi_values = aqi_stream.update(hour_delta * 60 + minute_delta, row)
+                    if AQI_OUTPUT == "columns":
+                        row += aqi_values
                 writer.writerow(row)
+                if exception_stream:
+                    exception_stream.write(hour_delta * 60 + minute_delta, row)
+                if shm_ring:
+                    shm_ring.write(hour_delta * 60 + minute_delta, row)
             
+            if shm_ring:
+                shm_ring.publish(hour_delta * 60 + minute_delta)
+
             if (minute_delta + 1) % 10 == 0:
                 print(f"İşlenen zaman: {current_timestamp}, Saat {hour_delta+1}/{DURATION_HOURS}, Dakika {minute_delta+1}/{RECORDS_PER_HOUR}")
 
+    if output_cache:
+        # Akış dosyaları kapanış yazımlarından önce kontrol noktasına alınır
+        csvfile.flush()
+        output_cache.checkpoint(DURATION_HOURS, {name: globals()[name] for name in checkpoint_names}, stream_files)
+
+if shm_ring:
+    published_minutes = shm_ring.close()
+    print(f"Paylaşımlı bellek halkası '{SHM_RING_NAME}' kapatıldı ({published_minutes} dakika yayımlandı).")
+if frame_recorder:
+    frames_size = frame_recorder.save(SWEEP_RECORD_FILE)
+    print(f"Hareket kareleri '{SWEEP_RECORD_FILE}' dosyasına yazıldı ({frames_size / 1024:.0f} KB).")
+if coverage_planner:
+    print(f"Kapsama: hücrelerin %{coverage_planner.coverage() * 100:.1f}'i en az bir kez ziyaret edildi.")
+if aqi_stream:
+    aqi_rows = aqi_stream.close()
+    print(f"{aqi_rows} satır için AQI hesaplandı" + (f" ve '{AQI_FILE}' dosyasına yazıldı." if AQI_OUTPUT == "sidecar" else " (ana CSV'de)."))
+if exception_stream:
+    dense_values, emitted_values = exception_stream.close()
+    stream_ratio = exception_stream.size_ratio()
+    print(f"İstisna akışı '{EXCEPTION_STREAM_FILE}' yazıldı ({dense_values} değerden {emitted_values} tanesi, %{100 * emitted_values / max(dense_values, 1):.1f}; "
+          f"boyut yoğun CSV'nin %{100 * stream_ratio:.1f}'i).")
+    if EXCEPTION_STREAM_MODE == "only":
+        print(f"Not: \"only\" kipinde tam CSV ('{OUTPUT_CSV_FILE}') yazılmadı.")
+if fleet_spacing:
+    write_close_approaches(close_approach_events, CLOSE_APPROACH_FILE, start_time)
+    print(f"{len(close_approach_events)} yakınlaşma olayı '{CLOSE_APPROACH_FILE}' dosyasına yazıldı ({fleet_spacing.separated} aralık düzeltmesi).")
+if WRITE_TRAJECTORY_SIDECAR:
+    total_points, kept_points = write_sidecar(trajectory_recorder, TRAJECTORY_SIDECAR_FILE, mode=TRAJECTORY_MODE, tolerance_m=TRAJECTORY_TOLERANCE_M)
+    print(f"Güzergah yan dosyası '{TRAJECTORY_SIDECAR_FILE}' yazıldı ({total_points} noktadan {kept_points} tanesi saklandı).")
+if WRITE_TRACK_POLYLINES:
+    track_points = write_track_polylines(trajectory_recorder, TRACK_POLYLINES_FILE, "aydin", tolerance_m=TRACK_POLYLINE_TOLERANCE_M)
+    print(f"İz çizgileri '{TRACK_POLYLINES_FILE}' dosyasına yazıldı ({track_points} nokta).")
+
+if output_cache:
+    evicted = output_cache.store(output_files)
+    print(f"Çıktılar önbelleğe yazıldı (anahtar {output_cache.key}" + (f", {evicted} eski girdi silindi)." if evicted else ")."))
+if PUBLISH_DIR:
+    publish(output_files, PUBLISH_DIR)
+    print(f"Çıktılar '{PUBLISH_DIR}' klasörüne kopyalandı.")
+
 print(f"Veri seti başarıyla oluşturuldu ve '{OUTPUT_CSV_FILE}' dosyasına kaydedildi.")
 print(f"Toplam satır sayısı (başlık hariç): {NUM_IKAS * DURATION_HOURS * RECORDS_PER_HOUR}")
 num_potential_anomaly_sources = 15
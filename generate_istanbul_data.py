@@ -2,6 +2,22 @@ import csv
 import datetime
 import random
 import math
+import os
+import sys
+import numpy as np
+
+from aqi_stream import AqiStream
+from camera_events import CameraEventSimulator, write_camera_events
+from exception_stream import ExceptionStreamWriter
+from fleet_spacing import FleetSpacing, write_close_approaches
+from output_cache import OutputCache, publish
+from pollution_field import build_city_field
+from sensor_sweep import FrameRecorder, FrameReplay
+from shm_ring import ShmRingWriter
+from solar import SolarCache
+from terrain import ElevationModel, dem_fingerprint
+from trajectory_codec import TrajectoryRecorder, write_sidecar
+from track_polylines import write_track_polylines
 
 # --- Ayarlar ---
 NUM_IKAS = 50 # İKA sayısı 100'e çıkarıldı
@@ -37,33 +53,105 @@ location_names = list(istanbul_key_locations.keys())
 
 OUTPUT_CSV_FILE = "istanbul_100ika_guzergahli_yasam_kalitesi.csv"
 
+# --- Sıkıştırılmış Güzergah Yan Dosyası (bkz. trajectory_codec.py) ---
+WRITE_TRAJECTORY_SIDECAR = False  # True ise konumlar ayrıca sıkıştırılmış .trj dosyasına yazılır
+TRAJECTORY_MODE = "dp"  # "delta": kayıpsız, "dp": Douglas-Peucker ile basitleştirilmiş
+TRAJECTORY_TOLERANCE_M = 5.0  # "dp" kipinde izin verilen en büyük sapma (metre)
+TRAJECTORY_SIDECAR_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + ".trj"
+
+# --- Kirletici Dağılım Alanı (bkz. pollution_field.py) ---
+USE_POLLUTION_FIELD = True  # PM2.5/PM10/CO/NO2 değerleri ızgara üzerindeki dağılım alanından örneklenir
+POLLUTION_CELL_DEG = 0.005  # Izgara hücre boyu (derece, ~500 m; İstanbul alanı daha geniş)
+
+# --- Filo Aralığı ve Yakınlaşma Olayları (bkz. fleet_spacing.py) ---
+ENFORCE_FLEET_SPACING = True  # İKA'lar arasında en küçük aralık zorlanır, yakınlaşmalar kaydedilir
+MIN_SEPARATION_M = 20.0  # İki İKA arasındaki en küçük mesafe (metre)
+CLOSE_APPROACH_M = 100.0  # Bu mesafenin altına inen çiftler yakınlaşma olayı sayılır
+CLOSE_APPROACH_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_yakinlasmalar.csv"
+
+# --- Hava Kalitesi İndeksi (bkz. aqi_stream.py) ---
+AQI_OUTPUT = "sidecar"  # "off", "sidecar": ayrı <veri seti>_aqi.csv, "columns": AQI sütunları ana CSV'ye eklenir
+AQI_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_aqi.csv"
+
+# --- İstisna ile Raporlama Çıktısı (bkz. exception_stream.py) ---
+EXCEPTION_STREAM_MODE = "off"  # "off": yalnızca tam CSV, "also": tam CSV + seyrek akış, "only": yalnızca seyrek akış
+EXCEPTION_STREAM_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_istisna.csv"
+
+# --- Kamera Analizi Olayları (bkz. camera_events.py) ---
+WRITE_CAMERA_EVENTS = True  # Araç/yaya sayıları ve olay etiketleri yalnızca tespit olan dakikalarda ayrı tabloya yazılır
+CAMERA_EVENTS_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_kamera.csv"
+
+# --- Gösterge Paneli İz Çizgileri (bkz. track_polylines.py) ---
+WRITE_TRACK_POLYLINES = True  # İKA başına kodlanmış güzergah çizgisi (şehir başına tek JSON)
+TRACK_POLYLINES_FILE = OUTPUT_CSV_FILE.rsplit(".", 1)[0] + "_izler.json"
+TRACK_POLYLINE_TOLERANCE_M = 0.0  # 0 ise yalnızca durağan dakikalar atılır
+
+# --- Tekrarlanabilirlik ve Çıktı Önbelleği (bkz. output_cache.py) ---
+RANDOM_SEED = None  # Sayı verilirse aynı ayarlar aynı veriyi üretir; önbellek yalnızca tohumlu çalıştırmalarda kullanılır
+USE_OUTPUT_CACHE = True  # Aynı ayar, tohum ve kodla çıktılar .output_cache/ altından alınır
+PUBLISH_DIR = None  # Örn. "public/data": çıktılar üretimden sonra gösterge panelinin klasörüne de kopyalanır
+
+if RANDOM_SEED is not None:
+    random.seed(RANDOM_SEED)
+    np.random.seed(RANDOM_SEED)
+
+# --- Parametre Süpürmesi (bkz. sensor_sweep.py) ---
+SWEEP_RECORD_FILE = None  # Verilirse her dakikanın filo durumu (konum, yükseklik, hedef, alan düzeyleri) bu .npz dosyasına kaydedilir
+SWEEP_REPLAY_FILE = None  # Verilirse hareket benzetimi atlanır; filo durumu bu dosyadan okunur, yalnızca sensörler örneklenir
+
+# --- Arazi Yüksekliği (bkz. terrain.py) ---
+DEM_PATH = None  # SRTM .hgt karoları veya .flt/.hdr ızgarası (dosya ya da klasör); verilirse Altitude_m zemin yüksekliğinden hesaplanır
+HEIGHT_ABOVE_GROUND_M = 1.5  # Sensörün zeminden yüksekliği (m)
+DEM_FINGERPRINT = dem_fingerprint(DEM_PATH) if DEM_PATH else None  # DEM dosyaları değişince önbellek anahtarı da değişir
+
+# --- Güneş Konumu (bkz. solar.py) ---
+USE_SOLAR_MODEL = True  # Işık ve sıcaklığın günlük döngüsü tarihe ve konuma göre güneş yüksekliğinden hesaplanır (False: saate bağlı sabit eğriler)
+
+# --- Paylaşımlı Bellek Yayını (bkz. shm_ring.py) ---
+SHM_RING_NAME = None  # Örn. "istanbul_ring": her dakikanın satırları yerel okuyucu süreçlere paylaşımlı bellek halkasıyla yayımlanır
+SHM_RING_SLOTS = 256  # Halkada tutulan dakika sayısı; daha fazla geride kalan okuyucu dakika kaçırır
+
+# --- Sensör Modeli Ayarları (parametre süpürmesiyle ayarlanabilir) ---
+RUSH_HOUR_SCALE = 1.0  # Alan kullanılmadığında yoğun saat çarpanlarının etkisi (0: yok, 1: varsayılan aralıklar)
+TEMPERATURE_RANGE_C = (10, 22)  # Günün en düşük / en yüksek sıcaklığı
+
 # --- Sensör Fonksiyonları (Bir önceki cevaptakiyle aynı, buraya kopyalamıyorum) ---
-def get_pm25(hour):
+def rush_hour_factor(low, high):
+    """Yoğun saat çarpanı; RUSH_HOUR_SCALE ile ölçeklenir"""
+    return 1 + (random.uniform(low, high) - 1) * RUSH_HOUR_SCALE
+def get_pm25(hour, field_level=None):
+    if field_level is not None: return round(min((5 + 35 * field_level) * random.uniform(0.9, 1.1), 150), 2) # Yoğun saat etkisi alanda
     base = random.uniform(5, 40)
-    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= random.uniform(1.5, 3)
+    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= rush_hour_factor(1.5, 3)
     return round(min(base, 150), 2)
-def get_pm10(hour):
+def get_pm10(hour, field_level=None):
+    if field_level is not None: return round(min((10 + 40 * field_level) * random.uniform(0.9, 1.1), 200), 2)
     base = random.uniform(10, 50)
-    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= random.uniform(1.5, 3)
+    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= rush_hour_factor(1.5, 3)
     return round(min(base, 200), 2)
-def get_co(hour):
+def get_co(hour, field_level=None):
+    if field_level is not None: return round(min((0.1 + 1.9 * field_level) * random.uniform(0.9, 1.1), 10), 2)
     base = random.uniform(0.1, 2.0)
-    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= random.uniform(2, 5)
+    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= rush_hour_factor(2, 5)
     return round(min(base, 10), 2)
-def get_no2(hour):
+def get_no2(hour, field_level=None):
+    if field_level is not None: return round(min((5 + 25 * field_level) * random.uniform(0.9, 1.1), 100), 1)
     base = random.uniform(5, 30)
-    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= random.uniform(1.5, 3)
+    if 7 <= hour <= 9 or 17 <= hour <= 19: base *= rush_hour_factor(1.5, 3)
     return round(min(base, 100), 1)
 def get_so2(): return round(random.uniform(1, 50), 1)
 def get_o3(hour):
     if 10 <= hour <= 16: return round(random.uniform(40, 120), 1)
     return round(random.uniform(10, 40), 1)
 def get_voc(): return round(random.uniform(50, 500), 0)
-def get_temperature(hour):
-    min_temp, max_temp = 10, 22
+def get_temperature(hour, diurnal=None):
+    min_temp, max_temp = TEMPERATURE_RANGE_C
     amplitude = (max_temp - min_temp) / 2
     avg_temp = min_temp + amplitude
-    temp = avg_temp + amplitude * math.sin((hour - 9) * (2 * math.pi / 24))
+    if diurnal is not None: # Güneş konumundan türetilen günlük döngü (bkz. solar.py)
+        temp = min_temp + (max_temp - min_temp) * diurnal
+    else:
+        temp = avg_temp + amplitude * math.sin((hour - 9) * (2 * math.pi / 24))
     return round(temp + random.uniform(-1, 1), 1)
 def get_humidity(temperature):
     base_humidity = 80 - (temperature * 1.5)
@@ -72,8 +160,9 @@ def get_sound_level(hour):
     if 23 <= hour <= 24 or 0 <= hour <= 6: return round(random.uniform(30, 50), 1)
     elif 7 <= hour <= 19: return round(random.uniform(55, 85) + random.choice([0,0,0,5,10]), 1)
     return round(random.uniform(45, 65), 1)
-def get_light_level(hour):
-    if 7 <= hour <= 18: return round(random.uniform(5000, 80000) * (math.sin((hour-6) * math.pi / 13)**2) + random.uniform(0,1000))
+def get_light_level(hour, daylight_lux=None):
+    if daylight_lux is not None: return round(daylight_lux * random.uniform(0.1, 1.0) + random.uniform(1, 50) + random.choice([0,0,0,0,100,200])) # Açık gök x bulut/gölge + yapay ışık
+    elif 7 <= hour <= 18: return round(random.uniform(5000, 80000) * (math.sin((hour-6) * math.pi / 13)**2) + random.uniform(0,1000))
     else: return round(random.uniform(1, 50) + random.choice([0,0,0,0,100,200]))
 def get_vibration():
     if random.random() < 0.05: return round(random.uniform(0.5, 2.0), 2)
@@ -83,7 +172,18 @@ def get_radiation():
     if random.random() < 0.001: return round(random.uniform(0.31, 0.50), 3)
     return round(random.uniform(0.05, 0.30), 3)
 
+# --- Kirletici Dağılım Alanı ---
+pollution_field = None
+if USE_POLLUTION_FIELD:
+    pollution_field = build_city_field(CITY_LAT_MIN, CITY_LAT_MAX, CITY_LON_MIN, CITY_LON_MAX,
+                                       POLLUTION_CELL_DEG, istanbul_key_locations)
+    print(f"Kirletici dağılım alanı hazır: {pollution_field.rows}x{pollution_field.cols} hücre.")
+
 # --- İKA Başlangıç Konumları ve Hareket Mantığı ---
+def clamp_to_city(lat, lon):
+    """Koordinatları İstanbul sınır kutusuna kırpar"""
+    return max(CITY_LAT_MIN, min(lat, CITY_LAT_MAX)), max(CITY_LON_MIN, min(lon, CITY_LON_MAX))
+
 ika_states = []
 for i in range(NUM_IKAS):
     start_location_name = random.choice(location_names)
@@ -108,52 +208,127 @@ headers = [
     "PM2.5_ug_m3", "PM10_ug_m3", "CO_ppm", "NO2_ppb", "SO2_ppb", "O3_ppb", "VOC_ppb",
     "Temperature_C", "Relative_Humidity_Percent", "Sound_Level_dB", "Light_Level_lux",
     "Vibration_g", "Magnetic_Field_X_uT", "Magnetic_Field_Y_uT", "Magnetic_Field_Z_uT",
-    "Radiation_uSv_h", "Kamera_Analizi"
-]
+    "Radiation_uSv_h"
+]  # Kamera analizi ana tabloda değil, (Timestamp, Ika_ID) ile bağlı seyrek olay tablosunda tutulur
 
 start_time = datetime.datetime(2023, 10, 28, 0, 0, 0)
 
-with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
+# --- Çıktı önbelleği: tam eşleşmede üretim atlanır, daha kısa bir çalıştırma varsa kaldığı saatten devam edilir ---
+dense_output_file = os.devnull if EXCEPTION_STREAM_MODE == "only" else OUTPUT_CSV_FILE
+stream_files = [f for f, enabled in [(OUTPUT_CSV_FILE, EXCEPTION_STREAM_MODE != "only"), (AQI_FILE, AQI_OUTPUT == "sidecar"),
+                                     (EXCEPTION_STREAM_FILE, EXCEPTION_STREAM_MODE != "off")] if enabled]
+output_files = stream_files + [f for f, enabled in [(CLOSE_APPROACH_FILE, ENFORCE_FLEET_SPACING), (TRAJECTORY_SIDECAR_FILE, WRITE_TRAJECTORY_SIDECAR),
+                                                    (TRACK_POLYLINES_FILE, WRITE_TRACK_POLYLINES), (CAMERA_EVENTS_FILE, WRITE_CAMERA_EVENTS)] if enabled]
+checkpoint_names = ["ika_states", "pollution_field", "trajectory_recorder", "fleet_spacing",
+                    "close_approach_events", "camera_events", "aqi_stream", "exception_stream"]  # Kontrol noktasına alınan simülasyon durumu
+output_cache = OutputCache("istanbul", globals(), __file__) if USE_OUTPUT_CACHE and RANDOM_SEED is not None and not (SWEEP_RECORD_FILE or SWEEP_REPLAY_FILE or SHM_RING_NAME) else None
+if output_cache and output_cache.restore(output_files):
+    print(f"Çıktılar önbellekten alındı (anahtar {output_cache.key}); üretim atlandı.")
+    if PUBLISH_DIR:
+        publish(output_files, PUBLISH_DIR)
+    sys.exit(0)
+resumed = output_cache.resume_point(DURATION_HOURS, stream_files) if output_cache else None
+resume_hour = 0
+if resumed:
+    resume_hour, checkpoint_state = resumed
+    globals().update(checkpoint_state)
+    for stream in (aqi_stream, exception_stream):
+        if stream:
+            stream.reopen()
+    print(f"İlk {resume_hour} saat önbellekten alındı; üretim {resume_hour + 1}. saatten devam ediyor.")
+else:
+    trajectory_recorder = TrajectoryRecorder(start_time) if (WRITE_TRAJECTORY_SIDECAR or WRITE_TRACK_POLYLINES) else None
+    fleet_spacing = FleetSpacing((CITY_LAT_MIN + CITY_LAT_MAX) / 2, MIN_SEPARATION_M, CLOSE_APPROACH_M) if ENFORCE_FLEET_SPACING else None
+    close_approach_events = []
+    camera_events = CameraEventSimulator(seed=RANDOM_SEED) if WRITE_CAMERA_EVENTS else None
+    aqi_stream = AqiStream(headers, sidecar_path=AQI_FILE if AQI_OUTPUT == "sidecar" else None) if AQI_OUTPUT != "off" else None
+    if AQI_OUTPUT == "columns":
+        headers = headers + aqi_stream.columns
+    exception_stream = ExceptionStreamWriter(EXCEPTION_STREAM_FILE, headers) if EXCEPTION_STREAM_MODE != "off" else None
+
+unit_ids = [ika["id"] for ika in ika_states]
+frame_recorder = FrameRecorder(unit_ids, DURATION_HOURS * 60) if SWEEP_RECORD_FILE else None
+frame_replay = FrameReplay(SWEEP_REPLAY_FILE, unit_ids, DURATION_HOURS * 60) if SWEEP_REPLAY_FILE else None
+elevation_model = ElevationModel(DEM_PATH) if DEM_PATH else None
+solar_cache = SolarCache(start_time, DURATION_HOURS * 60, CITY_LAT_MIN, CITY_LAT_MAX, CITY_LON_MIN, CITY_LON_MAX) if USE_SOLAR_MODEL else None
+shm_ring = ShmRingWriter(SHM_RING_NAME, headers, unit_ids, location_names, SHM_RING_SLOTS, "istanbul", start_time) if SHM_RING_NAME else None
+
+with open(dense_output_file, 'a' if resume_hour else 'w', newline='', encoding='utf-8') as csvfile:
     writer = csv.writer(csvfile)
-    writer.writerow(headers)
+    if not resume_hour:
+        writer.writerow(headers)
 
-    for hour_delta in range(DURATION_HOURS):
+    for hour_delta in range(resume_hour, DURATION_HOURS):
         current_hour_of_day = (start_time.hour + hour_delta) % 24
         for minute_delta in range(RECORDS_PER_HOUR):
             current_timestamp = start_time + datetime.timedelta(hours=hour_delta, minutes=minute_delta)
             timestamp_str = current_timestamp.strftime("%Y-%m-%dT%H:%M:%SZ")
 
-            for ika in ika_states:
-                # Hedefe doğru hareket et
-                # Lineer interpolasyon ile basit bir güzergah takibi
-                if ika["steps_to_target"] > 0:
-                    delta_lat = (ika["target_lat"] - ika["lat"]) / ika["steps_to_target"]
-                    delta_lon = (ika["target_lon"] - ika["lon"]) / ika["steps_to_target"]
-                    ika["lat"] += delta_lat + random.uniform(-0.0002, 0.0002) # Hafif sapma
-                    ika["lon"] += delta_lon + random.uniform(-0.0002, 0.0002) # Hafif sapma
-                    ika["steps_to_target"] -= 1
-                else: # Hedefe ulaşıldı veya süre doldu, yeni hedef belirle
-                    old_target = ika["current_target_name"]
-                    new_target_name = random.choice(location_names)
-                    while new_target_name == old_target: # Yeni hedef eskisiyle aynı olmasın
+            minute_index = hour_delta * 60 + minute_delta
+            if frame_replay:
+                # Süpürme: filo durumu kayıtlı karelerden alınır, hareket ve rota hesabı atlanır
+                field_levels = frame_replay.apply(minute_index, ika_states)
+                lats, lons = [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states]
+            else:
+                if pollution_field:
+                    pollution_field.step(current_hour_of_day)
+
+                for ika in ika_states:
+                    # Hedefe doğru hareket et
+                    # Lineer interpolasyon ile basit bir güzergah takibi
+                    if ika["steps_to_target"] > 0:
+                        delta_lat = (ika["target_lat"] - ika["lat"]) / ika["steps_to_target"]
+                        delta_lon = (ika["target_lon"] - ika["lon"]) / ika["steps_to_target"]
+                        ika["lat"] += delta_lat + random.uniform(-0.0002, 0.0002) # Hafif sapma
+                        ika["lon"] += delta_lon + random.uniform(-0.0002, 0.0002) # Hafif sapma
+                        ika["steps_to_target"] -= 1
+                    else: # Hedefe ulaşıldı veya süre doldu, yeni hedef belirle
+                        old_target = ika["current_target_name"]
                         new_target_name = random.choice(location_names)
+                        while new_target_name == old_target: # Yeni hedef eskisiyle aynı olmasın
+                            new_target_name = random.choice(location_names)
                     
-                    ika["current_target_name"] = new_target_name
-                    ika["target_lat"] = istanbul_key_locations[new_target_name][0]
-                    ika["target_lon"] = istanbul_key_locations[new_target_name][1]
-                    # Yeni hedefe uzaklığa göre adım sayısı belirleyelim (basitçe)
-                    dist_approx = abs(ika["target_lat"] - ika["lat"]) + abs(ika["target_lon"] - ika["lon"])
-                    ika["steps_to_target"] = random.randint(max(15, int(dist_approx * 500)), max(45, int(dist_approx * 1500))) # min 15 dk, max ~2-3 saatlik yol
-                    ika["steps_to_target"] = min(ika["steps_to_target"], 240) # En fazla 4 saatlik bir yol olsun bir sonraki hedef için
-
-                # Sınırlar içinde kalmasını sağla (çok dışarı taşarsa merkeze yakın bir noktaya resetle)
-                ika["lat"] = max(CITY_LAT_MIN, min(ika["lat"], CITY_LAT_MAX))
-                ika["lon"] = max(CITY_LON_MIN, min(ika["lon"], CITY_LON_MAX))
+                        ika["current_target_name"] = new_target_name
+                        ika["target_lat"] = istanbul_key_locations[new_target_name][0]
+                        ika["target_lon"] = istanbul_key_locations[new_target_name][1]
+                        # Yeni hedefe uzaklığa göre adım sayısı belirleyelim (basitçe)
+                        dist_approx = abs(ika["target_lat"] - ika["lat"]) + abs(ika["target_lon"] - ika["lon"])
+                        ika["steps_to_target"] = random.randint(max(15, int(dist_approx * 500)), max(45, int(dist_approx * 1500))) # min 15 dk, max ~2-3 saatlik yol
+                        ika["steps_to_target"] = min(ika["steps_to_target"], 240) # En fazla 4 saatlik bir yol olsun bir sonraki hedef için
+
+                    # Sınırlar içinde kalmasını sağla (çok dışarı taşarsa merkeze yakın bir noktaya resetle)
+                    ika["lat"] = max(CITY_LAT_MIN, min(ika["lat"], CITY_LAT_MAX))
+                    ika["lon"] = max(CITY_LON_MIN, min(ika["lon"], CITY_LON_MAX))
                 
-                ika['alt'] += random.uniform(-1, 1)
-                ika['alt'] = max(10, min(ika['alt'], 250))
+                    if not elevation_model:
+                        ika['alt'] += random.uniform(-1, 1)
+                        ika['alt'] = max(10, min(ika['alt'], 250))
+
+                if fleet_spacing:
+                    # Tüm İKA'lar hareket ettikten sonra birbirine çok yaklaşanlar ayrılır
+                    close_approach_events.extend(fleet_spacing.update(hour_delta * 60 + minute_delta, ika_states, clamp_to_city))
+
+                if elevation_model:
+                    elevation_model.apply(ika_states, HEIGHT_ABOVE_GROUND_M)
 
-                temp = get_temperature(current_hour_of_day)
+                lats, lons = [ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states]
+                if pollution_field:
+                    # Tüm filo tek vektörel okumayla örneklenir
+                    field_pm, field_traffic = pollution_field.sample_many(lats, lons)
+                    field_levels = list(zip(field_pm.tolist(), field_traffic.tolist()))
+                else:
+                    field_levels = [(None, None)] * len(ika_states)
+                if frame_recorder:
+                    frame_recorder.record(minute_index, ika_states, field_levels)
+
+            traffic_levels = []
+            solar_levels = solar_cache.levels(minute_index, lats, lons) if solar_cache else [(None, None)] * len(ika_states)
+            for ika, (pm_level, traffic_level), (daylight_lux, diurnal) in zip(ika_states, field_levels, solar_levels):
+                if trajectory_recorder:
+                    trajectory_recorder.record(hour_delta * 60 + minute_delta, ika['id'], ika['lat'], ika['lon'])
+
+                temp = get_temperature(current_hour_of_day, diurnal)
+                traffic_levels.append(traffic_level)
                 
                 row = [
                     timestamp_str,
@@ -162,18 +337,74 @@ with open(OUTPUT_CSV_FILE, 'w', newline='', encoding='utf-8') as csvfile:
                     round(ika['lon'], 6),
                     round(ika['alt'], 1),
                     ika["current_target_name"], # Hedef bilgisi eklendi
-                    get_pm25(current_hour_of_day), get_pm10(current_hour_of_day),
-                    get_co(current_hour_of_day), get_no2(current_hour_of_day),
+                    get_pm25(current_hour_of_day, pm_level), get_pm10(current_hour_of_day, pm_level),
+                    get_co(current_hour_of_day, traffic_level), get_no2(current_hour_of_day, traffic_level),
                     get_so2(), get_o3(current_hour_of_day), get_voc(),
                     temp, get_humidity(temp),
-                    get_sound_level(current_hour_of_day), get_light_level(current_hour_of_day),
+                    get_sound_level(current_hour_of_day), get_light_level(current_hour_of_day, daylight_lux),
                     get_vibration(), get_magnetic_field(), get_magnetic_field(), get_magnetic_field(),
                     get_radiation()
                 ]
+                if aqi_stream:
+                    aqi_values = aqi_stream.update(hour_delta * 60 + minute_delta, row)
+                    if AQI_OUTPUT == "columns":
+                        row += aqi_values
                 writer.writerow(row)
+                if exception_stream:
+                    exception_stream.write(hour_delta * 60 + minute_delta, row)
+                if shm_ring:
+                    shm_ring.write(hour_delta * 60 + minute_delta, row)
+
+            if camera_events:
+                camera_events.step(hour_delta * 60 + minute_delta, current_hour_of_day, [ika['id'] for ika in ika_states],
+                                   traffic_levels if None not in traffic_levels else None)
             
+            if shm_ring:
+                shm_ring.publish(hour_delta * 60 + minute_delta)
+
             if (minute_delta + 1) % 10 == 0:
                  print(f"İşlenen zaman: {current_timestamp}, Saat {hour_delta+1}/{DURATION_HOURS}, Dakika {minute_delta+1}/{RECORDS_PER_HOUR}")
 
+    if output_cache:
+        # Akış dosyaları kapanış yazımlarından önce kontrol noktasına alınır
+        csvfile.flush()
+        output_cache.checkpoint(DURATION_HOURS, {name: globals()[name] for name in checkpoint_names}, stream_files)
+
+if shm_ring:
+    published_minutes = shm_ring.close()
+    print(f"Paylaşımlı bellek halkası '{SHM_RING_NAME}' kapatıldı ({published_minutes} dakika yayımlandı).")
+if frame_recorder:
+    frames_size = frame_recorder.save(SWEEP_RECORD_FILE)
+    print(f"Hareket kareleri '{SWEEP_RECORD_FILE}' dosyasına yazıldı ({frames_size / 1024:.0f} KB).")
+if aqi_stream:
+    aqi_rows = aqi_stream.close()
+    print(f"{aqi_rows} satır için AQI hesaplandı" + (f" ve '{AQI_FILE}' dosyasına yazıldı." if AQI_OUTPUT == "sidecar" else " (ana CSV'de)."))
+if exception_stream:
+    dense_values, emitted_values = exception_stream.close()
+    stream_ratio = exception_stream.size_ratio()
+    print(f"İstisna akışı '{EXCEPTION_STREAM_FILE}' yazıldı ({dense_values} değerden {emitted_values} tanesi, %{100 * emitted_values / max(dense_values, 1):.1f}; "
+          f"boyut yoğun CSV'nin %{100 * stream_ratio:.1f}'i).")
+    if EXCEPTION_STREAM_MODE == "only":
+        print(f"Not: \"only\" kipinde tam CSV ('{OUTPUT_CSV_FILE}') yazılmadı.")
+if camera_events:
+    camera_count = write_camera_events(camera_events, CAMERA_EVENTS_FILE, start_time)
+    print(f"{camera_count} kamera tespiti '{CAMERA_EVENTS_FILE}' dosyasına yazıldı.")
+if fleet_spacing:
+    write_close_approaches(close_approach_events, CLOSE_APPROACH_FILE, start_time)
+    print(f"{len(close_approach_events)} yakınlaşma olayı '{CLOSE_APPROACH_FILE}' dosyasına yazıldı ({fleet_spacing.separated} aralık düzeltmesi).")
+if WRITE_TRAJECTORY_SIDECAR:
+    total_points, kept_points = write_sidecar(trajectory_recorder, TRAJECTORY_SIDECAR_FILE, mode=TRAJECTORY_MODE, tolerance_m=TRAJECTORY_TOLERANCE_M)
+    print(f"Güzergah yan dosyası '{TRAJECTORY_SIDECAR_FILE}' yazıldı ({total_points} noktadan {kept_points} tanesi saklandı).")
+if WRITE_TRACK_POLYLINES:
+    track_points = write_track_polylines(trajectory_recorder, TRACK_POLYLINES_FILE, "istanbul", tolerance_m=TRACK_POLYLINE_TOLERANCE_M)
+    print(f"İz çizgileri '{TRACK_POLYLINES_FILE}' dosyasına yazıldı ({track_points} nokta).")
+
+if output_cache:
+    evicted = output_cache.store(output_files)
+    print(f"Çıktılar önbelleğe yazıldı (anahtar {output_cache.key}" + (f", {evicted} eski girdi silindi)." if evicted else ")."))
+if PUBLISH_DIR:
+    publish(output_files, PUBLISH_DIR)
+    print(f"Çıktılar '{PUBLISH_DIR}' klasörüne kopyalandı.")
+
 print(f"Veri seti '{OUTPUT_CSV_FILE}' dosyasına başarıyla oluşturuldu.")
 print(f"Toplam satır sayısı (başlık hariç): {NUM_IKAS * DURATION_HOURS * RECORDS_PER_HOUR}")
\ No newline at end of file
@@ -0,0 +1,235 @@
+import argparse
+import datetime
+import json
+import math
+import numpy as np
+
+from columnar_store import SENSOR_COLUMNS
+from dataset_reader import DatasetReader
+
+# --- Uzay-Zamansal Sıcak Nokta Kümeleme ---
+# Eşik aşan (uyarı/tehlike) ölçümler, ızgara indeksli DBSCAN benzeri bir yöntemle
+# enlem/boylam/zaman uzayında kümelenir. Her ölçüm EPS_M x EPS_M metre x EPS_MINUTES
+# dakikalık bir hücreye düşer; hücre yoğunluğu kendisi ve 26 komşusundaki ölçüm sayısıdır.
+# Yoğunluğu MIN_POINTS'e ulaşan hücreler çekirdektir, bitişik çekirdek hücreler aynı
+# kümeye bağlanır, çekirdeğe komşu diğer hücreler sınır olarak katılır, kalanlar gürültüdür.
+# Tüm adımlar sıralı hücre anahtarları üzerinde arama ile yapılır; ölçüm çiftleri arasında
+# mesafe hesaplanmaz.
+
+METERS_PER_DEGREE = 111_320.0
+EPS_M = 150.0  # Uzamsal komşuluk (hücre boyu, metre)
+EPS_MINUTES = 10  # Zamansal komşuluk (hücre süresi, dakika)
+MIN_POINTS = 5  # Çekirdek hücre için komşulukta gereken en az ölçüm
+NEIGHBOR_OFFSETS = [(dx, dy, dt) for dx in (-1, 0, 1) for dy in (-1, 0, 1) for dt in (-1, 0, 1)]
+# Her komşu çiftini bir kez üretmek için ofsetlerin sözlük sırasında pozitif olan yarısı
+HALF_OFFSETS = [offset for offset in NEIGHBOR_OFFSETS if offset > (0, 0, 0)]
+DENSE_LOOKUP_LIMIT = 16_000_000  # Hücre uzayı bundan küçükse anahtar -> hücre tablosu doğrudan dizidir
+
+# src/utils/dataUtils.js içindeki healthThresholds ile aynı eşikler (uyarı, tehlike);
+# alt/üst sınırlı sensörlerde ((alt, üst) uyarı, (alt, üst) tehlike)
+HEALTH_THRESHOLDS = {
+    "PM2.5_ug_m3": (20, 35), "PM10_ug_m3": (40, 70), "CO_ppm": (5, 10), "NO2_ppb": (70, 150),
+    "SO2_ppb": (50, 125), "O3_ppb": (60, 100), "VOC_ppb": (300, 600),
+    "Temperature_C": ((5, 30), (0, 35)), "Relative_Humidity_Percent": ((20, 75), (15, 85)),
+    "Sound_Level_dB": (65, 80), "Light_Level_lux": (20000, 50000),
+    "Vibration_g": (0.4, 0.8), "Radiation_uSv_h": (0.2, 0.4),
+}
+# Gece saatlerinde daha sıkı eşikler: (başlangıç saati, bitiş saati, uyarı, tehlike); eşik aşımı ">"
+NIGHT_THRESHOLDS = {
+    "Sound_Level_dB": (22, 6, 40, 50),
+    "Light_Level_lux": (21, 5, 500, 1000),
+}
+ALERT_LEVELS = {"warning": 1, "danger": 2}
+
+
+def alert_levels(sensor, values, hour_of_day=None):
+    """Ölçümlerin uyarı seviyesini döndürür: 0 normal, 1 uyarı, 2 tehlike (checkAlertLevel ile aynı kurallar)"""
+    values = np.asarray(values, dtype=np.float64)
+    levels = np.zeros(len(values), dtype=np.int8)
+    rule = HEALTH_THRESHOLDS.get(sensor)
+    if rule is None:
+        return levels
+    warning, danger = rule
+    if isinstance(warning, tuple):
+        levels[(values <= warning[0]) | (values >= warning[1])] = 1
+        levels[(values <= danger[0]) | (values >= danger[1])] = 2
+    else:
+        levels[values >= warning] = 1
+        levels[values >= danger] = 2
+    night = NIGHT_THRESHOLDS.get(sensor)
+    if night is not None and hour_of_day is not None:
+        start, end, night_warning, night_danger = night
+        is_night = (hour_of_day >= start) | (hour_of_day < end)
+        levels[is_night] = np.where(values[is_night] > night_danger, 2, np.where(values[is_night] > night_warning, 1, 0))
+    levels[~np.isfinite(values)] = 0
+    return levels
+
+
+def _cell_lookup(cell_keys, size):
+    """Anahtar dizisini hücre indeksine çeviren fonksiyon döndürür; bulunamayanlar -1"""
+    if size <= DENSE_LOOKUP_LIMIT:
+        table = np.full(size, -1, dtype=np.int32 if len(cell_keys) < 2 ** 31 else np.int64)
+        table[cell_keys] = np.arange(len(cell_keys))
+        return lambda keys: table[keys]
+
+    def lookup(keys):
+        idx = np.minimum(np.searchsorted(cell_keys, keys), len(cell_keys) - 1)
+        return np.where(cell_keys[idx] == keys, idx, -1)
+    return lookup
+
+
+def _connected_labels(n, edge_groups):
+    """Bağlı bileşen etiketleri (bileşendeki en küçük düğüm indeksi).
+
+    Her kenar grubu tek bir ızgara ofsetine aittir; bir grupta her düğüm en fazla bir kez
+    kaynak ve bir kez hedef olduğundan güncellemeler düz atamayla yapılabilir.
+    """
+    labels = np.arange(n)
+    while True:
+        previous = labels.copy()
+        for a, b in edge_groups:
+            low = np.minimum(labels[a], labels[b])
+            labels[a] = low
+            labels[b] = np.minimum(labels[b], low)
+        while True:  # İşaretçi atlama: etiketin etiketine kısa devre
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+def cluster_cells(x, y, t, eps_m=EPS_M, eps_minutes=EPS_MINUTES, min_points=MIN_POINTS):
+    """Noktaları ızgara hücreleri üzerinden kümeler; nokta başına küme etiketi döndürür (-1 gürültü)"""
+    if len(x) == 0:
+        return np.zeros(0, dtype=np.int64)
+    cx = np.floor(np.asarray(x) / eps_m).astype(np.int64)
+    cy = np.floor(np.asarray(y) / eps_m).astype(np.int64)
+    ct = np.floor(np.asarray(t) / eps_minutes).astype(np.int64)
+    # Komşu ofsetleri taşmasın diye her eksende bir hücre pay bırakılır
+    cx, cy, ct = cx - cx.min() + 1, cy - cy.min() + 1, ct - ct.min() + 1
+    dims = (int(cx.max()) + 2, int(cy.max()) + 2, int(ct.max()) + 2)
+    keys = np.ravel_multi_index((cx, cy, ct), dims)
+    cell_keys, point_cell, counts = np.unique(keys, return_inverse=True, return_counts=True)
+    lookup = _cell_lookup(cell_keys, dims[0] * dims[1] * dims[2])
+    strides = (dims[1] * dims[2], dims[2], 1)
+
+    # Yarım komşulukta bulunan her (hücre, komşu) çifti iki yönde de sayılır
+    density = counts.copy()
+    pairs = []
+    for offset in HALF_OFFSETS:
+        found = lookup(cell_keys + sum(d * s for d, s in zip(offset, strides)))
+        source = np.flatnonzero(found >= 0)
+        target = found[source].astype(np.int64)
+        density[source] += counts[target]
+        density[target] += counts[source]
+        pairs.append((source, target))
+    core = density >= min_points
+
+    # Bitişik çekirdek hücreler aynı kümeye bağlanır
+    edge_groups = []
+    for source, target in pairs:
+        link = core[source] & core[target]
+        edge_groups.append((source[link], target[link]))
+    labels = _connected_labels(len(cell_keys), edge_groups)
+
+    # Çekirdek olmayan hücreler komşu bir çekirdeğin kümesine (en küçük etiket) katılır
+    cell_label = np.where(core, labels, -1)
+    unset = np.iinfo(np.int64).max
+    border = np.full(len(cell_keys), unset)
+    for source, target in pairs:
+        for cell, neighbor in ((source, target), (target, source)):
+            join = ~core[cell] & core[neighbor]
+            np.minimum.at(border, cell[join], labels[neighbor[join]])
+    cell_label = np.where(~core & (border != unset), border, cell_label)
+
+    # Etiketler 0..k-1 aralığına sıkıştırılır
+    _, compact = np.unique(cell_label, return_inverse=True)
+    compact = compact - (1 if (cell_label < 0).any() else 0)
+    compact[cell_label < 0] = -1
+    return compact[point_cell]
+
+
+def find_hotspots(reader, sensors=None, min_level="warning", eps_m=EPS_M, eps_minutes=EPS_MINUTES, min_points=MIN_POINTS):
+    """Depodaki eşik aşan ölçümleri sensör başına kümeler; sıcak nokta sözlükleri listesi döndürür"""
+    minutes = np.asarray(reader.column("minute"))
+    start_time = reader.start_time
+    start_offset = start_time.hour * 60 + start_time.minute if start_time else 0
+    hour_of_day = ((minutes + start_offset) // 60) % 24
+    lat_all = reader.column("Latitude")
+    lon_all = reader.column("Longitude")
+    units_all = reader.column("unit")
+    cos_lat = math.cos(math.radians(float(np.nanmean(lat_all)))) if len(lat_all) else 1.0
+    threshold = ALERT_LEVELS[min_level]
+
+    hotspots = []
+    for sensor in sensors or SENSOR_COLUMNS:
+        if sensor not in HEALTH_THRESHOLDS:
+            continue
+        values_all = reader.column(sensor)
+        levels_all = alert_levels(sensor, values_all, hour_of_day)
+        flagged = np.flatnonzero(levels_all >= threshold)
+        if len(flagged) == 0:
+            continue
+        lat, lon = np.asarray(lat_all[flagged], dtype=np.float64), np.asarray(lon_all[flagged], dtype=np.float64)
+        t = minutes[flagged]
+        values, levels, units = np.asarray(values_all[flagged], dtype=np.float64), levels_all[flagged], units_all[flagged]
+        labels = cluster_cells(lon * METERS_PER_DEGREE * cos_lat, lat * METERS_PER_DEGREE, t, eps_m, eps_minutes, min_points)
+        clustered = labels >= 0
+        if not clustered.any():
+            continue
+        # Küme başına ölçümler bitişik olsun diye etikete göre sıralanır
+        order = np.flatnonzero(clustered)[np.argsort(labels[clustered], kind="stable")]
+        bounds = np.flatnonzero(np.r_[True, labels[order][1:] != labels[order][:-1], True])
+        # Alçak sınırlı ihlallerde (örn. düşük sıcaklık) tepe, eşikten en uzak değerdir
+        severity = np.abs(values - np.nanmedian(values_all)) if isinstance(HEALTH_THRESHOLDS[sensor][0], tuple) else values
+        for lo, hi in zip(bounds[:-1], bounds[1:]):
+            members = order[lo:hi]
+            peak = members[np.argmax(severity[members])]
+            first, last = int(t[members].min()), int(t[members].max())
+            hotspots.append({
+                "sensor": sensor,
+                "level": "danger" if levels[members].max() >= 2 else "warning",
+                "readings": int(len(members)),
+                "centroid": [round(float(lat[members].mean()), 6), round(float(lon[members].mean()), 6)],
+                "extent": [round(float(lat[members].min()), 6), round(float(lon[members].min()), 6),
+                           round(float(lat[members].max()), 6), round(float(lon[members].max()), 6)],
+                "start": first, "end": last, "duration_min": last - first + 1,
+                "peak_value": round(float(values[peak]), 3),
+                "peak_at": [round(float(lat[peak]), 6), round(float(lon[peak]), 6), int(t[peak])],
+                "units": [reader.units[u] for u in np.unique(units[members]).tolist()],
+            })
+    hotspots.sort(key=lambda h: (-h["readings"], h["sensor"], h["start"]))
+    if start_time:
+        for h in hotspots:
+            h["start"], h["end"] = (reader.timestamps([h["start"], h["end"]]))
+            h["peak_at"][2] = reader.timestamps([h["peak_at"][2]])[0]
+    return hotspots
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Eşik aşan ölçümlerden uzay-zamansal sıcak noktalar çıkarır.")
+    parser.add_argument("store_dir", help="columnar_store.py ile oluşturulan depo")
+    parser.add_argument("--out", help="Sıcak noktaların yazılacağı JSON dosyası")
+    parser.add_argument("--sensor", action="append", choices=sorted(HEALTH_THRESHOLDS), help="Sensör (tekrarlanabilir; varsayılan: tümü)")
+    parser.add_argument("--level", choices=sorted(ALERT_LEVELS), default="warning", help="Kümelemeye alınan en düşük uyarı seviyesi")
+    parser.add_argument("--eps-m", type=float, default=EPS_M)
+    parser.add_argument("--eps-min", type=int, default=EPS_MINUTES)
+    parser.add_argument("--min-points", type=int, default=MIN_POINTS)
+    parser.add_argument("--top", type=int, default=10, help="Ekrana yazdırılan sıcak nokta sayısı")
+    args = parser.parse_args()
+
+    started = datetime.datetime.now()
+    reader = DatasetReader(args.store_dir)
+    hotspots = find_hotspots(reader, args.sensor, args.level, args.eps_m, args.eps_min, args.min_points)
+    elapsed = (datetime.datetime.now() - started).total_seconds()
+    print(f"{reader.meta['city']}: {len(reader)} ölçümden {len(hotspots)} sıcak nokta bulundu ({elapsed:.2f} sn).")
+    for h in hotspots[:args.top]:
+        print(f"  {h['sensor']:<16} {h['level']:<7} {h['readings']:>6} ölçüm, {h['duration_min']:>4} dk, "
+              f"tepe {h['peak_value']} @ {h['centroid']}, {len(h['units'])} İKA")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump({"city": reader.meta["city"], "eps_m": args.eps_m, "eps_minutes": args.eps_min,
+                       "min_points": args.min_points, "hotspots": hotspots}, f, ensure_ascii=False, indent=2)
+        print(f"Sıcak noktalar '{args.out}' dosyasına yazıldı.")
@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import csv
+import itertools
+import json
+import os
+import struct
+import time
+import numpy as np
+
+from columnar_store import canonical_column_name, SENSOR_COLUMNS
+
+# --- Alım (Ingest) Katmanı İçin Yük Üretici ---
+# Üretilmiş bir veri setini satır satır okuyup toplu halde yerel bir uç noktaya gönderir:
+# HTTP POST (kalıcı bağlantılar, JSON gövde) veya MQTT 3.1.1 (QoS 1, PUBACK ile onay).
+# Gönderim asyncio ile yapılır; her çalışan kendi bağlantısını açık tutar (bağlantı havuzu).
+# Hedef hız verilirse üretici partileri zamanlamaya göre kuyruğa koyar; alıcı yetişemezse
+# kuyruk dolar ve ulaşılan hız hedefin altında kalır. Sonunda ulaşılan satır/sn ve
+# parti gecikmesi yüzdelikleri raporlanır. Deneme için aynı araçla basit bir alıcı
+# (--sink) da çalıştırılabilir.
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORTS = {"http": 8780, "mqtt": 1883}
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_CONNECTIONS = 4
+HTTP_PATH = "/ingest"
+MQTT_TOPIC = "ika/readings"
+LATENCY_PERCENTILES = (50, 90, 99, 99.9)
+NUMERIC_COLUMNS = set(SENSOR_COLUMNS) | {"Latitude", "Longitude", "Altitude_m"}
+
+
+# --- Veri kaynağı ---
+def iter_batches(csv_path, batch_size, limit=None):
+    """CSV'yi akış halinde okuyup standart sütun adlı satır sözlüklerinden partiler üretir"""
+    batch = []
+    sent = 0
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        header = [canonical_column_name(h) for h in next(reader)]
+        for row in reader:
+            if not row:
+                continue
+            record = {}
+            for name, value in zip(header, row):
+                record[name] = float(value) if name in NUMERIC_COLUMNS and value != "" else value
+            batch.append(record)
+            sent += 1
+            if len(batch) == batch_size or sent == limit:
+                yield batch
+                batch = []
+            if sent == limit:
+                return
+    if batch:
+        yield batch
+
+
+# --- MQTT paket yardımcıları (3.1.1, yalnızca gereken alt küme) ---
+def _mqtt_length(n):
+    out = bytearray()
+    while True:
+        byte, n = n % 128, n // 128
+        out.append(byte | (0x80 if n else 0))
+        if not n:
+            return bytes(out)
+
+
+def _mqtt_string(text):
+    data = text.encode("utf-8")
+    return struct.pack(">H", len(data)) + data
+
+
+async def _mqtt_read_packet(reader):
+    first = (await reader.readexactly(1))[0]
+    length, multiplier = 0, 1
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length += (byte & 0x7F) * multiplier
+        multiplier *= 128
+        if not byte & 0x80:
+            break
+    return first, await reader.readexactly(length)
+
+
+# --- Bağlantılar ---
+class HttpConnection:
+    """Kalıcı (keep-alive) HTTP/1.1 bağlantısı üzerinden JSON POST gönderir"""
+
+    def __init__(self, host, port, path=HTTP_PATH):
+        self.host, self.port, self.path = host, port, path
+        self.reader = self.writer = None
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def send(self, batch):
+        if self.writer is None:
+            await self.open()
+        body = json.dumps(batch, separators=(",", ":")).encode("utf-8")
+        head = (f"POST {self.path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n").encode("ascii")
+        self.writer.write(head + body)
+        await self.writer.drain()
+        status_line = await self.reader.readline()
+        if not status_line:
+            raise ConnectionError("Sunucu bağlantıyı kapattı")
+        status = int(status_line.split()[1])
+        length, close = 0, False
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+            elif name.strip().lower() == "connection" and value.strip().lower() == "close":
+                close = True
+        if length:
+            await self.reader.readexactly(length)
+        if close:
+            await self.close()
+        if status >= 300:
+            raise ConnectionError(f"HTTP {status}")
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+class MqttConnection:
+    """MQTT 3.1.1 bağlantısı; her parti QoS 1 PUBLISH olarak gönderilir ve PUBACK beklenir"""
+
+    _serial = itertools.count(1)
+
+    def __init__(self, host, port, topic=MQTT_TOPIC, client_id=None):
+        # Aynı client_id ile gelen ikinci bağlantı aracıda ilkini düşürür; her bağlantıya ayrı kimlik verilir
+        client_id = client_id or f"ika-yuk-{os.getpid()}-{next(MqttConnection._serial)}"
+        self.host, self.port, self.topic, self.client_id = host, port, topic, client_id
+        self.reader = self.writer = None
+        self.packet_id = 0
+
+    async def open(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        variable = _mqtt_string("MQTT") + bytes([4, 0x02]) + struct.pack(">H", 60)
+        payload = _mqtt_string(self.client_id)
+        self.writer.write(bytes([0x10]) + _mqtt_length(len(variable) + len(payload)) + variable + payload)
+        await self.writer.drain()
+        kind, body = await _mqtt_read_packet(self.reader)
+        if kind != 0x20 or len(body) < 2:
+            raise ConnectionError("Beklenmeyen MQTT CONNACK yanıtı")
+        if body[1] != 0:
+            raise ConnectionError(f"MQTT bağlantısı reddedildi (kod {body[1]})")
+
+    async def send(self, batch):
+        if self.writer is None:
+            await self.open()
+        self.packet_id = self.packet_id % 65535 + 1
+        variable = _mqtt_string(self.topic) + struct.pack(">H", self.packet_id)
+        payload = json.dumps(batch, separators=(",", ":")).encode("utf-8")
+        self.writer.write(bytes([0x32]) + _mqtt_length(len(variable) + len(payload)) + variable + payload)
+        await self.writer.drain()
+        kind, body = await _mqtt_read_packet(self.reader)
+        if kind != 0x40 or struct.unpack(">H", body[:2])[0] != self.packet_id:
+            raise ConnectionError("Beklenmeyen MQTT yanıtı")
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.write(bytes([0xE0, 0x00]))  # DISCONNECT
+            self.writer.close()
+            self.reader = self.writer = None
+
+
+CONNECTIONS = {"http": HttpConnection, "mqtt": MqttConnection}
+
+
+# --- Ölçüm ---
+class LoadStats:
+    """Gönderilen satır/parti sayılarını ve parti gecikmelerini biriktirir"""
+
+    def __init__(self):
+        self.rows = 0
+        self.batches = 0
+        self.errors = 0
+        self.latencies = []
+        self.started = self.finished = None
+
+    def report(self, target_rate=None):
+        elapsed = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        latencies_ms = np.asarray(self.latencies) * 1000
+        return {
+            "rows": self.rows,
+            "batches": self.batches,
+            "errors": self.errors,
+            "elapsed_s": round(elapsed, 3),
+            "target_rows_per_s": target_rate,
+            "rows_per_s": round(self.rows / elapsed, 1) if elapsed > 0 else None,
+            "latency_ms": {f"p{p:g}": round(float(np.percentile(latencies_ms, p)), 3) for p in LATENCY_PERCENTILES}
+                          if len(latencies_ms) else {},
+            "latency_max_ms": round(float(latencies_ms.max()), 3) if len(latencies_ms) else None,
+        }
+
+
+async def run_load(csv_path, protocol="http", host=DEFAULT_HOST, port=None, batch_size=DEFAULT_BATCH_SIZE,
+                   connections=DEFAULT_CONNECTIONS, rate=None, limit=None):
+    """Veri setini uç noktaya gönderir ve LoadStats döndürür; rate satır/sn (None: sınırsız)"""
+    port = port or DEFAULT_PORTS[protocol]
+    stats = LoadStats()
+    queue = asyncio.Queue(maxsize=connections * 2)
+
+    async def worker():
+        connection = CONNECTIONS[protocol](host, port)
+        try:
+            while True:
+                batch = await queue.get()
+                if batch is None:
+                    return
+                started = time.perf_counter()
+                try:
+                    await connection.send(batch)
+                except (ConnectionError, OSError, asyncio.IncompleteReadError):
+                    stats.errors += 1
+                    await connection.close()  # Sonraki partide yeniden bağlanılır
+                    continue
+                stats.latencies.append(time.perf_counter() - started)
+                stats.rows += len(batch)
+                stats.batches += 1
+        finally:
+            await connection.close()
+
+    workers = [asyncio.create_task(worker()) for _ in range(connections)]
+    stats.started = time.perf_counter()
+    sent_rows = 0
+    for batch in iter_batches(csv_path, batch_size, limit):
+        if rate:
+            # Mutlak zamanlama: gecikmeler birikmez, alıcı yavaşsa kuyruk baskısı hızı düşürür
+            delay = stats.started + sent_rows / rate - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        await queue.put(batch)
+        sent_rows += len(batch)
+    for _ in workers:
+        await queue.put(None)
+    await asyncio.gather(*workers)
+    stats.finished = time.perf_counter()
+    return stats
+
+
+# --- Deneme alıcısı ---
+async def run_sink(protocol="http", host=DEFAULT_HOST, port=None, delay_ms=0.0):
+    """Gelen partileri sayan basit alıcı; delay_ms ile yavaş bir alım katmanı taklit edilir"""
+    port = port or DEFAULT_PORTS[protocol]
+    received = {"rows": 0, "batches": 0}
+
+    async def handle_http(reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    if name.strip().lower() == "content-length":
+                        length = int(value)
+                body = await reader.readexactly(length)
+                received["rows"] += len(json.loads(body))
+                received["batches"] += 1
+                if delay_ms:
+                    await asyncio.sleep(delay_ms / 1000)
+                writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    async def handle_mqtt(reader, writer):
+        try:
+            while True:
+                kind, body = await _mqtt_read_packet(reader)
+                packet_type = kind >> 4
+                if packet_type == 1:  # CONNECT
+                    writer.write(bytes([0x20, 0x02, 0x00, 0x00]))
+                elif packet_type == 3:  # PUBLISH
+                    topic_length = struct.unpack(">H", body[:2])[0]
+                    offset = 2 + topic_length
+                    packet_id = body[offset:offset + 2] if kind & 0x06 else b""
+                    received["rows"] += len(json.loads(body[offset + len(packet_id):]))
+                    received["batches"] += 1
+                    if delay_ms:
+                        await asyncio.sleep(delay_ms / 1000)
+                    if packet_id:
+                        writer.write(bytes([0x40, 0x02]) + packet_id)
+                elif packet_type == 14:  # DISCONNECT
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        writer.close()
+
+    server = await asyncio.start_server(handle_http if protocol == "http" else handle_mqtt, host, port)
+    print(f"{protocol.upper()} deneme alıcısı {host}:{port} adresinde dinliyor (Ctrl+C ile durdurun).")
+    try:
+        async with server:
+            while True:
+                await asyncio.sleep(5)
+                print(f"  alınan: {received['rows']} satır, {received['batches']} parti")
+    finally:
+        print(f"Toplam alınan: {received['rows']} satır, {received['batches']} parti")
+
+
+def print_report(report):
+    target = f" (hedef {report['target_rows_per_s']:g})" if report["target_rows_per_s"] else ""
+    print(f"{report['rows']} satır / {report['batches']} parti, {report['elapsed_s']} sn, "
+          f"{report['rows_per_s']} satır/sn{target}, {report['errors']} hata")
+    if report["latency_ms"]:
+        percentiles = ", ".join(f"{k}={v} ms" for k, v in report["latency_ms"].items())
+        print(f"Parti gecikmesi: {percentiles}, en fazla={report['latency_max_ms']} ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üretilmiş veri setini yerel bir HTTP/MQTT alım uç noktasına yük olarak gönderir.")
+    parser.add_argument("csv_path", nargs="?", help="Gönderilecek veri seti (--sink ile gerekmez)")
+    parser.add_argument("--protocol", choices=sorted(CONNECTIONS), default="http")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, help="Varsayılan: http 8780, mqtt 1883")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--connections", type=int, default=DEFAULT_CONNECTIONS, help="Eşzamanlı bağlantı (havuz) sayısı")
+    parser.add_argument("--rate", type=float, help="Hedef hız (satır/sn); verilmezse olabildiğince hızlı")
+    parser.add_argument("--limit", type=int, help="Gönderilecek en fazla satır")
+    parser.add_argument("--json", help="Raporun yazılacağı JSON dosyası")
+    parser.add_argument("--sink", action="store_true", help="Gönderim yerine deneme alıcısını çalıştır")
+    parser.add_argument("--sink-delay-ms", type=float, default=0.0, help="Deneme alıcısında parti başına yapay gecikme")
+    args = parser.parse_args()
+
+    if args.sink:
+        try:
+            asyncio.run(run_sink(args.protocol, args.host, args.port, args.sink_delay_ms))
+        except KeyboardInterrupt:
+            pass
+    else:
+        if not args.csv_path:
+            parser.error("csv_path gerekli")
+        result = asyncio.run(run_load(args.csv_path, args.protocol, args.host, args.port, args.batch_size,
+                                      args.connections, args.rate, args.limit))
+        report = result.report(args.rate)
+        print_report(report)
+        if args.json:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
@@ -0,0 +1,207 @@
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import random
+import re
+import shutil
+import sys
+import numpy as np
+
+# --- İçerik Adresli Çıktı Önbelleği ---
+# Üretim çıktıları (veri seti, yan dosyalar) tüm ayarların ve kodun özetiyle adlandırılmış
+# bir klasörde saklanır. Aynı ayarlar, tohum (seed) ve kodla yapılan sonraki çalıştırmalar
+# dosyaları önbellekten kopyalar. Yalnızca DURATION_HOURS artırıldıysa önceki çalıştırmanın
+# son saatindeki simülasyon durumu (kontrol noktası) ve satır satır yazılan dosyaları
+# geri yüklenir, üretim kalan saatlerden devam eder. Önbellek boyutu CACHE_MAX_BYTES'ı
+# aşınca en uzun süredir kullanılmayan girdiler silinir (LRU).
+
+CACHE_DIR = ".output_cache"
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+ENTRY_FILE = "entry.json"
+CHECKPOINT_FILE = "checkpoint.pkl"
+CACHE_FORMAT_VERSION = 1
+PREFIX_EXCLUDED = ("DURATION_HOURS",)  # Kısmi yeniden kullanımda değişmesine izin verilen ayarlar
+SETTING_NAME = re.compile(r"[A-Z][A-Z0-9_]*")
+SETTING_LINE = re.compile(r"^[A-Z][A-Z0-9_]*\s*=.*$", re.MULTILINE)
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+def settings_of(namespace):
+    """Modül düzeyindeki BÜYÜK_HARF ayarları (JSON uyumlu) sözlük olarak döndürür"""
+    return {name: _jsonable(value) for name, value in sorted(namespace.items())
+            if SETTING_NAME.fullmatch(name) and not callable(value) and not isinstance(value, type(sys))}
+
+
+def code_fingerprint(main_path):
+    """Üretici betiğin ve yüklenmiş yerel modüllerin kaynaklarından özet üretir.
+
+    Betikteki tek satırlık ayar atamaları çıkarılır; onlar ayrıca ayar sözlüğüyle özetlenir,
+    böylece yalnızca DURATION_HOURS değişince kod özeti aynı kalır.
+    """
+    root = os.path.dirname(os.path.abspath(main_path))
+    digest = hashlib.sha256()
+    with open(main_path, encoding="utf-8") as f:
+        digest.update(SETTING_LINE.sub("", f.read()).encode("utf-8"))
+    modules = sorted(os.path.abspath(m.__file__) for m in list(sys.modules.values())
+                     if getattr(m, "__file__", None) and os.path.dirname(os.path.abspath(m.__file__)) == root
+                     and os.path.abspath(m.__file__) != os.path.abspath(main_path))
+    for path in modules:
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _key(payload):
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:20]
+
+
+class OutputCache:
+    """Bir üretici çalıştırmasının çıktılarını ayar + kod özetine göre saklayan önbellek"""
+
+    def __init__(self, city, namespace, main_path, cache_dir=CACHE_DIR, max_bytes=CACHE_MAX_BYTES):
+        self.city = city
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.settings = settings_of(namespace)
+        code = code_fingerprint(main_path)
+        self.key = _key({"version": CACHE_FORMAT_VERSION, "city": city, "code": code, "settings": self.settings})
+        prefix_settings = {k: v for k, v in self.settings.items() if k not in PREFIX_EXCLUDED}
+        self.prefix_key = _key({"version": CACHE_FORMAT_VERSION, "city": city, "code": code, "settings": prefix_settings})
+        self.snapshot = None
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, f"{self.city}_{key}")
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name, ENTRY_FILE)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    entries.append((os.path.join(self.cache_dir, name), json.load(f)))
+            except (OSError, ValueError):
+                continue  # Yarım kalmış veya bozuk girdi
+        return entries
+
+    def _touch(self, entry_dir, entry):
+        entry["last_used"] = datetime.datetime.now().isoformat(timespec="seconds")
+        with open(os.path.join(entry_dir, ENTRY_FILE), "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False, indent=2)
+
+    def restore(self, output_files):
+        """Tam eşleşen girdi varsa tüm çıktıları yerine kopyalar ve True döndürür"""
+        entry_dir = self._entry_dir(self.key)
+        try:
+            with open(os.path.join(entry_dir, ENTRY_FILE), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not all(os.path.basename(p) in entry["files"] for p in output_files):
+            return False
+        for path in output_files:
+            shutil.copyfile(os.path.join(entry_dir, os.path.basename(path)), path)
+        self._touch(entry_dir, entry)
+        return True
+
+    def resume_point(self, duration_hours, stream_files):
+        """Aynı ayarlarla daha kısa süreli bir girdi varsa akış dosyalarını kontrol noktasına kadar
+        geri yükler; (tamamlanan saat, durum sözlüğü) ya da None döndürür"""
+        best = None
+        for entry_dir, entry in self._entries():
+            if entry.get("prefix_key") != self.prefix_key or entry["hours"] >= duration_hours:
+                continue
+            if not entry.get("stream_offsets") or not all(os.path.basename(p) in entry["stream_offsets"] for p in stream_files):
+                continue
+            if best is None or entry["hours"] > best[1]["hours"]:
+                best = (entry_dir, entry)
+        if best is None:
+            return None
+        entry_dir, entry = best
+        with open(os.path.join(entry_dir, CHECKPOINT_FILE), "rb") as f:
+            state = pickle.load(f)
+        for path in stream_files:
+            name = os.path.basename(path)
+            with open(os.path.join(entry_dir, name), "rb") as src, open(path, "wb") as dst:
+                remaining = entry["stream_offsets"][name]
+                while remaining > 0:
+                    chunk = src.read(min(remaining, 1 << 20))
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+        random.setstate(state.pop("__random__"))
+        np.random.set_state(state.pop("__numpy_random__"))
+        self._touch(entry_dir, entry)
+        return entry["hours"], state
+
+    def checkpoint(self, hours, state, stream_files):
+        """Son saatin simülasyon durumunu ve akış dosyalarının o anki boyutlarını bellekte tutar.
+
+        Akış dosyalarının sonlandırma (kapanış) yazımlarından önce çağrılmalıdır.
+        """
+        state = dict(state, __random__=random.getstate(), __numpy_random__=np.random.get_state())
+        payload = pickle.dumps(state, protocol=pickle.HIGHEST_PROTOCOL)  # Yazıcılar durumlarını alırken dosyalarını boşaltır
+        self.snapshot = (hours, payload, {os.path.basename(p): os.path.getsize(p) for p in stream_files})
+
+    def store(self, output_files):
+        """Çıktıları (ve varsa kontrol noktasını) önbelleğe yazar, ardından boyut sınırını uygular"""
+        entry_dir = self._entry_dir(self.key)
+        tmp_dir = entry_dir + ".tmp"
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        files = {}
+        for path in output_files:
+            shutil.copyfile(path, os.path.join(tmp_dir, os.path.basename(path)))
+            files[os.path.basename(path)] = os.path.getsize(path)
+        entry = {
+            "city": self.city, "key": self.key, "prefix_key": self.prefix_key,
+            "hours": self.settings.get("DURATION_HOURS"), "files": files, "settings": self.settings,
+            "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        }
+        if self.snapshot:
+            hours, payload, offsets = self.snapshot
+            with open(os.path.join(tmp_dir, CHECKPOINT_FILE), "wb") as f:
+                f.write(payload)
+            entry["hours"], entry["stream_offsets"] = hours, offsets
+        self._touch(tmp_dir, entry)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(tmp_dir, entry_dir)
+        return self.evict(keep=entry_dir)
+
+    def evict(self, keep=None):
+        """Toplam boyut sınırı aşılırsa en uzun süredir kullanılmayan girdileri siler; silinen sayısını döndürür"""
+        sized = []
+        for entry_dir, entry in self._entries():
+            size = sum(os.path.getsize(os.path.join(entry_dir, n)) for n in os.listdir(entry_dir))
+            sized.append((entry.get("last_used", ""), entry_dir, size))
+        total = sum(size for _, _, size in sized)
+        removed = 0
+        for _, entry_dir, size in sorted(sized):
+            if total <= self.max_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            total -= size
+            removed += 1
+        return removed
+
+
+def publish(output_files, publish_dir):
+    """Çıktıları gösterge panelinin okuduğu klasöre (örn. public/data) kopyalar"""
+    os.makedirs(publish_dir, exist_ok=True)
+    for path in output_files:
+        shutil.copyfile(path, os.path.join(publish_dir, os.path.basename(path)))
@@ -0,0 +1,124 @@
+import math
+import random
+import numpy as np
+
+# --- Izgara Tabanlı Kirletici Dağılım Alanı ---
+# Şehir düzenli bir ızgaraya bölünür ve iki kirletici kanalı tutulur:
+#   0: partikül (PM2.5, PM10) - ağırlıklı olarak merkezlerden yayılır
+#   1: trafik (CO, NO2)       - ağırlıklı olarak yollardan ve yol adlı konumlardan yayılır
+# Her simülasyon dakikasında alan, 5 noktalı şablonla difüzyon, rüzgâr yönünde upwind
+# adveksiyon, kaynak emisyonu ve birinci derece sönümle ilerletilir. İKA'lar bulundukları
+# noktadaki değeri çift doğrusal (bilinear) enterpolasyonla okur; adım maliyeti İKA
+# sayısından bağımsızdır, okuma da dakikada tek vektörel çağrıdır (sample_many).
+# Hücreler metre cinsinden karedir: boylam adımı cell_deg / cos(orta enlem) alınır. Böylece
+# DIFFUSION ve rüzgâr her iki eksende aynı fiziksel ölçeğe karşılık gelir (dereceyle kare
+# hücrede doğu-batı yönünde difüzyon cos²(enlem), adveksiyon cos(enlem) katına düşerdi).
+
+PARTICULATE, TRAFFIC = 0, 1
+SPECIES_COUNT = 2
+
+DIFFUSION = 0.12  # hücre^2/dakika (hücre metre cinsinden kare)
+DECAY_PER_MINUTE = 0.02
+WIND_SPEED_RANGE = (0.05, 0.25)  # hücre/dakika
+# Açık şema kararlılığı: 4*DIFFUSION + |u| + |v| + DECAY_PER_MINUTE < 1
+BACKGROUND_LEVEL = 0.15  # Kaynaklardan uzak bölgelerdeki taban seviye (normalize)
+SPIN_UP_MINUTES = 240  # Başlangıçta alanın dolması için ön çalıştırma
+
+
+def emission_profile(hour):
+    """Saate göre emisyon çarpanları (partikül, trafik)"""
+    if 7 <= hour <= 9 or 17 <= hour <= 19:
+        return 1.6, 2.2  # Sabah/akşam trafik yoğunluğu
+    if 0 <= hour <= 5:
+        return 0.6, 0.4
+    return 1.0, 1.0
+
+
+class PollutionField:
+    """Şehir ızgarası üzerinde adveksiyon-difüzyon ile ilerleyen kirletici alanı"""
+
+    def __init__(self, lat_min, lat_max, lon_min, lon_max, cell_deg):
+        self.lat_min, self.lon_min = lat_min, lon_min
+        self.cell_deg = cell_deg  # enlem adımı
+        self.lon_cell_deg = cell_deg / math.cos(math.radians((lat_min + lat_max) / 2))  # boylam adımı
+        self.rows = max(2, int(math.ceil((lat_max - lat_min) / cell_deg)) + 1)
+        self.cols = max(2, int(math.ceil((lon_max - lon_min) / self.lon_cell_deg)) + 1)
+        self.concentration = np.zeros((SPECIES_COUNT, self.rows, self.cols))
+        self.emission = np.zeros((SPECIES_COUNT, self.rows, self.cols))
+        angle = random.uniform(0, 2 * math.pi)
+        speed = random.uniform(*WIND_SPEED_RANGE)
+        self.wind_u = speed * math.cos(angle)  # doğu yönü (sütun)
+        self.wind_v = speed * math.sin(angle)  # kuzey yönü (satır)
+        self.reference = np.ones(SPECIES_COUNT)
+
+    def add_source(self, lat, lon, particulate, traffic):
+        """(lat, lon) noktasına kanal başına emisyon şiddeti ekler"""
+        r = int(round((lat - self.lat_min) / self.cell_deg))
+        c = int(round((lon - self.lon_min) / self.lon_cell_deg))
+        if 0 <= r < self.rows and 0 <= c < self.cols:
+            self.emission[PARTICULATE, r, c] += particulate
+            self.emission[TRAFFIC, r, c] += traffic
+
+    def step(self, hour, minutes=1):
+        """Alanı verilen dakika kadar ilerletir"""
+        factors = np.asarray(emission_profile(hour))[:, None, None]
+        u, v = self.wind_u, self.wind_v
+        for _ in range(minutes):
+            c = self.concentration
+            # Kenarlarda sıfır gradyan: alan dışına akış serbest, içeri sızıntı yok
+            p = np.pad(c, ((0, 0), (1, 1), (1, 1)), mode="edge")
+            center = p[:, 1:-1, 1:-1]
+            north, south = p[:, 2:, 1:-1], p[:, :-2, 1:-1]
+            east, west = p[:, 1:-1, 2:], p[:, 1:-1, :-2]
+            laplacian = north + south + east + west - 4 * center
+            # Upwind adveksiyon: rüzgârın geldiği yöndeki komşu kullanılır
+            dcdx = (center - west) if u > 0 else (east - center)
+            dcdy = (center - south) if v > 0 else (north - center)
+            self.concentration = c + DIFFUSION * laplacian - u * dcdx - v * dcdy \
+                + self.emission * factors - DECAY_PER_MINUTE * c
+            np.maximum(self.concentration, 0, out=self.concentration)
+
+    def spin_up(self, minutes=SPIN_UP_MINUTES):
+        """Alanı ortalama emisyonla doldurur ve normalizasyon referansını belirler"""
+        self.step(hour=12, minutes=minutes)
+        for species in range(SPECIES_COUNT):
+            positive = self.concentration[species][self.concentration[species] > 0]
+            self.reference[species] = np.percentile(positive, 99) if len(positive) else 1.0
+
+    def sample(self, lat, lon):
+        """(lat, lon) noktasında kanal başına normalize seviyeleri döndürür (~0-1, yoğun saatte daha yüksek)"""
+        y = min(max((lat - self.lat_min) / self.cell_deg, 0.0), self.rows - 1.000001)
+        x = min(max((lon - self.lon_min) / self.lon_cell_deg, 0.0), self.cols - 1.000001)
+        r, c = int(y), int(x)
+        fy, fx = y - r, x - c
+        grid = self.concentration
+        value = (grid[:, r, c] * (1 - fy) * (1 - fx) + grid[:, r, c + 1] * (1 - fy) * fx
+                 + grid[:, r + 1, c] * fy * (1 - fx) + grid[:, r + 1, c + 1] * fy * fx)
+        levels = BACKGROUND_LEVEL + (1 - BACKGROUND_LEVEL) * value / self.reference
+        return float(levels[PARTICULATE]), float(levels[TRAFFIC])
+
+    def sample_many(self, lats, lons):
+        """sample() ile aynı enterpolasyon, tüm filo için tek seferde: (partikül, trafik) dizileri döndürür"""
+        y = np.clip((np.asarray(lats, dtype=float) - self.lat_min) / self.cell_deg, 0.0, self.rows - 1.000001)
+        x = np.clip((np.asarray(lons, dtype=float) - self.lon_min) / self.lon_cell_deg, 0.0, self.cols - 1.000001)
+        r, c = y.astype(int), x.astype(int)
+        fy, fx = y - r, x - c
+        grid = self.concentration
+        value = (grid[:, r, c] * (1 - fy) * (1 - fx) + grid[:, r, c + 1] * (1 - fy) * fx
+                 + grid[:, r + 1, c] * fy * (1 - fx) + grid[:, r + 1, c + 1] * fy * fx)
+        levels = BACKGROUND_LEVEL + (1 - BACKGROUND_LEVEL) * value / self.reference[:, None]
+        return levels[PARTICULATE], levels[TRAFFIC]
+
+
+def build_city_field(lat_min, lat_max, lon_min, lon_max, cell_deg, key_locations, roads=None):
+    """Kilit konumlar ve yol noktalarından kaynakları tanımlanmış, ön çalıştırılmış alan döndürür"""
+    field = PollutionField(lat_min, lat_max, lon_min, lon_max, cell_deg)
+    for name, (lat, lon) in key_locations.items():
+        is_center = "Merkez" in name or "Kizilay" in name or "Meydan" in name
+        is_road = "Yolu" in name or "E5" in name or "Cad" in name
+        field.add_source(lat, lon, particulate=1.0 if is_center else 0.5, traffic=1.0 if is_road else 0.4)
+    for road_points in (roads or {}).values():
+        for lat, lon in road_points:
+            field.add_source(lat, lon, particulate=0.2, traffic=0.6)
+    field.spin_up()
+    return field
@@ -0,0 +1,410 @@
+import argparse
+import datetime
+import json
+import math
+import os
+import numpy as np
+
+from columnar_store import SENSOR_COLUMNS, TIMESTAMP_FORMAT
+from dataset_reader import DatasetReader
+
+# --- Birleştirilebilir Yüzdelik Özetleri (t-digest) ---
+# Her (sensör, saat, ızgara hücresi) için bir t-digest tutulur: değerler sıralanıp k1 ölçek
+# fonksiyonuna göre merkezlere (ortalama, ağırlık) toplanır. Uçlardaki merkezler küçük,
+# ortadakiler büyük olduğundan p95/p99 gibi kuyruk yüzdelikleri az bellekle doğru kalır; bir
+# özet en fazla ~COMPRESSION/2 merkez içerir. Bu sınır ancak özet COMPRESSION/2'den çok
+# değer topladığında veriden küçüktür: 50 İKA'lık bir filo saatte bir ~5 km hücreye çoğunlukla
+# birkaç düzine değer bırakır ve hücre başına özet ham verinin kendisi olur. Bu yüzden bir
+# (sensör, saat, hücre) özeti yalnızca en az MIN_CELL_VALUES değer içeriyorsa hücre düzeyinde
+# tutulur; seyrek hücrelerin değerleri o (sensör, saat) için konumsuz (NO_CELL) saat özetinde
+# birleşir. Böylece boyut sınırı (sensör, saat) düzeyinde geçerlidir: toplam merkez sayısı
+# en fazla sensör x saat x COMPRESSION/2 + tutulan hücrelerdeki değerlerin
+# COMPRESSION/(2*MIN_CELL_VALUES) kadarıdır. Hücre düzeyindeki sorgular (bbox, group=cell)
+# yalnızca tutulan hücreleri görür; filo yoğunlaştıkça daha çok hücre tutulur. Özetler birleştirilebilir: seçilen özetlerin
+# merkezleri yeniden sıkıştırılır, böylece şehir, gün ve bölge genelindeki yüzdelikler ham
+# değerlere dönmeden hesaplanır. Tüm özetler NumPy ile toplu olarak oluşturulur; saatler
+# Unix saati, hücreler küresel ızgara indeksi olarak saklandığından farklı şehir ve
+# günlerin özetleri aynı anahtar uzayındadır.
+
+SKETCH_FORMAT_VERSION = 1
+SKETCH_FILE = "quantiles.npz"  # Depo klasörü içindeki varsayılan özet dosyası
+COMPRESSION = 200  # t-digest δ: büyüdükçe doğruluk ve boyut artar (p99 sıra hatası ~%0.01)
+SKETCH_CELL_DEG = 0.05  # Hücre boyu (derece, ~5 km)
+MIN_CELL_VALUES = COMPRESSION  # Hücre özetinin tutulması için gereken en az değer (azsa saat özetine katılır)
+NO_CELL = np.iinfo(np.int32).min  # Seyrek hücrelerden birleşen saat özetinin satır/sütun anahtarı
+BUILD_BLOCK_HOURS = 24  # Oluşturma sırasında bellekte tutulan saat sayısı
+DEFAULT_QUANTILES = (0.5, 0.95, 0.99)
+GROUPINGS = ("none", "hour", "hour_of_day", "cell")
+EPOCH = datetime.datetime(1970, 1, 1)
+
+
+def epoch_hour(moment):
+    """datetime'ı Unix saatine (1970'ten beri geçen saat) çevirir"""
+    return int((moment - EPOCH).total_seconds() // 3600)
+
+
+def parse_time(value):
+    """ISO zaman damgası ya da 'YYYY-MM-DD' tarihini Unix saatine çevirir"""
+    for fmt in (TIMESTAMP_FORMAT, "%Y-%m-%dT%H:%M", "%Y-%m-%d"):
+        try:
+            return epoch_hour(datetime.datetime.strptime(value.strip(), fmt))
+        except ValueError:
+            continue
+    raise ValueError(f"Geçersiz zaman: {value} (örn. 2025-05-01 veya 2025-05-01T08:00:00Z)")
+
+
+# --- t-digest Çekirdeği ---
+def _group_index(*keys):
+    """Anahtar dizilerinin benzersiz birleşimlerini ve her öğenin grup numarasını döndürür"""
+    order = np.lexsort(keys[::-1])
+    sorted_keys = [k[order] for k in keys]
+    change = np.zeros(len(order), dtype=bool)
+    change[:1] = True
+    for k in sorted_keys:
+        change[1:] |= k[1:] != k[:-1]
+    inverse = np.empty(len(order), dtype=np.int64)
+    inverse[order] = np.cumsum(change) - 1
+    return [k[change] for k in sorted_keys], inverse
+
+
+def _k_index(q, compression):
+    """k1 ölçek fonksiyonuyla yüzdelik konumunu merkez (kova) numarasına çevirir"""
+    k = compression / (2 * math.pi) * (np.arcsin(2 * np.clip(q, 0.0, 1.0) - 1) + math.pi / 2)
+    return np.floor(k).astype(np.int64)
+
+
+def compress(groups, means, weights, compression=COMPRESSION):
+    """Grup numaralı değerleri/merkezleri her grup için t-digest merkezlerine sıkıştırır.
+
+    groups 0..n-1 arasında olmalıdır; (ofsetler, merkez ortalamaları, merkez ağırlıkları)
+    döndürür. Grup i'nin merkezleri [ofsetler[i], ofsetler[i+1]) aralığında, ortalamaya göre sıralıdır.
+    """
+    if len(groups) == 0:
+        return np.zeros(1, dtype=np.int64), np.zeros(0), np.zeros(0)
+    order = np.lexsort((means, groups))
+    g, m, w = groups[order], means[order], weights[order]
+    starts = np.flatnonzero(np.r_[True, g[1:] != g[:-1]])
+    sizes = np.diff(np.r_[starts, len(g)])
+    cum = np.cumsum(w)
+    before = np.repeat(cum[starts] - w[starts], sizes)  # Grup başına kadar birikmiş ağırlık
+    totals = np.repeat(np.add.reduceat(w, starts), sizes)
+    bucket = _k_index((cum - before - w / 2) / totals, compression)
+    # Grup ya da kova değişimi yeni merkez başlatır (ikisi de sıralı olduğundan kovalar bitişiktir)
+    centroid_starts = np.flatnonzero(np.r_[True, (g[1:] != g[:-1]) | (bucket[1:] != bucket[:-1])])
+    centroid_weights = np.add.reduceat(w, centroid_starts)
+    centroid_means = np.add.reduceat(m * w, centroid_starts) / centroid_weights
+    offsets = np.searchsorted(centroid_starts, np.r_[starts, len(g)])
+    return offsets, centroid_means, centroid_weights
+
+
+def digest_quantiles(means, weights, vmin, vmax, quantiles):
+    """Tek bir özetin merkezlerinden yüzdelikleri merkezler arası doğrusal enterpolasyonla hesaplar"""
+    if len(means) == 0:
+        return [None] * len(quantiles)
+    total = weights.sum()
+    positions = np.r_[0.0, np.cumsum(weights) - weights / 2, total]
+    values = np.r_[vmin, means, vmax]
+    return np.interp(np.asarray(quantiles, dtype=np.float64) * total, positions, values).tolist()
+
+
+def _merge_sparse_cells(keys, min_values):
+    """Değer sayısı min_values'ten az olan (sensör, saat, hücre) anahtarlarının hücresini NO_CELL yapar"""
+    unique_keys, inverse = _group_index(*keys)
+    sparse = np.bincount(inverse, minlength=len(unique_keys[0]))[inverse] < min_values
+    sensor, hour, row, col = keys
+    return [sensor, hour, np.where(sparse, NO_CELL, row), np.where(sparse, NO_CELL, col)]
+
+
+# --- Özet Kümesi ---
+class QuantileSketches:
+    """(sensör, saat, hücre) anahtarlı t-digest özetleri kümesi"""
+
+    KEYS = ("sensor", "hour", "row", "col")
+
+    def __init__(self, sensors, keys, offsets, means, weights, vmin, vmax,
+                 cell_deg=SKETCH_CELL_DEG, compression=COMPRESSION, meta=None):
+        self.sensors = list(sensors)
+        self.sensor, self.hour, self.row, self.col = (np.asarray(k, dtype=np.int64) for k in keys)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.means = np.asarray(means, dtype=np.float64)
+        self.weights = np.asarray(weights, dtype=np.float64)
+        self.vmin = np.asarray(vmin, dtype=np.float64)
+        self.vmax = np.asarray(vmax, dtype=np.float64)
+        self.cell_deg = cell_deg
+        self.compression = compression
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.sensor)
+
+    @property
+    def keys(self):
+        return self.sensor, self.hour, self.row, self.col
+
+    @property
+    def sizes(self):
+        """Özet başına merkez sayısı"""
+        return np.diff(self.offsets)
+
+    @property
+    def counts(self):
+        """Özet başına değer sayısı"""
+        return np.add.reduceat(self.weights, self.offsets[:-1]) if len(self) else np.zeros(0)
+
+    @classmethod
+    def build(cls, sensors, keys, means, weights, mins, maxs, cell_deg=SKETCH_CELL_DEG, compression=COMPRESSION, meta=None):
+        """Anahtarlı değerleri/merkezleri anahtar başına bir özete toplar.
+
+        keys: öğe başına (sensör, saat, satır, sütun) dizileri; mins/maxs öğenin ait olduğu
+        özetin en küçük/en büyük değeridir (ham değerlerde değerin kendisi).
+        """
+        unique_keys, inverse = _group_index(*keys)
+        offsets, c_means, c_weights = compress(inverse, means, weights, compression)
+        vmin = np.full(len(unique_keys[0]), np.inf)
+        vmax = np.full(len(unique_keys[0]), -np.inf)
+        np.minimum.at(vmin, inverse, mins)
+        np.maximum.at(vmax, inverse, maxs)
+        return cls(sensors, unique_keys, offsets, c_means, c_weights, vmin, vmax, cell_deg, compression, meta)
+
+    @classmethod
+    def from_store(cls, store_dir, sensors=None, cell_deg=SKETCH_CELL_DEG, compression=COMPRESSION, block_hours=BUILD_BLOCK_HOURS,
+                   min_cell_values=MIN_CELL_VALUES):
+        """Sütunlu depodaki değerlerden özetleri oluşturur; depo saat blokları halinde okunur.
+
+        min_cell_values'ten az değerli (sensör, saat, hücre) anahtarları NO_CELL saat özetine katılır.
+        """
+        reader = DatasetReader(store_dir)
+        sensors = [s for s in (sensors or SENSOR_COLUMNS) if s in reader.columns]
+        start_minute = int((reader.start_time - EPOCH).total_seconds() // 60) if reader.start_time else 0
+        parts = []
+        for block_start in range(0, reader.hours, block_hours):
+            lo, hi = reader.hour_range(block_start, block_start + block_hours)
+            if hi <= lo:
+                continue
+            hours = (start_minute + np.asarray(reader.columns["minute"][lo:hi], dtype=np.int64)) // 60
+            rows = np.floor(np.asarray(reader.columns["Latitude"][lo:hi], dtype=np.float64) / cell_deg)
+            cols = np.floor(np.asarray(reader.columns["Longitude"][lo:hi], dtype=np.float64) / cell_deg)
+            located = np.isfinite(rows) & np.isfinite(cols)
+            keys, values = [[], [], [], []], []
+            for index, name in enumerate(sensors):
+                column = np.asarray(reader.columns[name][lo:hi], dtype=np.float64)
+                valid = located & np.isfinite(column)
+                for target, key in zip(keys, (np.full(valid.sum(), index), hours[valid], rows[valid], cols[valid])):
+                    target.append(key.astype(np.int64))
+                values.append(column[valid])
+            if not values or not sum(len(v) for v in values):
+                continue
+            values = np.concatenate(values)
+            keys = _merge_sparse_cells([np.concatenate(k) for k in keys], min_cell_values)
+            parts.append(cls.build(sensors, keys, values, np.ones(len(values)), values, values, cell_deg, compression))
+        meta = {"city": reader.meta.get("city"), "start_time": reader.meta.get("start_time"), "hours": reader.hours,
+                "min_cell_values": min_cell_values}
+        if not parts:
+            empty = [np.zeros(0, dtype=np.int64)] * 4
+            return cls(sensors, empty, np.zeros(1), [], [], [], [], cell_deg, compression, meta)
+        merged = merge_sketches(parts)  # Bloklar farklı saatleri kapsadığı için yalnızca birleştirilir
+        merged.meta = meta
+        return merged
+
+    def centroids(self, mask):
+        """Seçilen özetlerin merkezlerini ve her merkezin ait olduğu özet numarasını döndürür"""
+        chosen = np.flatnonzero(mask)
+        sizes = self.sizes[chosen]
+        owner = np.repeat(chosen, sizes)
+        starts = np.repeat(self.offsets[chosen], sizes)
+        within = np.arange(len(owner)) - np.repeat(np.cumsum(sizes) - sizes, sizes)
+        index = starts + within
+        return owner, self.means[index], self.weights[index]
+
+    def select(self, sensor, start_hour=None, end_hour=None, hours_of_day=None, bbox=None, located=False):
+        """Filtrelere uyan özetlerin maskesi; bbox: [minLat, minLon, maxLat, maxLon].
+
+        bbox verilirse ya da located True ise konumsuz (NO_CELL) saat özetleri dışarıda kalır.
+        """
+        if sensor not in self.sensors:
+            return np.zeros(len(self), dtype=bool)
+        mask = self.sensor == self.sensors.index(sensor)
+        if start_hour is not None:
+            mask &= self.hour >= start_hour
+        if end_hour is not None:
+            mask &= self.hour < end_hour
+        if hours_of_day:
+            mask &= np.isin(self.hour % 24, list(hours_of_day))
+        if bbox or located:
+            mask &= self.row != NO_CELL
+        if bbox:
+            min_lat, min_lon, max_lat, max_lon = bbox
+            # Hücre kutuyla kesişiyorsa dahil edilir (hücre çözünürlüğünde)
+            mask &= ((self.row + 1) * self.cell_deg > min_lat) & (self.row * self.cell_deg <= max_lat)
+            mask &= ((self.col + 1) * self.cell_deg > min_lon) & (self.col * self.cell_deg <= max_lon)
+        return mask
+
+    # --- Kaydetme / Yükleme ---
+    def save(self, path):
+        """Özetleri sıkıştırılmış npz olarak yazar (float32 ortalamalar, uint32 ağırlıklar)"""
+        meta = dict(self.meta, format_version=SKETCH_FORMAT_VERSION, sensors=self.sensors,
+                    cell_deg=self.cell_deg, compression=self.compression)
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            meta=np.array(json.dumps(meta, ensure_ascii=False)),
+            sensor=self.sensor.astype(np.uint8),
+            hour=self.hour.astype(np.int32),
+            row=self.row.astype(np.int32),
+            col=self.col.astype(np.int32),
+            sizes=self.sizes.astype(np.uint16),
+            vmin=self.vmin.astype(np.float32),
+            vmax=self.vmax.astype(np.float32),
+            means=self.means.astype(np.float32),
+            weights=np.round(self.weights).astype(np.uint32),
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            if meta.get("format_version") != SKETCH_FORMAT_VERSION:
+                raise ValueError(f"'{path}' desteklenmeyen özet biçiminde; yeniden oluşturun.")
+            keys = [data[k] for k in cls.KEYS]
+            offsets = np.r_[0, np.cumsum(data["sizes"], dtype=np.int64)]
+            sketches = cls(meta.pop("sensors"), keys, offsets, data["means"], data["weights"], data["vmin"], data["vmax"],
+                           meta.pop("cell_deg"), meta.pop("compression"), meta)
+        return sketches
+
+
+def merge_sketches(sketch_sets, compression=None):
+    """Özet kümelerini birleştirir; aynı anahtarlı özetler (örn. aynı saat ve hücre) tek özete iner"""
+    sketch_sets = [s for s in sketch_sets if len(s)] or sketch_sets[:1]
+    cell_degs = {s.cell_deg for s in sketch_sets}
+    if len(cell_degs) > 1:
+        raise ValueError(f"Farklı hücre boylu özetler birleştirilemez: {sorted(cell_degs)}")
+    sensors = []
+    for s in sketch_sets:
+        sensors += [name for name in s.sensors if name not in sensors]
+    keys, means, weights, mins, maxs = [[], [], [], []], [], [], [], []
+    for s in sketch_sets:
+        owner, c_means, c_weights = s.centroids(np.ones(len(s), dtype=bool))
+        remap = np.array([sensors.index(name) for name in s.sensors], dtype=np.int64)
+        for target, key in zip(keys, (remap[s.sensor[owner]], s.hour[owner], s.row[owner], s.col[owner])):
+            target.append(key)
+        means.append(c_means)
+        weights.append(c_weights)
+        mins.append(s.vmin[owner])
+        maxs.append(s.vmax[owner])
+    first = sketch_sets[0]
+    return QuantileSketches.build(sensors, [np.concatenate(k) for k in keys], np.concatenate(means), np.concatenate(weights),
+                                  np.concatenate(mins), np.concatenate(maxs), first.cell_deg,
+                                  compression or max(s.compression for s in sketch_sets), dict(first.meta))
+
+
+# --- Sorgu ---
+def query_quantiles(sketch_sets, sensor, quantiles=DEFAULT_QUANTILES, group="none",
+                    start_hour=None, end_hour=None, hours_of_day=None, bbox=None):
+    """Bir veya birden çok özet kümesinde (şehir/gün) filtrelere uyan özetleri gruplayıp birleştirir.
+
+    Sonucu sütun adı -> değer listesi sözlüğü olarak döndürür (Count, Min, Max, p50, p95, ...).
+    """
+    if group not in GROUPINGS:
+        raise ValueError(f"Geçersiz group: {group} (seçenekler: {', '.join(GROUPINGS)})")
+    quantiles = [float(q) for q in quantiles]
+    if any(not 0 <= q <= 1 for q in quantiles):
+        raise ValueError("Yüzdelikler 0 ile 1 arasında olmalı (örn. 0.95)")
+    parts = [[], [], [], [], [], []]  # grup anahtarı 1, grup anahtarı 2, ortalama, ağırlık, min, max
+    for s in sketch_sets:
+        owner, means, weights = s.centroids(s.select(sensor, start_hour, end_hour, hours_of_day, bbox, located=group == "cell"))
+        if group == "hour":
+            first, second = s.hour[owner], np.zeros(len(owner), dtype=np.int64)
+        elif group == "hour_of_day":
+            first, second = s.hour[owner] % 24, np.zeros(len(owner), dtype=np.int64)
+        elif group == "cell":
+            first, second = s.row[owner], s.col[owner]
+        else:
+            first = second = np.zeros(len(owner), dtype=np.int64)
+        for target, values in zip(parts, (first, second, means, weights, s.vmin[owner], s.vmax[owner])):
+            target.append(values)
+    first, second, means, weights, mins, maxs = (np.concatenate(p) if p else np.zeros(0) for p in parts)
+    result = {}
+    if group == "hour":
+        result["Hour"] = []
+    elif group == "hour_of_day":
+        result["HourOfDay"] = []
+    elif group == "cell":
+        result["Latitude"], result["Longitude"] = [], []
+    result.update({"Count": [], "Min": [], "Max": []})
+    labels = [f"p{round(q * 100, 3):g}" for q in quantiles]
+    for label in labels:
+        result[label] = []
+    if len(means) == 0:
+        return result
+
+    zero = np.zeros(len(means), dtype=np.int64)
+    sketch = QuantileSketches.build([sensor], [zero, zero, first.astype(np.int64), second.astype(np.int64)],
+                                    means, weights, mins, maxs, sketch_sets[0].cell_deg,
+                                    max(s.compression for s in sketch_sets))
+    counts = sketch.counts
+    for i in range(len(sketch)):
+        lo, hi = sketch.offsets[i], sketch.offsets[i + 1]
+        if group == "hour":
+            result["Hour"].append((EPOCH + datetime.timedelta(hours=int(sketch.row[i]))).strftime(TIMESTAMP_FORMAT))
+        elif group == "hour_of_day":
+            result["HourOfDay"].append(int(sketch.row[i]))
+        elif group == "cell":
+            result["Latitude"].append(round((sketch.row[i] + 0.5) * sketch.cell_deg, 6))
+            result["Longitude"].append(round((sketch.col[i] + 0.5) * sketch.cell_deg, 6))
+        result["Count"].append(int(round(counts[i])))
+        result["Min"].append(round(float(sketch.vmin[i]), 4))
+        result["Max"].append(round(float(sketch.vmax[i]), 4))
+        values = digest_quantiles(sketch.means[lo:hi], sketch.weights[lo:hi], sketch.vmin[i], sketch.vmax[i], quantiles)
+        for label, value in zip(labels, values):
+            result[label].append(round(value, 4))
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sensör/saat/hücre bazında birleştirilebilir yüzdelik özetleri (t-digest) oluşturur ve sorgular.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="Sütunlu depo -> özet dosyası")
+    build.add_argument("store_dir")
+    build.add_argument("--out", help=f"Özet dosyası (varsayılan: <depo>/{SKETCH_FILE})")
+    build.add_argument("--cell-deg", type=float, default=SKETCH_CELL_DEG, help="Izgara hücre boyu (derece)")
+    build.add_argument("--compression", type=int, default=COMPRESSION, help="t-digest sıkıştırma parametresi (δ)")
+    build.add_argument("--min-cell-values", type=int, default=MIN_CELL_VALUES,
+                       help="Hücre özeti için en az değer; azsa değerler hücresiz saat özetine katılır (0: tüm hücreler tutulur)")
+    merge = sub.add_parser("merge", help="Özet dosyalarını (şehirler/günler) tek dosyada birleştirir")
+    merge.add_argument("out_path")
+    merge.add_argument("inputs", nargs="+")
+    query = sub.add_parser("query", help="Bir veya birden çok özet dosyasından yüzdelikleri hesaplar")
+    query.add_argument("inputs", nargs="+", help="Özet dosyaları veya depo klasörleri")
+    query.add_argument("--sensor", required=True, help="Sensör sütunu (örn. PM2.5_ug_m3)")
+    query.add_argument("--q", type=float, nargs="+", default=list(DEFAULT_QUANTILES), help="Yüzdelikler (0-1)")
+    query.add_argument("--group", choices=GROUPINGS, default="none")
+    query.add_argument("--start", help="Başlangıç zamanı (dahil), örn. 2025-05-01")
+    query.add_argument("--end", help="Bitiş zamanı (hariç)")
+    query.add_argument("--hour-of-day", type=int, nargs="+", help="Yalnızca bu saatler (UTC, 0-23)")
+    query.add_argument("--bbox", help="minLat,minLon,maxLat,maxLon")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        out_path = args.out or os.path.join(args.store_dir, SKETCH_FILE)
+        sketches = QuantileSketches.from_store(args.store_dir, cell_deg=args.cell_deg, compression=args.compression,
+                                               min_cell_values=args.min_cell_values)
+        sketches.save(out_path)
+        located = sketches.row != NO_CELL
+        print(f"{len(sketches)} özet ({int(located.sum())} hücre düzeyinde, değerlerin %{100 * sketches.counts[located].sum() / max(sketches.counts.sum(), 1):.0f}'i), "
+              f"{len(sketches.means)} merkez, {int(sketches.counts.sum())} değer -> "
+              f"'{out_path}' ({os.path.getsize(out_path) / 1024:.1f} KB)")
+    elif args.command == "merge":
+        merged = merge_sketches([QuantileSketches.load(p) for p in args.inputs])
+        merged.save(args.out_path)
+        print(f"{len(args.inputs)} dosya birleştirildi: {len(merged)} özet -> '{args.out_path}'")
+    else:
+        paths = [os.path.join(p, SKETCH_FILE) if os.path.isdir(p) else p for p in args.inputs]
+        bbox = [float(v) for v in args.bbox.split(",")] if args.bbox else None
+        result = query_quantiles([QuantileSketches.load(p) for p in paths], args.sensor, args.q, args.group,
+                                 parse_time(args.start) if args.start else None, parse_time(args.end) if args.end else None,
+                                 args.hour_of_day, bbox)
+        names = list(result)
+        print("\t".join(names))
+        for row in zip(*(result[n] for n in names)):
+            print("\t".join(str(v) for v in row))
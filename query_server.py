@@ -0,0 +1,317 @@
+import argparse
+import csv
+import datetime
+import io
+import json
+import os
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+import numpy as np
+
+from columnar_store import SENSOR_COLUMNS, META_FILE
+from dataset_reader import DatasetReader
+from quantile_sketch import QuantileSketches, SKETCH_FILE, DEFAULT_QUANTILES, parse_time, query_quantiles
+
+# --- Ayarlar ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+DEFAULT_LIMIT = 100000  # Ham (toplanmamış) sorgularda dönecek en fazla satır
+AGGREGATIONS = ("none", "mean", "min", "max", "sum", "count")
+GROUPINGS = ("none", "ika", "hour", "minute", "district")
+
+
+class QueryError(ValueError):
+    """İstemci kaynaklı (400) sorgu hataları"""
+
+
+# --- Depo Kaydı ---
+def load_stores(root_dir):
+    """Kök klasördeki her şehir deposunu açar; {şehir: DatasetReader} döndürür"""
+    stores = {}
+    for name in sorted(os.listdir(root_dir)):
+        store_dir = os.path.join(root_dir, name)
+        if os.path.isfile(os.path.join(store_dir, META_FILE)):
+            reader = DatasetReader(store_dir)
+            stores[reader.meta.get("city") or name] = reader
+    return stores
+
+
+def load_sketches(stores):
+    """Depo klasöründe özet dosyası (quantile_sketch.py build) olan şehirlerin özetlerini yükler"""
+    sketches = {}
+    for city, reader in stores.items():
+        path = os.path.join(reader.store_dir, SKETCH_FILE)
+        if os.path.isfile(path):
+            sketches[city] = QuantileSketches.load(path)
+    return sketches
+
+
+# --- Parametre Ayrıştırma ---
+def parse_minute(value, day_offset_minutes):
+    """'HH:MM' veya tamsayı dakika değerini başlangıca göre dakika ofsetine çevirir"""
+    value = value.strip()
+    if ":" in value:
+        hh, mm = value.split(":", 1)
+        return int(hh) * 60 + int(mm) - day_offset_minutes
+    return int(value)
+
+
+def parse_bbox(value):
+    """'minLat,minLon,maxLat,maxLon' biçimindeki sınır kutusunu ayrıştırır"""
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 4:
+        raise QueryError("bbox dört değer içermeli: minLat,minLon,maxLat,maxLon")
+    return parts
+
+
+def _single(params, name, default=None):
+    values = params.get(name)
+    return values[0] if values else default
+
+
+def _list(params, name):
+    items = []
+    for value in params.get(name, []):
+        items.extend(v for v in value.split(",") if v)
+    return items
+
+
+# --- Sorgu Çalıştırma ---
+def select_rows(reader, params):
+    """Filtrelere uyan satırların indekslerini zaman sırasıyla döndürür"""
+    start_time = reader.start_time
+    day_offset = start_time.hour * 60 + start_time.minute
+    columns = reader.columns
+
+    start_min, end_min = 0, reader.hours * 60
+    if _single(params, "hour") is not None:
+        start_min = int(_single(params, "hour")) * 60 - day_offset
+        end_min = start_min + 60
+    if _single(params, "from") is not None:
+        start_min = parse_minute(_single(params, "from"), day_offset)
+    if _single(params, "to") is not None:
+        end_min = parse_minute(_single(params, "to"), day_offset)
+    if end_min <= start_min:
+        return np.zeros(0, dtype=np.int64)
+    hour_start, hour_end = start_min // 60, -(-end_min // 60)
+
+    # Saat indeksi zaman penceresini O(1) ile bitişik bir aralığa indirir; İKA filtresi
+    # varsa yalnızca ilgili (saat, İKA) dilimleri okunur.
+    ika_ids = _list(params, "ika")
+    if ika_ids:
+        codes = [reader.unit_codes[i] for i in ika_ids if i in reader.unit_codes]
+        hours = range(max(hour_start, 0), min(hour_end, reader.hours))
+        ranges = [(int(reader.index[h, c]), int(reader.index[h, c + 1])) for h in hours for c in codes]
+        rows = np.concatenate([np.arange(lo, hi) for lo, hi in ranges]) if ranges else np.zeros(0, dtype=np.int64)
+    else:
+        lo, hi = reader.hour_range(hour_start, hour_end)
+        rows = np.arange(lo, hi)
+    if len(rows) == 0:
+        return rows.astype(np.int64)
+
+    minute = np.asarray(columns["minute"][rows])
+    mask = (minute >= start_min) & (minute < end_min)
+
+    bbox = _single(params, "bbox")
+    if bbox:
+        min_lat, min_lon, max_lat, max_lon = parse_bbox(bbox)
+        lat = np.asarray(columns["Latitude"][rows])
+        lon = np.asarray(columns["Longitude"][rows])
+        mask &= (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+
+    districts = _list(params, "district")
+    if districts:
+        codes = [reader.meta["districts"].index(d) for d in districts if d in reader.meta.get("districts", [])]
+        mask &= np.isin(np.asarray(_district_column(reader)[rows]), codes)
+
+    rows = rows[mask]
+    order = np.lexsort((np.asarray(columns["unit"][rows]), minute[mask]))
+    return rows[order]
+
+
+def _district_column(reader):
+    if "district" not in reader.columns:
+        raise QueryError("Depoda ilçe sütunu yok (önce district_index.py ile ekleyin)")
+    return reader.columns["district"]
+
+
+def _group_reduce(values, inverse, group_count, agg):
+    """Grup indekslerine göre NaN değerleri yok sayarak toplama yapar"""
+    valid = ~np.isnan(values)
+    counts = np.bincount(inverse[valid], minlength=group_count)
+    if agg == "count":
+        return counts.astype(np.float64)
+    if agg in ("mean", "sum"):
+        sums = np.bincount(inverse[valid], weights=values[valid], minlength=group_count)
+        if agg == "sum":
+            return sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    fill = np.inf if agg == "min" else -np.inf
+    out = np.full(group_count, fill, dtype=np.float64)
+    reducer = np.minimum if agg == "min" else np.maximum
+    reducer.at(out, inverse[valid], values[valid])
+    out[counts == 0] = np.nan
+    return out
+
+
+def run_query(reader, params):
+    """Sorguyu çalıştırır; sonucu sütun adı -> değer listesi sözlüğü olarak döndürür"""
+    agg = _single(params, "agg", "none")
+    group = _single(params, "group", "none" if agg == "none" else "ika")
+    if agg not in AGGREGATIONS:
+        raise QueryError(f"Geçersiz agg: {agg} (seçenekler: {', '.join(AGGREGATIONS)})")
+    if group not in GROUPINGS:
+        raise QueryError(f"Geçersiz group: {group} (seçenekler: {', '.join(GROUPINGS)})")
+
+    columns = reader.columns
+    sensors = _list(params, "sensor") or SENSOR_COLUMNS
+    unknown = [s for s in sensors if s not in columns]
+    if unknown:
+        raise QueryError(f"Bilinmeyen sensör sütunları: {unknown}")
+
+    rows = select_rows(reader, params)
+    start_time = reader.start_time
+    units = np.asarray(reader.units, dtype=object)
+
+    if agg == "none":
+        limit = int(_single(params, "limit", DEFAULT_LIMIT))
+        rows = rows[:limit]
+        minutes = np.asarray(columns["minute"][rows])
+        result = {
+            "Timestamp": reader.timestamps(minutes),
+            "Ika_ID": units[np.asarray(columns["unit"][rows], dtype=np.int64)].tolist(),
+            "Latitude": np.asarray(columns["Latitude"][rows]).round(6).tolist(),
+            "Longitude": np.asarray(columns["Longitude"][rows]).round(6).tolist(),
+        }
+        if "district" in columns:
+            names = np.asarray(reader.meta["districts"] + [""], dtype=object)  # -1 kodu boş ada düşer
+            result["District"] = names[np.asarray(columns["district"][rows], dtype=np.int64)].tolist()
+        for sensor in sensors:
+            result[sensor] = _clean(np.asarray(columns[sensor][rows], dtype=np.float64).round(4))
+        return result
+
+    if group == "ika":
+        keys = np.asarray(columns["unit"][rows], dtype=np.int64)
+    elif group == "hour":
+        keys = np.asarray(columns["minute"][rows], dtype=np.int64) // 60
+    elif group == "minute":
+        keys = np.asarray(columns["minute"][rows], dtype=np.int64)
+    elif group == "district":
+        keys = np.asarray(_district_column(reader)[rows], dtype=np.int64) + 1  # 0: ilçe dışı
+    else:
+        keys = np.zeros(len(rows), dtype=np.int64)
+    group_keys, inverse = np.unique(keys, return_inverse=True)
+
+    result = {}
+    if group == "ika":
+        result["Ika_ID"] = units[group_keys].tolist()
+    elif group == "hour":
+        result["Hour"] = [int((start_time + datetime.timedelta(hours=int(h))).hour) for h in group_keys]
+    elif group == "minute":
+        result["Timestamp"] = reader.timestamps(group_keys)
+    elif group == "district":
+        result["District"] = [reader.meta["districts"][k - 1] if k else "" for k in group_keys]
+    result["Count"] = np.bincount(inverse, minlength=len(group_keys)).tolist()
+    for sensor in sensors:
+        values = np.asarray(columns[sensor][rows], dtype=np.float64)
+        result[sensor] = _clean(_group_reduce(values, inverse, len(group_keys), agg).round(4))
+    return result
+
+
+def run_quantiles(sketches, params):
+    """Seçilen şehirlerin özetlerini birleştirip yüzdelikleri hesaplar (ham satırlar okunmaz)"""
+    cities = _list(params, "city") or list(sketches)
+    missing = [c for c in cities if c not in sketches]
+    if missing:
+        raise QueryError(f"Yüzdelik özeti olmayan şehirler: {missing} (mevcut: {', '.join(sketches)})")
+    sensor = _single(params, "sensor")
+    if sensor not in SENSOR_COLUMNS:
+        raise QueryError(f"Geçersiz sensör: {sensor}")
+    quantiles = [float(q) for q in _list(params, "q")] or DEFAULT_QUANTILES
+    start = _single(params, "start")
+    end = _single(params, "end")
+    hours_of_day = [int(h) for h in _list(params, "hour_of_day")]
+    bbox = _single(params, "bbox")
+    return query_quantiles([sketches[c] for c in cities], sensor, quantiles, _single(params, "group", "none"),
+                           parse_time(start) if start else None, parse_time(end) if end else None,
+                           hours_of_day, parse_bbox(bbox) if bbox else None)
+
+
+def _clean(values):
+    """JSON çıktısı için NaN değerlerini None yapar"""
+    return [None if v != v else v for v in values.tolist()]
+
+
+def result_to_csv(result):
+    """Sütun sözlüğünü CSV metnine çevirir (gösterge paneli Papa Parse ile okuyabilir)"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    names = list(result)
+    writer.writerow(names)
+    writer.writerows(zip(*(result[n] for n in names)))
+    return buffer.getvalue()
+
+
+# --- HTTP Sunucusu ---
+class QueryHandler(BaseHTTPRequestHandler):
+    stores = {}
+    sketches = {}
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = parse_qs(url.query)
+        try:
+            if url.path == "/cities":
+                body = {city: {k: reader.meta[k] for k in ("row_count", "start_time", "bounds", "source", "hours")} | {"units": len(reader.units)}
+                        for city, reader in self.stores.items()}
+                self._send_json(200, body)
+            elif url.path == "/query":
+                city = _single(params, "city")
+                if city not in self.stores:
+                    raise QueryError(f"Bilinmeyen şehir: {city} (mevcut: {', '.join(self.stores)})")
+                result = run_query(self.stores[city], params)
+                if _single(params, "format", "json") == "csv":
+                    self._send(200, result_to_csv(result).encode("utf-8"), "text/csv; charset=utf-8")
+                else:
+                    self._send_json(200, result)
+            elif url.path == "/quantiles":
+                result = run_quantiles(self.sketches, params)
+                if _single(params, "format", "json") == "csv":
+                    self._send(200, result_to_csv(result).encode("utf-8"), "text/csv; charset=utf-8")
+                else:
+                    self._send_json(200, result)
+            else:
+                self._send_json(404, {"error": f"Bilinmeyen yol: {url.path}"})
+        except (QueryError, ValueError, KeyError) as e:
+            self._send_json(400, {"error": str(e)})
+
+    def _send_json(self, status, body):
+        self._send(status, json.dumps(body, ensure_ascii=False).encode("utf-8"), "application/json; charset=utf-8")
+
+    def _send(self, status, payload, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Access-Control-Allow-Origin", "*")  # React geliştirme sunucusu farklı portta çalışıyor
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sütunlu veri depoları üzerinde yerel zaman serisi sorgu servisi.")
+    parser.add_argument("root", help="Her şehir için bir alt klasör (meta.json içeren) barındıran kök klasör")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    args = parser.parse_args()
+
+    QueryHandler.stores = load_stores(args.root)
+    if not QueryHandler.stores:
+        raise SystemExit(f"'{args.root}' altında sütunlu depo bulunamadı (önce columnar_store.py ile dönüştürün).")
+    QueryHandler.sketches = load_sketches(QueryHandler.stores)
+    for city, reader in QueryHandler.stores.items():
+        print(f"'{city}' deposu yüklendi: {len(reader)} satır, {reader.hours} saat, {len(reader.units)} İKA")
+    if QueryHandler.sketches:
+        print(f"Yüzdelik özetleri: {', '.join(QueryHandler.sketches)}")
+    print(f"Sorgu servisi http://{args.host}:{args.port} adresinde çalışıyor...")
+    ThreadingHTTPServer((args.host, args.port), QueryHandler).serve_forever()
@@ -0,0 +1,258 @@
+import argparse
+import ast
+import concurrent.futures
+import csv
+import hashlib
+import importlib
+import itertools
+import json
+import os
+import time
+import numpy as np
+
+from build_datasets import ROOT_DIR, module_settings, run_generator
+from columnar_store import canonical_column_name, SENSOR_COLUMNS
+from output_cache import code_fingerprint
+from trajectory_codec import FIXED_POINT_SCALE
+
+# --- Parametre Süpürmesi: Hareket Bir Kez, Sensör Katmanı Her Bileşim İçin ---
+# Üretici bir kez kayıt kipinde çalıştırılır; her dakikanın filo durumu (konum, yükseklik,
+# hedef konum, kirletici alanından okunan PM/trafik düzeyleri) kompakt dizilerle .npz
+# dosyasına yazılır. Her parametre bileşimi için üretici yeniden oynatma kipinde çalışır:
+# hareket, rota (get_circular_path) ve kapsama/aralık hesapları atlanır, yalnızca sensör
+# fonksiyonları yeniden örneklenir. Bileşimler ayrı süreçlerde paralel çalışır ve hepsi aynı
+# tohumu kullanır (ortak rastgele sayılar), böylece sonuç farkları yalnızca parametrelerden gelir.
+
+FRAMES_FORMAT_VERSION = 1
+SWEEP_DIR = "sweep_output"
+SUMMARY_FILE = "sweep_summary.csv"
+
+# Şehir anahtarı -> üretici betik
+GENERATORS = {
+    "istanbul": "generate_istanbul_data.py",
+    "ankara": "generate_ankara_data.py",
+    "aydin": "generate_aydin_data.py",
+}
+
+# Filo hareketini değiştiren ayarlar süpürülemez (kareler geçersiz olur)
+MOVEMENT_SETTINGS = {
+    "NUM_IKAS", "DURATION_HOURS", "RECORDS_PER_HOUR", "RANDOM_SEED", "CITY_PROFILE_CACHE",
+    "ANKARA_RADIUS", "AYDIN_RADIUS", "USE_POLLUTION_FIELD", "POLLUTION_CELL_DEG",
+    "ENFORCE_FLEET_SPACING", "MIN_SEPARATION_M", "COVERAGE_TARGETING", "COVERAGE_CELL_DEG",
+    "SWEEP_RECORD_FILE", "SWEEP_REPLAY_FILE", "OUTPUT_CSV_FILE",
+}
+
+# Kayıt ve yeniden oynatmada gereksiz yan çıktılar kapatılır (üreticide olmayanlar atlanır)
+# (aralık zorlaması hareketi değiştirdiği için açık kalır, yakınlaşma dosyası atılır)
+RECORD_OVERRIDES = {
+    "USE_OUTPUT_CACHE": False, "PUBLISH_DIR": None, "WRITE_TRAJECTORY_SIDECAR": False, "WRITE_TRACK_POLYLINES": False,
+    "WRITE_CAMERA_EVENTS": False, "AQI_OUTPUT": "off", "EXCEPTION_STREAM_MODE": "off", "CLOSE_APPROACH_FILE": os.devnull,
+}
+# Yeniden oynatmada konumlar ve alan düzeyleri karelerden geldiği için hareket hesapları da kapatılır
+REPLAY_OVERRIDES = dict(RECORD_OVERRIDES, USE_POLLUTION_FIELD=False, COVERAGE_TARGETING=False, ENFORCE_FLEET_SPACING=False)
+
+
+class FrameRecorder:
+    """Dakika başına filo durumunu sabit boyutlu dizilerde biriktirir"""
+
+    def __init__(self, unit_ids, minutes):
+        self.unit_ids = list(unit_ids)
+        shape = (minutes, len(self.unit_ids))
+        self.lat = np.zeros(shape, dtype=np.int32)  # 1e-6 derece
+        self.lon = np.zeros(shape, dtype=np.int32)
+        self.alt = np.zeros(shape, dtype=np.float32)
+        self.target = np.zeros(shape, dtype=np.uint16)
+        self.pm_level = np.full(shape, np.nan, dtype=np.float32)  # Alan yoksa NaN
+        self.traffic_level = np.full(shape, np.nan, dtype=np.float32)
+        self.target_names = {}
+
+    def record(self, minute_index, ika_states, field_levels):
+        """Bir dakikanın İKA durumlarını ve alan düzeylerini kaydeder"""
+        for i, (ika, (pm_level, traffic_level)) in enumerate(zip(ika_states, field_levels)):
+            self.lat[minute_index, i] = round(ika["lat"] * FIXED_POINT_SCALE)
+            self.lon[minute_index, i] = round(ika["lon"] * FIXED_POINT_SCALE)
+            self.alt[minute_index, i] = ika["alt"]
+            self.target[minute_index, i] = self.target_names.setdefault(ika["current_target_name"], len(self.target_names))
+            if pm_level is not None:
+                self.pm_level[minute_index, i] = pm_level
+                self.traffic_level[minute_index, i] = traffic_level
+
+    def save(self, path):
+        """Kareleri sıkıştırılmış .npz dosyasına yazar; dosya boyutunu döndürür"""
+        tmp_path = path + ".tmp.npz"
+        np.savez_compressed(tmp_path, version=np.array(FRAMES_FORMAT_VERSION), unit_ids=np.array(self.unit_ids),
+                            target_names=np.array(list(self.target_names)), lat=self.lat, lon=self.lon, alt=self.alt,
+                            target=self.target, pm_level=self.pm_level, traffic_level=self.traffic_level)
+        os.replace(tmp_path, path)
+        return os.path.getsize(path)
+
+
+class FrameReplay:
+    """Kayıtlı kareleri İKA durumlarına geri yükleyen okuyucu"""
+
+    def __init__(self, path, unit_ids, minutes):
+        with np.load(path, allow_pickle=False) as arrays:
+            if int(arrays["version"]) != FRAMES_FORMAT_VERSION:
+                raise ValueError(f"'{path}' eski biçimde; kareleri yeniden kaydedin.")
+            if arrays["unit_ids"].tolist() != list(unit_ids):
+                raise ValueError(f"'{path}' farklı bir filo için kaydedilmiş (NUM_IKAS uyuşmuyor).")
+            if arrays["lat"].shape[0] < minutes:
+                raise ValueError(f"'{path}' yalnızca {arrays['lat'].shape[0]} dakika içeriyor, {minutes} gerekli.")
+            # Satır başına Python nesnesine çevirme maliyeti dakika başına bir kez ödenir
+            self.lat = arrays["lat"] / FIXED_POINT_SCALE
+            self.lon = arrays["lon"] / FIXED_POINT_SCALE
+            self.alt = arrays["alt"].astype(np.float64)
+            self.target_names = arrays["target_names"].tolist()
+            self.target = arrays["target"]
+            self.pm_level = arrays["pm_level"].astype(np.float64)
+            self.traffic_level = arrays["traffic_level"].astype(np.float64)
+
+    def apply(self, minute_index, ika_states):
+        """Dakikanın konum, yükseklik ve hedeflerini İKA'lara yazar; (PM, trafik) düzeylerini döndürür"""
+        lats, lons, alts = self.lat[minute_index].tolist(), self.lon[minute_index].tolist(), self.alt[minute_index].tolist()
+        for ika, lat, lon, alt, code in zip(ika_states, lats, lons, alts, self.target[minute_index].tolist()):
+            ika["lat"], ika["lon"], ika["alt"] = lat, lon, alt
+            ika["current_target_name"] = self.target_names[code]
+        pm_levels, traffic_levels = self.pm_level[minute_index].tolist(), self.traffic_level[minute_index].tolist()
+        return [(None, None) if pm != pm else (pm, traffic) for pm, traffic in zip(pm_levels, traffic_levels)]
+
+
+def expand_grid(grid):
+    """{ayar: [değerler]} sözlüğünden tüm bileşimlerin listesini üretir"""
+    names = sorted(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+
+
+def _import_local_modules(script):
+    """Üreticinin aynı klasördeki modül içe aktarmalarını bu süreçte yükler (kod özeti için)"""
+    root = os.path.dirname(os.path.abspath(script))
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), script)
+    for node in ast.walk(tree):
+        names = [alias.name for alias in node.names] if isinstance(node, ast.Import) else \
+                [node.module] if isinstance(node, ast.ImportFrom) and node.module and not node.level else []
+        for name in names:
+            if os.path.exists(os.path.join(root, name.split(".")[0] + ".py")):
+                importlib.import_module(name.split(".")[0])
+
+
+def frames_key(script, settings):
+    """Kareleri belirleyen üretici kaynağı, yerel modülleri ve sabit ayarlardan kısa özet üretir"""
+    _import_local_modules(script)
+    digest = hashlib.sha256()
+    with open(script, "rb") as f:
+        digest.update(f.read())  # Ayar satırları dahil: betikteki varsayılan değerler de kareleri belirler
+    digest.update(code_fingerprint(script).encode("ascii"))
+    digest.update(json.dumps(settings, sort_keys=True, default=repr).encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def summarize_csv(csv_path):
+    """Veri setinin sensör sütunları için ortalama, 95. yüzdelik ve en büyük değeri hesaplar"""
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        reader = csv.reader(f)
+        header = [canonical_column_name(h) for h in next(reader)]
+        columns = [(name, header.index(name)) for name in SENSOR_COLUMNS if name in header]
+        values = np.array([[row[i] for _, i in columns] for row in reader if row], dtype=np.float64).reshape(-1, len(columns))
+    summary = {"rows": len(values)}
+    if len(values):
+        means, p95s, maxes = values.mean(axis=0), np.percentile(values, 95, axis=0), values.max(axis=0)
+        for k, (name, _) in enumerate(columns):
+            summary.update({f"{name}_mean": round(float(means[k]), 4), f"{name}_p95": round(float(p95s[k]), 4),
+                            f"{name}_max": round(float(maxes[k]), 4)})
+    return summary
+
+
+def _run_point(script, overrides, work_dir, log_path, summarize=True, keep_csv=False):
+    """Üreticiyi işçi süreçte verilen ayarlarla çalıştırır; istenirse veri setini özetler"""
+    started = time.perf_counter()
+    os.chdir(work_dir)
+    run_generator(script, overrides, log_path)
+    summary = summarize_csv(overrides["OUTPUT_CSV_FILE"]) if summarize else {}
+    if not keep_csv:
+        os.remove(overrides["OUTPUT_CSV_FILE"])
+    summary["seconds"] = round(time.perf_counter() - started, 2)
+    return summary
+
+
+def run_sweep(city, grid, out_dir=SWEEP_DIR, fixed=None, seed=0, jobs=None, keep_csv=False, work_dir=None):
+    """Hareketi bir kez benzetip her parametre bileşimi için sensör katmanını paralel yeniden örnekler.
+
+    Sonuçları (bileşim + sensör özetleri) sweep_summary.csv'ye yazar ve satırları döndürür.
+    """
+    work_dir = os.path.abspath(work_dir or ROOT_DIR)
+    out_dir = os.path.abspath(out_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    script = os.path.join(ROOT_DIR, GENERATORS[city])
+    fixed = dict(fixed or {})
+    blocked = sorted(set(grid) & MOVEMENT_SETTINGS)
+    if blocked:
+        raise ValueError(f"Hareketi değiştiren ayarlar süpürülemez: {', '.join(blocked)}")
+    settings = module_settings(script)
+    unknown = sorted((set(grid) | set(fixed)) - settings)
+    if unknown:
+        raise ValueError(f"{GENERATORS[city]} içinde bu ayarlar yok: {', '.join(unknown)}")
+    points = expand_grid(grid)
+
+    replay = dict(fixed, **{k: v for k, v in REPLAY_OVERRIDES.items() if k in settings}, RANDOM_SEED=seed)
+    rows = [None] * len(points)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=jobs) as pool:
+        # 1) Hareket karelerinin kaydı (aynı üretici kodu ve sabit ayarlar için yeniden kullanılır)
+        base = dict(fixed, **{k: v for k, v in RECORD_OVERRIDES.items() if k in settings}, RANDOM_SEED=seed)
+        frames_path = os.path.join(out_dir, f"{city}_kareler_{frames_key(script, base)}.npz")
+        if os.path.exists(frames_path):
+            print(f"Hareket kareleri önbellekten kullanılıyor: {frames_path}")
+        else:
+            overrides = dict(base, SWEEP_RECORD_FILE=frames_path, OUTPUT_CSV_FILE=os.path.join(out_dir, f"{city}_temel.csv"))
+            seconds = pool.submit(_run_point, script, overrides, work_dir, os.path.join(out_dir, f"{city}_kayit.log"),
+                                  summarize=False).result()["seconds"]
+            print(f"Hareket kareleri kaydedildi ({seconds} sn): {frames_path}")
+
+        # 2) Bileşimler: yalnızca sensör katmanı, paralel
+        replay["SWEEP_REPLAY_FILE"] = frames_path
+        started = time.perf_counter()
+        futures = {}
+        for index, point in enumerate(points):
+            overrides = dict(replay, **point, OUTPUT_CSV_FILE=os.path.join(out_dir, f"{city}_nokta_{index:03d}.csv"))
+            log_path = os.path.join(out_dir, f"{city}_nokta_{index:03d}.log")
+            futures[pool.submit(_run_point, script, overrides, work_dir, log_path, keep_csv=keep_csv)] = index
+        for future in concurrent.futures.as_completed(futures):
+            index = futures[future]
+            rows[index] = dict({"point": index}, **{name: json.dumps(value) for name, value in points[index].items()}, **future.result())
+        print(f"{len(points)} bileşim {time.perf_counter() - started:.1f} sn'de örneklendi.")
+
+    summary_path = os.path.join(out_dir, SUMMARY_FILE)
+    fields = list(dict.fromkeys(key for row in rows for key in row))
+    with open(summary_path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=fields)
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"Süpürme özeti '{summary_path}' dosyasına yazıldı.")
+    return rows
+
+
+def _parse_assignment(text):
+    name, _, value = text.partition("=")
+    if not name or not value:
+        raise argparse.ArgumentTypeError(f"'{text}' AYAR=değer biçiminde olmalı")
+    try:
+        return name.strip(), ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        return name.strip(), value  # Tırnaksız metin
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Hareketi bir kez benzetip sensör parametrelerini paralel süpürür.")
+    parser.add_argument("city", choices=sorted(GENERATORS))
+    parser.add_argument("--set", action="append", type=_parse_assignment, default=[], metavar="AYAR=değer",
+                        help="Tüm çalıştırmalarda sabit ayar (örn. NUM_IKAS=20)")
+    parser.add_argument("--vary", action="append", type=_parse_assignment, default=[], metavar="AYAR=[d1, d2, ...]",
+                        help="Süpürülecek ayar ve değer listesi (örn. \"ANOMALY_CHANCE=[0.0005, 0.002]\")")
+    parser.add_argument("--seed", type=int, default=0, help="Tüm çalıştırmalarda kullanılan tohum")
+    parser.add_argument("--out-dir", default=SWEEP_DIR)
+    parser.add_argument("--jobs", type=int, help="Eşzamanlı süreç sayısı (varsayılan: çekirdek sayısı)")
+    parser.add_argument("--keep-csv", action="store_true", help="Her bileşimin veri setini sakla (varsayılan: yalnızca özet)")
+    args = parser.parse_args()
+
+    grid = {name: values if isinstance(values, list) else [values] for name, values in args.vary}
+    run_sweep(args.city, grid, args.out_dir, dict(args.set), args.seed, args.jobs, args.keep_csv)
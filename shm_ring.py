@@ -0,0 +1,292 @@
+import argparse
+import datetime
+import json
+import struct
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+
+from columnar_store import COLUMN_DTYPES, canonical_column_name, TIMESTAMP_FORMAT
+
+# --- Paylaşımlı Bellek Halka Tamponu ---
+# Üretici her dakikanın satırlarını (İKA başına bir satır) sabit sütunlu bir paylaşımlı
+# bellek halkasına yazar; aynı makinedeki okuyucu süreçler (dedektör prototipleri,
+# not defterleri, tekrar oynatma sunucusu) satırları kopyalamadan NumPy görünümleri olarak
+# okur. Sütunlar ve tipleri sütunlu depoyla aynıdır (bkz. columnar_store.COLUMN_DTYPES).
+# Her yuvanın sıra sayacı vardır (seqlock): yazım sırasında tek, bitince çift değer alır.
+# Yazar okuyucuları beklemez; RING_SLOTS dakikadan fazla geride kalan okuyucu kaçırdığı
+# partileri sayar ve halkadaki en eski dakikadan devam eder. Hedef adları şema bloğunda
+# tutulur; üretim sırasında yeni bir ad çıkarsa blok yeniden yazılır. Şema bloğunun da
+# kendi sıra sayacı vardır; okuyucu bloğu kopyalar, sayaç tek ise ya da kopyalama sırasında
+# değiştiyse yeniden dener, böylece yarım yazılmış şema asla ayrıştırılmaz.
+
+RING_MAGIC = b"TSRING02"
+RING_SLOTS = 256  # Halkada tutulan dakika sayısı
+META_BYTES = 64 * 1024  # Şema (JSON) için ayrılan alan
+HEADER = struct.Struct("<8sQQQI")  # sihirli sayı, yazılan parti sayısı, kapandı bayrağı, şema sıra sayacı, şema uzunluğu
+SLOT_FIELDS = 3  # Yuva başına: sıra sayacı, dakika, satır sayısı
+ALIGN = 64
+POLL_INTERVAL = 0.001  # Okuyucunun yeni parti beklerken uyuma süresi (saniye)
+META_RETRIES = 1000  # Şema bloğu tutarlı okunamazsa vazgeçmeden önceki deneme sayısı
+
+
+def _aligned(offset):
+    return (offset + ALIGN - 1) // ALIGN * ALIGN
+
+
+def _read_meta(buf):
+    """Şema bloğunu sıra sayacıyla tutarlı okur; (şema, sıra sayacı) döndürür"""
+    for _ in range(META_RETRIES):
+        _, _, _, before, meta_len = HEADER.unpack_from(buf, 0)
+        # meta_len == 0: yazar başlığı koydu ama şemayı henüz yazmadı, beklemeye devam edilir
+        if before % 2 == 0 and 0 < meta_len <= META_BYTES:
+            meta_bytes = bytes(buf[HEADER.size:HEADER.size + meta_len])
+            if HEADER.unpack_from(buf, 0)[3] == before:  # Kopyalama sırasında yazar şemayı değiştirmedi
+                return json.loads(meta_bytes.decode("utf-8")), before
+        time.sleep(POLL_INTERVAL)
+    raise TimeoutError("Halka şeması tutarlı okunamadı")
+
+
+def ring_layout(slots, capacity, columns=None):
+    """Yuva tablosu ve sütun dizilerinin bayt ofsetlerini hesaplar; (yuva tablosu ofseti, sütun şeması, toplam boyut) döndürür"""
+    offset = _aligned(HEADER.size + META_BYTES)
+    slot_table = offset
+    offset = _aligned(offset + slots * SLOT_FIELDS * 8)
+    layout = {}
+    for name, dtype in (columns or COLUMN_DTYPES).items():
+        layout[name] = {"dtype": dtype, "offset": offset}
+        offset = _aligned(offset + slots * capacity * np.dtype(dtype).itemsize)
+    return slot_table, layout, offset
+
+
+class _Ring:
+    """Yazar ve okuyucunun ortak görünümleri"""
+
+    def _map(self, shm, meta):
+        self.shm = shm
+        self.meta = meta
+        self.slots = meta["slots"]
+        self.capacity = meta["capacity"]
+        buf = shm.buf
+        self.counters = np.ndarray((3,), dtype=np.uint64, buffer=buf, offset=8)  # yazılan parti sayısı, kapandı bayrağı, şema sıra sayacı
+        self.slot_table = np.ndarray((self.slots, SLOT_FIELDS), dtype=np.int64, buffer=buf, offset=meta["slot_table"])
+        self.columns = {name: np.ndarray((self.slots, self.capacity), dtype=info["dtype"], buffer=buf, offset=info["offset"])
+                        for name, info in meta["columns"].items()}
+
+    @property
+    def published(self):
+        return int(self.counters[0])
+
+    @property
+    def closed(self):
+        return bool(self.counters[1])
+
+
+class ShmRingWriter(_Ring):
+    """Dakikalık satır partilerini paylaşımlı belleğe yazan üretici tarafı"""
+
+    def __init__(self, name, headers, units, targets=(), slots=RING_SLOTS, city=None, start_time=None):
+        names = [canonical_column_name(h) for h in headers]
+        self.unit_codes = {u: i for i, u in enumerate(units)}
+        self.target_codes = {t: i for i, t in enumerate(targets)}
+        self.positions = {c: names.index(c) for c in COLUMN_DTYPES if c in names and c not in ("minute", "unit", "target")}
+        self.unit_col, self.target_col = names.index("Ika_ID"), names.index("Target_Location")
+        slot_table, layout, size = ring_layout(slots, len(units))
+        meta = {
+            "city": city, "start_time": start_time.strftime(TIMESTAMP_FORMAT) if start_time else None,
+            "slots": slots, "capacity": len(units), "slot_table": slot_table, "columns": layout,
+            "units": list(units), "targets": list(targets),
+        }
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:  # Önceki çalıştırmadan kalmış halka
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        shm.buf[:HEADER.size] = HEADER.pack(RING_MAGIC, 0, 0, 0, 0)
+        self._map(shm, meta)
+        self._write_meta()
+        self.name = name
+        self.pending = []
+
+    def _write_meta(self):
+        meta_bytes = json.dumps(self.meta, ensure_ascii=False).encode("utf-8")
+        if len(meta_bytes) > META_BYTES:
+            raise ValueError("Halka şeması META_BYTES sınırını aşıyor")
+        sequence = int(self.counters[2])
+        self.counters[2] = sequence + 1  # Şema yazımı başladı (tek)
+        self.shm.buf[HEADER.size:HEADER.size + len(meta_bytes)] = meta_bytes
+        struct.pack_into("<I", self.shm.buf, HEADER.size - 4, len(meta_bytes))
+        self.counters[2] = sequence + 2  # Şema yazımı bitti (çift)
+
+    def _target_code(self, target):
+        code = self.target_codes.get(target)
+        if code is None:  # Yeni hedef adı: parti yayımlanmadan önce şemaya eklenir
+            code = self.target_codes[target] = len(self.target_codes)
+            self.meta["targets"].append(target)
+            self._write_meta()
+        return code
+
+    def write(self, minute_index, row):
+        """Satırı geçerli dakikanın partisine ekler (parti publish ile yayımlanır)"""
+        self.pending.append(row)
+
+    def publish(self, minute_index):
+        """Biriken satırları bir sonraki yuvaya yazar ve sıra sayacını ilerletir"""
+        rows, self.pending = self.pending[:self.capacity], []
+        batch = self.published
+        slot = batch % self.slots
+        self.slot_table[slot, 0] = 2 * batch + 1  # Yazım başladı (tek)
+        n = len(rows)
+        columns = self.columns
+        columns["minute"][slot, :n] = minute_index
+        columns["unit"][slot, :n] = [self.unit_codes.get(r[self.unit_col], 0) for r in rows]
+        columns["target"][slot, :n] = [self._target_code(r[self.target_col]) for r in rows]
+        for name, position in self.positions.items():
+            columns[name][slot, :n] = [_to_float(r[position]) for r in rows]
+        self.slot_table[slot, 1] = minute_index
+        self.slot_table[slot, 2] = n
+        self.slot_table[slot, 0] = 2 * batch + 2  # Yazım bitti (çift)
+        self.counters[0] = batch + 1
+        return n
+
+    def close(self, unlink=True):
+        """Kapandı bayrağını koyar; bağlı okuyucular kalan partileri okuyabilir. Yayımlanan parti sayısını döndürür"""
+        published = self.published
+        self.counters[1] = 1
+        del self.counters, self.slot_table, self.columns  # Bellek görünümleri serbest bırakılmadan kapatılamaz
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+        return published
+
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float("nan")
+
+
+class RingBatch:
+    """Bir dakikanın satırları; sütunlar paylaşımlı belleğe doğrudan görünümdür"""
+
+    def __init__(self, reader, sequence, slot, minute, rows):
+        self.reader = reader
+        self.sequence = sequence
+        self.minute = minute
+        self.rows = rows
+        self.slot = slot
+
+    def __getitem__(self, column):
+        return self.reader.columns[column][self.slot, :self.rows]
+
+    def valid(self):
+        """Görünümler okunurken yazar yuvanın üzerine yazmadıysa True (okuma sonrasında çağrılmalı)"""
+        return int(self.reader.slot_table[self.slot, 0]) == 2 * self.sequence + 2
+
+    def copy(self):
+        """Tüm sütunların kopyası (parti uzun süre tutulacaksa)"""
+        return {name: self[name].copy() for name in self.reader.columns}
+
+
+class ShmRingReader(_Ring):
+    """Halkayı adıyla açan okuyucu; varsayılan olarak yeni yayımlanan partiden başlar"""
+
+    def __init__(self, name, from_start=False):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:  # Python < 3.13: okuyucu çıkarken halkayı silmesin diye izleyiciden çıkarılır
+            shm = shared_memory.SharedMemory(name=name)
+            resource_tracker.unregister(shm._name, "shared_memory")
+        if HEADER.unpack_from(shm.buf, 0)[0] != RING_MAGIC:
+            shm.close()
+            raise ValueError(f"'{name}' bir veri halkası değil (veya eski sürüm)")
+        try:
+            meta, self.meta_sequence = _read_meta(shm.buf)
+        except (TimeoutError, ValueError):
+            shm.close()
+            raise
+        self._map(shm, meta)
+        self.units = meta["units"]
+        self.start_time = datetime.datetime.strptime(meta["start_time"], TIMESTAMP_FORMAT) if meta["start_time"] else None
+        self.next_sequence = max(0, self.published - self.slots) if from_start else self.published
+        self.overruns = 0  # Yazar tarafından üzerine yazıldığı için atlanan parti sayısı
+
+    @property
+    def targets(self):
+        """Hedef adları (yazar yeni ad eklediyse şema bloğu yeniden okunur)"""
+        if int(self.counters[2]) != self.meta_sequence:
+            self.meta, self.meta_sequence = _read_meta(self.shm.buf)
+        return self.meta["targets"]
+
+    def poll(self):
+        """Hazır parti varsa RingBatch, yoksa None döndürür"""
+        published = self.published
+        if self.next_sequence >= published:
+            return None
+        if published - self.next_sequence > self.slots:
+            skipped = published - self.slots - self.next_sequence
+            self.overruns += skipped
+            self.next_sequence += skipped
+        sequence = self.next_sequence
+        slot = sequence % self.slots
+        if int(self.slot_table[slot, 0]) != 2 * sequence + 2:  # Okurken üzerine yazılmaya başlandı
+            self.overruns += 1
+            self.next_sequence += 1
+            return self.poll()
+        batch = RingBatch(self, sequence, slot, int(self.slot_table[slot, 1]), int(self.slot_table[slot, 2]))
+        self.next_sequence += 1
+        return batch
+
+    def __iter__(self):
+        """Partileri sırayla verir; yazar kapanıp kalan partiler bitince durur"""
+        while True:
+            batch = self.poll()
+            if batch is not None:
+                yield batch
+            elif self.closed and self.next_sequence >= self.published:
+                return
+            else:
+                time.sleep(POLL_INTERVAL)
+
+    def close(self):
+        del self.counters, self.slot_table, self.columns
+        self.shm.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üreticinin paylaşımlı bellek halkasını izler (dakika başına özet yazdırır).")
+    parser.add_argument("name", help="Halka adı (üreticideki SHM_RING_NAME)")
+    parser.add_argument("--sensor", default="PM2.5_ug_m3", help="Özetlenecek sensör sütunu")
+    parser.add_argument("--from-start", action="store_true", help="Halkada kalan en eski partiden başla")
+    parser.add_argument("--wait", type=float, default=0.0, help="Halka henüz yoksa oluşturulmasını bu kadar saniye bekle")
+    args = parser.parse_args()
+
+    deadline = time.monotonic() + args.wait
+    while True:
+        try:
+            reader = ShmRingReader(args.name, args.from_start)
+            break
+        except FileNotFoundError:
+            if time.monotonic() >= deadline:
+                raise SystemExit(f"'{args.name}' adlı halka bulunamadı (üretici SHM_RING_NAME ile çalışıyor mu?).")
+            time.sleep(0.1)
+        except (ValueError, TimeoutError) as exc:
+            # Halka oluşturulmuş ama başlığı/şeması henüz yazılmamış olabilir (boş bellek, sihirli sayı yok)
+            if time.monotonic() >= deadline:
+                raise SystemExit(f"'{args.name}' halkası okunamadı: {exc}")
+            time.sleep(0.1)
+    print(f"'{args.name}' halkasına bağlanıldı: {reader.meta['city']}, {reader.capacity} İKA, {reader.slots} yuva")
+    batches = 0
+    for batch in reader:
+        values = batch[args.sensor]
+        mean = float(np.nanmean(values)) if batch.rows else float("nan")
+        if not batch.valid():
+            continue  # Okuma sırasında üzerine yazıldı
+        timestamp = (reader.start_time + datetime.timedelta(minutes=batch.minute)).strftime(TIMESTAMP_FORMAT) if reader.start_time else batch.minute
+        print(f"{timestamp}: {batch.rows} satır, ortalama {args.sensor} {mean:.2f}")
+        batches += 1
+    print(f"Halka kapandı: {batches} parti okundu, {reader.overruns} parti kaçırıldı.")
+    reader.close()
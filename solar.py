@@ -0,0 +1,131 @@
+import argparse
+import datetime
+import math
+import numpy as np
+
+# --- Güneş Konumu Önbelleği ---
+# Işık ve sıcaklık modelleri saatten türetilen sabit eğriler yerine güneşin gerçek
+# yüksekliğini kullanır. Çalıştırmanın başında her (dakika, ~10 km hücre) için güneş
+# yüksekliği tek bir vektörel geçişte hesaplanır (düşük hassasiyetli astronomik almanak
+# formülleri, ~0.01°) ve bellekte tutulur; satır başına maliyet iki dizi okumasıdır.
+# Bundan iki seri türetilir:
+#   - Açık gök aydınlığı (lux): doğrudan güneş + gök yayılımı, ufkun altında alacakaranlık
+#   - Günlük sıcaklık döngüsü (0..1): güneşlenme birinci dereceden gecikmeli bir filtreden
+#     geçirilir (zemin ısınması ~2 saat geride kalır, en sıcak an öğleden sonradır) ve her yerel
+#     gün için 0..1'e ölçeklenir; üreticinin TEMPERATURE_RANGE_C aralığı böylece korunur,
+#     gün doğumu, gün uzunluğu ve tepe saati tarihe ve konuma göre değişir.
+# Üreticilerin saate bağlı diğer modelleri (yoğun saatler, gürültü) zaman damgasını yerel saat
+# olarak kullandığından güneş hesabı da zaman damgasını UTC_OFFSET_HOURS kadar kaydırılmış yerel
+# saat (TSİ, UTC+3) kabul eder.
+
+SOLAR_CELL_DEG = 0.1  # Güneş yüksekliği hücre boyu (derece); şehir ölçeğinde fark < 0.1°
+UTC_OFFSET_HOURS = 3  # Zaman damgalarının yerel saat farkı (Türkiye saati)
+THERMAL_LAG_HOURS = 3.0  # Sıcaklığın güneşlenmeyi izleme zaman sabiti
+DIRECT_LUX = 128000  # Atmosfer dışı aydınlık (lux)
+EXTINCTION = 0.21  # Açık gök sönümleme katsayısı
+DIFFUSE_LUX = (800, 15500)  # Gök yayılımı: A + B * sqrt(sin(yükseklik))
+TWILIGHT_DECADES_PER_DEG = 0.4  # Ufkun altında aydınlığın derece başına 10'un kuvveti olarak azalması
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+
+
+def sun_elevation(unix_seconds, lat, lon):
+    """Güneş yüksekliği (derece); girdiler yayınlanabilir (broadcast) NumPy dizileridir"""
+    n = np.asarray(unix_seconds, dtype=np.float64) / 86400.0 + UNIX_EPOCH_JD - J2000_JD
+    mean_lon = np.radians((280.460 + 0.9856474 * n) % 360)
+    anomaly = np.radians((357.528 + 0.9856003 * n) % 360)
+    ecliptic_lon = mean_lon + np.radians(1.915) * np.sin(anomaly) + np.radians(0.020) * np.sin(2 * anomaly)
+    obliquity = np.radians(23.439 - 0.0000004 * n)
+    right_ascension = np.arctan2(np.cos(obliquity) * np.sin(ecliptic_lon), np.cos(ecliptic_lon))
+    declination = np.arcsin(np.sin(obliquity) * np.sin(ecliptic_lon))
+    sidereal = np.radians(((18.697374558 + 24.06570982441908 * n) % 24) * 15)
+    hour_angle = sidereal + np.radians(lon) - right_ascension
+    lat = np.radians(lat)
+    sin_elevation = np.sin(lat) * np.sin(declination) + np.cos(lat) * np.cos(declination) * np.cos(hour_angle)
+    return np.degrees(np.arcsin(np.clip(sin_elevation, -1, 1)))
+
+
+def clear_sky_lux(elevation):
+    """Güneş yüksekliğinden (derece) yatay düzlemde açık gök aydınlığı (lux)"""
+    s = np.sin(np.radians(np.maximum(elevation, 0.0)))
+    with np.errstate(divide="ignore"):
+        direct = DIRECT_LUX * s * np.exp(-EXTINCTION / np.maximum(s, 1e-6))
+    diffuse = DIFFUSE_LUX[0] + DIFFUSE_LUX[1] * np.sqrt(s)
+    twilight = DIFFUSE_LUX[0] * 10.0 ** (TWILIGHT_DECADES_PER_DEG * np.minimum(elevation, 0.0))
+    return np.where(elevation > 0, direct + diffuse, twilight)
+
+
+def diurnal_cycle(elevation, day_index, lag_minutes):
+    """Gecikmeli güneşlenmenin her yerel gün ve hücre için 0..1'e ölçeklenmiş hali; (dakika, hücre)"""
+    insolation = np.sin(np.radians(np.maximum(elevation, 0.0)))
+    alpha = 1.0 - math.exp(-1.0 / lag_minutes)
+    heat = np.empty_like(insolation)
+    state = insolation[0].copy()
+    for t in range(len(insolation)):  # Hücreler vektörel, zaman ekseni özyinelemeli
+        state += alpha * (insolation[t] - state)
+        heat[t] = state
+    cycle = np.zeros_like(heat)
+    for day in np.unique(day_index):
+        rows = day_index == day
+        low, high = heat[rows].min(axis=0), heat[rows].max(axis=0)
+        cycle[rows] = np.where(high > low, (heat[rows] - low) / np.maximum(high - low, 1e-12), 0.0)
+    return cycle
+
+
+class SolarCache:
+    """Çalıştırma süresince her (dakika, hücre) için açık gök aydınlığı ve sıcaklık döngüsü"""
+
+    def __init__(self, start_time, minutes, lat_min, lat_max, lon_min, lon_max,
+                 cell_deg=SOLAR_CELL_DEG, utc_offset_hours=UTC_OFFSET_HOURS, lag_hours=THERMAL_LAG_HOURS):
+        self.lat_min, self.lon_min, self.cell_deg = lat_min, lon_min, cell_deg
+        self.n_lat = max(1, math.ceil((lat_max - lat_min) / cell_deg))
+        self.n_lon = max(1, math.ceil((lon_max - lon_min) / cell_deg))
+        cell_lat = lat_min + (np.arange(self.n_lat) + 0.5) * cell_deg
+        cell_lon = lon_min + (np.arange(self.n_lon) + 0.5) * cell_deg
+        lats, lons = np.repeat(cell_lat, self.n_lon), np.tile(cell_lon, self.n_lat)
+
+        # Filtre bir önceki gün yerel gece yarısından ısınır, son gün tamamlanır (gün içi ölçekleme tam günlerle yapılır)
+        midnight_offset = start_time.hour * 60 + start_time.minute
+        first = -(midnight_offset + 1440)
+        last = math.ceil((midnight_offset + minutes) / 1440) * 1440 - midnight_offset
+        offsets = np.arange(first, max(last, 1))
+        start_utc = (start_time - datetime.timedelta(hours=utc_offset_hours)).replace(tzinfo=datetime.timezone.utc).timestamp()
+        elevation = sun_elevation(start_utc + offsets[:, None] * 60.0, lats[None, :], lons[None, :])
+        day_index = (offsets + midnight_offset) // 1440
+        window = slice(-first, -first + minutes)
+        self.elevation = elevation[window].astype(np.float32)
+        self.lux = clear_sky_lux(elevation[window]).astype(np.float32)
+        self.cycle = diurnal_cycle(elevation, day_index, lag_hours * 60)[window].astype(np.float32)
+
+    def cells(self, lats, lons):
+        rows = np.clip(((np.asarray(lats) - self.lat_min) / self.cell_deg).astype(np.intp), 0, self.n_lat - 1)
+        cols = np.clip(((np.asarray(lons) - self.lon_min) / self.cell_deg).astype(np.intp), 0, self.n_lon - 1)
+        return rows * self.n_lon + cols
+
+    def levels(self, minute_index, lats, lons):
+        """Bir dakikadaki konumlar için (açık gök lux, sıcaklık döngüsü 0..1) çiftleri"""
+        cells = self.cells(lats, lons)
+        return list(zip(self.lux[minute_index, cells].tolist(), self.cycle[minute_index, cells].tolist()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Bir konum ve gün için saatlik güneş yüksekliği, açık gök aydınlığı ve sıcaklık döngüsünü yazdırır.")
+    parser.add_argument("lat", type=float)
+    parser.add_argument("lon", type=float)
+    parser.add_argument("--date", default="2023-10-28", help="Yerel tarih (YYYY-AA-GG)")
+    parser.add_argument("--utc-offset", type=float, default=UTC_OFFSET_HOURS, help="Yerel saat farkı (saat)")
+    args = parser.parse_args()
+
+    day = datetime.datetime.strptime(args.date, "%Y-%m-%d")
+    half = SOLAR_CELL_DEG / 2  # Tek hücrenin merkezi verilen nokta olur
+    cache = SolarCache(day, 1440, args.lat - half, args.lat + half, args.lon - half, args.lon + half, utc_offset_hours=args.utc_offset)
+    for hour in range(24):
+        minute = hour * 60
+        print(f"{hour:02d}:00  yükseklik {cache.elevation[minute, 0]:6.1f}°  açık gök {cache.lux[minute, 0]:8.0f} lux  "
+              f"sıcaklık döngüsü {cache.cycle[minute, 0]:.2f}")
+    elevation = cache.elevation[:, 0]
+    daylight = np.flatnonzero(elevation > 0)
+    if len(daylight):
+        peak = int(np.argmax(cache.cycle[:, 0]))
+        print(f"Gün doğumu ~{daylight[0] // 60:02d}:{daylight[0] % 60:02d}, gün batımı ~{daylight[-1] // 60:02d}:{daylight[-1] % 60:02d}, "
+              f"öğle {int(np.argmax(elevation)) // 60:02d}:{int(np.argmax(elevation)) % 60:02d}, en sıcak an ~{peak // 60:02d}:{peak % 60:02d}")
@@ -0,0 +1,404 @@
+import argparse
+import json
+import math
+import os
+import struct
+import zlib
+import numpy as np
+
+from columnar_store import SENSOR_COLUMNS
+from dataset_reader import DatasetReader
+
+# --- Saatlik Uzamsal Enterpolasyon Rasterları ---
+# Her saatin ölçümleri sensör başına sürekli bir rastere enterpole edilir. Ölçümler önce
+# raster hücrelerinde ortalanır (aynı noktada bekleyen İKA'nın tekrarları tek örneğe iner),
+# ardından tüm hücre merkezleri için k en yakın örnek bir k-d ağacıyla vektörel olarak
+# bulunur ve ters mesafe ağırlıklandırma (IDW) ya da sıradan kriging uygulanır. Konumlar
+# sensörler arasında ortak olduğundan hücre ataması ve ağaç saat başına bir kez kurulur.
+# En yakın örneğe MAX_DISTANCE_M'den uzak hücreler boş (şeffaf) bırakılır. Çıktı, harita üzerine
+# doğrudan bindirilebilen renkli PNG ve/veya ham değerler için float16 ikili dosyalardır;
+# sınırlar ve renk ölçekleri manifest.json'da tutulur.
+
+METERS_PER_DEGREE = 111_320.0
+RASTER_CELL_DEG = 0.0025  # Raster hücre boyu (derece, ~250 m)
+MAX_DISTANCE_M = 1500.0  # En yakın örneğe bundan uzak hücreler boş kalır
+IDW_NEIGHBORS = 12
+IDW_POWER = 2.0
+KRIGING_NEIGHBORS = 16
+VARIOGRAM_BINS = 12
+VARIOGRAM_MAX_POINTS = 2000  # Deneysel variogram için kullanılan en fazla örnek
+LEAF_SIZE = 32  # k-d ağacı yaprak boyu
+QUERY_CHUNK = 8192  # Tek seferde sorgulanan hücre sayısı
+SCAN_BATCH = 8  # Bir birleştirme turunda sorgu başına taranan en fazla yaprak
+SCALE_PERCENTILES = (2, 98)  # Renk ölçeği tüm saatler için bu yüzdeliklerden alınır
+COLOR_STOPS = [(0.0, (0, 128, 0)), (0.5, (255, 215, 0)), (1.0, (200, 0, 0))]  # yeşil -> sarı -> kırmızı
+OVERLAY_ALPHA = 170
+MANIFEST_FILE = "manifest.json"
+
+
+class KDTree:
+    """2B noktalar için yaprak kovalı k-d ağacı; k en yakın komşu sorgusu vektöreldir.
+
+    Noktalar en geniş eksende medyandan bölünerek LEAF_SIZE'lık yapraklara ayrılır. Sorguda
+    önce tüm sorgular bölme düzlemlerine göre kendi yapraklarına indirilir ve o yaprak
+    taranarak ilk k. mesafe sınırı bulunur; ardından ağaç kökten düzey düzey gezilir ve
+    sınır kutusu sorgunun güncel k. mesafesinden uzak düğümler (alt ağaçlarıyla) budanır.
+    Tüm sorgular aynı düzeyde birlikte işlenir; sorgu başına ziyaret edilen düğüm sayısı
+    O(log n) mertebesindedir.
+    """
+
+    def __init__(self, x, y, leaf_size=LEAF_SIZE):
+        self.x = np.asarray(x, dtype=np.float64)
+        self.y = np.asarray(y, dtype=np.float64)
+        self.leaf_size = leaf_size
+        # Düğüm dizileri; 0 kök, çocuklar ebeveynden sonra eklenir (yaprakta çocuk -1)
+        members = [np.arange(len(self.x))]
+        left, right, axis, split, leaf = [-1], [-1], [0], [0.0], [-1]
+        boxes = []
+        leaves = []
+        node = 0
+        while node < len(members) and len(self.x):
+            idx = members[node]
+            xs, ys = self.x[idx], self.y[idx]
+            boxes.append((xs.min(), xs.max(), ys.min(), ys.max()))
+            if len(idx) <= leaf_size:
+                leaf[node] = len(leaves)
+                leaves.append(idx)
+            else:
+                axis[node] = 0 if np.ptp(xs) >= np.ptp(ys) else 1
+                coord = xs if axis[node] == 0 else ys
+                mid = len(idx) // 2
+                part = np.argpartition(coord, mid)
+                split[node] = float(coord[part[mid]])  # Sağ yarının en küçüğü
+                for child, half in ((left, part[:mid]), (right, part[mid:])):
+                    child[node] = len(members)
+                    members.append(idx[half])
+                    left.append(-1), right.append(-1), axis.append(0), split.append(0.0), leaf.append(-1)
+            members[node] = None
+            node += 1
+        boxes = np.array(boxes, dtype=np.float64).reshape(-1, 4)
+        self.lo_x, self.hi_x, self.lo_y, self.hi_y = boxes.T
+        self.left, self.right = np.array(left), np.array(right)
+        self.axis, self.split, self.leaf = np.array(axis), np.array(split), np.array(leaf)
+        self.leaf_points = np.full((len(leaves), leaf_size), -1, dtype=np.int64)
+        for i, idx in enumerate(leaves):
+            self.leaf_points[i, :len(idx)] = idx
+
+    def __len__(self):
+        return len(self.x)
+
+    def query(self, qx, qy, k):
+        """Her sorgu noktası için k en yakın noktanın (mesafe, indeks) dizilerini döndürür (artan sırada)"""
+        qx = np.asarray(qx, dtype=np.float64)
+        qy = np.asarray(qy, dtype=np.float64)
+        k = min(k, len(self))
+        dist = np.empty((len(qx), k))
+        index = np.empty((len(qx), k), dtype=np.int64)
+        for lo in range(0, len(qx), QUERY_CHUNK):
+            hi = min(lo + QUERY_CHUNK, len(qx))
+            dist[lo:hi], index[lo:hi] = self._query_chunk(qx[lo:hi], qy[lo:hi], k)
+        return dist, index
+
+    def _scan(self, best_d2, best_index, queries, leaves, qx, qy, k):
+        """Sorgu-yaprak çiftlerindeki noktaları sorguların mevcut k en iyisiyle birleştirir"""
+        order = np.argsort(queries, kind="stable")
+        queries, leaves = queries[order], leaves[order]
+        starts = np.flatnonzero(np.r_[True, queries[1:] != queries[:-1]])
+        rank = np.arange(len(queries)) - np.repeat(starts, np.diff(np.r_[starts, len(queries)]))
+        # Aynı turda bir sorguya düşen yaprak sayısı sınırlanır (bellek sorgu x SCAN_BATCH x yaprak boyu)
+        for first in range(0, int(rank.max()) + 1, SCAN_BATCH):
+            pick = (rank >= first) & (rank < first + SCAN_BATCH)
+            q, points, r = queries[pick], self.leaf_points[leaves[pick]], rank[pick] - first
+            d2 = (self.x[points] - qx[q, None]) ** 2 + (self.y[points] - qy[q, None]) ** 2
+            d2[points < 0] = np.inf
+            unique_q, group = np.unique(q, return_inverse=True)
+            width = k + (int(r.max()) + 1) * self.leaf_size
+            cand_d2 = np.full((len(unique_q), width), np.inf)
+            cand_index = np.full((len(unique_q), width), -1, dtype=np.int64)
+            cand_d2[:, :k], cand_index[:, :k] = best_d2[unique_q], best_index[unique_q]
+            columns = k + r[:, None] * self.leaf_size + np.arange(self.leaf_size)
+            cand_d2[group[:, None], columns] = d2
+            cand_index[group[:, None], columns] = points
+            keep = np.argpartition(cand_d2, k - 1, axis=1)[:, :k]
+            best_d2[unique_q] = np.take_along_axis(cand_d2, keep, axis=1)
+            best_index[unique_q] = np.take_along_axis(cand_index, keep, axis=1)
+
+    def _query_chunk(self, qx, qy, k):
+        n = len(qx)
+        best_d2 = np.full((n, k), np.inf)
+        best_index = np.full((n, k), -1, dtype=np.int64)
+        queries = np.arange(n)
+        # 1) Her sorgu bölme düzlemlerini izleyerek kendi yaprağına iner; ilk sınır o yapraktan gelir
+        home = np.zeros(n, dtype=np.int64)
+        inner = self.leaf[home] < 0
+        while inner.any():
+            nodes = home[inner]
+            coord = np.where(self.axis[nodes] == 0, qx[inner], qy[inner])
+            home[inner] = np.where(coord < self.split[nodes], self.left[nodes], self.right[nodes])
+            inner = self.leaf[home] < 0
+        self._scan(best_d2, best_index, queries, self.leaf[home], qx, qy, k)
+        # 2) Kökten düzey düzey gezinti; kutusu k. mesafeden uzak düğümler budanır
+        bound = best_d2.max(axis=1)
+        pair_q, pair_node = queries, np.zeros(n, dtype=np.int64)
+        while len(pair_q):
+            dx = np.maximum(0.0, np.maximum(self.lo_x[pair_node] - qx[pair_q], qx[pair_q] - self.hi_x[pair_node]))
+            dy = np.maximum(0.0, np.maximum(self.lo_y[pair_node] - qy[pair_q], qy[pair_q] - self.hi_y[pair_node]))
+            near = dx * dx + dy * dy < bound[pair_q]
+            pair_q, pair_node = pair_q[near], pair_node[near]
+            is_leaf = self.leaf[pair_node] >= 0
+            visit = is_leaf & (pair_node != home[pair_q])  # Kendi yaprağı zaten tarandı
+            if visit.any():
+                self._scan(best_d2, best_index, pair_q[visit], self.leaf[pair_node[visit]], qx, qy, k)
+                bound = best_d2.max(axis=1)
+            pair_q, pair_node = pair_q[~is_leaf], pair_node[~is_leaf]
+            pair_q = np.concatenate([pair_q, pair_q])
+            pair_node = np.concatenate([self.left[pair_node], self.right[pair_node]])
+        order = np.argsort(best_d2, axis=1)
+        return np.sqrt(np.take_along_axis(best_d2, order, axis=1)), np.take_along_axis(best_index, order, axis=1)
+
+
+class RasterGrid:
+    """Enlem/boylam sınırları üzerinde düzgün raster; satırlar kuzeyden güneye sıralıdır"""
+
+    def __init__(self, lat_min, lon_min, lat_max, lon_max, cell_deg=RASTER_CELL_DEG):
+        self.cell_deg = cell_deg
+        self.width = max(1, int(math.ceil((lon_max - lon_min) / cell_deg)))
+        self.height = max(1, int(math.ceil((lat_max - lat_min) / cell_deg)))
+        self.lat_min, self.lon_min = lat_min, lon_min
+        self.lat_max = lat_min + self.height * cell_deg
+        self.lon_max = lon_min + self.width * cell_deg
+        self.cos_lat = math.cos(math.radians((lat_min + lat_max) / 2))
+        center_lat = self.lat_max - (np.arange(self.height) + 0.5) * cell_deg
+        center_lon = lon_min + (np.arange(self.width) + 0.5) * cell_deg
+        grid_lat, grid_lon = np.meshgrid(center_lat, center_lon, indexing="ij")
+        self.cell_x, self.cell_y = self.project(grid_lat.ravel(), grid_lon.ravel())
+
+    @property
+    def bounds(self):
+        """Leaflet imageOverlay biçiminde [[güney, batı], [kuzey, doğu]]"""
+        return [[self.lat_min, self.lon_min], [self.lat_max, self.lon_max]]
+
+    def project(self, lat, lon):
+        """Enlem/boylamı raster köşesine göre metre cinsinden (x, y) düzlemine çevirir"""
+        x = (np.asarray(lon, dtype=np.float64) - self.lon_min) * METERS_PER_DEGREE * self.cos_lat
+        y = (np.asarray(lat, dtype=np.float64) - self.lat_min) * METERS_PER_DEGREE
+        return x, y
+
+
+class SampleCells:
+    """Bir saatin ölçümlerinin raster hücrelerine dağılımı, k-d ağacı ve raster hücrelerinin komşuları.
+
+    Konumlar saatin tüm sensörlerinde aynı olduğundan hücre ataması, ağaç ve her raster
+    hücresinin k en yakın örneği saat başına bir kez hesaplanır; her sensör yalnızca hücre
+    ortalamasını ve ağırlıklı toplamı hesaplar.
+    """
+
+    def __init__(self, grid, lat, lon):
+        self.grid = grid
+        self._neighbors = {}
+        lat, lon = np.asarray(lat, dtype=np.float64), np.asarray(lon, dtype=np.float64)
+        self.valid = np.isfinite(lat) & np.isfinite(lon)
+        row = np.clip(((grid.lat_max - lat[self.valid]) // grid.cell_deg).astype(np.int64), 0, grid.height - 1)
+        col = np.clip(((lon[self.valid] - grid.lon_min) // grid.cell_deg).astype(np.int64), 0, grid.width - 1)
+        self.cells = row * grid.width + col
+        self.size = grid.width * grid.height
+        self.counts = np.bincount(self.cells, minlength=self.size)
+        self.seen = self.counts > 0
+        x, y = grid.project(self._mean(lat[self.valid]), self._mean(lon[self.valid]))
+        self.tree = KDTree(x, y)
+
+    def _mean(self, values):
+        return np.bincount(self.cells, weights=values, minlength=self.size)[self.seen] / self.counts[self.seen]
+
+    def neighbors(self, k):
+        """Raster hücre merkezlerinin k en yakın örneği (mesafe, indeks); k başına bir kez sorgulanır"""
+        if k not in self._neighbors:
+            self._neighbors[k] = self.tree.query(self.grid.cell_x, self.grid.cell_y, k)
+        return self._neighbors[k]
+
+    def means(self, values):
+        """Sensör değerlerinin hücre ortalamaları; eksik (NaN) değer varsa None (ayrı ağaç gerekir)"""
+        values = np.asarray(values, dtype=np.float64)[self.valid]
+        return self._mean(values) if np.isfinite(values).all() else None
+
+
+# --- Enterpolasyon ---
+def idw(tree, values, dist, index, power=IDW_POWER, max_distance_m=MAX_DISTANCE_M):
+    """Ters mesafe ağırlıklandırma; dist/index hücrelerin k en yakın örneğidir (KDTree.query).
+
+    En yakın örneği max_distance_m'den uzak hücreler NaN.
+    """
+    weights = 1.0 / np.maximum(dist, 1.0) ** power  # 1 m altı mesafeler kırpılır (sıfıra bölme yok)
+    result = (weights * values[index]).sum(axis=1) / weights.sum(axis=1)
+    result[dist[:, 0] > max_distance_m] = np.nan
+    return result
+
+
+def fit_variogram(x, y, values):
+    """Üstel variogram (nugget, kısmi eşik, menzil) parametrelerini deneysel variogramdan uydurur"""
+    if len(values) > VARIOGRAM_MAX_POINTS:
+        pick = np.random.default_rng(0).choice(len(values), VARIOGRAM_MAX_POINTS, replace=False)
+        x, y, values = x[pick], y[pick], values[pick]
+    i, j = np.triu_indices(len(values), k=1)
+    h = np.hypot(x[i] - x[j], y[i] - y[j])
+    gamma = 0.5 * (values[i] - values[j]) ** 2
+    variance = float(np.var(values))
+    if len(h) == 0 or h.max() == 0 or variance == 0:
+        return 0.0, max(variance, 1e-12), 1.0
+    edges = np.linspace(0, h.max() / 2, VARIOGRAM_BINS + 1)
+    bins = np.digitize(h, edges) - 1
+    inside = bins < VARIOGRAM_BINS
+    counts = np.bincount(bins[inside], minlength=VARIOGRAM_BINS)
+    used = counts > 0
+    lag = (np.bincount(bins[inside], weights=h[inside], minlength=VARIOGRAM_BINS)[used] / counts[used])
+    semivariance = (np.bincount(bins[inside], weights=gamma[inside], minlength=VARIOGRAM_BINS)[used] / counts[used])
+    best = (np.inf, 0.0, variance, edges[-1])
+    # Verilen menzil için nugget ve kısmi eşik doğrusal en küçük kareler ile bulunur
+    for range_m in np.linspace(edges[1], edges[-1] * 2, 24):
+        basis = np.column_stack([np.ones(len(lag)), 1 - np.exp(-3 * lag / range_m)])
+        coef = np.linalg.lstsq(basis * counts[used, None] ** 0.5, semivariance * counts[used] ** 0.5, rcond=None)[0]
+        nugget, partial_sill = max(coef[0], 0.0), max(coef[1], 1e-12)
+        error = float((counts[used] * (basis @ [nugget, partial_sill] - semivariance) ** 2).sum())
+        if error < best[0]:
+            best = (error, nugget, partial_sill, range_m)
+    return best[1], best[2], best[3]
+
+
+def ordinary_kriging(tree, values, all_dist, all_index, max_distance_m=MAX_DISTANCE_M):
+    """Yerel komşuluklu sıradan kriging; all_dist/all_index hücrelerin k en yakın örneğidir (KDTree.query).
+
+    Tüm hücrelerin denklem sistemleri parçalar halinde toplu çözülür.
+    """
+    nugget, partial_sill, range_m = fit_variogram(tree.x, tree.y, values)
+    sill = nugget + partial_sill
+
+    def covariance(h):
+        return np.where(h == 0, sill, partial_sill * np.exp(-3 * h / range_m))
+
+    k = all_index.shape[1]
+    result = np.empty(len(all_index))
+    for lo in range(0, len(all_index), QUERY_CHUNK):
+        hi = min(lo + QUERY_CHUNK, len(all_index))
+        dist, index = all_dist[lo:hi], all_index[lo:hi]
+        px, py = tree.x[index], tree.y[index]
+        system = np.ones((hi - lo, k + 1, k + 1))
+        system[:, :k, :k] = covariance(np.hypot(px[:, :, None] - px[:, None, :], py[:, :, None] - py[:, None, :]))
+        system[:, :k, :k] += np.eye(k) * sill * 1e-9  # Sayısal kararlılık için küçük ek
+        system[:, k, k] = 0.0
+        rhs = np.ones((hi - lo, k + 1, 1))
+        rhs[:, :k, 0] = covariance(dist)
+        weights = np.linalg.solve(system, rhs)[:, :k, 0]
+        estimate = (weights * values[index]).sum(axis=1)
+        estimate[dist[:, 0] > max_distance_m] = np.nan
+        result[lo:hi] = estimate
+    return result
+
+
+INTERPOLATORS = {"idw": idw, "kriging": ordinary_kriging}
+NEIGHBORS = {"idw": IDW_NEIGHBORS, "kriging": KRIGING_NEIGHBORS}
+
+
+def interpolate(grid, lat, lon, values, method="idw", samples=None):
+    """Tek bir saat/sensör için (height, width) boyutlu raster döndürür; boş hücreler NaN.
+
+    samples aynı saatin SampleCells nesnesiyse hücre ataması, ağaç ve komşu listeleri yeniden
+    hesaplanmaz.
+    """
+    if samples is None:
+        samples = SampleCells(grid, lat, lon)
+    cell_values = samples.means(values)
+    if cell_values is None:  # Sensörde eksik değer var: yalnızca değeri olan ölçümlerle kurulur
+        finite = np.isfinite(np.asarray(values, dtype=np.float64))
+        samples = SampleCells(grid, np.asarray(lat)[finite], np.asarray(lon)[finite])
+        cell_values = samples.means(np.asarray(values, dtype=np.float64)[finite])
+    if len(cell_values) == 0:
+        return np.full((grid.height, grid.width), np.nan)
+    dist, index = samples.neighbors(NEIGHBORS[method])
+    return INTERPOLATORS[method](samples.tree, cell_values, dist, index).reshape(grid.height, grid.width)
+
+
+# --- Dışa aktarma ---
+def colorize(raster, vmin, vmax):
+    """Rasterı renk ölçeğiyle RGBA (uint8) görüntüye çevirir; NaN hücreler şeffaf"""
+    level = np.clip((raster - vmin) / (vmax - vmin), 0, 1) if vmax > vmin else np.zeros(raster.shape)
+    stops = np.array([s for s, _ in COLOR_STOPS])
+    colors = np.array([c for _, c in COLOR_STOPS], dtype=np.float64)
+    rgba = np.zeros(raster.shape + (4,), dtype=np.uint8)
+    filled = np.isfinite(raster)
+    for channel in range(3):
+        rgba[..., channel] = np.round(np.interp(np.nan_to_num(level), stops, colors[:, channel]))
+    rgba[..., 3] = np.where(filled, OVERLAY_ALPHA, 0)
+    return rgba
+
+
+def write_png(path, rgba):
+    """RGBA uint8 diziyi (yalnızca standart kütüphaneyle) PNG olarak yazar"""
+    height, width, _ = rgba.shape
+    raw = np.zeros((height, width * 4 + 1), dtype=np.uint8)  # Her satırın başında filtre baytı (0)
+    raw[:, 1:] = rgba.reshape(height, width * 4)
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xFFFFFFFF)
+
+    with open(path, "wb") as f:
+        f.write(b"\x89PNG\r\n\x1a\n")
+        f.write(chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+        f.write(chunk(b"IDAT", zlib.compress(raw.tobytes(), 9)))
+        f.write(chunk(b"IEND", b""))
+
+
+def sensor_dir_name(sensor):
+    return sensor.replace("/", "_").replace(".", "_")
+
+
+def export_rasters(store_dir, out_dir, sensors=None, method="idw", cell_deg=RASTER_CELL_DEG, formats=("png",)):
+    """Depodaki her saat ve sensör için raster üretir; manifest sözlüğünü döndürür"""
+    reader = DatasetReader(store_dir)
+    lat_min, lon_min, lat_max, lon_max = reader.meta["bounds"]
+    grid = RasterGrid(lat_min, lon_min, lat_max, lon_max, cell_deg)
+    sensors = sensors or SENSOR_COLUMNS
+    manifest = {
+        "city": reader.meta["city"], "start_time": reader.meta["start_time"], "method": method,
+        "bounds": grid.bounds, "width": grid.width, "height": grid.height, "cell_deg": cell_deg,
+        "row_order": "north_to_south", "sensors": {},
+    }
+    for sensor in sensors:
+        column = reader.column(sensor)
+        vmin, vmax = (float(v) for v in np.nanpercentile(column, SCALE_PERCENTILES)) if len(column) else (0.0, 1.0)
+        os.makedirs(os.path.join(out_dir, sensor_dir_name(sensor)), exist_ok=True)
+        manifest["sensors"][sensor] = {"min": vmin, "max": vmax, "hours": {}}
+    for hour in range(reader.hours):
+        lat, lon = reader.column("Latitude", hour), reader.column("Longitude", hour)
+        samples = SampleCells(grid, lat, lon)  # Saatin tüm sensörleri aynı ağacı kullanır
+        for sensor in sensors:
+            scale = manifest["sensors"][sensor]
+            raster = interpolate(grid, lat, lon, reader.column(sensor, hour), method, samples)
+            folder = sensor_dir_name(sensor)
+            files = {}
+            if "png" in formats:
+                files["png"] = f"{folder}/h{hour:02d}.png"
+                write_png(os.path.join(out_dir, files["png"]), colorize(raster, scale["min"], scale["max"]))
+            if "f16" in formats:
+                files["f16"] = f"{folder}/h{hour:02d}.f16"
+                raster.astype("<f2").tofile(os.path.join(out_dir, files["f16"]))
+            scale["hours"][str(hour)] = files
+        print(f"Saat {hour:02d}: {len(sensors)} sensör rasterı yazıldı ({grid.width}x{grid.height}, {len(samples.tree)} örnek hücre).")
+    with open(os.path.join(out_dir, MANIFEST_FILE), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sütunlu depodan saat ve sensör başına enterpolasyon rasterları üretir.")
+    parser.add_argument("store_dir", help="columnar_store.py ile oluşturulan depo")
+    parser.add_argument("out_dir")
+    parser.add_argument("--sensor", action="append", choices=SENSOR_COLUMNS, help="Sensör (tekrarlanabilir; varsayılan: tümü)")
+    parser.add_argument("--method", choices=sorted(INTERPOLATORS), default="idw")
+    parser.add_argument("--cell-deg", type=float, default=RASTER_CELL_DEG, help="Raster hücre boyu (derece)")
+    parser.add_argument("--format", choices=["png", "f16", "both"], default="png",
+                        help="png: renkli bindirme, f16: ham float16 değerler (satırlar kuzeyden güneye)")
+    args = parser.parse_args()
+
+    formats = ("png", "f16") if args.format == "both" else (args.format,)
+    manifest = export_rasters(args.store_dir, args.out_dir, args.sensor, args.method, args.cell_deg, formats)
+    print(f"Manifest '{os.path.join(args.out_dir, MANIFEST_FILE)}' yazıldı: {len(manifest['sensors'])} sensör.")
@@ -99,7 +99,8 @@ const AppContent = () => {
     setSelectedMinute,
     error,
     usingDemoData,
-    selectedCity
+    selectedCity,
+    citySettings
   } = useData();
   
   const [activeSensors, setActiveSensors] = useState([]);
@@ -130,7 +131,7 @@ const AppContent = () => {
   };
 
   // Yükleme mesajını şehre göre ayarla
-  const loadingMessage = `${selectedCity === 'ankara' ? 'Ankara' : 'Aydın'} sensör verileri yükleniyor...`;
+  const loadingMessage = `${citySettings[selectedCity].name} sensör verileri yükleniyor...`;
 
   if (error) {
     return (
@@ -195,7 +196,7 @@ const AppContent = () => {
                 fontSize: isMobile ? '0.8rem' : 'inherit'
               }}
             >
-              {isMobile ? 'Demo veriler gösteriliyor' : `Gerçek veri yüklenemedi. Demo veriler ile heatmap oluşturuldu! ${selectedCity === 'ankara' ? 'Ankara' : 'Aydın'} için rastgele oluşturulmuş veri gösteriliyor.`}
+              {isMobile ? 'Demo veriler gösteriliyor' : `Gerçek veri yüklenemedi. Demo veriler ile heatmap oluşturuldu! ${citySettings[selectedCity].name} için rastgele oluşturulmuş veri gösteriliyor.`}
             </Alert>
           </Snackbar>
         </>
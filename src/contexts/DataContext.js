@@ -36,6 +36,27 @@ const CITY_SETTINGS = {
   }
 };
 
+// build_datasets.py'nin yazdığı veri seti manifesti (yollar, sınırlar, sütunlar, istatistikler)
+const DATASET_MANIFEST_URL = '/data/manifest.json';
+
+// Manifestteki şehirleri ayarlara işle: veri seti yolu manifestten alınır,
+// elle tanımlanmış merkez ve sınırlar korunur, yeni şehirler manifestteki sınırlarla eklenir
+const applyDatasetManifest = (manifest) => {
+  Object.entries(manifest.cities || {}).forEach(([cityKey, entry]) => {
+    if (!entry.datasetPath || !entry.bounds) return;
+    const { name, center, bounds, minLat, maxLat, minLng, maxLng, datasetPath, sidecars, columns, rows } = entry;
+    CITY_SETTINGS[cityKey] = {
+      name, center, bounds, minLat, maxLat, minLng, maxLng,
+      ...CITY_SETTINGS[cityKey],
+      datasetPath,
+      fallbackDatasetPath: null, // Manifestteki dosya üretilmiş olduğundan yedek dosya denenmez
+      sidecars,
+      columns,
+      rows
+    };
+  });
+};
+
 // Dünya sınırları (geçerli koordinat aralıkları)
 const VALID_MIN_LAT = -90;
 const VALID_MAX_LAT = 90;
@@ -111,11 +132,28 @@ export const DataProvider = ({ children }) => {
   const [error, setError] = useState(null);
   const [usingDemoData, setUsingDemoData] = useState(false);
   const [selectedCity, setSelectedCity] = useState('ankara'); // Varsayılan şehir: Ankara
+  const [manifestChecked, setManifestChecked] = useState(false);
+
+  // Veri seti manifestini bir kez oku; yoksa sabit ayarlar kullanılır
+  useEffect(() => {
+    fetch(DATASET_MANIFEST_URL)
+      .then(response => (response.ok ? response.json() : null))
+      .then(manifest => {
+        if (manifest) {
+          applyDatasetManifest(manifest);
+          console.log(`Veri seti manifesti yüklendi: ${Object.keys(manifest.cities || {}).join(', ')}`);
+        }
+      })
+      .catch(err => console.log("Veri seti manifesti okunamadı, sabit ayarlar kullanılıyor:", err.message))
+      .finally(() => setManifestChecked(true));
+  }, []);
 
   // Şehir değiştiğinde verileri yeniden yükle
   useEffect(() => {
-    loadData();
-  }, [selectedCity]);
+    if (manifestChecked) {
+      loadData();
+    }
+  }, [selectedCity, manifestChecked]);
 
   // Load data on mount
     const loadData = async () => {
@@ -136,9 +174,9 @@ export const DataProvider = ({ children }) => {
           // Try to use the fallback dataset if the primary one isn't available
           console.log("Veri seti bulunamadı, alternatif dosyayı deniyoruz...");
           const fallbackCsvUrl = CITY_SETTINGS[selectedCity].fallbackDatasetPath;
-          const fallbackResponse = await fetch(fallbackCsvUrl);
+          const fallbackResponse = fallbackCsvUrl ? await fetch(fallbackCsvUrl) : null;
           
-          if (!fallbackResponse.ok) {
+          if (!fallbackResponse || !fallbackResponse.ok) {
             throw new Error(`CSV alınamadı: ${response.status} ${response.statusText}`);
           }
           
@@ -0,0 +1,182 @@
+import argparse
+import glob
+import os
+import re
+import numpy as np
+
+# --- Arazi Yüksekliği (Sayısal Yükseklik Modeli) ---
+# Altitude_m, İKA'nın konumundaki zemin yüksekliği + sensörün zeminden yüksekliği olarak
+# hesaplanır. Yükseklik modeli (DEM) diskte kalır: dosyalar bellek eşlemeli (memmap) açılır,
+# her dakika tüm filonun konumları tek seferde çift doğrusal (bilinear) aradeğerlemeyle
+# örneklenir ve yalnızca dokunulan sayfalar okunur; büyük rasterler RAM'e yüklenmez.
+# Desteklenen biçimler (GDAL gerektirmez):
+#   - SRTM .hgt karoları (N39E032.hgt gibi; 1°x1°, big-endian int16, 1" veya 3")
+#   - ESRI ikili ızgara: .flt (float32) + aynı adlı .hdr başlık dosyası
+# Bir klasör verilirse içindeki tüm .hgt/.flt dosyaları birlikte kullanılır. Boşluk (void)
+# hücreler aradeğerlemeye katılmaz; hiçbir geçerli komşusu olmayan veya model dışında kalan
+# konumlar için NaN döner ve üretici İKA'nın önceki yüksekliğini korur.
+
+HGT_VOID = -32768
+HGT_NAME = re.compile(r"^([NS])(\d{2})([EW])(\d{3})\.hgt$", re.IGNORECASE)
+HEIGHT_ABOVE_GROUND_M = 1.5  # Varsayılan sensör yüksekliği (m)
+
+
+class RasterTile:
+    """Tek bir bellek eşlemeli raster; örnek noktaları düzenli enlem/boylam ızgarasındadır"""
+
+    def __init__(self, path, data, lat0, lon0, dlat, dlon, nodata):
+        self.path = path
+        self.data = data  # (satır, sütun); satır 0 kuzey kenarıdır
+        self.lat0 = lat0  # İlk satırdaki örneklerin enlemi
+        self.lon0 = lon0  # İlk sütundaki örneklerin boylamı
+        self.dlat = dlat
+        self.dlon = dlon
+        self.nodata = nodata
+        rows, cols = data.shape
+        self.bounds = (lat0 - (rows - 1) * dlat, lon0, lat0, lon0 + (cols - 1) * dlon)  # (güney, batı, kuzey, doğu)
+
+    def sample(self, lats, lons):
+        """Karonun içindeki noktalar için (maske, değerler) döndürür; geçerli komşusu olmayanlar NaN"""
+        rows = (self.lat0 - lats) / self.dlat
+        cols = (lons - self.lon0) / self.dlon
+        n_rows, n_cols = self.data.shape
+        inside = (rows >= 0) & (rows <= n_rows - 1) & (cols >= 0) & (cols <= n_cols - 1)
+        if not inside.any():
+            return inside, None
+        r, c = rows[inside], cols[inside]
+        r0 = np.minimum(r.astype(np.intp), n_rows - 2)
+        c0 = np.minimum(c.astype(np.intp), n_cols - 2)
+        fr, fc = (r - r0)[:, None], (c - c0)[:, None]
+        corners = self.data[r0[:, None] + [0, 0, 1, 1], c0[:, None] + [0, 1, 0, 1]].astype(np.float64)
+        weights = np.hstack([(1 - fr) * (1 - fc), (1 - fr) * fc, fr * (1 - fc), fr * fc])
+        valid = np.isfinite(corners) if self.nodata is None else np.isfinite(corners) & (corners != self.nodata)
+        weights = np.where(valid, weights, 0.0)
+        total = weights.sum(axis=1)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            values = np.where(total > 0, (weights * np.where(valid, corners, 0.0)).sum(axis=1) / total, np.nan)
+        return inside, values
+
+
+def open_hgt(path):
+    """SRTM .hgt karosunu açar; karo köşesi dosya adından, çözünürlük dosya boyutundan bulunur"""
+    match = HGT_NAME.match(os.path.basename(path))
+    if not match:
+        raise ValueError(f"'{path}': .hgt dosya adı N39E032.hgt biçiminde olmalı")
+    lat = int(match.group(2)) * (1 if match.group(1).upper() == "N" else -1)
+    lon = int(match.group(4)) * (1 if match.group(3).upper() == "E" else -1)
+    size = int(round((os.path.getsize(path) / 2) ** 0.5))
+    if size * size * 2 != os.path.getsize(path) or size < 2:
+        raise ValueError(f"'{path}': kare bir int16 ızgara değil")
+    data = np.memmap(path, dtype=">i2", mode="r", shape=(size, size))
+    step = 1.0 / (size - 1)
+    return RasterTile(path, data, lat + 1.0, lon, step, step, HGT_VOID)
+
+
+def read_hdr(path):
+    """ESRI .hdr başlığını (anahtar değer satırları) küçük harfli sözlük olarak okur"""
+    header = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2:
+                header[parts[0].lower()] = parts[1]
+    return header
+
+
+def open_flt(path):
+    """ESRI ikili ızgarasını (.flt + .hdr) açar; hücre köşesi veya merkezi referanslı olabilir"""
+    header = read_hdr(os.path.splitext(path)[0] + ".hdr")
+    n_rows, n_cols = int(header["nrows"]), int(header["ncols"])
+    cell = float(header["cellsize"])
+    if "xllcenter" in header:
+        lon0, lat_bottom = float(header["xllcenter"]), float(header["yllcenter"])
+    else:
+        lon0, lat_bottom = float(header["xllcorner"]) + cell / 2, float(header["yllcorner"]) + cell / 2
+    byte_order = ">" if header.get("byteorder", "lsbfirst").lower() in ("msbfirst", "m") else "<"
+    data = np.memmap(path, dtype=byte_order + "f4", mode="r", shape=(n_rows, n_cols))
+    nodata = float(header["nodata_value"]) if "nodata_value" in header else None
+    return RasterTile(path, data, lat_bottom + (n_rows - 1) * cell, lon0, cell, cell, nodata)
+
+
+def dem_files(path):
+    """Dosya ya da klasör yolundan .hgt/.flt dosyalarının sıralı listesi"""
+    if os.path.isdir(path):
+        files = glob.glob(os.path.join(path, "*.hgt")) + glob.glob(os.path.join(path, "*.HGT")) + glob.glob(os.path.join(path, "*.flt"))
+        return sorted(set(files))
+    return [path]
+
+
+def dem_fingerprint(path):
+    """Çıktı önbelleği anahtarı için DEM dosyalarının ad, boyut ve değişiklik zamanı özeti"""
+    return [(os.path.basename(f), os.path.getsize(f), int(os.path.getmtime(f))) for f in dem_files(path)]
+
+
+class ElevationModel:
+    """Bir veya daha çok rasterden oluşan zemin yüksekliği modeli"""
+
+    def __init__(self, path):
+        self.tiles = []
+        for f in dem_files(path):
+            self.tiles.append(open_hgt(f) if f.lower().endswith(".hgt") else open_flt(f))
+        if not self.tiles:
+            raise ValueError(f"'{path}' içinde .hgt veya .flt dosyası bulunamadı")
+
+    def sample(self, lats, lons):
+        """Zemin yüksekliği (m); model dışındaki veya boşluktaki noktalar NaN"""
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        heights = np.full(lats.shape, np.nan)
+        if not len(lats):
+            return heights
+        lat_min, lat_max, lon_min, lon_max = lats.min(), lats.max(), lons.min(), lons.max()
+        for tile in self.tiles:
+            south, west, north, east = tile.bounds
+            if lat_max < south or lat_min > north or lon_max < west or lon_min > east:
+                continue
+            pending = np.isnan(heights)  # Karo kenarlarında ilk geçerli değer kullanılır
+            inside, values = tile.sample(lats[pending], lons[pending])
+            if values is not None:
+                index = np.flatnonzero(pending)[inside]
+                heights[index] = values
+            if not np.isnan(heights).any():
+                break
+        return heights
+
+    def apply(self, ika_states, height_above_ground=HEIGHT_ABOVE_GROUND_M):
+        """İKA yüksekliklerini zemin + sensör yüksekliği yapar; model dışında kalanlar değişmez. Kapsanan İKA sayısını döndürür"""
+        ground = self.sample([ika["lat"] for ika in ika_states], [ika["lon"] for ika in ika_states])
+        covered = 0
+        for ika, height in zip(ika_states, ground):
+            if height == height:  # NaN değil
+                ika["alt"] = float(height) + height_above_ground
+                covered += 1
+        return covered
+
+    def bounds(self):
+        """Tüm karoların kapsadığı (güney, batı, kuzey, doğu) kutusu"""
+        boxes = np.array([tile.bounds for tile in self.tiles])
+        return float(boxes[:, 0].min()), float(boxes[:, 1].min()), float(boxes[:, 2].max()), float(boxes[:, 3].max())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sayısal yükseklik modelini (SRTM .hgt / ESRI .flt) inceler ve örnekler.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    info = sub.add_parser("info", help="Karoları ve kapsanan alanı listeler")
+    info.add_argument("dem", help=".hgt/.flt dosyası veya bunları içeren klasör")
+    sample = sub.add_parser("sample", help="Verilen noktalardaki zemin yüksekliğini yazdırır")
+    sample.add_argument("dem", help=".hgt/.flt dosyası veya bunları içeren klasör")
+    sample.add_argument("points", nargs="+", help="enlem,boylam çiftleri (örn. 39.9208,32.8541)")
+    args = parser.parse_args()
+
+    model = ElevationModel(args.dem)
+    if args.command == "info":
+        for tile in model.tiles:
+            south, west, north, east = tile.bounds
+            print(f"{os.path.basename(tile.path)}: {tile.data.shape[0]}x{tile.data.shape[1]} örnek, "
+                  f"enlem {south:.4f}..{north:.4f}, boylam {west:.4f}..{east:.4f}, adım {tile.dlat * 3600:.2f}\"")
+        print("Toplam kapsama (güney, batı, kuzey, doğu):", tuple(round(v, 4) for v in model.bounds()))
+    else:
+        points = [tuple(float(v) for v in p.split(",")) for p in args.points]
+        heights = model.sample([p[0] for p in points], [p[1] for p in points])
+        for (lat, lon), height in zip(points, heights):
+            print(f"{lat:.6f},{lon:.6f}: " + (f"{height:.1f} m" if height == height else "kapsam dışı"))
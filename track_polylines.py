@@ -0,0 +1,127 @@
+import argparse
+import json
+import numpy as np
+
+from columnar_store import TIMESTAMP_FORMAT
+from trajectory_codec import recorder_from_csv, simplify_indices
+
+# --- Gösterge Paneli İçin İKA İz Çizgileri ---
+# Her İKA'nın güzergahı Google "encoded polyline" biçiminde tek bir dizgiye, güzergah
+# noktalarına denk gelen dakikalar da aynı kodlamayla ikinci bir dizgiye yazılır.
+# Şehir başına tek bir JSON dosyası oluşur; Play kipinde tüm veri setini İKA'ya göre
+# gruplamak yerine bu dosya çözülüp doğrudan çizilebilir.
+
+POLYLINE_PRECISION = 5  # Google polyline standardı (~1 m)
+
+
+def _encode_deltas(deltas):
+    """Tamsayı farklarını Google polyline karakterlerine çevirir"""
+    deltas = np.asarray(deltas, dtype=np.int64)
+    if len(deltas) == 0:
+        return ""
+    zz = np.where(deltas < 0, ~(deltas << 1), deltas << 1).astype(np.uint64)
+    # 5 bitlik parçalar; son parça dışında her birine 0x20 devam biti eklenir, sonra +63
+    nchunks = np.ones(len(zz), dtype=np.int64)
+    for k in range(1, 13):
+        nchunks += zz >= np.uint64(1 << (5 * k))
+    starts = np.concatenate([[0], np.cumsum(nchunks)[:-1]])
+    out = np.zeros(int(nchunks.sum()), dtype=np.uint8)
+    for k in range(int(nchunks.max())):
+        mask = nchunks > k
+        chunk = (zz[mask] >> np.uint64(5 * k)) & np.uint64(0x1F)
+        more = (nchunks[mask] > k + 1).astype(np.uint64) << np.uint64(5)
+        out[starts[mask] + k] = (chunk | more).astype(np.uint8) + 63
+    return out.tobytes().decode("ascii")
+
+
+def _decode_deltas(text):
+    """Google polyline karakterlerini tamsayı farklarına çevirir"""
+    raw = np.frombuffer(text.encode("ascii"), dtype=np.uint8).astype(np.int64) - 63
+    ends = np.flatnonzero((raw & 0x20) == 0)
+    starts = np.concatenate([[0], ends[:-1] + 1]) if len(ends) else np.zeros(0, dtype=np.int64)
+    lengths = ends - starts + 1
+    zz = np.zeros(len(ends), dtype=np.int64)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        mask = lengths > k
+        zz[mask] |= (raw[starts[mask] + k] & 0x1F) << (5 * k)
+    return np.where(zz & 1, ~(zz >> 1), zz >> 1)
+
+
+def encode_polyline_values(values, precision=0):
+    """Tek boyutlu sayı dizisini (örn. dakikalar) polyline dizgisine çevirir"""
+    ints = np.round(np.asarray(values, dtype=np.float64) * (10 ** precision)).astype(np.int64)
+    return _encode_deltas(np.diff(ints, prepend=0))
+
+
+def decode_polyline_values(text, precision=0):
+    """encode_polyline_values ile kodlanmış dizgiyi sayı dizisine geri çevirir"""
+    return np.cumsum(_decode_deltas(text)) / (10 ** precision)
+
+
+def encode_polyline(lat, lon, precision=POLYLINE_PRECISION):
+    """Enlem/boylam dizilerini standart Google polyline dizgisine çevirir"""
+    scaled = np.round(np.column_stack([lat, lon]) * (10 ** precision)).astype(np.int64)
+    # Enlem ve boylam farkları ayrı ayrı alınıp (enlem, boylam) sırasıyla yazılır
+    return _encode_deltas(np.diff(scaled, axis=0, prepend=0).ravel())
+
+
+def decode_polyline(text, precision=POLYLINE_PRECISION):
+    """Google polyline dizgisini (enlemler, boylamlar) dizilerine çevirir"""
+    coords = np.cumsum(_decode_deltas(text).reshape(-1, 2), axis=0) / (10 ** precision)
+    return coords[:, 0], coords[:, 1]
+
+
+def build_track(minutes, lat, lon, tolerance_m=0.0):
+    """Tek İKA için durağan dakikaları atıp (isteğe bağlı basitleştirip) kodlanmış iz üretir"""
+    minutes = np.asarray(minutes, dtype=np.int64)
+    lat = np.asarray(lat, dtype=np.float64)
+    lon = np.asarray(lon, dtype=np.float64)
+    scale = 10 ** POLYLINE_PRECISION
+    moved = np.ones(len(minutes), dtype=bool)
+    if len(minutes) > 1:
+        # Aynı noktada beklenen dakikalar çizgiye katkı yapmaz; ilk ve son nokta hep kalır
+        moved[1:] = (np.round(lat[1:] * scale) != np.round(lat[:-1] * scale)) | \
+                    (np.round(lon[1:] * scale) != np.round(lon[:-1] * scale))
+        # Bekleyişin son dakikası da kalır; yoksa hareketin başlangıç zamanı bekleyişin başına kayar
+        moved[:-1] |= moved[1:]
+        moved[-1] = True
+    minutes, lat, lon = minutes[moved], lat[moved], lon[moved]
+    if tolerance_m > 0 and len(minutes) > 2:
+        keep = simplify_indices(minutes, lat, lon, tolerance_m)
+        minutes, lat, lon = minutes[keep], lat[keep], lon[keep]
+    return {
+        "points": int(len(minutes)),
+        "polyline": encode_polyline(lat, lon),
+        "minutes": encode_polyline_values(minutes),
+    }
+
+
+def write_track_polylines(recorder, path, city, tolerance_m=0.0):
+    """TrajectoryRecorder içeriğini şehir başına tek bir JSON iz dosyasına yazar"""
+    tracks = {}
+    for ika_id in sorted(recorder.tracks):
+        minutes, lat, lon = recorder.arrays(ika_id)
+        tracks[ika_id] = build_track(minutes, lat, lon, tolerance_m)
+    document = {
+        "city": city,
+        "start_time": recorder.start_time.strftime(TIMESTAMP_FORMAT),
+        "precision": POLYLINE_PRECISION,
+        "encoding": "google-polyline",
+        "tracks": tracks,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(document, f, ensure_ascii=False, separators=(",", ":"))
+    return sum(t["points"] for t in tracks.values())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üretilmiş CSV'den İKA başına kodlanmış iz çizgisi dosyası oluşturur.")
+    parser.add_argument("csv_path")
+    parser.add_argument("out_path")
+    parser.add_argument("--city", required=True)
+    parser.add_argument("--tolerance-m", type=float, default=0.0, help="Douglas-Peucker toleransı (0: basitleştirme yok)")
+    args = parser.parse_args()
+
+    rec = recorder_from_csv(args.csv_path)
+    points = write_track_polylines(rec, args.out_path, args.city, tolerance_m=args.tolerance_m)
+    print(f"{len(rec.tracks)} İKA için toplam {points} noktalı iz çizgileri '{args.out_path}' dosyasına yazıldı.")
@@ -0,0 +1,232 @@
+import argparse
+import csv
+import datetime
+import json
+import math
+import struct
+import zlib
+import numpy as np
+
+from columnar_store import canonical_column_name, TIMESTAMP_FORMAT
+
+# --- Sıkıştırılmış Güzergah Gösterimi ---
+# İKA konumları 1e-6 derece sabit noktalı tamsayılara çevrilir, ardışık farkları alınır
+# ve zigzag + varint ile kodlanır. "dp" kipinde ise önce zaman senkronlu Douglas-Peucker
+# ile basitleştirilir: yalnızca köşe noktaları dakikalarıyla birlikte saklanır, çözücü
+# aradaki dakikaları doğrusal enterpolasyonla geri üretir.
+
+SIDECAR_MAGIC = b"IKTRJ1"
+FIXED_POINT_SCALE = 1_000_000  # 6 ondalık basamak, CSV ile aynı hassasiyet
+METERS_PER_DEGREE = 111_320.0
+MODES = ("delta", "dp")
+
+
+# --- Varint yardımcıları ---
+def zigzag_encode(values):
+    values = np.asarray(values, dtype=np.int64)
+    return ((values << 1) ^ (values >> 63)).astype(np.uint64)
+
+
+def zigzag_decode(values):
+    values = np.asarray(values, dtype=np.uint64)
+    return ((values >> np.uint64(1)).astype(np.int64)) ^ -((values & np.uint64(1)).astype(np.int64))
+
+
+def varint_encode(values):
+    """İşaretsiz tamsayı dizisini vektörel olarak LEB128 varint baytlarına çevirir"""
+    values = np.asarray(values, dtype=np.uint64)
+    if len(values) == 0:
+        return b""
+    nbytes = np.ones(len(values), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += values >= np.uint64(1 << (7 * k))
+    starts = np.concatenate([[0], np.cumsum(nbytes)[:-1]])
+    out = np.zeros(int(nbytes.sum()), dtype=np.uint8)
+    for k in range(int(nbytes.max())):
+        mask = nbytes > k
+        chunk = (values[mask] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[mask] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[mask] + k] = (chunk | more).astype(np.uint8)
+    return out.tobytes()
+
+
+def varint_decode(data):
+    """LEB128 varint baytlarını vektörel olarak işaretsiz tamsayı dizisine çevirir"""
+    raw = np.frombuffer(data, dtype=np.uint8)
+    ends = np.flatnonzero((raw & 0x80) == 0)
+    starts = np.concatenate([[0], ends[:-1] + 1]) if len(ends) else np.zeros(0, dtype=np.int64)
+    lengths = ends - starts + 1
+    values = np.zeros(len(ends), dtype=np.uint64)
+    for k in range(int(lengths.max()) if len(lengths) else 0):
+        mask = lengths > k
+        values[mask] |= (raw[starts[mask] + k] & 0x7F).astype(np.uint64) << np.uint64(7 * k)
+    return values
+
+
+# --- Douglas-Peucker (zaman senkronlu) ---
+def simplify_indices(minutes, lat, lon, tolerance_m):
+    """Zaman senkronlu Douglas-Peucker ile tutulacak nokta indekslerini döndürür"""
+    n = len(minutes)
+    if n <= 2:
+        return np.arange(n)
+    cos_lat = math.cos(math.radians(float(np.mean(lat))))
+    x = np.asarray(lon, dtype=np.float64) * cos_lat * METERS_PER_DEGREE
+    y = np.asarray(lat, dtype=np.float64) * METERS_PER_DEGREE
+    t = np.asarray(minutes, dtype=np.float64)
+
+    keep = np.zeros(n, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        inner = slice(first + 1, last)
+        span = t[last] - t[first]
+        ratio = (t[inner] - t[first]) / span if span > 0 else np.zeros(last - first - 1)
+        # Noktanın, aynı dakikada segment üzerinde olması gereken konuma uzaklığı
+        px = x[first] + ratio * (x[last] - x[first])
+        py = y[first] + ratio * (y[last] - y[first])
+        errors = np.hypot(x[inner] - px, y[inner] - py)
+        worst = int(np.argmax(errors))
+        if errors[worst] > tolerance_m:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+
+# --- Kayıt ---
+class TrajectoryRecorder:
+    """Üretim sırasında her İKA'nın dakika başına konumunu biriktirir"""
+
+    def __init__(self, start_time):
+        self.start_time = start_time
+        self.tracks = {}
+
+    def record(self, minute_index, ika_id, lat, lon):
+        track = self.tracks.setdefault(ika_id, ([], [], []))
+        track[0].append(minute_index)
+        track[1].append(int(round(lat * FIXED_POINT_SCALE)))
+        track[2].append(int(round(lon * FIXED_POINT_SCALE)))
+
+    def arrays(self, ika_id):
+        minutes, lat, lon = self.tracks[ika_id]
+        return (np.asarray(minutes, dtype=np.int64),
+                np.asarray(lat, dtype=np.int64) / FIXED_POINT_SCALE,
+                np.asarray(lon, dtype=np.int64) / FIXED_POINT_SCALE)
+
+
+def recorder_from_csv(csv_path):
+    """Üretilmiş CSV dosyasını akış halinde okuyarak bir TrajectoryRecorder doldurur"""
+    recorder = None
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        positions = {canonical_column_name(h): i for i, h in enumerate(next(reader))}
+        for row in reader:
+            if not row:
+                continue
+            timestamp = datetime.datetime.strptime(row[positions["Timestamp"]], TIMESTAMP_FORMAT)
+            if recorder is None:
+                recorder = TrajectoryRecorder(timestamp)
+            minute_index = int((timestamp - recorder.start_time).total_seconds() // 60)
+            recorder.record(minute_index, row[positions["Ika_ID"]],
+                            float(row[positions["Latitude"]]), float(row[positions["Longitude"]]))
+    return recorder
+
+
+# --- Yan dosya yazma/okuma ---
+def write_sidecar(recorder, path, mode="delta", tolerance_m=5.0):
+    """Kaydedilen güzergahları sıkıştırılmış yan dosyaya yazar; (nokta, tutulan nokta) döndürür"""
+    if mode not in MODES:
+        raise ValueError(f"Geçersiz kip: {mode} (seçenekler: {', '.join(MODES)})")
+    body = bytearray()
+    units = sorted(recorder.tracks)
+    total_points = kept_points = 0
+    for ika_id in units:
+        minutes, lat_fp, lon_fp = (np.asarray(a, dtype=np.int64) for a in recorder.tracks[ika_id])
+        total_points += len(minutes)
+        if mode == "dp" and len(minutes) > 2:
+            keep = simplify_indices(minutes, lat_fp / FIXED_POINT_SCALE, lon_fp / FIXED_POINT_SCALE, tolerance_m)
+            minutes, lat_fp, lon_fp = minutes[keep], lat_fp[keep], lon_fp[keep]
+        kept_points += len(minutes)
+        body += varint_encode([len(minutes)])
+        for series in (minutes, lat_fp, lon_fp):
+            deltas = np.diff(series, prepend=0)
+            body += varint_encode(zigzag_encode(deltas))
+
+    header = json.dumps({
+        "mode": mode,
+        "tolerance_m": tolerance_m if mode == "dp" else None,
+        "scale": FIXED_POINT_SCALE,
+        "start_time": recorder.start_time.strftime(TIMESTAMP_FORMAT),
+        "units": units,
+    }, ensure_ascii=False).encode("utf-8")
+    with open(path, "wb") as f:
+        f.write(SIDECAR_MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(zlib.compress(bytes(body), 6))
+    return total_points, kept_points
+
+
+def read_sidecar(path, expand=True):
+    """Yan dosyayı çözer; (başlık, {İKA: (dakikalar, enlemler, boylamlar)}) döndürür.
+
+    expand=True ise "dp" kipinde atlanan dakikalar doğrusal enterpolasyonla doldurulur.
+    """
+    with open(path, "rb") as f:
+        if f.read(len(SIDECAR_MAGIC)) != SIDECAR_MAGIC:
+            raise ValueError(f"'{path}' bir güzergah yan dosyası değil")
+        header_len = struct.unpack("<I", f.read(4))[0]
+        header = json.loads(f.read(header_len).decode("utf-8"))
+        body = zlib.decompress(f.read())
+
+    scale = header["scale"]
+    # Gövde baştan sona tek bir varint dizisidir: [n, n dakika, n enlem, n boylam] x İKA
+    values = varint_decode(body)
+    tracks = {}
+    offset = 0
+    for ika_id in header["units"]:
+        count = int(values[offset])
+        offset += 1
+        series = []
+        for _ in range(3):
+            series.append(np.cumsum(zigzag_decode(values[offset:offset + count])))
+            offset += count
+        minutes, lat, lon = series[0], series[1] / scale, series[2] / scale
+        if expand and header["mode"] == "dp" and count > 1:
+            full = np.arange(minutes[0], minutes[-1] + 1)
+            lat, lon, minutes = np.interp(full, minutes, lat), np.interp(full, minutes, lon), full
+        tracks[ika_id] = (minutes, lat, lon)
+    return header, tracks
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="İKA güzergahlarını sıkıştırılmış yan dosyaya yazar veya çözer.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    enc = sub.add_parser("encode", help="Üretilmiş CSV'den yan dosya oluştur")
+    enc.add_argument("csv_path")
+    enc.add_argument("out_path")
+    enc.add_argument("--mode", choices=MODES, default="delta")
+    enc.add_argument("--tolerance-m", type=float, default=5.0, help="dp kipinde izin verilen sapma (metre)")
+    dec = sub.add_parser("decode", help="Yan dosyayı CSV'ye aç")
+    dec.add_argument("sidecar_path")
+    dec.add_argument("out_csv")
+    args = parser.parse_args()
+
+    if args.command == "encode":
+        rec = recorder_from_csv(args.csv_path)
+        total, kept = write_sidecar(rec, args.out_path, mode=args.mode, tolerance_m=args.tolerance_m)
+        print(f"{len(rec.tracks)} İKA, {total} nokta -> {kept} nokta '{args.out_path}' dosyasına yazıldı.")
+    else:
+        hdr, trk = read_sidecar(args.sidecar_path)
+        start = datetime.datetime.strptime(hdr["start_time"], TIMESTAMP_FORMAT)
+        with open(args.out_csv, "w", newline="", encoding="utf-8") as out:
+            writer = csv.writer(out)
+            writer.writerow(["Timestamp", "Ika_ID", "Latitude", "Longitude"])
+            for ika_id, (mins, lats, lons) in trk.items():
+                for m, la, lo in zip(mins, lats, lons):
+                    writer.writerow([(start + datetime.timedelta(minutes=int(m))).strftime(TIMESTAMP_FORMAT), ika_id, round(la, 6), round(lo, 6)])
+        print(f"{len(trk)} İKA güzergahı '{args.out_csv}' dosyasına açıldı.")
@@ -0,0 +1,267 @@
+import argparse
+import csv
+import datetime
+import json
+import math
+import os
+import sys
+
+from columnar_store import canonical_column_name, SENSOR_COLUMNS, TIMESTAMP_FORMAT
+
+# --- Akış Halinde Veri Seti Doğrulama ---
+# Üretilmiş bir veri setini tek geçişte okur; bellekte yalnızca İKA başına son kayıt
+# tutulur. Şema, değer aralıkları, şehir sınırı, zaman damgası sırası ve İKA başına
+# dakika sürekliliği denetlenir. İsteğe bağlı olarak başlıklar standart adlara
+# çevrilmiş bir kopya yazılır; böylece sonraki yükleyiciler sütun tahmini yapmaz.
+
+REQUIRED_COLUMNS = ["Timestamp", "Ika_ID", "Latitude", "Longitude", "Altitude_m", "Target_Location"] + SENSOR_COLUMNS
+OPTIONAL_COLUMNS = ["Kamera_Analizi"]
+OPTIONAL_PREFIXES = ("AQI_",)  # aqi_stream.py "columns" kipinde eklenen sütunlar
+MAX_SAMPLES = 5  # Her bulgu türü için raporlanan örnek satır sayısı
+MAX_STEP_DEG = 0.04  # Bir dakikada izin verilen en büyük konum değişimi (dış çevre yolu adımı ~0.03)
+EXPECTED_STEP_MINUTES = 1
+
+# Tüm şehirler için fiziksel olarak anlamlı aralıklar (anomali çarpanları dahil)
+RANGE_RULES = {
+    "PM2.5_ug_m3": (0, 1000), "PM10_ug_m3": (0, 1200), "CO_ppm": (0, 60), "NO2_ppb": (0, 600),
+    "SO2_ppb": (0, 300), "O3_ppb": (0, 700), "VOC_ppb": (0, 3500),
+    "Temperature_C": (-40, 60), "Relative_Humidity_Percent": (0, 100), "Sound_Level_dB": (0, 140),
+    "Light_Level_lux": (0, 150000), "Vibration_g": (0, 10),
+    "Magnetic_Field_X_uT": (-400, 400), "Magnetic_Field_Y_uT": (-400, 400), "Magnetic_Field_Z_uT": (-400, 400),
+    "Radiation_uSv_h": (0, 5),
+}
+
+# DEM_PATH ile üretilen veride Altitude_m gerçek arazi yüksekliğidir; şehir bantları (rastgele
+# yürüyüş sınırları) yerine yeryüzündeki fiziksel aralık denetlenir
+TERRAIN_ALTITUDE_RANGE = (-450, 9000)
+
+# Üreticilerdeki şehir sınırları ve model aralıkları
+CITY_RULES = {
+    "istanbul": {
+        "bbox": (40.80, 28.20, 41.30, 29.65),
+        "ranges": {"Relative_Humidity_Percent": (30, 95), "Altitude_m": (10, 250)},
+    },
+    "ankara": {
+        "circle": (39.9208, 32.8541, 0.10),
+        "ranges": {"Relative_Humidity_Percent": (20, 85), "Altitude_m": (950, 1100)},
+    },
+    "aydin": {
+        "circle": (37.8560, 27.8416, 0.1),
+        "ranges": {"Relative_Humidity_Percent": (30, 90), "Altitude_m": (40, 120)},
+    },
+}
+
+
+class Finding:
+    """Aynı türdeki bulguları sayar ve ilk birkaç örneği saklar"""
+
+    def __init__(self, severity, message):
+        self.severity = severity
+        self.message = message
+        self.count = 0
+        self.samples = []
+
+    def add(self, line_number, detail):
+        self.count += 1
+        if len(self.samples) < MAX_SAMPLES:
+            self.samples.append({"line": line_number, "detail": detail})
+
+
+class StreamingValidator:
+    """Satırları tek tek alıp sınırlı bellekle doğrulayan denetleyici"""
+
+    def __init__(self, header, city=None, terrain=False):
+        self.raw_header = header
+        self.header = [canonical_column_name(h) for h in header]
+        self.positions = {name: i for i, name in enumerate(self.header)}
+        self.city = city
+        self.rules = CITY_RULES.get(city, {})
+        self.ranges = dict(RANGE_RULES)
+        self.ranges.update(self.rules.get("ranges", {}))
+        if terrain:
+            self.ranges["Altitude_m"] = TERRAIN_ALTITUDE_RANGE
+        self.findings = {}
+        self.rows = 0
+        self.last_timestamp = None
+        self.unit_state = {}  # İKA -> (dakika, enlem, boylam)
+        self.start_time = None
+        self.end_time = None
+        self.bounds = [float("inf"), float("inf"), float("-inf"), float("-inf")]
+        self.sums = {c: [0, 0.0, float("inf"), float("-inf")] for c in SENSOR_COLUMNS if c in self.positions}
+        self._check_schema()
+
+    def _finding(self, key, severity, message):
+        if key not in self.findings:
+            self.findings[key] = Finding(severity, message)
+        return self.findings[key]
+
+    def _check_schema(self):
+        missing = [c for c in REQUIRED_COLUMNS if c not in self.positions]
+        unknown = [c for c in self.header if c not in REQUIRED_COLUMNS and c not in OPTIONAL_COLUMNS
+                   and not c.startswith(OPTIONAL_PREFIXES)]
+        if missing:
+            self._finding("schema_missing", "error", "Zorunlu sütunlar eksik").add(1, missing)
+        if unknown:
+            self._finding("schema_unknown", "warning", "Tanınmayan sütunlar").add(1, unknown)
+        renamed = {raw: canon for raw, canon in zip(self.raw_header, self.header) if raw.strip() != canon}
+        if renamed:
+            self._finding("schema_aliases", "info", "Standart olmayan sütun adları (normalize edilebilir)").add(1, renamed)
+
+    def _in_boundary(self, lat, lon):
+        if "circle" in self.rules:
+            center_lat, center_lon, radius = self.rules["circle"]
+            dlon = (lon - center_lon) * math.cos(math.radians(center_lat))
+            # Yuvarlama payı: CSV'de 6 ondalık basamak yazılıyor
+            return math.sqrt((lat - center_lat) ** 2 + dlon ** 2) <= radius + 1e-6
+        if "bbox" in self.rules:
+            min_lat, min_lon, max_lat, max_lon = self.rules["bbox"]
+            return min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+        return True
+
+    def feed(self, line_number, row):
+        """Tek bir veri satırını doğrular"""
+        self.rows += 1
+        if len(row) != len(self.header):
+            self._finding("row_length", "error", f"Satır uzunluğu başlıkla uyuşmuyor ({len(self.header)} sütun bekleniyor)").add(line_number, len(row))
+
+        pos = self.positions
+        try:
+            timestamp = datetime.datetime.strptime(row[pos["Timestamp"]], TIMESTAMP_FORMAT)
+        except (KeyError, IndexError, ValueError):
+            self._finding("timestamp_invalid", "error", "Geçersiz zaman damgası").add(line_number, row[pos["Timestamp"]] if "Timestamp" in pos and pos["Timestamp"] < len(row) else None)
+            return
+        if self.start_time is None:
+            self.start_time = timestamp
+        if self.last_timestamp is not None and timestamp < self.last_timestamp:
+            self._finding("timestamp_order", "error", "Zaman damgaları monoton artmıyor").add(line_number, row[pos["Timestamp"]])
+        self.last_timestamp = timestamp
+        self.end_time = max(self.end_time or timestamp, timestamp)
+        minute = int((timestamp - self.start_time).total_seconds() // 60)
+
+        try:
+            lat = float(row[pos["Latitude"]])
+            lon = float(row[pos["Longitude"]])
+        except (KeyError, IndexError, ValueError):
+            self._finding("coordinate_invalid", "error", "Geçersiz koordinat").add(line_number, None)
+            return
+        self.bounds = [min(self.bounds[0], lat), min(self.bounds[1], lon), max(self.bounds[2], lat), max(self.bounds[3], lon)]
+        if not self._in_boundary(lat, lon):
+            self._finding("boundary", "error", "Koordinat şehir sınırı dışında").add(line_number, [lat, lon])
+
+        unit_id = row[pos["Ika_ID"]] if "Ika_ID" in pos else None
+        previous = self.unit_state.get(unit_id)
+        if previous is not None:
+            step = minute - previous[0]
+            if step == 0:
+                self._finding("unit_duplicate", "error", "Aynı İKA için aynı dakikada birden fazla kayıt").add(line_number, unit_id)
+            elif step != EXPECTED_STEP_MINUTES:
+                self._finding("unit_gap", "error", "İKA kayıtlarında dakika boşluğu").add(line_number, [unit_id, step])
+            if max(abs(lat - previous[1]), abs(lon - previous[2])) > MAX_STEP_DEG:
+                self._finding("unit_jump", "warning", f"Bir dakikada {MAX_STEP_DEG} dereceden büyük sıçrama").add(line_number, unit_id)
+        self.unit_state[unit_id] = (minute, lat, lon)
+
+        for column, (low, high) in self.ranges.items():
+            idx = pos.get(column)
+            if idx is None or idx >= len(row):
+                continue
+            try:
+                value = float(row[idx])
+            except ValueError:
+                self._finding(f"value_invalid:{column}", "error", f"{column} sayısal değil").add(line_number, row[idx])
+                continue
+            if not low <= value <= high:
+                self._finding(f"range:{column}", "warning", f"{column} [{low}, {high}] aralığı dışında").add(line_number, value)
+            stats = self.sums.get(column)
+            if stats is not None:
+                stats[0] += 1
+                stats[1] += value
+                stats[2] = min(stats[2], value)
+                stats[3] = max(stats[3], value)
+
+    def report(self):
+        """Doğrulama özetini sözlük olarak döndürür"""
+        errors = sum(f.count for f in self.findings.values() if f.severity == "error")
+        return {
+            "city": self.city,
+            "rows": self.rows,
+            "units": len(self.unit_state),
+            "columns": self.header,
+            "start_time": self.start_time.strftime(TIMESTAMP_FORMAT) if self.start_time else None,
+            "end_time": self.end_time.strftime(TIMESTAMP_FORMAT) if self.end_time else None,
+            "bounds": self.bounds if self.rows else None,
+            "stats": {c: {"count": s[0], "mean": round(s[1] / s[0], 4), "min": s[2], "max": s[3]}
+                      for c, s in self.sums.items() if s[0]},
+            "valid": errors == 0,
+            "findings": {key: {"severity": f.severity, "message": f.message, "count": f.count, "samples": f.samples}
+                         for key, f in self.findings.items()},
+        }
+
+
+def guess_city(path):
+    """Dosya adından şehir anahtarını tahmin eder"""
+    name = os.path.basename(path).lower()
+    for city in CITY_RULES:
+        if name.startswith(city):
+            return city
+    return None
+
+
+def validate_csv(csv_path, city=None, normalize_path=None, terrain=False):
+    """CSV dosyasını akış halinde doğrular; normalize_path verilirse standart başlıklı kopya yazar.
+
+    terrain: veri DEM_PATH ile (arazi yüksekliğinden) üretildiyse şehir yükseklik bandı uygulanmaz.
+    """
+    city = city or guess_city(csv_path)
+    out = None
+    with open(csv_path, newline="", encoding="utf-8") as csvfile:
+        reader = csv.reader(csvfile)
+        validator = StreamingValidator(next(reader), city=city, terrain=terrain)
+        writer = None
+        if normalize_path:
+            out = open(normalize_path, "w", newline="", encoding="utf-8")
+            writer = csv.writer(out)
+            writer.writerow(validator.header)
+        width = len(validator.header)
+        try:
+            for line_number, row in enumerate(reader, start=2):
+                if not row:
+                    continue
+                validator.feed(line_number, row)
+                if writer:
+                    # Eksik sondaki alanlar boş bırakılır (örn. yazılmayan Kamera_Analizi)
+                    writer.writerow(row[:width] + [""] * (width - len(row)))
+        finally:
+            if out:
+                out.close()
+    return validator.report()
+
+
+def print_report(path, report):
+    status = "GEÇERLİ" if report["valid"] else "HATALI"
+    print(f"{path}: {status} - {report['rows']} satır, {report['units']} İKA, şehir: {report['city']}")
+    for key, finding in report["findings"].items():
+        print(f"  [{finding['severity']}] {finding['message']}: {finding['count']} kez")
+        for sample in finding["samples"]:
+            print(f"      satır {sample['line']}: {sample['detail']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Üretilmiş veri setlerini tek geçişte, sınırlı bellekle doğrular.")
+    parser.add_argument("csv_paths", nargs="+")
+    parser.add_argument("--city", choices=sorted(CITY_RULES), help="Şehir kuralları (varsayılan: dosya adından)")
+    parser.add_argument("--normalize", help="Standart başlıklı kopyanın yazılacağı dosya (tek girişte) veya klasör")
+    parser.add_argument("--json", help="Raporların JSON olarak yazılacağı dosya")
+    parser.add_argument("--terrain", action="store_true", help="Veri DEM_PATH ile üretildi; yükseklik şehir bandı yerine fiziksel aralıkla denetlenir")
+    args = parser.parse_args()
+
+    reports = {}
+    for path in args.csv_paths:
+        normalize_path = None
+        if args.normalize:
+            normalize_path = os.path.join(args.normalize, os.path.basename(path)) if os.path.isdir(args.normalize) else args.normalize
+        reports[path] = validate_csv(path, city=args.city, normalize_path=normalize_path, terrain=args.terrain)
+        print_report(path, reports[path])
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(reports, f, ensure_ascii=False, indent=2)
+    sys.exit(0 if all(r["valid"] for r in reports.values()) else 1)